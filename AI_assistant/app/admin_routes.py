@@ -0,0 +1,60 @@
+import logging
+import os
+import secrets
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.db.connection import engine
+from app.utils.bulk_io import BULK_CHUNK_ROWS, MEDIA_TYPES, export_table, import_table
+
+logger = logging.getLogger("ai_assistant")
+
+# Admin routes answer 404 unless this is set; callers send it as X-Admin-Token.
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN")
+
+Table = Literal["chat_sessions", "messages"]
+Format = Literal["ndjson", "csv"]
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin token")
+
+
+admin_router: APIRouter = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@admin_router.get("/conversations/{table}/export")
+async def export_conversations(
+    table: Table,
+    format: Format = "ndjson",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    include_archive: bool = False,
+):
+    """Streams the table as NDJSON or CSV; the body is never held in memory."""
+    logger.info(f"Admin export of {table} as {format} (since={since}, until={until})")
+    return StreamingResponse(
+        export_table(engine, table, format, since, until, include_archive),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{format}"'},
+    )
+
+
+@admin_router.post("/conversations/{table}/import")
+async def import_conversations(
+    table: Table,
+    request: Request,
+    format: Format = "ndjson",
+    chunk_rows: int = Query(BULK_CHUNK_ROWS, ge=1, le=100_000),
+):
+    """Loads an NDJSON or CSV request body (as produced by export) in chunked transactions."""
+    try:
+        return await import_table(engine, table, request.stream(), format, chunk_rows)
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Invalid {format} input: {e}")
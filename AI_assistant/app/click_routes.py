@@ -0,0 +1,35 @@
+import logging
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import RedirectResponse
+
+from app.db.connection import engine
+from app.utils.click_buffer import AffiliateResolver, ClickBuffer, safe_destination
+
+logger = logging.getLogger("ai_assistant")
+
+click_router: APIRouter = APIRouter()
+
+affiliate_resolver = AffiliateResolver(engine)
+click_buffer = ClickBuffer(engine)
+
+
+@click_router.get("/click")
+async def track_click(
+    url: str = Query(..., min_length=1, description="Partner URL to send the user to"),
+    user_id: Optional[UUID] = None,
+):
+    """
+    Records the click and redirects straight away; the click reaches the database with the
+    next batch flush. Only absolute http(s) URLs under a known partner_url are accepted, and
+    the redirect goes to the URL rebuilt from its parsed parts, never to the raw string.
+    """
+    destination = safe_destination(url)
+    affiliate_id = await affiliate_resolver.resolve(destination) if destination else None
+    if affiliate_id is None:
+        logger.debug(f"Click on unknown or unsafe partner URL: {url!r}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown partner URL")
+    click_buffer.record(affiliate_id, destination, user_id)
+    return RedirectResponse(destination, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
@@ -0,0 +1,50 @@
+import logging
+from typing import Dict, List, Tuple
+from uuid import UUID
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.models.affiliate import Affiliate, AffiliateClick
+
+logger = logging.getLogger("ai_assistant")
+
+affiliates = Affiliate.__table__
+clicks = AffiliateClick.__table__
+
+CLICK_COLUMNS = ("id", "user_id", "affiliate_id", "destination_url", "clicked_at")
+
+
+async def get_partner_urls(conn: AsyncConnection) -> List[Tuple[UUID, str]]:
+    """(affiliate_id, partner_url) for every affiliate with a partner URL."""
+    result = await conn.execute(select(affiliates.c.id, affiliates.c.partner_url).where(affiliates.c.partner_url.is_not(None)))
+    return [(row.id, row.partner_url) for row in result]
+
+
+async def insert_clicks(conn: AsyncConnection, rows: List[Dict]) -> int:
+    """
+    Writes a batch of clicks in one round trip (plus a staging step on Postgres). Clicks whose
+    user does not exist are kept without the user; clicks of a deleted affiliate are dropped.
+    """
+    if conn.dialect.name != "postgresql":
+        result = await conn.execute(insert(clicks), rows)
+        return result.rowcount
+
+    await conn.exec_driver_sql(
+        'CREATE TEMP TABLE IF NOT EXISTS "_affiliate_clicks_stage" (LIKE "affiliate_clicks") ON COMMIT DELETE ROWS'
+    )
+    driver = (await conn.get_raw_connection()).driver_connection
+    await driver.copy_records_to_table(
+        "_affiliate_clicks_stage",
+        records=[tuple(row[name] for name in CLICK_COLUMNS) for row in rows],
+        columns=list(CLICK_COLUMNS),
+    )
+    result = await conn.execute(text("""
+        INSERT INTO "affiliate_clicks" ("id", "user_id", "affiliate_id", "destination_url", "clicked_at")
+        SELECT s."id", u."id", s."affiliate_id", s."destination_url", s."clicked_at"
+        FROM "_affiliate_clicks_stage" s
+        JOIN "affiliates" a ON a."id" = s."affiliate_id"
+        LEFT JOIN "users" u ON u."id" = s."user_id"
+        ON CONFLICT DO NOTHING
+    """))
+    return result.rowcount
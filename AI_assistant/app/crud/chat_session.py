@@ -39,6 +39,22 @@ async def get_all_chat_sessions(db: AsyncSession, limit: int = 100, offset: int
     logger.info(f"Fetched {len(sessions)} chat sessions (limit={limit}, offset={offset})")
     return sessions
 
+def _chat_session_rows(limit: int, offset: int):
+    columns = ChatSession.__table__.c
+    return (
+        select(columns.user_id, columns.session_type, columns.id, columns.started_at, columns.ended_at)
+        .offset(offset).limit(limit)
+    )
+
+async def stream_chat_session_rows(db: AsyncSession, limit: int, offset: int, chunk_rows: int):
+    """
+    Same page as get_all_chat_sessions, as plain rows of the ChatSessionOut columns, yielded
+    in chunks of `chunk_rows` read through a server-side cursor.
+    """
+    result = await db.stream(_chat_session_rows(limit, offset).execution_options(yield_per=chunk_rows))
+    async for rows in result.partitions(chunk_rows):
+        yield rows
+
 # UPDATE
 async def update_chat_session(db: AsyncSession, session_id: UUID, update_data: dict) -> Optional[ChatSession]:
     await db.execute(
@@ -0,0 +1,199 @@
+# app/crud/history.py
+"""
+ORM-free reads for the per-turn hot paths (memory, summarization, message listing).
+
+Statements are SQLAlchemy Core selects over the `messages` table that project only the
+columns the caller needs, built once at import time. Rows come back as NamedTuples, so
+no ORM identity map, attribute instrumentation or relationship loaders are involved.
+
+`messages` is range-partitioned by month (data/migrations/0001). Every read of it is bounded
+below by the session's `started_at`, which lets Postgres prune partitions older than the
+session. A trigger (data/migrations/0005) moves `started_at` back whenever a message older than
+it is written (imports, clock skew), so the bound never hides a row. Once the archival job has set a session's `archived_at`, its older messages live in
+`messages_archive` while a resumed session keeps writing to `messages`, so reads of such a
+session merge both tables. For other sessions the archive branch is skipped by a one-time filter.
+
+AI messages keep their structured response in `payload` with `message` left NULL; callers
+render text from the row when they need it (`HistoryTurn.text()` / `.compact()`).
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, NamedTuple, Optional
+from uuid import UUID
+
+from sqlalchemy import Integer, bindparam, exists, func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.chat_session import ChatSession
+from app.models.message import Message, MessageArchive
+from app.utils.compact_response import compact_response
+from app.utils.format_json_as_text import render_message
+
+logger = logging.getLogger("ai_assistant")
+
+messages = Message.__table__
+archive = MessageArchive.__table__
+sessions = ChatSession.__table__
+
+
+class HistoryTurn(NamedTuple):
+    sender: str
+    message: Optional[str]
+    timestamp: Optional[datetime]
+    payload: Optional[dict] = None
+
+    def text(self) -> str:
+        """Full text, as shown to the user."""
+        return render_message(self.message, self.payload)
+
+    def compact(self) -> str:
+        """Short form for prompt context: saved text as-is, structured responses compacted."""
+        return self.message if self.message is not None else compact_response(self.payload)
+
+
+class Exchange(NamedTuple):
+    """A user question and the AI reply to it; `id` is the reply's message id."""
+    id: UUID
+    session_id: UUID
+    timestamp: Optional[datetime]
+    question: str
+    answer: Optional[str]
+    payload: Optional[dict] = None
+
+    def text(self) -> str:
+        """Question and compacted answer, as indexed and quoted by long-term memory."""
+        answer = self.answer if self.answer is not None else compact_response(self.payload)
+        return f"User: {self.question}\nAI: {answer}"
+
+
+class MessageRow(NamedTuple):
+    """Same fields as MessageOut, plus session_id and timestamp."""
+    id: UUID
+    session_id: UUID
+    sender: str
+    message: Optional[str]
+    response_to: Optional[UUID]
+    timestamp: Optional[datetime]
+    payload: Optional[dict] = None
+
+
+def _session_rows(table, *columns):
+    return select(*columns).where(table.c.session_id == bindparam("session_id"))
+
+
+# True only for sessions the archival job has touched; Postgres evaluates it once per statement.
+_session_archived = exists().where(sessions.c.id == bindparam("session_id"), sessions.c.archived_at.is_not(None))
+
+
+# Lower time bound for partition pruning; evaluated once per statement (an InitPlan in Postgres).
+_session_started_at = func.coalesce(
+    select(sessions.c.started_at).where(sessions.c.id == bindparam("session_id")).scalar_subquery(),
+    literal(datetime(1970, 1, 1, tzinfo=timezone.utc), messages.c.timestamp.type),
+)
+
+
+def _merged(hot, archived):
+    """Hot rows since the session started plus, for archived sessions, the archived ones, as a subquery."""
+    hot = hot.where(messages.c.timestamp >= _session_started_at)
+    return union_all(select(hot.subquery()), select(archived.where(_session_archived).subquery())).subquery()
+
+
+def _turn_columns(table):
+    return table.c.sender, table.c.message, table.c.timestamp, table.c.payload
+
+
+def _message_columns(table):
+    return table.c.id, table.c.session_id, table.c.sender, table.c.message, table.c.response_to, table.c.timestamp, table.c.payload
+
+
+def _recent(table):
+    return _session_rows(table, *_turn_columns(table)).order_by(table.c.timestamp.desc()).limit(bindparam("limit", type_=Integer))
+
+
+def _chronological(table):
+    return _session_rows(table, *_turn_columns(table)).order_by(table.c.timestamp.asc())
+
+
+_recent_turns_merged = _merged(_recent(messages), _recent(archive))
+_recent_turns = (
+    select(_recent_turns_merged)
+    .order_by(_recent_turns_merged.c.timestamp.desc())
+    .limit(bindparam("limit", type_=Integer))
+)
+
+_all_turns_merged = _merged(_chronological(messages), _chronological(archive))
+_all_turns = select(_all_turns_merged).order_by(_all_turns_merged.c.timestamp.asc())
+
+_message_count = select(func.count()).select_from(
+    _merged(_session_rows(messages, messages.c.id), _session_rows(archive, archive.c.id))
+)
+
+_session_messages_merged = _merged(
+    _session_rows(messages, *_message_columns(messages)), _session_rows(archive, *_message_columns(archive))
+)
+_session_messages = select(_session_messages_merged).order_by(_session_messages_merged.c.timestamp.asc())
+
+
+def _exchanges(table):
+    reply, question = table.alias("reply"), table.alias("question")
+    return (
+        select(reply.c.id, reply.c.session_id, reply.c.timestamp, question.c.message, reply.c.message, reply.c.payload)
+        .join(question, question.c.id == reply.c.response_to)
+        .where(reply.c.session_id.in_(select(sessions.c.id).where(sessions.c.user_id == bindparam("user_id"))))
+        .order_by(reply.c.timestamp.desc())
+        .limit(bindparam("limit"))
+        .subquery()
+    )
+
+
+# Each table contributes at most `limit` rows before the newest `limit` of both are kept.
+_user_exchanges_merged = union_all(select(_exchanges(messages)), select(_exchanges(archive))).subquery()
+_user_exchanges = (
+    select(_user_exchanges_merged)
+    .order_by(_user_exchanges_merged.c.timestamp.desc())
+    .limit(bindparam("limit"))
+)
+_session_user = select(sessions.c.user_id).where(sessions.c.id == bindparam("session_id"))
+
+
+async def get_recent_turns(db: AsyncSession, session_id: UUID, limit: int) -> List[HistoryTurn]:
+    """Last `limit` turns of a session, oldest first."""
+    rows = (await db.execute(_recent_turns, {"session_id": session_id, "limit": limit})).all()
+    turns = [HistoryTurn(*row) for row in rows]
+    turns.reverse()
+    return turns
+
+
+async def get_all_turns(db: AsyncSession, session_id: UUID) -> List[HistoryTurn]:
+    """Every turn of a session, oldest first."""
+    rows = (await db.execute(_all_turns, {"session_id": session_id})).all()
+    return [HistoryTurn(*row) for row in rows]
+
+
+async def count_messages(db: AsyncSession, session_id: UUID) -> int:
+    return (await db.execute(_message_count, {"session_id": session_id})).scalar_one()
+
+
+async def get_session_messages(db: AsyncSession, session_id: UUID) -> List[MessageRow]:
+    rows = (await db.execute(_session_messages, {"session_id": session_id})).all()
+    return [MessageRow(*row) for row in rows]
+
+
+async def stream_session_messages(db: AsyncSession, session_id: UUID, chunk_rows: int) -> AsyncIterator[List[MessageRow]]:
+    """get_session_messages in chunks of `chunk_rows`, read through a server-side cursor."""
+    result = await db.stream(_session_messages.execution_options(yield_per=chunk_rows), {"session_id": session_id})
+    async for rows in result.partitions(chunk_rows):
+        yield [MessageRow(*row) for row in rows]
+
+
+async def get_session_user_id(db: AsyncSession, session_id: UUID) -> Optional[UUID]:
+    return (await db.execute(_session_user, {"session_id": session_id})).scalar_one_or_none()
+
+
+async def get_user_exchanges(db: AsyncSession, user_id: UUID, limit: int) -> List[Exchange]:
+    """The user's last `limit` answered questions across all sessions, hot and archived, oldest first."""
+    rows = (await db.execute(_user_exchanges, {"user_id": user_id, "limit": limit})).all()
+    exchanges = [Exchange(*row) for row in rows]
+    exchanges.reverse()
+    return exchanges
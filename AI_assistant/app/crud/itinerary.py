@@ -0,0 +1,48 @@
+import logging
+import uuid
+from datetime import date
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.affiliate import utcnow_naive
+from app.models.trip import Itinerary, Trip
+
+logger = logging.getLogger("ai_assistant")
+
+trips = Trip.__table__
+itineraries = Itinerary.__table__
+
+
+async def create_trip_with_days(
+    db: AsyncSession,
+    user_id: UUID,
+    name: Optional[str],
+    destination: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    days: List[List[str]],
+) -> UUID:
+    """
+    Writes a trip and one itineraries row per day (days[0] is day 1) in one transaction;
+    the day rows go in a single multi-row INSERT. Returns the trip id.
+    """
+    trip_id = uuid.uuid4()
+    now = utcnow_naive()
+    try:
+        await db.execute(insert(trips).values(
+            id=trip_id, user_id=user_id, name=name, destination=destination,
+            start_date=start_date, end_date=end_date, created_at=now, updated_at=now,
+        ))
+        await db.execute(insert(itineraries), [
+            {"id": uuid.uuid4(), "trip_id": trip_id, "day": day, "activities": activities, "created_at": now, "updated_at": now}
+            for day, activities in enumerate(days, start=1)
+        ])
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    logger.info(f"Trip {trip_id} saved with {len(days)} itinerary days")
+    return trip_id
@@ -1,12 +1,17 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.models.message import Message
+from app.models.message import Message, MessageArchive
+from app.crud.history import get_session_messages, stream_session_messages
 from sqlalchemy import update, delete
 from datetime import datetime
 import logging
 
 logger = logging.getLogger("ai_assistant")
 
+# Hot table first; the archival job moves an ended session's rows to messages_archive, where
+# history reads still find them, so lookups by id fall back to it.
+_MESSAGE_TABLES = (Message, MessageArchive)
+
 async def create_message(db: AsyncSession, message: Message):
     if not message.timestamp:
         message.timestamp = datetime.utcnow()
@@ -19,32 +24,41 @@ async def create_message(db: AsyncSession, message: Message):
 
 async def get_message(db: AsyncSession, message_id):
     logger.debug(f"Fetching message with ID: {message_id}")
-    result = await db.execute(select(Message).where(Message.id == message_id))
-    message = result.scalar_one_or_none()
-    if message:
-        logger.info(f"Message fetched with ID: {message_id}")
-    else:
-        logger.warning(f"No message found with ID: {message_id}")
-    return message
+    for model in _MESSAGE_TABLES:
+        result = await db.execute(select(model).where(model.id == message_id))
+        message = result.scalar_one_or_none()
+        if message:
+            logger.info(f"Message fetched with ID: {message_id} from {model.__tablename__}")
+            return message
+    logger.warning(f"No message found with ID: {message_id}")
+    return None
 
 async def get_messages_for_session(db: AsyncSession, session_id):
     logger.debug(f"Fetching messages for session ID: {session_id}")
-    result = await db.execute(select(Message).where(Message.session_id == session_id))
-    messages = result.scalars().all()
+    messages = await get_session_messages(db, session_id)
     logger.info(f"Fetched {len(messages)} messages for session ID: {session_id}")
     return messages
 
+async def stream_messages_for_session(db: AsyncSession, session_id, chunk_rows: int):
+    logger.debug(f"Streaming messages for session ID: {session_id} in chunks of {chunk_rows}")
+    async for rows in stream_session_messages(db, session_id, chunk_rows):
+        yield rows
+
 async def update_message(db: AsyncSession, message_id, updated_fields: dict):
     logger.debug(f"Updating message ID {message_id} with fields: {updated_fields}")
-    query = (
-        update(Message)
-        .where(Message.id == message_id)
-        .values(**updated_fields)
-        .execution_options(synchronize_session="fetch")
-    )
-    result = await db.execute(query)
+    rowcount = 0
+    for model in _MESSAGE_TABLES:
+        query = (
+            update(model)
+            .where(model.id == message_id)
+            .values(**updated_fields)
+            .execution_options(synchronize_session="fetch")
+        )
+        rowcount = (await db.execute(query)).rowcount
+        if rowcount:
+            break
     await db.commit()
-    if result.rowcount:
+    if rowcount:
         logger.info(f"Message ID {message_id} updated successfully")
     else:
         logger.warning(f"Message ID {message_id} update failed or no changes")
@@ -52,10 +66,13 @@ async def update_message(db: AsyncSession, message_id, updated_fields: dict):
 
 async def delete_message(db: AsyncSession, message_id):
     logger.debug(f"Attempting to delete message ID: {message_id}")
-    query = delete(Message).where(Message.id == message_id)
-    result = await db.execute(query)
+    rowcount = 0
+    for model in _MESSAGE_TABLES:
+        rowcount = (await db.execute(delete(model).where(model.id == message_id))).rowcount
+        if rowcount:
+            break
     await db.commit()
-    if result.rowcount > 0:
+    if rowcount > 0:
         logger.info(f"Message ID {message_id} deleted successfully")
         return True
     else:
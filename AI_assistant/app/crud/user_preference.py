@@ -0,0 +1,75 @@
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.chat_session import ChatSession
+from app.models.user import User
+from app.models.user_preference import UserPreference
+
+logger = logging.getLogger("ai_assistant")
+
+sessions = ChatSession.__table__
+preferences = UserPreference.__table__
+users = User.__table__
+
+# One round trip per cold session: the session's user and their preferences (if any).
+_preferences_for_session = (
+    select(sessions.c.user_id, preferences.c.preferences)
+    .select_from(sessions.outerjoin(preferences, preferences.c.user_id == sessions.c.user_id))
+    .where(sessions.c.id == bindparam("session_id"))
+)
+
+
+async def get_preferences_for_session(db: AsyncSession, session_id: UUID) -> Optional[Tuple[UUID, Optional[dict]]]:
+    """Returns (user_id, preferences) for a chat session, or None if the session does not exist."""
+    result = await db.execute(_preferences_for_session, {"session_id": session_id})
+    row = result.first()
+    return (row.user_id, row.preferences) if row else None
+
+
+async def get_user_preferences(db: AsyncSession, user_id: UUID) -> Optional[UserPreference]:
+    result = await db.execute(select(UserPreference).where(UserPreference.user_id == user_id))
+    return result.scalar_one_or_none()
+
+
+def _upsert_statement(dialect: str, user_id: UUID, prefs: dict):
+    """INSERT ... SELECT FROM users ... ON CONFLICT (user_id) DO UPDATE: no row when the user is missing."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    now = datetime.now(timezone.utc)
+    row = select(
+        literal(uuid.uuid4(), preferences.c.id.type),
+        users.c.id,
+        literal(prefs, preferences.c.preferences.type),
+        literal(now, preferences.c.created_at.type),
+        literal(now, preferences.c.updated_at.type),
+    ).where(users.c.id == user_id)
+    statement = insert(preferences).from_select(["id", "user_id", "preferences", "created_at", "updated_at"], row)
+    return statement.on_conflict_do_update(
+        index_elements=[preferences.c.user_id],
+        set_={"preferences": statement.excluded.preferences, "updated_at": statement.excluded.updated_at},
+    ).returning(preferences.c.id)
+
+
+async def upsert_user_preferences(db: AsyncSession, user_id: UUID, prefs: dict) -> Optional[UserPreference]:
+    """
+    Creates or replaces the user's preferences in one statement, so concurrent PUTs cannot race.
+    Returns None if the user does not exist.
+    """
+    saved = (await db.execute(_upsert_statement(db.get_bind().dialect.name, user_id, prefs))).first()
+    await db.commit()
+    if saved is None:
+        logger.warning(f"Preferences not saved: no user {user_id}")
+        return None
+    logger.info(f"Preferences saved for user: {user_id}")
+    result = await db.execute(
+        select(UserPreference).where(UserPreference.user_id == user_id).execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
@@ -0,0 +1,101 @@
+# app/db/migrate.py
+"""
+Applies the SQL migrations in data/migrations on top of data/schema.sql, in file-name order.
+Each file runs in its own transaction and is recorded in "schema_migrations", so re-running
+only applies new files.
+
+    python -m app.db.migrate            # apply pending migrations
+    python -m app.db.migrate --status   # list applied and pending migrations
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from typing import List, Set
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger("ai_assistant")
+
+MIGRATIONS_DIR = os.getenv("MIGRATIONS_DIR", "data/migrations")
+
+
+def asyncpg_dsn(database_url: str) -> str:
+    """asyncpg takes plain postgresql:// URLs, not SQLAlchemy's postgresql+asyncpg://."""
+    return database_url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+
+def migration_files(directory: str = MIGRATIONS_DIR) -> List[str]:
+    return sorted(name for name in os.listdir(directory) if name.endswith(".sql"))
+
+
+async def applied_migrations(conn) -> Set[str]:
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS "schema_migrations" (
+          "version" varchar PRIMARY KEY,
+          "applied_at" timestamp DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    return {row["version"] for row in await conn.fetch('SELECT "version" FROM "schema_migrations"')}
+
+
+async def migrate(database_url: str, directory: str = MIGRATIONS_DIR) -> List[str]:
+    """Applies pending migrations and returns their file names."""
+    import asyncpg
+
+    conn = await asyncpg.connect(asyncpg_dsn(database_url))
+    applied = []
+    try:
+        done = await applied_migrations(conn)
+        for name in migration_files(directory):
+            if name in done:
+                continue
+            with open(os.path.join(directory, name), "r") as f:
+                sql = f.read()
+            logger.info(f"Applying migration {name}")
+            try:
+                async with conn.transaction():
+                    await conn.execute(sql)
+                    await conn.execute('INSERT INTO "schema_migrations" ("version") VALUES ($1)', name)
+            except Exception as e:
+                logger.exception(f"Migration {name} failed")
+                raise
+            applied.append(name)
+    finally:
+        await conn.close()
+    return applied
+
+
+async def status(database_url: str, directory: str = MIGRATIONS_DIR) -> None:
+    import asyncpg
+
+    conn = await asyncpg.connect(asyncpg_dsn(database_url))
+    try:
+        done = await applied_migrations(conn)
+    finally:
+        await conn.close()
+    for name in migration_files(directory):
+        print(f"{'applied' if name in done else 'pending'}  {name}")
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Apply SQL migrations from data/migrations.")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Defaults to $DATABASE_URL.")
+    parser.add_argument("--dir", default=MIGRATIONS_DIR)
+    parser.add_argument("--status", action="store_true", help="Only list applied and pending migrations.")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or $DATABASE_URL is required")
+
+    if args.status:
+        asyncio.run(status(args.database_url, args.dir))
+        return
+    applied = asyncio.run(migrate(args.database_url, args.dir))
+    print(f"Applied {len(applied)} migration(s): {', '.join(applied) or 'none pending'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+# app/jobs/archive_messages.py
+"""
+Moves the messages of ended or idle chat sessions from the partitioned "messages" table
+into "messages_archive", then keeps the monthly partitions in shape (Postgres only):
+creates the upcoming months and drops old partitions that archival has emptied.
+
+A session is archived when it ended more than ARCHIVE_ENDED_AFTER_DAYS ago, or when it has
+had no message for ARCHIVE_IDLE_DAYS (idle sessions are marked ended). An archived session
+that was resumed is archived again once its newest message is ARCHIVE_ENDED_AFTER_DAYS old.
+Run it periodically:
+
+    python -m app.jobs.archive_messages --batch-size 500
+    python -m app.jobs.archive_messages --dry-run
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from uuid import UUID
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, exists, func, insert, or_, select, text, update, delete
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.models.chat_session import ChatSession
+from app.models.message import Message, MessageArchive
+
+logger = logging.getLogger("ai_assistant")
+
+ARCHIVE_ENDED_AFTER_DAYS = float(os.getenv("ARCHIVE_ENDED_AFTER_DAYS", "7"))
+ARCHIVE_IDLE_DAYS = float(os.getenv("ARCHIVE_IDLE_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+# Monthly partitions older than this are dropped once archival has left them empty.
+MESSAGES_HOT_MONTHS = int(os.getenv("MESSAGES_HOT_MONTHS", "3"))
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+messages = Message.__table__
+archive = MessageArchive.__table__
+sessions = ChatSession.__table__
+
+_archived_columns = ["id", "session_id", "sender", "message", "payload", "timestamp", "response_to"]
+
+
+def partition_name(day: datetime, months_back: int = 0) -> str:
+    """Name of the monthly partition holding `day`, shifted `months_back` months earlier."""
+    month_index = day.year * 12 + day.month - 1 - months_back
+    return f"messages_y{month_index // 12:04d}m{month_index % 12 + 1:02d}"
+
+
+def archivable_sessions_query(now: datetime, ended_after_days: float, idle_days: float, limit: int):
+    ended_cutoff = now - timedelta(days=ended_after_days)
+    idle_cutoff = now - timedelta(days=idle_days)
+    recent_message = exists().where(and_(
+        messages.c.session_id == sessions.c.id,
+        messages.c.timestamp >= idle_cutoff,  # only scans recent partitions
+    ))
+    hot_message = exists().where(messages.c.session_id == sessions.c.id)
+    message_since_ended_cutoff = exists().where(and_(
+        messages.c.session_id == sessions.c.id,
+        messages.c.timestamp >= ended_cutoff,  # only scans recent partitions
+    ))
+    return (
+        select(sessions.c.id)
+        .where(or_(
+            and_(sessions.c.archived_at.is_(None), or_(
+                sessions.c.ended_at < ended_cutoff,
+                and_(sessions.c.started_at < idle_cutoff, ~recent_message),
+            )),
+            # resumed after archival, then quiet again
+            and_(sessions.c.archived_at.is_not(None), hot_message, ~message_since_ended_cutoff),
+        ))
+        .order_by(sessions.c.started_at)
+        .limit(limit)
+    )
+
+
+async def archive_batch(engine: AsyncEngine, session_ids: List[UUID], now: datetime) -> int:
+    """Copies the sessions' messages to the archive and deletes exactly the copied rows, in one transaction."""
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(archive).from_select(
+                _archived_columns,
+                select(*[messages.c[name] for name in _archived_columns]).where(messages.c.session_id.in_(session_ids)),
+            )
+        )
+        # Only rows that made it into the archive are deleted, so a message written
+        # concurrently by a resumed session is never lost.
+        copied = select(archive.c.id).where(archive.c.session_id.in_(session_ids))
+        result = await conn.execute(
+            delete(messages).where(messages.c.session_id.in_(session_ids)).where(messages.c.id.in_(copied))
+        )
+        await conn.execute(
+            update(sessions)
+            .where(sessions.c.id.in_(session_ids))
+            .values(archived_at=now, ended_at=func.coalesce(sessions.c.ended_at, now))
+        )
+    return result.rowcount
+
+
+async def maintain_partitions(engine: AsyncEngine, hot_months: int, months_ahead: int) -> Dict[str, List[str]]:
+    """Creates upcoming monthly partitions and drops empty ones older than `hot_months`."""
+    dropped = []
+    async with engine.begin() as conn:
+        await conn.execute(
+            text("SELECT ensure_message_partitions(CURRENT_DATE, :ahead)"), {"ahead": months_ahead}
+        )
+        result = await conn.execute(text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = 'messages' AND child.relname ~ '^messages_y[0-9]{4}m[0-9]{2}$'
+            ORDER BY child.relname
+        """))
+        oldest_hot = partition_name(datetime.now(timezone.utc), months_back=hot_months - 1)
+        for (name,) in result.all():
+            if name >= oldest_hot:
+                continue
+            is_empty = (await conn.execute(text(f'SELECT NOT EXISTS (SELECT 1 FROM "{name}")'))).scalar_one()
+            if is_empty:
+                await conn.execute(text(f'ALTER TABLE "messages" DETACH PARTITION "{name}"'))
+                await conn.execute(text(f'DROP TABLE "{name}"'))
+                dropped.append(name)
+    if dropped:
+        logger.info(f"Dropped empty message partitions: {dropped}")
+    return {"dropped": dropped}
+
+
+async def run_archival(
+    database_url: str,
+    batch_size: int = ARCHIVE_BATCH_SIZE,
+    ended_after_days: float = ARCHIVE_ENDED_AFTER_DAYS,
+    idle_days: float = ARCHIVE_IDLE_DAYS,
+    max_batches: int = 0,
+    dry_run: bool = False,
+) -> Dict:
+    engine = create_async_engine(database_url)
+    now = datetime.now(timezone.utc)
+    summary = {"sessions": 0, "messages": 0, "batches": 0, "dropped_partitions": []}
+    try:
+        while not max_batches or summary["batches"] < max_batches:
+            async with engine.connect() as conn:
+                query = archivable_sessions_query(now, ended_after_days, idle_days, batch_size)
+                session_ids = list((await conn.execute(query)).scalars())
+            if not session_ids:
+                break
+            if dry_run:
+                summary["sessions"] += len(session_ids)
+                break
+            try:
+                moved = await archive_batch(engine, session_ids, now)
+            except Exception as e:
+                logger.exception(f"Archiving a batch of {len(session_ids)} sessions failed")
+                raise
+            summary["sessions"] += len(session_ids)
+            summary["messages"] += moved
+            summary["batches"] += 1
+            logger.info(f"Archived {len(session_ids)} sessions ({moved} messages)")
+
+        if engine.dialect.name == "postgresql" and not dry_run:
+            partitions = await maintain_partitions(engine, MESSAGES_HOT_MONTHS, PARTITION_MONTHS_AHEAD)
+            summary["dropped_partitions"] = partitions["dropped"]
+    finally:
+        await engine.dispose()
+    return summary
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Archive messages of ended or idle chat sessions.")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Defaults to $DATABASE_URL.")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Sessions per transaction.")
+    parser.add_argument("--ended-after-days", type=float, default=ARCHIVE_ENDED_AFTER_DAYS)
+    parser.add_argument("--idle-days", type=float, default=ARCHIVE_IDLE_DAYS)
+    parser.add_argument("--max-batches", type=int, default=0, help="Stop after N batches (0 = until done).")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the first batch of archivable sessions.")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or $DATABASE_URL is required")
+
+    summary = asyncio.run(run_archival(
+        args.database_url, args.batch_size, args.ended_after_days, args.idle_days, args.max_batches, args.dry_run,
+    ))
+    print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# app/jobs/ask_worker.py
+"""
+Runs asynchronous /ask jobs outside the HTTP server, so generation capacity can be sized
+separately from the API. Needs the shared Redis job store (ASK_JOB_BACKEND=redis); set
+ASK_JOB_WORKERS=0 on the HTTP servers to leave all jobs to these processes.
+
+    ASK_JOB_BACKEND=redis python -m app.jobs.ask_worker --concurrency 8
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger("ai_assistant")
+
+
+async def run_workers(concurrency: int) -> None:
+    from app.routes import intent_detector, run_ask_job
+    from app.utils.ask_jobs import AskJobWorkers, ask_job_store
+    from app.utils.loop_monitor import LOOP_MONITOR, loop_monitor
+
+    if LOOP_MONITOR == "on":
+        loop_monitor.start()
+    workers = AskJobWorkers(ask_job_store, run_ask_job, concurrency)
+    workers.start()
+    try:
+        await asyncio.Event().wait()  # until cancelled (Ctrl+C)
+    finally:
+        await workers.close()
+        await intent_detector.executor.close()
+        await ask_job_store.close()
+        await loop_monitor.close()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run asynchronous /ask jobs from the shared job queue.")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("ASK_JOB_WORKER_CONCURRENCY", "4")))
+    args = parser.parse_args()
+
+    if os.getenv("ASK_JOB_BACKEND", "memory") != "redis":
+        parser.error("ASK_JOB_BACKEND=redis is required: the in-memory queue is not shared between processes")
+
+    from app.utils.setup_logger import setup_logger
+    setup_logger(name="ai_assistant", level=logging.INFO)
+    try:
+        asyncio.run(run_workers(args.concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# app/jobs/bulk_conversations.py
+"""
+Bulk export and import of chat sessions and messages, as NDJSON or CSV files named
+<table>.<format> in one directory (see app/utils/bulk_io.py). Memory stays flat whatever the
+size: rows are streamed through a server-side cursor (or COPY for CSV on Postgres) on the way
+out, and COPYed in chunked transactions on the way in. Prints rows/s per table.
+
+    python -m app.jobs.bulk_conversations export --dir dump/ --format csv --since 2025-01-01
+    python -m app.jobs.bulk_conversations import --dir dump/ --format csv --chunk-rows 20000
+
+Sessions are imported before messages; rows that already exist are skipped, so a failed run
+can simply be repeated. Users are not exported: they must exist in the target database.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.utils.bulk_io import BULK_CHUNK_ROWS, FORMATS, TABLE_COLUMNS, export_table, import_table
+
+logger = logging.getLogger("ai_assistant")
+
+READ_CHUNK_BYTES = 1 << 20
+
+
+async def read_file(path: str, chunk_bytes: int = READ_CHUNK_BYTES) -> AsyncIterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, chunk_bytes):
+            yield chunk
+
+
+async def export_to_dir(
+    database_url: str,
+    directory: str,
+    fmt: str = "ndjson",
+    tables: Optional[List[str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    include_archive: bool = False,
+    chunk_rows: int = BULK_CHUNK_ROWS,
+) -> List[Dict]:
+    os.makedirs(directory, exist_ok=True)
+    engine = create_async_engine(database_url)
+    summaries = []
+    try:
+        for table in tables or list(TABLE_COLUMNS):
+            summary: Dict = {}
+            path = os.path.join(directory, f"{table}.{fmt}")
+            with open(path, "wb") as f:
+                async for chunk in export_table(engine, table, fmt, since, until, include_archive, chunk_rows, summary):
+                    await asyncio.to_thread(f.write, chunk)
+            summaries.append({**summary, "path": path})
+    finally:
+        await engine.dispose()
+    return summaries
+
+
+async def import_from_dir(
+    database_url: str,
+    directory: str,
+    fmt: str = "ndjson",
+    tables: Optional[List[str]] = None,
+    chunk_rows: int = BULK_CHUNK_ROWS,
+) -> List[Dict]:
+    engine = create_async_engine(database_url)
+    summaries = []
+    try:
+        for table in tables or list(TABLE_COLUMNS):
+            path = os.path.join(directory, f"{table}.{fmt}")
+            if not os.path.exists(path):
+                logger.warning(f"No {path}, skipping {table}")
+                continue
+            summaries.append({**await import_table(engine, table, read_file(path), fmt, chunk_rows), "path": path})
+    finally:
+        await engine.dispose()
+    return summaries
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Bulk export/import of chat sessions and messages.")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Defaults to $DATABASE_URL.")
+    parser.add_argument("--dir", required=True, help="Directory holding <table>.<format> files.")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--tables", default=",".join(TABLE_COLUMNS), help="Comma-separated, in import order.")
+    parser.add_argument("--chunk-rows", type=int, default=BULK_CHUNK_ROWS, help="Rows per transaction / chunk.")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Export only rows from this time on.")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Export only rows before this time.")
+    parser.add_argument("--include-archive", action="store_true", help="Also export messages_archive rows.")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or $DATABASE_URL is required")
+    tables = [t.strip() for t in args.tables.split(",") if t.strip()]
+    unknown = set(tables) - set(TABLE_COLUMNS)
+    if unknown:
+        parser.error(f"Unknown tables: {', '.join(sorted(unknown))}")
+
+    from app.utils.setup_logger import setup_logger
+    setup_logger(name="ai_assistant", level=logging.INFO)
+    if args.command == "export":
+        summaries = asyncio.run(export_to_dir(
+            args.database_url, args.dir, args.format, tables, args.since, args.until, args.include_archive, args.chunk_rows,
+        ))
+    else:
+        summaries = asyncio.run(import_from_dir(args.database_url, args.dir, args.format, tables, args.chunk_rows))
+    for summary in summaries:
+        print(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+# app/jobs/warm_recommendations.py
+"""
+Pre-generates base recommendations for the most asked-for (sub_intent, location) pairs, so
+the recommendation graph can serve or personalise them instead of generating cold.
+
+Pairs are mined from the last WARM_RECS_LOOKBACK_DAYS of traffic: the titles of stored AI
+answers ("Top Recommendations for {sub_intent} in {user_location}") and, on Postgres, the
+Context lines of logged prompts in "ai_requests". Each pair seen at least WARM_RECS_MIN_REQUESTS
+times gets a generic answer (no preferences or history) written to the shared store
+(WARM_RECS_BACKEND=redis) for WARM_RECS_TTL_S. Run it off-peak:
+
+    WARM_RECS_BACKEND=redis python -m app.jobs.warm_recommendations --top 300
+    WARM_RECS_BACKEND=redis python -m app.jobs.warm_recommendations --every 60 --hours 1-6
+    python -m app.jobs.warm_recommendations --dry-run
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import column, func, select, table
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.models.message import Message
+from app.utils.metrics import metrics
+from app.utils.recommendation_store import WARM_RECS_TTL_S, RecommendationStore, new_entry, warm_key
+
+logger = logging.getLogger("ai_assistant")
+
+WARM_RECS_TOP = int(os.getenv("WARM_RECS_TOP", "300"))
+WARM_RECS_LOOKBACK_DAYS = float(os.getenv("WARM_RECS_LOOKBACK_DAYS", "14"))
+WARM_RECS_MIN_REQUESTS = int(os.getenv("WARM_RECS_MIN_REQUESTS", "3"))
+# Entries younger than this are left alone, so an hourly schedule does not regenerate everything.
+WARM_RECS_REFRESH_AFTER_S = float(os.getenv("WARM_RECS_REFRESH_AFTER_S", str(WARM_RECS_TTL_S / 2)))
+# Generations in flight at once; keep it low so warming never crowds out live traffic.
+WARM_RECS_CONCURRENCY = int(os.getenv("WARM_RECS_CONCURRENCY", "1"))
+INTENT_KB_PATH = "data/intents_knowledge_base.json"
+
+BASE_QUERY = "What are the best {sub_intent} options in {user_location}?"
+
+messages = Message.__table__
+# Only in data/schema.sql (no ORM model); nothing but this job reads it.
+ai_requests = table("ai_requests", column("prompt"), column("created_at"))
+
+
+class PopularPair(NamedTuple):
+    intent: str
+    sub_intent: str
+    location: str
+    requests: int
+
+
+def title_pattern(intent_object: Dict) -> Optional[re.Pattern]:
+    """
+    Regex that reads (sub_intent, user_location) back out of an answer title rendered from
+    the intent's output_format, or None if the title does not carry both, i.e. the intent's
+    answers do not depend on just those two and are not worth warming.
+    """
+    title = (intent_object.get("output_format") or {}).get("title") or ""
+    if "{sub_intent}" not in title or "{user_location}" not in title:
+        return None
+    groups = {"{sub_intent}": "(?P<sub_intent>.+?)", "{user_location}": "(?P<user_location>.+)"}
+    parts = re.split(r"(\{sub_intent\}|\{user_location\})", title)
+    return re.compile("^" + "".join(groups.get(part, re.escape(part)) for part in parts) + "$", re.IGNORECASE)
+
+
+class _Tally:
+    """Request counts per warm_key, remembering the most common spelling of each pair."""
+
+    def __init__(self, intents: List[Dict]):
+        self.patterns = [(i, title_pattern(i)) for i in intents]
+        self.patterns = [(i, p) for i, p in self.patterns if p is not None]
+        self.counts: Counter = Counter()
+        self.spellings: Dict[Tuple[str, str, str], Counter] = defaultdict(Counter)
+
+    def _intent_for(self, sub_intent: str) -> Optional[str]:
+        for intent, _ in self.patterns:
+            if sub_intent.lower() in (s.lower() for s in intent.get("sub_intents", [])):
+                return intent["intent"]
+        return None
+
+    def add(self, sub_intent: str, location: str, count: int, intent: Optional[str] = None) -> None:
+        sub_intent, location = sub_intent.strip(), location.strip().rstrip(".")
+        known = self._intent_for(sub_intent)
+        if known is None or (intent and intent != known) or not location:
+            return  # a sub-intent the model made up, or one of an intent that is not warmed
+        intent = known
+        key = warm_key(intent, sub_intent, location)
+        self.counts[key] += count
+        self.spellings[key][(sub_intent.lower(), location)] += count
+
+    def add_title(self, title: str, count: int) -> None:
+        for intent, pattern in self.patterns:
+            match = pattern.match(title.strip())
+            if match:
+                self.add(match["sub_intent"], match["user_location"], count, intent["intent"])
+                return
+
+    def top(self, n: int, min_requests: int) -> List[PopularPair]:
+        pairs = []
+        for key, count in self.counts.most_common():
+            if count < min_requests or len(pairs) >= n:
+                break
+            sub_intent, location = self.spellings[key].most_common(1)[0][0]
+            pairs.append(PopularPair(key[0], sub_intent, location, count))
+        return pairs
+
+
+async def popular_pairs(
+    engine: AsyncEngine,
+    intents: List[Dict],
+    since: datetime,
+    top: int = WARM_RECS_TOP,
+    min_requests: int = WARM_RECS_MIN_REQUESTS,
+) -> List[PopularPair]:
+    """The `top` (intent, sub_intent, location) pairs asked for at least `min_requests` times since `since`."""
+    tally = _Tally(intents)
+
+    title = messages.c.payload["title"].as_string()
+    query = (
+        select(title, func.count())
+        .where(messages.c.sender == "ai", messages.c.timestamp >= since, title.is_not(None))  # recent partitions only
+        .group_by(title)
+    )
+    async with engine.connect() as conn:
+        for text, count in await conn.execute(query):
+            tally.add_title(text, count)
+
+    if engine.dialect.name == "postgresql":
+        sub_intent = func.substring(ai_requests.c.prompt, r"Sub-intent: ([^\n]*)")
+        location = func.substring(ai_requests.c.prompt, r"Location: ([^\n]*)")
+        query = (
+            select(sub_intent, location, func.count())
+            .where(ai_requests.c.created_at >= since.replace(tzinfo=None))
+            .group_by(sub_intent, location)
+        )
+        try:
+            async with engine.connect() as conn:
+                for sub, loc, count in await conn.execute(query):
+                    if sub and loc:
+                        tally.add(sub, loc, count)
+        except Exception as e:
+            logger.warning(f"Skipping ai_requests while mining popular pairs: {e}")
+
+    return tally.top(top, min_requests)
+
+
+def _age_s(entry: Dict) -> float:
+    return (datetime.now(timezone.utc) - datetime.fromisoformat(entry["generated_at"])).total_seconds()
+
+
+async def generate_base(pair: PopularPair, intent_object: Dict) -> Dict:
+    """A generic answer for the pair: the recommendation prompt with no user context."""
+    from app.langgraph.nodes.generate_response_node import generate_response_node
+    from app.langgraph.nodes.prompt.prompt_node import prompt_node
+
+    state = {
+        "session_id": uuid.UUID(int=0),
+        "user_query": BASE_QUERY.format(sub_intent=pair.sub_intent, user_location=pair.location),
+        "intent": pair.intent,
+        "sub_intent": pair.sub_intent,
+        "intent_object": intent_object,
+        "user_location": pair.location,
+        "current_time": "any time",
+    }
+    state.update(await prompt_node(state))
+    return (await generate_response_node(state))["response"]
+
+
+async def warm_pairs(
+    store: RecommendationStore,
+    pairs: List[PopularPair],
+    intents: List[Dict],
+    generate: Callable[[PopularPair, Dict], Awaitable[Dict]] = generate_base,
+    concurrency: int = WARM_RECS_CONCURRENCY,
+    refresh_after_s: float = WARM_RECS_REFRESH_AFTER_S,
+) -> Dict:
+    by_name = {i["intent"]: i for i in intents}
+    summary = {"pairs": len(pairs), "warmed": 0, "fresh": 0, "failed": 0}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def warm(pair: PopularPair) -> None:
+        entry = await store.get(pair.intent, pair.sub_intent, pair.location)
+        if entry is not None and _age_s(entry) < refresh_after_s:
+            summary["fresh"] += 1
+            return
+        async with semaphore:
+            try:
+                response = await generate(pair, by_name[pair.intent])
+            except Exception as e:
+                logger.exception(f"Warming {pair.sub_intent} in {pair.location} failed")
+                response = None
+        if not response:
+            summary["failed"] += 1
+            return
+        await store.set(pair.intent, pair.sub_intent, pair.location, new_entry(response, pair.requests))
+        summary["warmed"] += 1
+        metrics.increment("warm_recs.generated")
+
+    await asyncio.gather(*(warm(pair) for pair in pairs))
+    return summary
+
+
+async def run_warming(
+    database_url: str,
+    store: RecommendationStore,
+    top: int = WARM_RECS_TOP,
+    days: float = WARM_RECS_LOOKBACK_DAYS,
+    min_requests: int = WARM_RECS_MIN_REQUESTS,
+    concurrency: int = WARM_RECS_CONCURRENCY,
+    dry_run: bool = False,
+    generate: Callable[[PopularPair, Dict], Awaitable[Dict]] = generate_base,
+    kb_path: str = INTENT_KB_PATH,
+) -> Dict:
+    with open(kb_path, "r") as f:
+        intents = json.load(f).get("intents", [])
+
+    engine = create_async_engine(database_url)
+    try:
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        pairs = await popular_pairs(engine, intents, since, top, min_requests)
+    finally:
+        await engine.dispose()
+    logger.info(f"Found {len(pairs)} popular pairs in the last {days:g} days")
+
+    if dry_run:
+        return {"pairs": len(pairs), "top": [list(pair) for pair in pairs[:20]]}
+    return await warm_pairs(store, pairs, intents, generate, concurrency)
+
+
+def in_window(hour: int, window: Optional[str]) -> bool:
+    """Whether `hour` falls in an "start-end" hour window (end exclusive, may wrap midnight)."""
+    if not window:
+        return True
+    start, end = (int(h) for h in window.split("-"))
+    return start <= hour < end if start <= end else hour >= start or hour < end
+
+
+async def run_schedule(args: argparse.Namespace) -> None:
+    from app.utils.recommendation_store import recommendation_store
+
+    try:
+        while True:
+            if in_window(datetime.now().hour, args.hours):
+                print(await run_warming(
+                    args.database_url, recommendation_store, args.top, args.days,
+                    args.min_requests, args.concurrency, args.dry_run,
+                ))
+            else:
+                logger.info(f"Outside the warming window {args.hours}, skipping this run")
+            if not args.every:
+                break
+            await asyncio.sleep(args.every * 60)
+    finally:
+        await recommendation_store.close()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Pre-generate recommendations for popular (sub_intent, location) pairs.")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Defaults to $DATABASE_URL.")
+    parser.add_argument("--top", type=int, default=WARM_RECS_TOP, help="Most popular pairs to warm.")
+    parser.add_argument("--days", type=float, default=WARM_RECS_LOOKBACK_DAYS, help="Traffic window to mine.")
+    parser.add_argument("--min-requests", type=int, default=WARM_RECS_MIN_REQUESTS)
+    parser.add_argument("--concurrency", type=int, default=WARM_RECS_CONCURRENCY)
+    parser.add_argument("--every", type=float, default=0, help="Repeat every N minutes (0 = run once).")
+    parser.add_argument("--hours", help='Only run within these local hours, e.g. "1-6" or "22-5".')
+    parser.add_argument("--dry-run", action="store_true", help="Only list the popular pairs.")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or $DATABASE_URL is required")
+    if not args.dry_run and os.getenv("WARM_RECS_BACKEND", "none") != "redis":
+        parser.error("WARM_RECS_BACKEND=redis is required: the API servers read warm recommendations from it")
+
+    from app.utils.setup_logger import setup_logger
+    setup_logger(name="ai_assistant", level=logging.INFO)
+    try:
+        asyncio.run(run_schedule(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
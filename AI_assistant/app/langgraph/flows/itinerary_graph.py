@@ -0,0 +1,47 @@
+# flows/langgraph/itinerary_graph.py
+
+from langgraph.graph import StateGraph, END
+from app.schemas.state import ChatFlowState
+
+# Node imports
+from app.langgraph.nodes.memory.memory_node import retrieve_memory_node
+from app.langgraph.nodes.memory.long_term_memory import long_term_memory_node
+from app.langgraph.nodes.memory.summarize_history_node import summarize_history_node
+from app.langgraph.nodes.user_preferences_node import user_preferences_node
+from app.langgraph.nodes.itinerary.itinerary_nodes import (
+    fan_out_days, merge_itinerary_node, plan_day_node, plan_trip_node, save_itinerary_node,
+)
+from app.langgraph.nodes.save_to_db_node import save_to_db_node
+
+def build_itinerary_graph():
+    """
+    Planning flow: an outline of the trip first, then every day planned concurrently (one
+    Send per day), so a long trip takes about as long as its slowest day rather than the
+    sum of its days. The days are merged and checked, then written as a trip.
+    """
+    graph = StateGraph(ChatFlowState)
+
+    # Add each node
+    graph.add_node("retrieve_memory", retrieve_memory_node)
+    graph.add_node("recall_long_term_memory", long_term_memory_node)
+    graph.add_node("summarize_history", summarize_history_node)
+    graph.add_node("load_user_preferences", user_preferences_node)
+    graph.add_node("plan_trip", plan_trip_node)
+    graph.add_node("plan_day", plan_day_node)
+    graph.add_node("merge_itinerary", merge_itinerary_node)
+    graph.add_node("save_itinerary", save_itinerary_node)
+    graph.add_node("save_to_db", save_to_db_node)
+
+    # Define flow
+    graph.set_entry_point("retrieve_memory")
+    graph.add_edge("retrieve_memory", "recall_long_term_memory")
+    graph.add_edge("recall_long_term_memory", "summarize_history")
+    graph.add_edge("summarize_history", "load_user_preferences")
+    graph.add_edge("load_user_preferences", "plan_trip")
+    graph.add_conditional_edges("plan_trip", fan_out_days, ["plan_day"])
+    graph.add_edge("plan_day", "merge_itinerary")
+    graph.add_edge("merge_itinerary", "save_itinerary")
+    graph.add_edge("save_itinerary", "save_to_db")
+    graph.add_edge("save_to_db", END)
+
+    return graph.compile()
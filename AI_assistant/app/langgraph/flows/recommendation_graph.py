@@ -5,9 +5,14 @@ from app.schemas.state import ChatFlowState
 
 # Node imports
 from app.langgraph.nodes.memory.memory_node import retrieve_memory_node
+from app.langgraph.nodes.memory.long_term_memory import long_term_memory_node
 from app.langgraph.nodes.memory.summarize_history_node import summarize_history_node
+from app.langgraph.nodes.realtime.realtime_info_node import realtime_info_node
+from app.langgraph.nodes.user_preferences_node import user_preferences_node
+from app.langgraph.nodes.warm_recommendations_node import warm_recommendations_node
 from app.langgraph.nodes.prompt.prompt_node import prompt_node
 from app.langgraph.nodes.generate_response_node import generate_response_node
+from app.langgraph.nodes.sub_intent_fanout_node import generate_sub_intent_node, merge_sub_intents_node, route_sub_intents
 from app.langgraph.nodes.save_to_db_node import save_to_db_node
 
 def build_recommendation_graph():
@@ -15,17 +20,31 @@ def build_recommendation_graph():
 
     # Add each node
     graph.add_node("retrieve_memory", retrieve_memory_node)
+    graph.add_node("recall_long_term_memory", long_term_memory_node)
     graph.add_node("summarize_history", summarize_history_node)
+    graph.add_node("fetch_realtime_info", realtime_info_node)
+    graph.add_node("load_user_preferences", user_preferences_node)
+    graph.add_node("load_warm_recommendations", warm_recommendations_node)
     graph.add_node("build_prompt", prompt_node)
     graph.add_node("generate_response", generate_response_node)
+    graph.add_node("generate_sub_intent", generate_sub_intent_node)
+    graph.add_node("merge_sub_intents", merge_sub_intents_node)
     graph.add_node("save_to_db", save_to_db_node)
 
     # Define flow
     graph.set_entry_point("retrieve_memory")
-    graph.add_edge("retrieve_memory", "summarize_history")
-    graph.add_edge("summarize_history", "build_prompt")
+    graph.add_edge("retrieve_memory", "recall_long_term_memory")
+    graph.add_edge("recall_long_term_memory", "summarize_history")
+    graph.add_edge("summarize_history", "load_user_preferences")
+    # Several sub-intents (e.g. food and activities) are answered in parallel and merged;
+    # each part fetches its own realtime info, so the fan-out happens before fetch_realtime_info
+    graph.add_conditional_edges("load_user_preferences", route_sub_intents, ["fetch_realtime_info", "generate_sub_intent"])
+    graph.add_edge("fetch_realtime_info", "load_warm_recommendations")
+    graph.add_edge("load_warm_recommendations", "build_prompt")
     graph.add_edge("build_prompt", "generate_response")
     graph.add_edge("generate_response", "save_to_db")
+    graph.add_edge("generate_sub_intent", "merge_sub_intents")
+    graph.add_edge("merge_sub_intents", "save_to_db")
     graph.add_edge("save_to_db", END)
 
     return graph.compile()
@@ -4,20 +4,28 @@ from typing import List
 from langchain_core.runnables import Runnable
 from langchain_core.documents import Document
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_ollama import OllamaLLM
 from app.schemas.state import ChatFlowState
+from app.utils.embedding_executor import EmbeddingBatchExecutor
+from app.utils.embedding_backends import shared_embeddings
+from app.utils.ollama_pool import get_llm
 import json
 import logging
+import os
+import re
 
 logger = logging.getLogger("ai_assistant")
 
+# Sub-intents kept from one query; each one is answered by its own LLM call.
+DETECT_MAX_SUB_INTENTS = int(os.getenv("DETECT_MAX_SUB_INTENTS", "3"))
+
 class DetectIntentNode(Runnable):
-    def __init__(self, kb_path: str, model_name: str = "llama3.2"):
+    def __init__(self, kb_path: str, model_name: str = "llama3.2", embedding_backend: str = None):
         self.kb_path = kb_path
+        self.embedding_backend = embedding_backend
         self.vectorstore = self._load_vectorstore()
-        self.llm = OllamaLLM(model=model_name, temperature=0)
+        self.executor = EmbeddingBatchExecutor(self.vectorstore)
+        self.llm = get_llm(model=model_name, temperature=0)
         logger.info("DetectIntentNode initialized with model: %s", model_name)
 
     def _load_vectorstore(self):
@@ -29,6 +37,14 @@ class DetectIntentNode(Runnable):
             logger.exception("Failed to load or parse KB JSON: %s", self.kb_path)
             raise
 
+        docs = self._build_documents(kb)
+        embeddings = shared_embeddings(self.embedding_backend)
+        vectorstore = FAISS.from_documents(docs, embeddings)
+        logger.info("Vectorstore built with %d intent documents", len(docs))
+        return vectorstore
+
+    @staticmethod
+    def _build_documents(kb: dict) -> List[Document]:
         docs = []
         for item in kb["intents"]:
             doc_text = f"""
@@ -37,11 +53,7 @@ class DetectIntentNode(Runnable):
                         Examples: {"; ".join(item['examples'])}
                     """
             docs.append(Document(page_content=doc_text, metadata={"intent": item["intent"]}))
-
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        vectorstore = FAISS.from_documents(docs, embeddings)
-        logger.info("Vectorstore built with %d intent documents", len(docs))
-        return vectorstore
+        return docs
 
     def _build_prompt(self, user_query: str, docs: List[Document]):
         logger.debug("Building prompt for intent classification...")
@@ -56,12 +68,14 @@ class DetectIntentNode(Runnable):
 
                 🎯 Your task:
                 Identify the **best-matching intent and sub_intent** based on the user query and the intent descriptions.
+                If the query clearly asks for several sub_intents of that intent (e.g. food and things to do), list each of them.
 
                 🧾 Output format:
-                Respond with exactly two values — the intent and the sub_intent — separated by a single comma.
+                Respond with the intent followed by one or more sub_intents, separated by single commas.
 
                 ✅ Format (no quotes, no labels, no JSON):
                 intent_name,sub_intent_name
+                intent_name,sub_intent_name,other_sub_intent_name
 
                 ❌ Do not explain your answer.
                 ❌ Do not include any extra text or formatting.
@@ -73,7 +87,7 @@ class DetectIntentNode(Runnable):
         )
 
     def invoke(self, state: ChatFlowState) -> ChatFlowState:
-        query = state.user_query
+        query = state["user_query"]
         logger.debug("Detecting intent for user query: %s", query)
 
         # Step 1: Retrieve relevant intents
@@ -97,13 +111,69 @@ class DetectIntentNode(Runnable):
             raise
 
         # Step 4: Parse and assign intent
+        return self._apply_intent(state, response)
+
+    def _apply_intent(self, state: ChatFlowState, response: str) -> ChatFlowState:
+        """
+        Parses "intent,sub_intent[,sub_intent...]". `sub_intent` is the first one and
+        `sub_intents` all of them (at most DETECT_MAX_SUB_INTENTS, duplicates dropped).
+        """
         try:
-            detected_intent, detected_sub_intent = tuple((response.strip().lower().split(",")))
-            state.intent = detected_intent.strip()
-            state.sub_intent = detected_sub_intent.strip()
-            logger.info("Intent detected: %s | Sub-intent: %s", state.intent, state.sub_intent)
+            detected_intent, detected_sub_intents = response.strip().lower().split(",", 1)
+            intent = detected_intent.strip()
+            sub_intents = []
+            for sub_intent in re.split(r",|&|\+|/|\band\b", detected_sub_intents):
+                sub_intent = sub_intent.strip()
+                if sub_intent and sub_intent not in sub_intents:
+                    sub_intents.append(sub_intent)
+            sub_intents = sub_intents[:DETECT_MAX_SUB_INTENTS]
+            logger.info("Intent detected: %s | Sub-intents: %s", intent, ", ".join(sub_intents))
+            sub_intent = sub_intents[0]
         except Exception as e:
             logger.exception("Failed to parse LLM intent output: %s", response)
             raise
 
-        return state
+        return {**state, "intent": intent, "sub_intent": sub_intent, "sub_intents": sub_intents}
+
+    async def ainvoke(self, state: ChatFlowState, config=None, **kwargs) -> ChatFlowState:
+        """
+        Async variant of invoke: retrieval goes through the micro-batching executor and
+        classification uses the async LLM client, so nothing blocks the event loop.
+        """
+        query = state["user_query"]
+        logger.debug("Detecting intent for user query: %s", query)
+
+        try:
+            retrieved_docs = await self.executor.search(query, k=3)
+            logger.info("Retrieved %d documents for intent classification", len(retrieved_docs))
+        except Exception as e:
+            logger.exception("Vector similarity search failed.")
+            raise
+
+        return await self.aclassify(state, retrieved_docs)
+
+    async def aretrieve_batch(self, queries: List[str], k: int = 3) -> List[List[Document]]:
+        """
+        Retrieval for many queries at once, embedded together by the batching executor.
+        """
+        logger.debug("Retrieving intent documents for a batch of %d queries", len(queries))
+        try:
+            retrieved = await self.executor.search_many(queries, k)
+            logger.info("Retrieved intent documents for %d queries", len(queries))
+        except Exception as e:
+            logger.exception("Batched vector similarity search failed.")
+            raise
+        return retrieved
+
+    async def aclassify(self, state: ChatFlowState, docs: List[Document]) -> ChatFlowState:
+        """
+        Async LLM classification for a query whose intent documents are already retrieved.
+        """
+        try:
+            response = await self.llm.ainvoke(self._build_prompt(state["user_query"], docs))
+            logger.info("LLM response received: %s", response.strip())
+        except Exception as e:
+            logger.exception("LLM invocation failed")
+            raise
+
+        return self._apply_intent(state, response)
@@ -1,13 +1,15 @@
 import json
 import re
 import logging
-from langchain_ollama import OllamaLLM
 from langchain.output_parsers import OutputFixingParser
 from langchain_core.output_parsers import JsonOutputParser
+from app.langgraph.nodes.warm_recommendations_node import WARM_RECS_MODE, is_personal
 from app.schemas.state import ChatFlowState
+from app.utils.metrics import metrics
+from app.utils.ollama_pool import get_llm
 
 logger = logging.getLogger("ai_assistant")
-llm = OllamaLLM(model="llama3.2")
+llm = get_llm(model="llama3.2")
 
 
 def safe_json_parse(text: str) -> dict:
@@ -51,18 +53,30 @@ def safe_json_parse(text: str) -> dict:
             return {}
 
 
-async def generate_response_node(state: ChatFlowState) -> ChatFlowState:
+async def generate_response_node(state: ChatFlowState) -> dict:
     """
     Generates an AI response using the retrieved memory, detected intent, and the user query.
+    A warm base recommendation is returned as-is when neither the query nor the context adds
+    anything to its (intent, sub_intent, location) (WARM_RECS_MODE=auto); otherwise it is
+    already in the prompt as candidates to personalise.
     """
-    if not state.prompt or any(p is None for p in state.prompt):
+    warm = state.get("warm_recommendation")
+    if warm:
+        if WARM_RECS_MODE == "auto" and not is_personal(state):
+            metrics.increment("warm_recs.reused")
+            logger.info(f"Reusing warm recommendation for session_id: {state['session_id']}")
+            return {"response": warm}
+        metrics.increment("warm_recs.personalised")
+
+    prompt = state.get("prompt")
+    if not prompt or any(p is None for p in prompt):
         logger.error("Prompt messages are invalid or contain None.")
         raise ValueError("Prompt messages are invalid or contain None.")
 
-    logger.debug("Final prompt sent to LLM: %s", state.prompt)
+    logger.debug("Final prompt sent to LLM: %s", prompt)
 
     try:
-        response = llm.invoke(state.prompt)
+        response = await llm.ainvoke(prompt)
         logger.info("LLM response received successfully.")
     except Exception as e:
         logger.exception("LLM invocation failed.")
@@ -75,5 +89,4 @@ async def generate_response_node(state: ChatFlowState) -> ChatFlowState:
     else:
         logger.warning("Response parsing returned an empty result.")
 
-    state.response = parsed_response
-    return state
+    return {"response": parsed_response}
@@ -0,0 +1,212 @@
+# app/langgraph/nodes/itinerary/itinerary_nodes.py
+
+import logging
+import os
+import re
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.types import Send
+
+from app.crud.history import get_session_user_id
+from app.crud.itinerary import create_trip_with_days
+from app.langgraph.nodes.generate_response_node import safe_json_parse
+from app.langgraph.nodes.itinerary.itinerary_prompt import day_messages, skeleton_messages
+from app.schemas.state import ChatFlowState, flow_context
+from app.utils.metrics import metrics
+from app.utils.ollama_pool import get_llm
+from app.utils.session_gate import commit_point
+
+logger = logging.getLogger("ai_assistant")
+
+ITINERARY_MAX_DAYS = int(os.getenv("ITINERARY_MAX_DAYS", "14"))
+ITINERARY_DEFAULT_DAYS = int(os.getenv("ITINERARY_DEFAULT_DAYS", "3"))
+ITINERARY_MAX_ACTIVITIES = int(os.getenv("ITINERARY_MAX_ACTIVITIES", "8"))
+# Attempts per day; a day whose output has no usable activities is asked for again.
+ITINERARY_DAY_ATTEMPTS = int(os.getenv("ITINERARY_DAY_ATTEMPTS", "2"))
+
+llm = get_llm(model="llama3.2")
+
+# Keys the per-day calls need from the state; each day gets its own copy through Send.
+_DAY_CONTEXT_KEYS = (
+    "session_id", "user_query", "user_location", "current_time",
+    "user_preferences", "chat_history_summary", "long_term_memory",
+)
+
+
+def stated_days(query: str) -> Optional[int]:
+    """Trip length stated in the query ("5-day", "3 nights", "weekend"), capped at ITINERARY_MAX_DAYS."""
+    match = re.search(r"(\d+)\s*-?\s*(day|night)", query, re.IGNORECASE)
+    if match:
+        days = int(match.group(1)) + (match.group(2).lower() == "night")
+    elif re.search(r"\bweekend\b", query, re.IGNORECASE):
+        days = 2
+    else:
+        return None
+    return max(1, min(days, ITINERARY_MAX_DAYS))
+
+
+def requested_days(query: str) -> int:
+    """stated_days(), else ITINERARY_DEFAULT_DAYS."""
+    return stated_days(query) or ITINERARY_DEFAULT_DAYS
+
+
+def _parse_date(value) -> Optional[date]:
+    try:
+        return date.fromisoformat(str(value)[:10]) if value else None
+    except ValueError:
+        return None
+
+
+def normalise_skeleton(raw: Dict, state: ChatFlowState) -> Dict:
+    """
+    A usable outline whatever the model returned: days numbered 1..n. When the query states a
+    length, the outline is trimmed or padded to it; otherwise the model's days are kept (capped
+    at ITINERARY_MAX_DAYS), or ITINERARY_DEFAULT_DAYS if it returned none.
+    """
+    days = [d for d in (raw.get("days") or []) if isinstance(d, dict)][:ITINERARY_MAX_DAYS]
+    length = stated_days(state["user_query"]) or len(days) or ITINERARY_DEFAULT_DAYS
+    if len(days) != length:
+        logger.debug(f"Trip outline has {len(days)} days, {length} asked for; trimming or padding it")
+    days = days[:length] + [{} for _ in range(length - len(days))]
+    # No fallback to user_location: that is where the user is, not where the trip goes.
+    destination = str(raw.get("destination") or "").strip()
+    where = f" in {destination}" if destination else ""
+    return {
+        "title": str(raw.get("title") or f"{len(days)}-Day Trip" + (f" to {destination}" if destination else "")),
+        "destination": destination,
+        "start_date": _parse_date(raw.get("start_date")),
+        "summary": str(raw.get("summary") or ""),
+        "days": [
+            {"day": number, "theme": str(d.get("theme") or f"Day {number}{where}"), "area": str(d.get("area") or "")}
+            for number, d in enumerate(days, start=1)
+        ],
+    }
+
+
+async def plan_trip_node(state: ChatFlowState) -> dict:
+    """
+    One short LLM call for the outline of the trip (destination, dates, a theme and area per
+    day) into `trip_plan`. The days are planned in parallel from it by plan_day_node.
+    """
+    session_id = state["session_id"]
+    logger.debug(f"Planning trip outline for session_id: {session_id}")
+    try:
+        raw = safe_json_parse(await llm.ainvoke(skeleton_messages(state)))
+    except Exception:
+        logger.exception(f"Trip outline failed for session_id: {session_id}; falling back to the requested length")
+        raw = {}
+    skeleton = normalise_skeleton(raw if isinstance(raw, dict) else {}, state)
+    logger.info(f"Trip outline for session_id {session_id}: {len(skeleton['days'])} days in {skeleton['destination'] or 'an unnamed destination'}")
+    return {"trip_plan": skeleton}
+
+
+def fan_out_days(state: ChatFlowState) -> List[Send]:
+    """One plan_day task per day of the outline; LangGraph runs them concurrently."""
+    context = {key: state.get(key) for key in _DAY_CONTEXT_KEYS}
+    skeleton = state["trip_plan"]
+    return [Send("plan_day", {**context, "trip_plan": skeleton, "day_plan": day}) for day in skeleton["days"]]
+
+
+def clean_activities(raw) -> List[str]:
+    """Non-empty activity strings (objects are reduced to their name), at most ITINERARY_MAX_ACTIVITIES."""
+    if not isinstance(raw, list):
+        return []
+    activities = []
+    for item in raw:
+        if isinstance(item, dict):
+            item = item.get("name") or item.get("activity") or ""
+        if isinstance(item, str) and item.strip():
+            activities.append(item.strip())
+    return activities[:ITINERARY_MAX_ACTIVITIES]
+
+
+async def plan_day_node(state: ChatFlowState) -> dict:
+    """
+    Plans a single day (state holds only that day's Send payload). Does not touch the DB
+    session, which is not safe to share between the concurrent day tasks.
+    """
+    day = state["day_plan"]
+    activities: List[str] = []
+    for attempt in range(1, ITINERARY_DAY_ATTEMPTS + 1):
+        try:
+            raw = safe_json_parse(await llm.ainvoke(day_messages(state, state["trip_plan"], day)))
+            activities = clean_activities(raw.get("activities") if isinstance(raw, dict) else None)
+        except Exception:
+            logger.exception(f"Planning day {day['day']} failed (attempt {attempt}) for session_id: {state['session_id']}")
+        if activities:
+            break
+        metrics.increment("itinerary.day_retries")
+    return {"itinerary_days": [{**day, "activities": activities}]}
+
+
+def merge_days(skeleton: Dict, planned: List[Dict]) -> List[Dict]:
+    """
+    The planned days in outline order, one per outline day. Activities already planned for
+    an earlier day are dropped; a day that could not be planned keeps an empty list.
+    """
+    by_day = {d["day"]: d for d in planned}
+    seen = set()
+    days = []
+    for outline in skeleton["days"]:
+        activities = []
+        for activity in (by_day.get(outline["day"]) or {}).get("activities") or []:
+            key = re.sub(r"^\w+:\s*", "", activity).casefold()
+            if key not in seen:
+                seen.add(key)
+                activities.append(activity)
+        days.append({"day": outline["day"], "theme": outline["theme"], "activities": activities})
+    return days
+
+
+async def merge_itinerary_node(state: ChatFlowState) -> dict:
+    """Assembles the planning intent's response from the outline and the planned days."""
+    skeleton = state["trip_plan"]
+    days = merge_days(skeleton, state.get("itinerary_days") or [])
+    incomplete = [d["day"] for d in days if not d["activities"]]
+    if incomplete:
+        metrics.increment("itinerary.incomplete_days", len(incomplete))
+        logger.warning(f"Itinerary days {incomplete} have no activities (session_id: {state['session_id']})")
+
+    output_format = (state.get("intent_object") or {}).get("output_format") or {}
+    response = {
+        "title": skeleton["title"],
+        "summary": skeleton["summary"] or output_format.get("summary") or "",
+        "days": [{"day": f"Day {d['day']}", "theme": d["theme"], "activities": d["activities"]} for d in days],
+        "follow_up": output_format.get("follow_up") or "",
+    }
+    if incomplete:
+        response["incomplete_days"] = incomplete
+    return {"response": response}
+
+
+async def save_itinerary_node(state: ChatFlowState, config: RunnableConfig) -> dict:
+    """
+    Stores the plan as a trip with one itineraries row per day, and adds its trip_id to the
+    response. Skipped (the answer is still returned) if the session has no user.
+    """
+    # The trip is committed here, before save_to_db_node; cancelling after it would orphan the trip.
+    commit_point()
+
+    db = flow_context(config).db
+    session_id = state["session_id"]
+    skeleton, response = state["trip_plan"], dict(state["response"])
+
+    user_id = state.get("user_id") or await get_session_user_id(db, session_id)
+    if user_id is None:
+        logger.warning(f"No user for session_id {session_id}; itinerary not saved as a trip")
+        return {}
+
+    start = skeleton["start_date"]
+    end = start + timedelta(days=len(response["days"]) - 1) if start else None
+    try:
+        trip_id = await create_trip_with_days(
+            db, user_id, skeleton["title"], skeleton["destination"] or None, start, end,
+            [day["activities"] for day in response["days"]],
+        )
+    except Exception:
+        logger.exception(f"Failed to save itinerary for session_id: {session_id}")
+        raise
+    response["trip_id"] = str(trip_id)
+    return {"user_id": user_id, "response": response}
@@ -0,0 +1,89 @@
+# app/langgraph/nodes/itinerary/itinerary_prompt.py
+
+import json
+from typing import Dict, List
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from app.langgraph.nodes.prompt.get_prompt import STATIC_PREFIX_TEMPLATE
+
+SKELETON_INSTRUCTION = (
+    "Outline a multi-day trip for the user's request: pick the destination, the number of days "
+    "(as asked, otherwise a sensible length) and the start date if the user gave one (YYYY-MM-DD, "
+    "otherwise null). Give each day a theme and the area it covers, so that no two days repeat "
+    "the same sights. Do not list activities yet."
+)
+
+SKELETON_FORMAT = {
+    "title": "3-Day Trip to Goa",
+    "destination": "Goa, India",
+    "start_date": None,
+    "summary": "Beaches first, then heritage and food.",
+    "days": [
+        {"day": 1, "theme": "North Goa beaches", "area": "Calangute, Baga"},
+        {"day": 2, "theme": "Old Goa heritage", "area": "Old Goa, Panaji"},
+        {"day": 3, "theme": "South Goa food and markets", "area": "Margao, Colva"},
+    ],
+}
+
+DAY_INSTRUCTION = (
+    "Plan one day of the trip outlined in the Context message: 3 to 6 activities that fit the "
+    "day's theme and area, in the order of the day, each starting with the time of day. Respect "
+    "the user's preferences and do not repeat places planned for other days."
+)
+
+DAY_FORMAT = {
+    "day": 1,
+    "theme": "North Goa beaches",
+    "activities": ["Morning: Swim at Calangute Beach", "Afternoon: Lunch at Britto's", "Evening: Sunset at Baga"],
+}
+
+CONTEXT_TEMPLATE = """
+📌 Context:
+- Location: {user_location}
+- Preferences: {user_preferences}
+- Past Summary: {chat_history_summary}
+- Related Past Conversations:
+{long_term_memory}
+- Time: {current_time}
+"""
+
+
+def _prefix(instruction: str, output_format: Dict) -> SystemMessage:
+    return SystemMessage(content=STATIC_PREFIX_TEMPLATE.format(
+        system_instruction=instruction, output_format=json.dumps(output_format, indent=2),
+    ))
+
+
+# Rendered once: every skeleton call and every day call starts with the same bytes.
+SKELETON_PREFIX = _prefix(SKELETON_INSTRUCTION, SKELETON_FORMAT)
+DAY_PREFIX = _prefix(DAY_INSTRUCTION, DAY_FORMAT)
+
+
+def _context(context: Dict) -> str:
+    return CONTEXT_TEMPLATE.format(**{
+        key: context.get(key) or ""
+        for key in ("user_location", "user_preferences", "chat_history_summary", "long_term_memory", "current_time")
+    })
+
+
+def skeleton_messages(context: Dict) -> List[BaseMessage]:
+    return [SKELETON_PREFIX, SystemMessage(content=_context(context)), HumanMessage(content=f"User Query: {context['user_query']}")]
+
+
+def day_messages(context: Dict, skeleton: Dict, day: Dict) -> List[BaseMessage]:
+    """
+    The outline is the same for every day of a trip and comes before the day's own line, so
+    the day calls share everything up to the last message.
+    """
+    outline = "\n".join(f"- Day {d['day']}: {d.get('theme') or ''} ({d.get('area') or 'any area'})" for d in skeleton["days"])
+    where = f" in {skeleton['destination']}" if skeleton.get("destination") else ""
+    trip = f"📝 Trip: {skeleton.get('title') or ''}{where}\n{outline}"
+    return [
+        DAY_PREFIX,
+        SystemMessage(content=_context(context) + "\n" + trip),
+        HumanMessage(content=(
+            f"User Query: {context['user_query']}\n"
+            f"Plan Day {day['day']}: {day.get('theme') or ''} ({day.get('area') or 'any area'})"
+        )),
+    ]
@@ -1,13 +1,13 @@
 from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain.memory import ConversationBufferMemory
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
 from typing import List
 from uuid import UUID
 
-from app.models.message import Message
+from app.crud.history import get_recent_turns
+from app.langgraph.nodes.memory.session_cache import session_cache
 import logging
 
 logger = logging.getLogger("ai_assistant")
@@ -19,8 +19,26 @@ class Memory:
         self.db = db
         logger.debug(f"Initialized Memory for session_id: {session_id}")
 
+    async def get_messages(self) -> List[BaseMessage]:
+        """The session's last turns as LangChain messages, without a memory wrapper."""
+        chat_history = self._chat_history()
+        await chat_history.load_messages()
+        return chat_history.messages
+
     async def get_memory(self) -> ConversationBufferMemory:
         logger.debug(f"Creating ConversationBufferMemory for session_id: {self.session_id}")
+        chat_history = self._chat_history()
+        await chat_history.load_messages()
+
+        logger.info(f"Returning ConversationBufferMemory for session_id: {self.session_id}")
+        return ConversationBufferMemory(
+            memory_key="chat_history",
+            return_messages=True,
+            chat_memory=chat_history,
+            input_key="user_query"
+        )
+
+    def _chat_history(self) -> BaseChatMessageHistory:
 
         class _ChatHistory(BaseChatMessageHistory):
             def __init__(self, session_id: UUID, db: AsyncSession):
@@ -31,44 +49,40 @@ class Memory:
                 logger.debug(f"ChatHistory initialized for session_id: {session_id} with limit={self.limit}")
 
             async def load_messages(self) -> List:
+                turns = await session_cache.get_turns(self.session_id)
+                if turns is not None:
+                    logger.debug(f"Loaded {len(turns)} cached turns for session_id: {self.session_id}")
+                    self._set_messages(turns[-self.limit:])
+                    return
+
                 logger.debug(f"Loading last {self.limit} messages from DB for session_id: {self.session_id}")
                 try:
-                    result = await self.db.execute(
-                        select(Message)
-                        .where(Message.session_id == self.session_id)
-                        .order_by(desc(Message.timestamp))
-                        .limit(self.limit)
-                    )
-                    rows = result.scalars().all()
+                    rows = await get_recent_turns(self.db, self.session_id, self.limit)
                     logger.info(f"Fetched {len(rows)} messages from DB for session_id: {self.session_id}")
                 except Exception as e:
                     logger.exception(f"Failed to load messages for session_id: {self.session_id}")
-                    rows = []
+                    self._set_messages([])
+                    return
+
+                turns = [(row.sender, row.compact()) for row in rows]
+                self._set_messages(turns)
+                await session_cache.set_turns(self.session_id, turns)
 
+            def _set_messages(self, turns: List) -> None:
                 self.messages = []
 
-                for msg in reversed(rows):  # Ensure chronological order
-                    if msg.sender == "user":
-                        self.messages.append(HumanMessage(content=msg.message))
-                        logger.debug(f"Loaded HumanMessage: {msg.message}")
-                    elif msg.sender == "ai":
-                        self.messages.append(AIMessage(content=msg.message))
-                        logger.debug(f"Loaded AIMessage: {msg.message}")
+                for sender, text in turns:
+                    if sender == "user":
+                        self.messages.append(HumanMessage(content=text))
+                        logger.debug(f"Loaded HumanMessage: {text}")
+                    elif sender == "ai":
+                        self.messages.append(AIMessage(content=text))
+                        logger.debug(f"Loaded AIMessage: {text}")
                     else:
-                        logger.warning(f"Unknown sender type: {msg.sender} for message ID: {msg.id}")
+                        logger.warning(f"Unknown sender type: {sender} for session_id: {self.session_id}")
 
             def clear(self) -> None:
                 logger.debug(f"Clearing in-memory chat history for session_id: {self.session_id}")
                 self.messages = []
 
-        # Create and load custom chat history
-        chat_history = _ChatHistory(self.session_id, self.db)
-        await chat_history.load_messages()
-
-        logger.info(f"Returning ConversationBufferMemory for session_id: {self.session_id}")
-        return ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True,
-            chat_memory=chat_history,
-            input_key="user_query"
-        )
+        return _ChatHistory(self.session_id, self.db)
@@ -0,0 +1,311 @@
+# app/langgraph/nodes/memory/long_term_memory.py
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Collection, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.history import Exchange, get_session_user_id, get_user_exchanges
+from app.schemas.state import ChatFlowState, flow_context
+from app.utils.metrics import metrics
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger("ai_assistant")
+
+LONG_TERM_MEMORY_BACKEND = os.getenv("LONG_TERM_MEMORY_BACKEND", "none")  # faiss, none
+LONG_TERM_MEMORY_TOP_K = int(os.getenv("LONG_TERM_MEMORY_TOP_K", "4"))
+# Cosine similarity below which a past exchange is not considered relevant.
+LONG_TERM_MEMORY_MIN_SCORE = float(os.getenv("LONG_TERM_MEMORY_MIN_SCORE", "0.35"))
+# Upper bound on the prompt text, however many exchanges the user has.
+LONG_TERM_MEMORY_MAX_CHARS = int(os.getenv("LONG_TERM_MEMORY_MAX_CHARS", "1200"))
+LONG_TERM_MEMORY_MAX_USERS = int(os.getenv("LONG_TERM_MEMORY_MAX_USERS", "1000"))
+LONG_TERM_MEMORY_TTL_S = float(os.getenv("LONG_TERM_MEMORY_TTL_S", "3600"))
+# A shard is built from at most this many of the user's newest exchanges.
+LONG_TERM_MEMORY_MAX_EXCHANGES = int(os.getenv("LONG_TERM_MEMORY_MAX_EXCHANGES", "2000"))
+# How long a query waits for a cold shard before going on without recall; the build carries on.
+LONG_TERM_MEMORY_BUILD_WAIT_S = float(os.getenv("LONG_TERM_MEMORY_BUILD_WAIT_S", "0.2"))
+
+
+class LongTermMemory:
+    """
+    Per-user store of past exchanges (question + answer), searched by similarity to the
+    current query. The base class is the "none" backend: nothing is indexed or recalled.
+    """
+
+    async def user_id(self, db: AsyncSession, session_id: UUID) -> Optional[UUID]:
+        return None
+
+    async def search(
+        self,
+        user_id: UUID,
+        query: str,
+        k: int = LONG_TERM_MEMORY_TOP_K,
+        exclude: Collection[Tuple[UUID, str]] = (),
+    ) -> List[Tuple[Exchange, float]]:
+        return []
+
+    async def add(self, user_id: UUID, exchange: Exchange) -> None:
+        pass
+
+    def forget_user(self, user_id: UUID) -> None:
+        """Drops what is held for the user, e.g. after their messages were deleted."""
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+def _unit(vectors) -> np.ndarray:
+    """L2-normalized float32 rows, so inner product is cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class _Shard:
+    __slots__ = ("store", "exchanges")
+
+    def __init__(self):
+        self.store = None  # FAISS, created with the first exchange
+        self.exchanges: Dict[str, Exchange] = {}
+
+
+class FaissLongTermMemory(LongTermMemory):
+    """
+    One in-process FAISS index per user (a shard), so a search only scans that user's history.
+
+    A shard is built from the user's newest `max_exchanges` in the database (get_user_exchanges)
+    the first time the user is seen, kept in an LRU of `max_users`, and extended by
+    save_to_db_node as new exchanges are saved. The build runs in a background task on its own
+    DB session: a query waits for it at most `build_wait` seconds and otherwise goes on without
+    recall. Exchanges saved during a build are indexed when it ends; those saved while a shard is
+    not resident are picked up when it is rebuilt. Embedding and FAISS work runs on one
+    dedicated thread, so it neither blocks the event loop nor races.
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[Callable[[], Embeddings]] = None,
+        max_users: int = LONG_TERM_MEMORY_MAX_USERS,
+        ttl: float = LONG_TERM_MEMORY_TTL_S,
+        min_score: float = LONG_TERM_MEMORY_MIN_SCORE,
+        max_exchanges: int = LONG_TERM_MEMORY_MAX_EXCHANGES,
+        build_wait: float = LONG_TERM_MEMORY_BUILD_WAIT_S,
+        sessions: Optional[Callable[[], AsyncSession]] = None,
+    ):
+        if embeddings is None:
+            from app.utils.embedding_backends import shared_embeddings
+            embeddings = shared_embeddings
+        self._embeddings_factory = embeddings
+        self._embeddings: Optional[Embeddings] = None
+        self._sessions = sessions
+        self.min_score = min_score
+        self.max_exchanges = max_exchanges
+        self.build_wait = build_wait
+        self.shards = TTLCache(maxsize=max_users, ttl=ttl)
+        self.session_users = TTLCache(maxsize=max_users * 10, ttl=ttl)
+        self._building: Dict[UUID, asyncio.Task] = {}
+        self._saved_while_building: Dict[asyncio.Task, List[Exchange]] = {}  # per build task
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="long-term-memory")
+
+    @property
+    def embeddings(self) -> Embeddings:
+        if self._embeddings is None:
+            self._embeddings = self._embeddings_factory()
+        return self._embeddings
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    async def user_id(self, db: AsyncSession, session_id: UUID) -> Optional[UUID]:
+        user_id = self.session_users.get(session_id)
+        if user_id is None:
+            user_id = await get_session_user_id(db, session_id)
+            if user_id is not None:
+                self.session_users.set(session_id, user_id)
+        return user_id
+
+    # --- shards -------------------------------------------------------
+
+    def _index(self, shard: _Shard, exchanges: List[Exchange]) -> None:
+        """Runs in the pool: embeds `exchanges` and adds them to the shard's index."""
+        from langchain_community.vectorstores import FAISS
+        from langchain_community.vectorstores.utils import DistanceStrategy
+
+        exchanges = [e for e in exchanges if str(e.id) not in shard.exchanges]
+        if not exchanges:
+            return
+        texts = [e.text() for e in exchanges]
+        ids = [str(e.id) for e in exchanges]
+        metadatas = [{"id": id_} for id_ in ids]
+        pairs = list(zip(texts, _unit(self.embeddings.embed_documents(texts)).tolist()))
+        if shard.store is None:
+            shard.store = FAISS.from_embeddings(
+                pairs, self.embeddings, metadatas=metadatas, ids=ids,
+                distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+            )
+        else:
+            shard.store.add_embeddings(pairs, metadatas=metadatas, ids=ids)
+        shard.exchanges.update(zip(ids, exchanges))
+
+    async def build_shard(self, user_id: UUID, exchanges: List[Exchange]) -> _Shard:
+        """Indexes `exchanges` as the user's shard, replacing any resident one."""
+        shard = _Shard()
+        await self._run(self._index, shard, exchanges)
+        self.shards.set(user_id, shard)
+        metrics.increment("long_term_memory.shard_builds")
+        logger.info(f"Built long-term memory shard for user {user_id} with {len(exchanges)} exchanges")
+        return shard
+
+    async def _load_shard(self, user_id: UUID) -> _Shard:
+        """Background task: builds the user's shard from the database."""
+        if self._sessions is None:
+            from app.db.connection import AsyncSessionLocal
+            self._sessions = AsyncSessionLocal
+        this = asyncio.current_task()
+        try:
+            async with self._sessions() as db:
+                exchanges = await get_user_exchanges(db, user_id, self.max_exchanges)
+            shard = await self.build_shard(user_id, exchanges)
+            while self._saved_while_building.get(this):
+                await self._run(self._index, shard, self._saved_while_building.pop(this))
+            return shard
+        except Exception:
+            logger.exception(f"Building the long-term memory shard for user {user_id} failed")
+            raise
+        finally:
+            # A build cancelled by forget_user() may end after the next query started another.
+            if self._building.get(user_id) is this:
+                del self._building[user_id]
+            self._saved_while_building.pop(this, None)
+
+    async def _shard(self, user_id: UUID) -> Optional[_Shard]:
+        """The user's shard, or None if it is not built within `build_wait` seconds."""
+        shard = self.shards.get(user_id)
+        if shard is not None:
+            return shard
+        building = self._building.get(user_id)
+        if building is None:
+            building = asyncio.ensure_future(self._load_shard(user_id))
+            building.add_done_callback(lambda t: t.cancelled() or t.exception())  # logged in the task
+            self._building[user_id] = building
+        await asyncio.wait({building}, timeout=self.build_wait)
+        if not building.done():
+            metrics.increment("long_term_memory.cold_misses")
+            return None
+        return None if building.cancelled() or building.exception() else building.result()
+
+    # --- public API ---------------------------------------------------
+
+    async def search(
+        self,
+        user_id: UUID,
+        query: str,
+        k: int = LONG_TERM_MEMORY_TOP_K,
+        exclude: Collection[Tuple[UUID, str]] = (),
+    ) -> List[Tuple[Exchange, float]]:
+        """
+        Top-k past exchanges of the user by cosine similarity to `query`, best first, skipping
+        those scoring under min_score and (session_id, question) pairs listed in `exclude`.
+        Empty while the user's shard is still being built.
+        """
+        shard = await self._shard(user_id)
+        if shard is None or shard.store is None:
+            return []
+
+        def search_shard() -> List[Tuple[Exchange, float]]:
+            vector = _unit(self.embeddings.embed_query(query)).tolist()
+            hits = shard.store.similarity_search_with_score_by_vector(vector, k=k + len(exclude))
+            found = []
+            for doc, score in hits:
+                exchange = shard.exchanges[doc.metadata["id"]]
+                if score >= self.min_score and (exchange.session_id, exchange.question) not in exclude:
+                    found.append((exchange, float(score)))
+            return found[:k]
+
+        found = await self._run(search_shard)
+        metrics.observe("long_term_memory.hits", len(found))
+        return found
+
+    async def add(self, user_id: UUID, exchange: Exchange) -> None:
+        shard = self.shards.get(user_id)
+        if shard is None:
+            building = self._building.get(user_id)
+            if building is not None:  # the build may have read the DB before this was saved
+                self._saved_while_building.setdefault(building, []).append(exchange)
+            return  # otherwise indexed from the DB when the shard is next built
+        await self._run(self._index, shard, [exchange])
+
+    def forget_user(self, user_id: UUID) -> None:
+        """Drops the user's shard and any build in flight; the next query rebuilds it from the DB."""
+        self.shards.pop(user_id)
+        building = self._building.pop(user_id, None)
+        if building is not None:
+            building.cancel()
+
+    async def close(self) -> None:
+        for building in list(self._building.values()):
+            building.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def build_long_term_memory(backend: str = LONG_TERM_MEMORY_BACKEND) -> LongTermMemory:
+    if backend == "faiss":
+        return FaissLongTermMemory()
+    if backend == "none":
+        return LongTermMemory()
+    raise ValueError(f"Unknown LONG_TERM_MEMORY_BACKEND '{backend}'. Choose faiss or none.")
+
+
+long_term_memory = build_long_term_memory()
+logger.debug(f"Long-term memory backend: {LONG_TERM_MEMORY_BACKEND}")
+
+
+def format_recollections(found: List[Tuple[Exchange, float]], max_chars: int = LONG_TERM_MEMORY_MAX_CHARS) -> str:
+    """Prompt lines for recalled exchanges, best first, cut off at `max_chars`."""
+    lines, used = [], 0
+    for exchange, _ in found:
+        day = exchange.timestamp.strftime("%Y-%m-%d") if exchange.timestamp else "earlier"
+        line = f"- [{day}] " + exchange.text().replace("\n", " | ")
+        if used + len(line) > max_chars:
+            if not lines:
+                lines.append(line[:max_chars])
+            break
+        lines.append(line)
+        used += len(line) + 1
+    return "\n".join(lines)
+
+
+def _recent_questions(state: ChatFlowState) -> List[Tuple[UUID, str]]:
+    """Questions already in the short-term window, so they are not quoted twice."""
+    history = state.get("chat_memory") or []
+    return [(state["session_id"], m.content) for m in history if isinstance(m, HumanMessage)]
+
+
+async def long_term_memory_node(state: ChatFlowState, config: RunnableConfig) -> dict:
+    """
+    Recalls the user's past exchanges most relevant to the query, from this and earlier
+    sessions, into `long_term_memory` (at most LONG_TERM_MEMORY_TOP_K, LONG_TERM_MEMORY_MAX_CHARS).
+    """
+    session_id = state["session_id"]
+    db = flow_context(config).db
+    logger.debug(f"Recalling long-term memory for session_id: {session_id}")
+
+    try:
+        user_id = await long_term_memory.user_id(db, session_id)
+        if user_id is None:
+            return {"user_id": None, "long_term_memory": ""}
+        found = await long_term_memory.search(user_id, state["user_query"], exclude=set(_recent_questions(state)))
+        logger.info(f"Recalled {len(found)} past exchanges for session_id: {session_id}")
+        return {"user_id": user_id, "long_term_memory": format_recollections(found)}
+    except Exception as e:
+        logger.exception(f"Long-term memory recall failed for session_id: {session_id}")
+        return {"long_term_memory": ""}
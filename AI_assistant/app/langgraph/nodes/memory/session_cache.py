@@ -0,0 +1,245 @@
+# app/langgraph/nodes/memory/session_cache.py
+
+import json
+import logging
+import os
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from app.utils.metrics import metrics
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger("ai_assistant")
+
+SESSION_CACHE_BACKEND = os.getenv("SESSION_CACHE_BACKEND", "memory")  # memory, redis, none
+SESSION_CACHE_URL = os.getenv("SESSION_CACHE_URL", "redis://localhost:6379/0")
+SESSION_CACHE_TTL_S = float(os.getenv("SESSION_CACHE_TTL_S", "900"))
+SESSION_CACHE_MAX_SESSIONS = int(os.getenv("SESSION_CACHE_MAX_SESSIONS", "10000"))
+SESSION_CACHE_MAX_TURNS = int(os.getenv("SESSION_CACHE_MAX_TURNS", "10"))
+
+# (sender, message) in chronological order
+Turn = Tuple[str, str]
+
+
+class SessionCache:
+    """
+    Per-session hot cache of recent turns, the total message count and the latest summary.
+
+    Reads fall back to the database on a miss and populate the cache; save_to_db_node writes
+    through it, so a warm session never needs to re-read its own history. Appends only apply
+    to sessions that are already cached, so the cache never holds a partial history.
+    The base class is the "none" backend: every read misses and writes are dropped.
+    """
+
+    async def get_turns(self, session_id: UUID) -> Optional[List[Turn]]:
+        return None
+
+    async def set_turns(self, session_id: UUID, turns: List[Turn], message_count: Optional[int] = None) -> None:
+        pass
+
+    async def append_turns(self, session_id: UUID, turns: List[Turn]) -> None:
+        pass
+
+    async def get_message_count(self, session_id: UUID) -> Optional[int]:
+        return None
+
+    async def set_message_count(self, session_id: UUID, message_count: int) -> None:
+        pass
+
+    async def get_summary(self, session_id: UUID) -> Optional[Tuple[int, str]]:
+        """Returns (message_count_when_summarized, summary) or None."""
+        return None
+
+    async def set_summary(self, session_id: UUID, message_count: int, summary: str) -> None:
+        pass
+
+    async def invalidate(self, session_id: UUID) -> None:
+        pass
+
+
+class _SessionEntry:
+    __slots__ = ("turns", "message_count", "summary")
+
+    def __init__(self):
+        self.turns: Optional[List[Turn]] = None
+        self.message_count: Optional[int] = None
+        self.summary: Optional[Tuple[int, str]] = None
+
+
+class InMemorySessionCache(SessionCache):
+    """
+    In-process LRU/TTL implementation. Only consistent when a session's requests hit one
+    worker; use the redis backend for multi-worker deployments.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = SESSION_CACHE_MAX_SESSIONS,
+        ttl: float = SESSION_CACHE_TTL_S,
+        max_turns: int = SESSION_CACHE_MAX_TURNS,
+    ):
+        self.entries = TTLCache(maxsize=max_sessions, ttl=ttl)
+        self.max_turns = max_turns
+
+    def _entry(self, session_id: UUID, create: bool = False) -> Optional[_SessionEntry]:
+        entry = self.entries.get(session_id)
+        if entry is None and create:
+            entry = _SessionEntry()
+            self.entries.set(session_id, entry)
+        return entry
+
+    def _touch(self, session_id: UUID, entry: _SessionEntry) -> None:
+        # Writes refresh the TTL; reads only refresh LRU order.
+        self.entries.set(session_id, entry)
+
+    async def get_turns(self, session_id: UUID) -> Optional[List[Turn]]:
+        entry = self._entry(session_id)
+        turns = entry.turns if entry else None
+        metrics.increment("session_cache.hits" if turns is not None else "session_cache.misses")
+        return list(turns) if turns is not None else None
+
+    async def set_turns(self, session_id: UUID, turns: List[Turn], message_count: Optional[int] = None) -> None:
+        entry = self._entry(session_id, create=True)
+        entry.turns = list(turns[-self.max_turns:])
+        if message_count is not None:
+            entry.message_count = message_count
+        self._touch(session_id, entry)
+
+    async def append_turns(self, session_id: UUID, turns: List[Turn]) -> None:
+        entry = self._entry(session_id)
+        if entry is None:
+            return
+        if entry.turns is not None:
+            entry.turns = (entry.turns + list(turns))[-self.max_turns:]
+        if entry.message_count is not None:
+            entry.message_count += len(turns)
+        self._touch(session_id, entry)
+
+    async def get_message_count(self, session_id: UUID) -> Optional[int]:
+        entry = self._entry(session_id)
+        return entry.message_count if entry else None
+
+    async def set_message_count(self, session_id: UUID, message_count: int) -> None:
+        entry = self._entry(session_id, create=True)
+        entry.message_count = message_count
+        self._touch(session_id, entry)
+
+    async def get_summary(self, session_id: UUID) -> Optional[Tuple[int, str]]:
+        entry = self._entry(session_id)
+        return entry.summary if entry else None
+
+    async def set_summary(self, session_id: UUID, message_count: int, summary: str) -> None:
+        entry = self._entry(session_id, create=True)
+        entry.summary = (message_count, summary)
+        self._touch(session_id, entry)
+
+    async def invalidate(self, session_id: UUID) -> None:
+        self.entries.pop(session_id)
+
+
+class RedisSessionCache(SessionCache):
+    """
+    Redis (or any Redis-protocol server) implementation shared by all workers.
+    Keys expire after `ttl`; configure the server with `maxmemory-policy allkeys-lru`
+    for LRU eviction under memory pressure.
+
+    Layout per session:
+        session:{id}:turns  list of JSON [sender, message], capped at max_turns
+        session:{id}:meta   hash with turns_loaded, message_count, summary_count, summary
+    """
+
+    def __init__(
+        self,
+        url: str = SESSION_CACHE_URL,
+        ttl: float = SESSION_CACHE_TTL_S,
+        max_turns: int = SESSION_CACHE_MAX_TURNS,
+        client=None,
+    ):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url, decode_responses=True)
+        self.redis = client
+        self.ttl = int(ttl)
+        self.max_turns = max_turns
+
+    @staticmethod
+    def _keys(session_id: UUID) -> Tuple[str, str]:
+        return f"session:{session_id}:turns", f"session:{session_id}:meta"
+
+    async def get_turns(self, session_id: UUID) -> Optional[List[Turn]]:
+        turns_key, meta_key = self._keys(session_id)
+        if not await self.redis.hget(meta_key, "turns_loaded"):
+            metrics.increment("session_cache.misses")
+            return None
+        metrics.increment("session_cache.hits")
+        return [tuple(json.loads(raw)) for raw in await self.redis.lrange(turns_key, 0, -1)]
+
+    async def set_turns(self, session_id: UUID, turns: List[Turn], message_count: Optional[int] = None) -> None:
+        turns_key, meta_key = self._keys(session_id)
+        meta = {"turns_loaded": 1}
+        if message_count is not None:
+            meta["message_count"] = message_count
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(turns_key)
+            if turns:
+                pipe.rpush(turns_key, *[json.dumps(list(t)) for t in turns[-self.max_turns:]])
+            pipe.hset(meta_key, mapping=meta)
+            pipe.expire(turns_key, self.ttl)
+            pipe.expire(meta_key, self.ttl)
+            await pipe.execute()
+
+    async def append_turns(self, session_id: UUID, turns: List[Turn]) -> None:
+        turns_key, meta_key = self._keys(session_id)
+        loaded, count = await self.redis.hmget(meta_key, "turns_loaded", "message_count")
+        if not loaded and count is None:
+            return
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if loaded:
+                pipe.rpush(turns_key, *[json.dumps(list(t)) for t in turns])
+                pipe.ltrim(turns_key, -self.max_turns, -1)
+                pipe.expire(turns_key, self.ttl)
+            if count is not None:
+                pipe.hincrby(meta_key, "message_count", len(turns))
+            pipe.expire(meta_key, self.ttl)
+            await pipe.execute()
+
+    async def get_message_count(self, session_id: UUID) -> Optional[int]:
+        count = await self.redis.hget(self._keys(session_id)[1], "message_count")
+        return int(count) if count is not None else None
+
+    async def set_message_count(self, session_id: UUID, message_count: int) -> None:
+        meta_key = self._keys(session_id)[1]
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(meta_key, "message_count", message_count)
+            pipe.expire(meta_key, self.ttl)
+            await pipe.execute()
+
+    async def get_summary(self, session_id: UUID) -> Optional[Tuple[int, str]]:
+        count, summary = await self.redis.hmget(self._keys(session_id)[1], "summary_count", "summary")
+        if count is None or summary is None:
+            return None
+        return int(count), summary
+
+    async def set_summary(self, session_id: UUID, message_count: int, summary: str) -> None:
+        meta_key = self._keys(session_id)[1]
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(meta_key, mapping={"summary_count": message_count, "summary": summary})
+            pipe.expire(meta_key, self.ttl)
+            await pipe.execute()
+
+    async def invalidate(self, session_id: UUID) -> None:
+        await self.redis.delete(*self._keys(session_id))
+
+
+def build_session_cache(backend: str = SESSION_CACHE_BACKEND) -> SessionCache:
+    if backend == "memory":
+        return InMemorySessionCache()
+    if backend == "redis":
+        return RedisSessionCache()
+    if backend == "none":
+        return SessionCache()
+    raise ValueError(f"Unknown SESSION_CACHE_BACKEND '{backend}'. Choose memory, redis or none.")
+
+
+session_cache = build_session_cache()
+logger.debug(f"Session cache backend: {SESSION_CACHE_BACKEND}")
@@ -1,46 +1,65 @@
 # flows/langgraph/nodes/summarize_history.py
 
-from app.schemas.state import ChatFlowState
-from langchain_ollama import OllamaLLM
+from app.schemas.state import ChatFlowState, flow_context
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableConfig
 
-from app.models.message import Message
-from sqlalchemy import select, asc
+from app.crud.history import count_messages, get_all_turns
+from app.langgraph.nodes.memory.session_cache import session_cache
+from app.utils.ollama_pool import get_llm
 import logging
+import os
 
 logger = logging.getLogger("ai_assistant")
 
+SUMMARY_MIN_MESSAGES = 12
+# Reuse the cached summary until this many new messages have been saved.
+SUMMARY_REFRESH_MESSAGES = int(os.getenv("SUMMARY_REFRESH_MESSAGES", "6"))
 
-async def summarize_history_node(state: ChatFlowState) -> ChatFlowState:
+llm = get_llm(model="llama3.2")
+
+
+async def _message_count(db, session_id) -> int:
+    count = await session_cache.get_message_count(session_id)
+    if count is None:
+        count = await count_messages(db, session_id)
+        await session_cache.set_message_count(session_id, count)
+    return count
+
+
+async def summarize_history_node(state: ChatFlowState, config: RunnableConfig) -> dict:
     """
     Summarizes the full chat session by querying all messages for the session_id from the DB.
-    Returns updated state with `summary`.
+    The message count and the last summary come from the session cache when warm, so short
+    sessions and recently summarized ones skip the DB and the LLM.
+    Returns `chat_history_summary`.
     """
-    db = state.db
-    session_id = state.session_id
+    db = flow_context(config).db
+    session_id = state["session_id"]
 
     logger.debug(f"Starting summarization for session_id: {session_id}")
 
     try:
-        # Fetch all messages for session
-        result = await db.execute(
-            select(Message)
-            .where(Message.session_id == session_id)
-            .order_by(asc(Message.timestamp))
-        )
-        rows = result.scalars().all()
-        logger.info(f"Fetched {len(rows)} messages for summarization (session_id: {session_id})")
-
         # Short-circuit if not enough context
-        if not rows or len(rows) < 12:
+        count = await _message_count(db, session_id)
+        if count < SUMMARY_MIN_MESSAGES:
             logger.info(f"Insufficient messages for summarization (session_id: {session_id})")
-            state.chat_history_summary = ""
-            return state
+            return {"chat_history_summary": ""}
+
+        cached = await session_cache.get_summary(session_id)
+        if cached and count - cached[0] < SUMMARY_REFRESH_MESSAGES:
+            logger.info(f"Reusing cached summary for session_id: {session_id}")
+            return {"chat_history_summary": cached[1]}
+
+        # Fetch all messages for session
+        rows = await get_all_turns(db, session_id)
+        logger.info(f"Fetched {len(rows)} messages for summarization (session_id: {session_id})")
+        await session_cache.set_message_count(session_id, len(rows))
 
         # Format messages
         history_text = "\n".join([
-            f"{'User' if msg.sender == 'user' else 'AI'}: {msg.message}" for msg in rows
+            f"{'User' if msg.sender == 'user' else 'AI'}: {msg.text()}" for msg in rows
         ])
         logger.debug(f"Formatted history text for summarization (session_id: {session_id})")
 
@@ -54,17 +73,17 @@ async def summarize_history_node(state: ChatFlowState) -> ChatFlowState:
 
             Summary:
         """)
-        chain = prompt | OllamaLLM(model="llama3.2") | StrOutputParser()
+        chain = prompt | llm | StrOutputParser()
 
         # Run summarization
-        summary = chain.invoke({"history": history_text})
-        state.chat_history_summary = summary.strip()
+        summary = (await chain.ainvoke({"history": history_text})).strip()
+        await session_cache.set_summary(session_id, len(rows), summary)
 
         logger.info(f"Generated summary for session_id: {session_id}")
-        logger.debug(f"Summary: {state.chat_history_summary}")
+        logger.debug(f"Summary: {summary}")
 
     except Exception as e:
         logger.exception(f"Summarization failed for session_id: {session_id}")
-        state.chat_history_summary = ""
+        summary = ""
 
-    return state
+    return {"chat_history_summary": summary}
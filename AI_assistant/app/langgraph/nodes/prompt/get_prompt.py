@@ -1,47 +1,72 @@
-from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate
+from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, HumanMessagePromptTemplate, MessagesPlaceholder
+from langchain_core.messages import SystemMessage
 from jinja2 import Template
+from typing import Dict
 import json
 import logging
 
 logger = logging.getLogger("ai_assistant")
 
 
+# Placeholders left in the static prefix; the model reads their values from the Context message.
+PREFIX_PLACEHOLDERS = {
+    "sub_intent": "{sub_intent}",
+    "user_location": "{user_location}",
+    "current_time": "{current_time}",
+}
+
+STATIC_PREFIX_TEMPLATE = """
+You are **Teeow.ai**, a smart and friendly AI **travel consultant**.
+
+- system_instruction: {system_instruction}
+
+Placeholders such as {{sub_intent}}, {{user_location}} and {{current_time}} stand for the values given in the Context message.
+
+🧾 FORMAT INSTRUCTIONS:
+You must **respond ONLY using the JSON structure shown below**. Do not create new keys. Do not add fields like "answer", "suggestions", or "follow_up" unless they already exist in the format. 
+
+🧱 OUTPUT STRUCTURE (MUST match exactly):
+```json
+{output_format}
+```
+"""
+
+
 class PromptBuilder:
     """
     Flexible prompt builder for Teeow.ai generation tasks.
-    Allows formatting with dynamic variables using LangChain's ChatPromptTemplate.
+
+    Prompts are laid out static-first so the inference server can reuse its KV cache:
+    the per-intent prefix (persona, instruction, format) is byte-identical across requests,
+    and everything that changes per request follows it in the Context and user messages.
     """
 
     def __init__(self):
         logger.debug("Initializing PromptBuilder...")
+        self._prefixes: Dict[str, SystemMessage] = {}
 
         try:
-            system_template = """
-                You are **Teeow.ai**, a smart and friendly AI **travel consultant**.
-
-                - system_instruction: {system_instruction}
-
-                📌 Personalization:
+            # Roughly ordered from most to least stable within a session.
+            context_template = """
+                📌 Context:
+                - Sub-intent: {sub_intent}
                 - Location: {user_location}
-                - Time: {current_time}
+                - Popular Picks: {warm_recommendation}
                 - Preferences: {user_preferences}
                 - Past Summary: {chat_history_summary}
+                - Related Past Conversations:
+                {long_term_memory}
                 - Last Messages: {chat_memory}
+                - Time: {current_time}
 
                 📡 Real-time Info: {realtime_info}
-                🧾 FORMAT INSTRUCTIONS:
-                You must **respond ONLY using the JSON structure shown below**. Do not create new keys. Do not add fields like "answer", "suggestions", or "follow_up" unless they already exist in the format. 
-
-                🧱 OUTPUT STRUCTURE (MUST match exactly):
-                ```json
-                {output_format}
-                ```
             """
 
             user_template = "User Query: {user_query}"
 
             self.template = ChatPromptTemplate.from_messages([
-                SystemMessagePromptTemplate.from_template(system_template),
+                MessagesPlaceholder("static_prefix"),
+                SystemMessagePromptTemplate.from_template(context_template),
                 HumanMessagePromptTemplate.from_template(user_template)
             ])
 
@@ -53,6 +78,20 @@ class PromptBuilder:
         logger.debug("Retrieving ChatPromptTemplate from PromptBuilder.")
         return self.template
 
+    def static_prefix(self, intent_obj: dict) -> SystemMessage:
+        """The intent's system message; rendered once and reused so it stays byte-identical."""
+        key = intent_obj["intent"]
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            instruction = Template(intent_obj["system_instruction"]).render(**PREFIX_PLACEHOLDERS)
+            output_format = Template(json.dumps(intent_obj["output_format"], indent=2)).render(**PREFIX_PLACEHOLDERS)
+            prefix = SystemMessage(content=STATIC_PREFIX_TEMPLATE.format(
+                system_instruction=instruction, output_format=output_format,
+            ))
+            self._prefixes[key] = prefix
+            logger.debug(f"Rendered static prompt prefix for intent: {key}")
+        return prefix
+
 
 if __name__ == "__main__":
 
@@ -99,27 +138,27 @@ if __name__ == "__main__":
         "user_preferences": "vegetarian, romantic, low budget",
         "chat_history_summary": "User is planning a romantic weekend in Delhi",
         "chat_memory": "Previously asked for cafes and couple activities",
+        "long_term_memory": "- [2025-05-02] User: Vegan cafes in Delhi? | AI: Top Recommendations for food in Delhi; items: Greenr Cafe (4.4)",
+        "warm_recommendation": "Top Recommendations for food in New Delhi; items: Sattvik (4.4), Saravana Bhavan (4.3)",
         "realtime_info": "3 romantic vegetarian restaurants nearby are open with 4.5+ ratings"
     }
 
-    # ✅ Fix: Pre-render system_instruction and output_format using jinja2
-    rendered_instruction = Template(intent_obj["system_instruction"]).render(**state)
-    rendered_output_format = Template(json.dumps(intent_obj["output_format"], indent=2)).render(**state)
-
     # Build prompt
     builder = PromptBuilder()
     prompt = builder.get_prompt()
 
     # Final prompt messages
     messages = prompt.format_messages(
-        system_instruction=rendered_instruction,
-        output_format=rendered_output_format,
+        static_prefix=[builder.static_prefix(intent_obj)],
+        sub_intent=state["sub_intent"],
         user_query=state["user_query"],
         user_location=state["user_location"],
         current_time=state["current_time"],
         user_preferences=state["user_preferences"],
         chat_history_summary=state["chat_history_summary"],
         chat_memory=state["chat_memory"],
+        long_term_memory=state["long_term_memory"],
+        warm_recommendation=state["warm_recommendation"],
         realtime_info=state["realtime_info"]
     )
 
@@ -0,0 +1,148 @@
+# app/langgraph/nodes/realtime/providers.py
+
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from app.utils.metrics import metrics
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger("ai_assistant")
+
+REALTIME_PROVIDERS = os.getenv("REALTIME_PROVIDERS", "")  # comma-separated, e.g. "stub"
+REALTIME_DEADLINE_MS = float(os.getenv("REALTIME_DEADLINE_MS", "300"))
+REALTIME_PROVIDER_TIMEOUT_S = float(os.getenv("REALTIME_PROVIDER_TIMEOUT_S", "5"))
+REALTIME_CACHE_TTL_S = float(os.getenv("REALTIME_CACHE_TTL_S", "300"))
+REALTIME_CACHE_MAX_KEYS = int(os.getenv("REALTIME_CACHE_MAX_KEYS", "5000"))
+REALTIME_STUB_DELAY_MS = float(os.getenv("REALTIME_STUB_DELAY_MS", "0"))
+
+
+class RealtimeProvider:
+    """
+    Source of real-time context (opening hours, weather, events...) for a location.
+    `fetch` returns a short line for the prompt, or None when it has nothing relevant.
+    Set `sub_intents` to limit which sub_intents the provider is asked about.
+    """
+
+    name: str = "provider"
+    sub_intents: Optional[set] = None
+
+    def supports(self, sub_intent: Optional[str]) -> bool:
+        return self.sub_intents is None or sub_intent in self.sub_intents
+
+    async def fetch(self, location: str, sub_intent: Optional[str]) -> Optional[str]:
+        raise NotImplementedError
+
+
+class StubRealtimeProvider(RealtimeProvider):
+    """Local canned data for tests and load runs; `delay_s` simulates a slow upstream."""
+
+    name = "stub"
+
+    OPENING_HOURS = {
+        "food": "Most restaurants are open until 23:00; breakfast places open at 07:00.",
+        "attractions": "Museums and forts are open 09:00-17:30; most close on Mondays.",
+        "activities": "Outdoor activities run 06:00-18:00; evening slots need booking.",
+        "local gems": "Markets are busiest after 18:00; small shops close around 21:00.",
+    }
+
+    def __init__(self, delay_s: float = REALTIME_STUB_DELAY_MS / 1000):
+        self.delay_s = delay_s
+        self.calls = 0
+
+    async def fetch(self, location: str, sub_intent: Optional[str]) -> Optional[str]:
+        self.calls += 1
+        if self.delay_s:
+            await asyncio.sleep(self.delay_s)
+        hours = self.OPENING_HOURS.get(sub_intent or "")
+        weather = f"Weather in {location}: clear, 27°C."
+        return f"{weather} {hours}" if hours else weather
+
+
+PROVIDER_FACTORIES: Dict[str, Callable[[], RealtimeProvider]] = {
+    "stub": StubRealtimeProvider,
+}
+
+
+class RealtimeInfoFetcher:
+    """
+    Fetches every provider concurrently and returns whatever arrived within `deadline_s`.
+
+    Results are cached per (provider, location, sub_intent) for `ttl` seconds. Providers that
+    miss the deadline are dropped from this request but keep running in the background
+    (bounded by `provider_timeout_s`) so their result is cached for the next request; a
+    provider is never fetched twice concurrently for the same key.
+    """
+
+    def __init__(
+        self,
+        providers: List[RealtimeProvider],
+        deadline_s: float = REALTIME_DEADLINE_MS / 1000,
+        provider_timeout_s: float = REALTIME_PROVIDER_TIMEOUT_S,
+        ttl: float = REALTIME_CACHE_TTL_S,
+        max_keys: int = REALTIME_CACHE_MAX_KEYS,
+    ):
+        self.providers = providers
+        self.deadline_s = deadline_s
+        self.provider_timeout_s = provider_timeout_s
+        self.cache = TTLCache(maxsize=max_keys, ttl=ttl)
+        self._in_flight: Dict[Tuple[str, str, str], asyncio.Task] = {}
+
+    async def _fetch_one(self, provider: RealtimeProvider, key: Tuple[str, str, str], location: str, sub_intent: Optional[str]) -> Optional[str]:
+        started = time.perf_counter()
+        try:
+            value = await asyncio.wait_for(provider.fetch(location, sub_intent), self.provider_timeout_s)
+            self.cache.set(key, value)
+            return value
+        except Exception as e:
+            metrics.increment(f"realtime.{provider.name}.errors")
+            logger.warning(f"Realtime provider '{provider.name}' failed for {location}/{sub_intent}: {e!r}")
+            return None
+        finally:
+            metrics.observe(f"realtime.{provider.name}.fetch_ms", (time.perf_counter() - started) * 1000)
+            self._in_flight.pop(key, None)
+
+    async def fetch(self, location: str, sub_intent: Optional[str]) -> str:
+        results: Dict[str, Optional[str]] = {}
+        pending: Dict[asyncio.Task, str] = {}
+
+        for provider in self.providers:
+            if not provider.supports(sub_intent):
+                continue
+            key = (provider.name, location, sub_intent or "")
+            if key in self.cache:
+                metrics.increment("realtime.cache_hits")
+                results[provider.name] = self.cache.get(key)
+                continue
+            metrics.increment("realtime.cache_misses")
+            task = self._in_flight.get(key)
+            if task is None:
+                task = asyncio.create_task(self._fetch_one(provider, key, location, sub_intent))
+                self._in_flight[key] = task
+            pending[task] = provider.name
+
+        if pending:
+            done, late = await asyncio.wait(pending, timeout=self.deadline_s)
+            for task in done:
+                results[pending[task]] = task.result()
+            for task in late:
+                metrics.increment(f"realtime.{pending[task]}.late")
+                logger.info(f"Realtime provider '{pending[task]}' missed the {self.deadline_s * 1000:.0f} ms deadline")
+
+        lines = [results[p.name] for p in self.providers if results.get(p.name)]
+        return "\n".join(f"- {line}" for line in lines)
+
+
+def build_realtime_fetcher(names: str = REALTIME_PROVIDERS) -> RealtimeInfoFetcher:
+    providers = []
+    for name in filter(None, (n.strip() for n in names.split(","))):
+        if name not in PROVIDER_FACTORIES:
+            raise ValueError(f"Unknown realtime provider '{name}'. Choose from: {', '.join(PROVIDER_FACTORIES)}")
+        providers.append(PROVIDER_FACTORIES[name]())
+    logger.debug(f"Realtime providers: {[p.name for p in providers] or 'none'}")
+    return RealtimeInfoFetcher(providers)
+
+
+realtime_fetcher = build_realtime_fetcher()
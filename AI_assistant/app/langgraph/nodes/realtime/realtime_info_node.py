@@ -0,0 +1,26 @@
+# app/langgraph/nodes/realtime/realtime_info_node.py
+
+from app.langgraph.nodes.realtime.providers import realtime_fetcher
+from app.schemas.state import ChatFlowState
+import logging
+
+logger = logging.getLogger("ai_assistant")
+
+
+async def realtime_info_node(state: ChatFlowState) -> dict:
+    """
+    Fills `realtime_info` from the configured providers. Bounded by REALTIME_DEADLINE_MS;
+    a provider failure only leaves its line out of the prompt.
+    """
+    session_id = state["session_id"]
+    location, sub_intent = state.get("user_location"), state.get("sub_intent")
+    logger.debug(f"Fetching realtime info for {location}/{sub_intent} (session_id: {session_id})")
+
+    try:
+        realtime_info = await realtime_fetcher.fetch(location or "", sub_intent)
+        logger.info(f"Realtime info ready for session_id: {session_id} ({len(realtime_info)} chars)")
+    except Exception as e:
+        logger.exception(f"Failed to fetch realtime info for session_id: {session_id}")
+        realtime_info = ""
+
+    return {"realtime_info": realtime_info}
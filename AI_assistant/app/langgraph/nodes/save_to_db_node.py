@@ -1,27 +1,34 @@
 from uuid import uuid4
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from app.models.message import Message
 from app.crud.message import create_message
-from app.schemas.state import ChatFlowState
-from app.utils.format_json_as_text import format_json_as_text  # type: ignore
+from app.crud.history import Exchange
+from app.langgraph.nodes.memory.long_term_memory import long_term_memory
+from app.langgraph.nodes.memory.session_cache import session_cache
+from app.schemas.state import ChatFlowState, flow_context
+from app.utils.compact_response import compact_response
+from app.utils.session_gate import commit_point
+from langchain_core.runnables import RunnableConfig
 import logging
 
 logger = logging.getLogger("ai_assistant")
 
-async def save_to_db_node(state: ChatFlowState) -> ChatFlowState:
+async def save_to_db_node(state: ChatFlowState, config: RunnableConfig) -> dict:
     """
-    Saves the user message and the AI response to the Postgres DB.
+    Saves the user message and the AI response to the Postgres DB and writes both turns
+    through to the session cache. The AI response is stored as its JSON payload; text is
+    rendered when it is read.
     """
 
-    db = state.db
-    session_id = state.session_id
-    user_query = state.user_query
-    response = state.response  # type: ignore
+    db = flow_context(config).db
+    session_id = state["session_id"]
+    user_query = state["user_query"]
+    response = state.get("response")
 
-    # Format AI response into readable text
-    ai_response = format_json_as_text(response)  # type: ignore
+    logger.debug(f"Raw AI response to save: {response}")
 
-    logger.debug(f"Raw AI response for formatting: {response}")
+    # The answer is paid for; a newer query for the session now waits instead of cancelling it.
+    commit_point()
 
     now = datetime.now(timezone.utc)
 
@@ -46,9 +53,10 @@ async def save_to_db_node(state: ChatFlowState) -> ChatFlowState:
         id=uuid4(),
         session_id=session_id,
         sender="ai",
-        message=ai_response,
+        message=None,
+        payload=response or {},
         response_to=user_msg.id,
-        timestamp=now
+        timestamp=now + timedelta(microseconds=1)  # keeps the reply after its question in history reads
     )
 
     try:
@@ -58,6 +66,14 @@ async def save_to_db_node(state: ChatFlowState) -> ChatFlowState:
         logger.exception("❌ Failed to save AI message to the database.")
         raise
 
-    return {
-        "response": response
-    }
+    await session_cache.append_turns(session_id, [("user", user_query), ("ai", compact_response(response))])
+
+    user_id = state.get("user_id")
+    if user_id is not None:
+        exchange = Exchange(ai_msg.id, session_id, ai_msg.timestamp, user_query, None, ai_msg.payload)
+        try:
+            await long_term_memory.add(user_id, exchange)
+        except Exception as e:
+            logger.exception(f"Failed to index exchange {ai_msg.id} in long-term memory")
+
+    return {}
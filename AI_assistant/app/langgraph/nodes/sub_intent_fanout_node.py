@@ -0,0 +1,105 @@
+# app/langgraph/nodes/sub_intent_fanout_node.py
+
+import logging
+import os
+from typing import Dict, List, Union
+
+from langgraph.types import Send
+
+from app.langgraph.nodes.generate_response_node import generate_response_node
+from app.langgraph.nodes.prompt.prompt_node import prompt_node
+from app.langgraph.nodes.realtime.realtime_info_node import realtime_info_node
+from app.langgraph.nodes.warm_recommendations_node import warm_recommendations_node
+from app.schemas.state import ChatFlowState
+from app.utils.metrics import metrics
+
+logger = logging.getLogger("ai_assistant")
+
+# Items asked for (and kept) per sub-intent when a query has several, so each part is short.
+SUB_INTENT_MAX_ITEMS = int(os.getenv("SUB_INTENT_MAX_ITEMS", "2"))
+
+# Goes in the user message, after the cached prefix and context.
+PART_INSTRUCTION = (
+    "(Answer only the {sub_intent} part of this request, with at most {max_items} items; "
+    "the other parts are answered separately.)"
+)
+
+
+def route_sub_intents(state: ChatFlowState) -> Union[str, List[Send]]:
+    """
+    A single sub-intent continues down the usual path. Several fan out to one
+    generate_sub_intent task each, which LangGraph runs concurrently.
+    """
+    sub_intents = state.get("sub_intents") or []
+    if len(sub_intents) < 2:
+        return "fetch_realtime_info"
+    metrics.increment("sub_intents.fanned_out")
+    logger.info(f"Answering {len(sub_intents)} sub-intents in parallel for session_id: {state['session_id']}")
+    return [Send("generate_sub_intent", {**state, "sub_intent": sub_intent}) for sub_intent in sub_intents]
+
+
+async def generate_sub_intent_node(state: ChatFlowState) -> dict:
+    """
+    Answers one sub-intent (state is its Send payload) through the same realtime, warm,
+    prompt and generation steps as a single-sub-intent request, asking for a shorter answer.
+    """
+    sub_intent = state["sub_intent"]
+    # Kept out of user_query, so the warm-answer check only sees what the user asked.
+    part = {**state, "part_instruction": PART_INSTRUCTION.format(sub_intent=sub_intent, max_items=SUB_INTENT_MAX_ITEMS)}
+    try:
+        for node in (realtime_info_node, warm_recommendations_node, prompt_node, generate_response_node):
+            part.update(await node(part))
+    except Exception:
+        logger.exception(f"Answering sub-intent {sub_intent} failed for session_id: {state['session_id']}")
+        part["response"] = None
+    return {"response_parts": [{"sub_intent": sub_intent, "response": part.get("response") or {}}]}
+
+
+def _render(template: str, sub_intent: str, location: str) -> str:
+    return template.replace("{sub_intent}", sub_intent).replace("{user_location}", location)
+
+
+def merge_responses(parts: List[Dict], output_format: Dict, sub_intents: List[str], location: str) -> Dict:
+    """
+    One payload in `output_format` from the per-sub-intent answers (taken in `sub_intents`
+    order): list fields are concatenated, at most SUB_INTENT_MAX_ITEMS per part, with each
+    entry tagged with its sub_intent; the title names all sub-intents; other text fields
+    (summary, follow_up) join every part's text; anything else comes from the first part.
+    """
+    by_sub_intent = {part["sub_intent"]: part["response"] for part in parts}
+    answers = [(s, by_sub_intent[s]) for s in sub_intents if by_sub_intent.get(s)]
+    names = [s for s, _ in answers]
+    joined = " and ".join([", ".join(names[:-1]), names[-1]] if len(names) > 1 else names)
+
+    merged: Dict = {}
+    for key, template in output_format.items():
+        if isinstance(template, list):
+            merged[key] = [
+                {**entry, "sub_intent": sub_intent} if isinstance(entry, dict) else entry
+                for sub_intent, answer in answers
+                for entry in (answer.get(key) if isinstance(answer.get(key), list) else [])[:SUB_INTENT_MAX_ITEMS]
+            ]
+        elif key == "title" and isinstance(template, str):
+            merged[key] = _render(template, joined, location)
+        elif isinstance(template, str):
+            texts = [answer[key].strip() for _, answer in answers if isinstance(answer.get(key), str) and answer[key].strip()]
+            merged[key] = " ".join(dict.fromkeys(texts)) or template
+        else:
+            merged[key] = next((answer[key] for _, answer in answers if answer.get(key)), template)
+    return merged
+
+
+async def merge_sub_intents_node(state: ChatFlowState) -> dict:
+    """Merges the parts into `response`; fails like a single generation if no part was answered."""
+    parts = state.get("response_parts") or []
+    sub_intents = state.get("sub_intents") or []
+    missing = [part["sub_intent"] for part in parts if not part["response"]]
+    if len(missing) == len(parts):
+        raise ValueError(f"No sub-intent could be answered: {', '.join(sub_intents)}")
+    if missing:
+        metrics.increment("sub_intents.failed", len(missing))
+        logger.warning(f"Sub-intents {missing} left out of the answer for session_id: {state['session_id']}")
+
+    output_format = (state.get("intent_object") or {}).get("output_format") or {}
+    response = merge_responses(parts, output_format, sub_intents, state.get("user_location") or "")
+    return {"response": response}
@@ -0,0 +1,78 @@
+# app/langgraph/nodes/user_preferences_node.py
+
+import logging
+import os
+from uuid import UUID
+
+from langchain_core.runnables import RunnableConfig
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.user_preference import get_preferences_for_session
+from app.schemas.state import ChatFlowState, flow_context
+from app.utils.compact_preferences import compact_preferences
+from app.utils.metrics import metrics
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger("ai_assistant")
+
+PREFERENCES_CACHE_TTL_S = float(os.getenv("PREFERENCES_CACHE_TTL_S", "300"))
+PREFERENCES_CACHE_MAX_ENTRIES = int(os.getenv("PREFERENCES_CACHE_MAX_ENTRIES", "10000"))
+
+
+class UserPreferencesCache:
+    """
+    Compacted preference strings per user, plus the session -> user mapping, so a warm
+    session resolves its preferences with two dict lookups and no query.
+
+    The PUT preferences route calls `invalidate_user`. The cache is per process, so other
+    workers pick up a change when their entry expires (PREFERENCES_CACHE_TTL_S).
+    """
+
+    def __init__(self, ttl: float = PREFERENCES_CACHE_TTL_S, max_entries: int = PREFERENCES_CACHE_MAX_ENTRIES):
+        self.session_users = TTLCache(maxsize=max_entries, ttl=ttl)
+        self.user_preferences = TTLCache(maxsize=max_entries, ttl=ttl)
+
+    async def get(self, db: AsyncSession, session_id: UUID) -> str:
+        user_id = self.session_users.get(session_id)
+        if user_id is not None:
+            compact = self.user_preferences.get(user_id)
+            if compact is not None:
+                metrics.increment("preferences_cache.hits")
+                return compact
+
+        metrics.increment("preferences_cache.misses")
+        row = await get_preferences_for_session(db, session_id)
+        if row is None:
+            logger.warning(f"No chat session {session_id} while loading preferences")
+            return ""
+        user_id, preferences = row
+        compact = compact_preferences(preferences)
+        self.session_users.set(session_id, user_id)
+        self.user_preferences.set(user_id, compact)
+        return compact
+
+    def invalidate_user(self, user_id: UUID) -> None:
+        self.user_preferences.pop(user_id)
+
+    def forget_session(self, session_id: UUID) -> None:
+        self.session_users.pop(session_id)
+
+
+user_preferences_cache = UserPreferencesCache()
+
+
+async def user_preferences_node(state: ChatFlowState, config: RunnableConfig) -> dict:
+    """
+    Loads the session user's preferences as a short prompt string into `user_preferences`.
+    """
+    session_id = state["session_id"]
+    logger.debug(f"Loading user preferences for session_id: {session_id}")
+
+    try:
+        preferences = await user_preferences_cache.get(flow_context(config).db, session_id)
+        logger.info(f"User preferences loaded for session_id: {session_id}")
+    except Exception as e:
+        logger.exception(f"Failed to load user preferences for session_id: {session_id}")
+        preferences = ""
+
+    return {"user_preferences": preferences}
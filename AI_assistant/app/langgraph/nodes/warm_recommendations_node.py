@@ -0,0 +1,61 @@
+# app/langgraph/nodes/warm_recommendations_node.py
+
+import logging
+import os
+import re
+
+from app.schemas.state import ChatFlowState
+from app.utils.metrics import metrics
+from app.utils.recommendation_store import recommendation_store
+
+logger = logging.getLogger("ai_assistant")
+
+# auto: serve the warm answer as-is when neither the query nor the request context asks for
+# more than (intent, sub_intent, location), otherwise give it to the model as candidates to
+# personalise; personalise: always go through the model.
+WARM_RECS_MODE = os.getenv("WARM_RECS_MODE", "auto")
+
+_PERSONAL_FIELDS = ("user_preferences", "chat_history_summary", "long_term_memory", "chat_memory", "realtime_info")
+
+# Words that ask for recommendations without narrowing them down.
+_GENERIC_WORDS = frozenset("""
+    a an the and also some any me my i we us you please can could would will what whats which where is are
+    to in at of on for near around nearby here there best top good great nice popular famous must
+    recommend recommendation recommendations suggest suggestions show find give list tell want need
+    looking try see visit eat do go things thing places place spots spot options
+""".split())
+_WORD = re.compile(r"\w+|[^\w\s.,;:!?'\"()-]")  # words, plus symbols such as ₹ or %
+
+
+def query_constraints(state: ChatFlowState) -> set:
+    """
+    Words of the query that are not part of (intent, sub_intent, location) or generic asking. When
+    the query is fanned out, the other sub-intents it names do not narrow this part down either.
+    """
+    key = " ".join(filter(None, (state.get("intent"), state.get("sub_intent"), state.get("user_location"), *(state.get("sub_intents") or []))))
+    known = _GENERIC_WORDS | set(_WORD.findall(key.lower()))
+    return {word for word in _WORD.findall((state.get("user_query") or "").lower()) if word not in known}
+
+
+def is_personal(state: ChatFlowState) -> bool:
+    """True when anything beyond (intent, sub_intent, location) could change the answer."""
+    return any(state.get(field) for field in _PERSONAL_FIELDS) or bool(query_constraints(state))
+
+
+async def warm_recommendations_node(state: ChatFlowState) -> dict:
+    """
+    Looks up the pre-generated base recommendation for the request's intent, sub-intent and
+    location (see app/jobs/warm_recommendations.py) into `warm_recommendation`.
+    """
+    intent, sub_intent, location = state.get("intent"), state.get("sub_intent"), state.get("user_location")
+    if not (intent and sub_intent and location):
+        return {"warm_recommendation": None}
+
+    try:
+        entry = await recommendation_store.get(intent, sub_intent, location)
+    except Exception as e:
+        logger.exception(f"Warm recommendation lookup failed for session_id: {state['session_id']}")
+        return {"warm_recommendation": None}
+
+    metrics.increment("warm_recs.hits" if entry else "warm_recs.misses")
+    return {"warm_recommendation": entry["response"] if entry else None}
@@ -1,9 +1,16 @@
 # Entry point for FastAPI application
 from fastapi import FastAPI
-from app.routes import router
+from app.routes import router, intent_detector, ask_workers
+from app.admin_routes import admin_router
+from app.click_routes import click_router, click_buffer
 from contextlib import asynccontextmanager
 from app.db.connection import test_connection
 from app.utils.setup_logger import setup_logger
+from app.utils.metrics import metrics
+from app.utils.ollama_pool import ollama_pool
+from app.langgraph.nodes.memory.long_term_memory import long_term_memory
+from app.utils.recommendation_store import recommendation_store
+from app.utils.loop_monitor import LOOP_MONITOR, loop_monitor
 import logging
 
 logger = setup_logger(name="ai_assistant",level=logging.DEBUG)
@@ -17,16 +24,34 @@ async def lifespan(app: FastAPI):
         logger.info("Database connection successful.")
     except Exception as e:
         logger.exception("Database connection failed: %s", str(e))
+    ollama_pool.start()
+    ask_workers.start()
+    click_buffer.start()
+    if LOOP_MONITOR == "on":
+        loop_monitor.start()
 
     yield  # This is where the app runs
 
     # Shutdown
     logger.info("Shutting down FastAPI application.")
+    await ask_workers.close()
+    await click_buffer.close()
+    await intent_detector.executor.close()
+    await ollama_pool.close()
+    await long_term_memory.close()
+    await recommendation_store.close()
+    await loop_monitor.close()
 
 app = FastAPI(lifespan=lifespan, title="ai_assistant")
 
 app.include_router(router, prefix="/chat", tags=["chat"])
+app.include_router(admin_router, prefix="/admin", tags=["admin"])
+app.include_router(click_router, prefix="/affiliate", tags=["affiliate"])
 
 @app.get("/health")
 async def health_check():
     return {"status": "ok", "message": "AI assistant is up and running..."}
+
+@app.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
@@ -0,0 +1,33 @@
+# app/models/affiliate.py
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import Column, TIMESTAMP, ForeignKey, String
+from sqlalchemy.dialects.postgresql import UUID
+from app.db.base import Base
+from app.models.user import User
+
+
+def utcnow_naive() -> datetime:
+    # These tables use "timestamp" without time zone (see data/schema.sql); values are UTC.
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Affiliate(Base):
+    __tablename__ = "affiliates"
+
+    id          = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name        = Column(String, nullable=True)
+    partner_url = Column(String, nullable=True)  # links under this URL are credited to the affiliate
+    created_at  = Column(TIMESTAMP, default=utcnow_naive)
+    updated_at  = Column(TIMESTAMP, default=utcnow_naive)
+
+
+class AffiliateClick(Base):
+    """Written in batches by app/utils/click_buffer.py, never per request."""
+    __tablename__ = "affiliate_clicks"
+
+    id              = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id         = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    affiliate_id    = Column(UUID(as_uuid=True), ForeignKey("affiliates.id"), nullable=False)
+    destination_url = Column(String, nullable=True)
+    clicked_at      = Column(TIMESTAMP, default=utcnow_naive)
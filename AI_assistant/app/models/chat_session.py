@@ -17,6 +17,7 @@ class ChatSession(Base):
     session_type = Column(String, nullable=False)
     started_at   = Column(TIMESTAMP(timezone=True), default=now)
     ended_at     = Column(TIMESTAMP(timezone=True), nullable=True)
+    archived_at  = Column(TIMESTAMP(timezone=True), nullable=True)
 
     # ensure the Message model can refer back
     messages = relationship("Message", back_populates="session", cascade="all, delete-orphan")
@@ -1,8 +1,8 @@
 # app/models/message.py
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import Column, Text, String, TIMESTAMP, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import DDL, Column, Text, String, TIMESTAMP, ForeignKey, JSON, event
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -18,10 +18,36 @@ class Message(Base):
     id          = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     session_id  = Column(UUID(as_uuid=True), ForeignKey("chat_sessions.id"), nullable=False)
     sender      = Column(String, nullable=False)  # ENUM: user, ai
-    message     = Column(Text, nullable=False)
+    message     = Column(Text, nullable=True)  # NULL for AI messages stored as payload only
+    payload     = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)  # parsed AI response, rendered on read
     timestamp   = Column(TIMESTAMP(timezone=True), default=now)
     response_to = Column(UUID(as_uuid=True), ForeignKey("messages.id"), nullable=True)
 
     # Relationships
     session     = relationship("ChatSession", back_populates="messages")
     replied_to  = relationship("Message", remote_side=[id], backref="replies")
+
+
+# Keeps chat_sessions.started_at at or before every message of the session, so history reads can
+# use it as a lower bound. Postgres gets the same trigger from data/migrations/0005.
+event.listen(Message.__table__, "after_create", DDL("""
+    CREATE TRIGGER messages_lower_session_started_at AFTER INSERT ON messages
+    BEGIN
+      UPDATE chat_sessions SET started_at = NEW.timestamp
+      WHERE id = NEW.session_id AND (started_at IS NULL OR started_at > NEW.timestamp);
+    END
+""").execute_if(dialect="sqlite"))
+
+
+class MessageArchive(Base):
+    """Cold copy of the messages of ended or idle sessions (see app/jobs/archive_messages.py)."""
+    __tablename__ = "messages_archive"
+
+    id          = Column(UUID(as_uuid=True), primary_key=True)
+    session_id  = Column(UUID(as_uuid=True), ForeignKey("chat_sessions.id"), nullable=False)
+    sender      = Column(String, nullable=False)
+    message     = Column(Text, nullable=True)
+    payload     = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    timestamp   = Column(TIMESTAMP(timezone=True))
+    response_to = Column(UUID(as_uuid=True), nullable=True)
+    archived_at = Column(TIMESTAMP(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -0,0 +1,32 @@
+# app/models/trip.py
+import uuid
+from sqlalchemy import Column, Date, Integer, String, TIMESTAMP, ForeignKey, JSON
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from app.db.base import Base
+from app.models.affiliate import utcnow_naive
+from app.models.user import User
+
+
+class Trip(Base):
+    __tablename__ = "trips"
+
+    id          = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id     = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    name        = Column(String, nullable=True)
+    destination = Column(String, nullable=True)
+    start_date  = Column(Date, nullable=True)
+    end_date    = Column(Date, nullable=True)
+    created_at  = Column(TIMESTAMP, default=utcnow_naive)
+    updated_at  = Column(TIMESTAMP, default=utcnow_naive)
+
+
+class Itinerary(Base):
+    """One row per day of a trip, written together by the itinerary flow."""
+    __tablename__ = "itineraries"
+
+    id          = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    trip_id     = Column(UUID(as_uuid=True), ForeignKey("trips.id"), nullable=False)
+    day         = Column(Integer, nullable=True)  # 1-based
+    activities  = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)  # list of "Morning: ..." strings
+    created_at  = Column(TIMESTAMP, default=utcnow_naive)
+    updated_at  = Column(TIMESTAMP, default=utcnow_naive)
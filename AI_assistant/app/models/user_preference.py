@@ -0,0 +1,17 @@
+# app/models/user_preference.py
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import Column, TIMESTAMP, ForeignKey, JSON
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from app.db.base import Base
+from app.models.user import User
+
+
+class UserPreference(Base):
+    __tablename__ = "user_preferences"
+
+    id          = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id     = Column(UUID(as_uuid=True), ForeignKey("users.id"), unique=True, nullable=False)
+    preferences = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    created_at  = Column(TIMESTAMP(timezone=True), default=lambda: datetime.now(timezone.utc))
+    updated_at  = Column(TIMESTAMP(timezone=True), default=lambda: datetime.now(timezone.utc))
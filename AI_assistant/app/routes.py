@@ -1,63 +1,217 @@
+import asyncio
+import json
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
-from langchain_ollama import OllamaLLM
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from app.utils.load_intent_object import load_intent_object
-from app.schemas.chat_ask import ChatRequest
-from app.schemas.state import ChatFlowState
-from typing import List
-from app.schemas.chat_session import ChatSessionCreate, ChatSessionOut
-from app.schemas.message import MessageCreate, MessageOut
+from app.schemas.chat_ask import ChatRequest, ChatBatchRequest
+from app.schemas.state import ChatFlowState, flow_config
+from typing import List, Literal, Optional
+from app.schemas.chat_session import ChatSessionCreate, ChatSessionOut, chat_session_out_dict
+from app.schemas.message import MessageCreate, MessageOut, message_out_dict
+from app.schemas.user_preference import UserPreferencesIn, UserPreferencesOut
 from app.models.chat_session import ChatSession
 from app.models.message import Message
-from app.crud import chat_session, message
-from app.db.connection import get_db
+from app.crud import chat_session, message, user_preference
+from app.db.connection import get_db, AsyncSessionLocal
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 from app.langgraph.nodes import detect_intent_node
-from app.langgraph.flows import recommendation_graph
+from app.langgraph.flows import itinerary_graph, recommendation_graph
+from app.langgraph.nodes.memory.long_term_memory import long_term_memory
+from app.langgraph.nodes.memory.session_cache import session_cache
+from app.langgraph.nodes.user_preferences_node import user_preferences_cache
+from app.utils.ask_jobs import ASK_JOB_MAX_WAIT_S, AskJobWorkers, JobQueueFull, ask_job_store
+from app.utils.metrics import metrics
+from app.utils.session_gate import Superseded, session_gate
+from app.utils.fast_json import STREAM_CHUNK_ITEMS, json_list_stream_response
 
 router: APIRouter = APIRouter()
 logger = logging.getLogger("ai_assistant")
 
-# Define once globally
-llm = OllamaLLM(model="llama3.2")
-
 INTENT_KB_PATH = "data/intents_knowledge_base.json"
 intent_detector = detect_intent_node.DetectIntentNode(kb_path=INTENT_KB_PATH, model_name="llama3.2")
 
+# Compiled once; the graphs themselves are stateless between invocations
+recommendation_flow = recommendation_graph.build_recommendation_graph()
+itinerary_flow = itinerary_graph.build_itinerary_graph()
+
+# Used when the request does not send user_location
+DEFAULT_USER_LOCATION = os.getenv("DEFAULT_USER_LOCATION", "Pune, India")
+
+# Batch /ask limits
+ASK_BATCH_MAX_ITEMS = int(os.getenv("ASK_BATCH_MAX_ITEMS", "500"))
+ASK_BATCH_CONCURRENCY = int(os.getenv("ASK_BATCH_CONCURRENCY", "8"))
+
+
+def initial_state(request: ChatRequest) -> ChatFlowState:
+    return {
+        "session_id": request.chat_session_id,
+        "user_query": request.user_query,
+        "user_location": request.user_location,
+    }
+
+
+async def run_intent_flow(intent_state: ChatFlowState, db: AsyncSession) -> dict:
+    """
+    Runs the flow for an already-detected intent and returns the response payload.
+    """
+    intent = intent_state["intent"]
+    if intent == "recommendation":
+        logger.debug("Using recommendation graph for intent.")
+        graph = recommendation_flow
+    elif intent == "planning":
+        logger.debug("Using itinerary graph for intent.")
+        graph = itinerary_flow
+    else:
+        logger.warning(f"Unsupported intent detected: {intent}")
+        return {"error": "Intent is not recommendation or planning"}
+
+    state = {
+        **intent_state,
+        "intent_object": load_intent_object(intent, INTENT_KB_PATH),
+        "user_location": intent_state.get("user_location") or DEFAULT_USER_LOCATION,
+    }
+    final_state = await graph.ainvoke(state, config=flow_config(db))
+    logger.info("Successfully completed graph execution.")
+    return final_state["response"]
+
+
+async def answer(request: ChatRequest, db: AsyncSession, supersede: Optional[bool] = None) -> dict:
+    """
+    Detects the intent and runs its flow, one request per chat session at a time (session_gate).
+    Raises Superseded when a newer query for the same session cancels this one.
+    """
+    async def work() -> dict:
+        intent_state = await intent_detector.ainvoke(initial_state(request))
+        logger.info(f"Detected intent: {intent_state['intent']}, sub_intents: {intent_state.get('sub_intents') or intent_state['sub_intent']}")
+        return await run_intent_flow(intent_state, db)
+
+    key = (request.user_query.strip(), request.user_location)
+    return await session_gate.run(request.chat_session_id, key, work, supersede=supersede)
+
+
+async def run_ask_job(request: dict) -> dict:
+    """Runs one queued /ask job on its own DB session."""
+    async with AsyncSessionLocal() as db:
+        return await answer(ChatRequest(**request), db)
+
+
+async def _read_in_own_session(read, *args):
+    """Chunks from `read(db, *args)` on a DB session of its own, open until a streamed list is sent."""
+    async with AsyncSessionLocal() as db:
+        async for rows in read(db, *args):
+            yield rows
+
+
+# Started and stopped by the app lifespan (app/main.py)
+ask_workers = AskJobWorkers(ask_job_store, run_ask_job)
+
 
 @router.post("/ask")
-async def ask_chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
+async def ask_chat(
+    request: ChatRequest,
+    mode: Literal["sync", "async"] = "sync",
+    db: AsyncSession = Depends(get_db),
+):
+    if mode == "async":
+        return await submit_ask_job(request)
+
     try:
         logger.info(f"Received /ask request for session ID: {request.chat_session_id}")
-        
-        base_state = ChatFlowState(
-            user_query=request.user_query,
-            session_id=request.chat_session_id,
-            db=db
+        return JSONResponse(content=await answer(request, db))
+
+    except Superseded as e:
+        logger.info(f"/ask for session ID {request.chat_session_id} was superseded")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    except Exception as e:
+        logger.exception("Unhandled error occurred in /ask route.")
+        raise HTTPException(status_code=500, detail=f"Error in /ask: {str(e)}")
+
+
+async def submit_ask_job(request: ChatRequest) -> JSONResponse:
+    """Queues the request and answers 202 with the job id; the graph runs on an ask job worker."""
+    try:
+        job = await ask_job_store.submit(request.model_dump(mode="json"))
+    except JobQueueFull as e:
+        logger.warning(f"Rejected async /ask for session ID {request.chat_session_id}: {e}")
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Ask job queue is full, retry later")
+    metrics.increment("ask_jobs.submitted")
+    logger.info(f"Queued ask job {job['job_id']} for session ID: {request.chat_session_id}")
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"job_id": job["job_id"], "status": job["status"], "status_url": f"/chat/ask/jobs/{job['job_id']}"},
+    )
+
+
+@router.get("/ask/jobs/{job_id}")
+async def get_ask_job(job_id: UUID, wait: float = Query(0, ge=0, description="Long-poll for up to this many seconds")):
+    """Job status, and its response or error once finished. `wait` holds the request until the job finishes."""
+    job = await ask_job_store.wait(str(job_id), min(wait, ASK_JOB_MAX_WAIT_S))
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    job.pop("request", None)
+    return job
+
+
+@router.post("/ask/batch")
+async def ask_chat_batch(request: ChatBatchRequest):
+    """
+    Answers many (chat_session_id, user_query) pairs in one call. Intents are detected with a
+    single batched embedding pass, flows run with bounded concurrency, and one NDJSON line is
+    streamed back per item as soon as it finishes (in completion order, tagged with its index).
+    """
+    if len(request.items) > ASK_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds {ASK_BATCH_MAX_ITEMS} items",
         )
 
-        intent_state = intent_detector.invoke(base_state)
-        logger.info(f"Detected intent: {intent_state.intent}, sub_intent: {intent_state.sub_intent}")
+    max_concurrency = min(request.max_concurrency or ASK_BATCH_CONCURRENCY, ASK_BATCH_CONCURRENCY)
+    logger.info(f"Received /ask/batch request with {len(request.items)} items (concurrency={max_concurrency})")
 
-        intent_state.intent_object = load_intent_object(intent_state.intent, INTENT_KB_PATH)
-        intent_state.user_location = "Pune, India"
+    async def run_item(index: int, item: ChatRequest, docs, semaphore: asyncio.Semaphore) -> dict:
+        line = {"index": index, "chat_session_id": str(item.chat_session_id)}
+        try:
+            # AsyncSession is not safe for concurrent use, so every item gets its own.
+            async with semaphore, AsyncSessionLocal() as db:
+                async def work() -> dict:
+                    return await run_intent_flow(await intent_detector.aclassify(initial_state(item), docs), db)
 
-        if intent_state.intent == "recommendation":
-            logger.debug("Using recommendation graph for intent.")
-            graph = recommendation_graph.build_recommendation_graph()
-        else:
-            logger.warning(f"Unsupported intent detected: {intent_state.intent}")
-            return JSONResponse({"error": "Intent is not recommendation"})
+                # Items for the same session run in order; a batch never supersedes itself.
+                key = (item.user_query.strip(), item.user_location)
+                response = await session_gate.run(item.chat_session_id, key, work, supersede=False)
+                line.update(status="ok", response=response)
+        except Exception as e:
+            logger.exception(f"Batch item {index} failed for session ID: {item.chat_session_id}")
+            line.update(status="error", error=str(e))
+        return line
 
-        final_state = await graph.ainvoke(intent_state)
-        logger.info("Successfully completed graph execution.")
-        return JSONResponse(content=final_state["response"])
+    async def stream_results():
+        try:
+            retrieved = await intent_detector.aretrieve_batch([item.user_query for item in request.items])
+        except Exception as e:
+            for index, item in enumerate(request.items):
+                yield json.dumps({
+                    "index": index, "chat_session_id": str(item.chat_session_id), "status": "error", "error": str(e),
+                }) + "\n"
+            return
 
-    except Exception as e:
-        logger.exception("Unhandled error occurred in /ask route.")
-        raise HTTPException(status_code=500, detail=f"Error in /ask: {str(e)}")
+        semaphore = asyncio.Semaphore(max_concurrency)
+        tasks = [
+            asyncio.create_task(run_item(index, item, docs, semaphore))
+            for index, (item, docs) in enumerate(zip(request.items, retrieved))
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished, default=str) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
 
 @router.post("/chat_sessions", response_model=ChatSessionOut)
@@ -78,10 +232,10 @@ async def read_chat(session_id: UUID, db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/chat_sessions", response_model=List[ChatSessionOut])
-async def list_chats(limit: int = 100, offset: int = 0, db: AsyncSession = Depends(get_db)):
+async def list_chats(limit: int = 100, offset: int = 0):
     logger.info(f"Listing chat sessions with limit={limit} offset={offset}")
-    sessions = await chat_session.get_all_chat_sessions(db, limit=limit, offset=offset)
-    return sessions
+    chunks = _read_in_own_session(chat_session.stream_chat_session_rows, limit, offset, STREAM_CHUNK_ITEMS)
+    return await json_list_stream_response(chunks, chat_session_out_dict)
 
 
 @router.put("/chat_sessions/{session_id}", response_model=ChatSessionOut)
@@ -91,16 +245,22 @@ async def update_chat(session_id: UUID, session_update: ChatSessionCreate, db: A
     if not updated_session:
         logger.warning(f"Chat session {session_id} not found for update.")
         raise HTTPException(status_code=404, detail="Chat session not found")
+    user_preferences_cache.forget_session(session_id)
     return updated_session
 
 
 @router.delete("/chat_sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_chat(session_id: UUID, db: AsyncSession = Depends(get_db)):
     logger.info(f"Deleting chat session: {session_id}")
+    user_id = await long_term_memory.user_id(db, session_id)  # looked up while the session exists
     success = await chat_session.delete_chat_session(db, session_id)
     if not success:
         logger.warning(f"Chat session {session_id} not found for deletion.")
         raise HTTPException(status_code=404, detail="Chat session not found")
+    await session_cache.invalidate(session_id)
+    user_preferences_cache.forget_session(session_id)
+    if user_id is not None:
+        long_term_memory.forget_user(user_id)
     return None
 
 
@@ -108,7 +268,9 @@ async def delete_chat(session_id: UUID, db: AsyncSession = Depends(get_db)):
 async def create_msg(session_id: UUID, msg_in: MessageCreate, db: AsyncSession = Depends(get_db)):
     logger.info(f"Creating message for session {session_id}")
     db_msg = Message(**msg_in.model_dump(), session_id=session_id)
-    return await message.create_message(db, db_msg)
+    db_msg = await message.create_message(db, db_msg)
+    await session_cache.invalidate(session_id)
+    return db_msg
 
 
 @router.get("/chat_sessions/{session_id}/messages/{message_id}", response_model=MessageOut)
@@ -122,9 +284,10 @@ async def get_msg(session_id: UUID, message_id: UUID, db: AsyncSession = Depends
 
 
 @router.get("/chat_sessions/{session_id}/messages", response_model=List[MessageOut])
-async def get_messages_for_session(session_id: UUID, db: AsyncSession = Depends(get_db)):
+async def get_messages_for_session(session_id: UUID):
     logger.info(f"Fetching all messages for session {session_id}")
-    return await message.get_messages_for_session(db, session_id)
+    chunks = _read_in_own_session(message.stream_messages_for_session, session_id, STREAM_CHUNK_ITEMS)
+    return await json_list_stream_response(chunks, message_out_dict)
 
 
 @router.put("/chat_sessions/{session_id}/messages/{message_id}", response_model=MessageOut)
@@ -135,6 +298,10 @@ async def update_msg(session_id: UUID, message_id: UUID, msg_in: MessageCreate,
         logger.warning(f"Message {message_id} not found in session {session_id} for update.")
         raise HTTPException(status_code=404, detail="Message not found in this session")
     updated_msg = await message.update_message(db, message_id, msg_in.model_dump(exclude_unset=True))
+    await session_cache.invalidate(session_id)
+    user_id = await long_term_memory.user_id(db, session_id)  # the old text is still indexed
+    if user_id is not None:
+        long_term_memory.forget_user(user_id)
     return updated_msg
 
 
@@ -149,4 +316,28 @@ async def delete_msg(session_id: UUID, message_id: UUID, db: AsyncSession = Depe
     if not deleted:
         logger.warning(f"Delete operation failed. Message {message_id} not found.")
         raise HTTPException(status_code=404, detail="Message not found")
+    await session_cache.invalidate(session_id)
+    user_id = await long_term_memory.user_id(db, session_id)
+    if user_id is not None:
+        long_term_memory.forget_user(user_id)
     return None
+
+
+@router.get("/users/{user_id}/preferences", response_model=UserPreferencesOut)
+async def get_user_prefs(user_id: UUID, db: AsyncSession = Depends(get_db)):
+    logger.debug(f"Fetching preferences for user {user_id}")
+    prefs = await user_preference.get_user_preferences(db, user_id)
+    if not prefs:
+        logger.warning(f"No preferences stored for user {user_id}")
+        raise HTTPException(status_code=404, detail="Preferences not found")
+    return prefs
+
+
+@router.put("/users/{user_id}/preferences", response_model=UserPreferencesOut)
+async def put_user_prefs(user_id: UUID, prefs_in: UserPreferencesIn, db: AsyncSession = Depends(get_db)):
+    logger.info(f"Saving preferences for user {user_id}")
+    prefs = await user_preference.upsert_user_preferences(db, user_id, prefs_in.preferences)
+    if prefs is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    user_preferences_cache.invalidate_user(user_id)
+    return prefs
@@ -1,10 +1,15 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
 from typing import Optional, List
 
 class ChatRequest(BaseModel):
     user_query: str
     chat_session_id: UUID
+    user_location: Optional[str] = None
+
+class ChatBatchRequest(BaseModel):
+    items: List[ChatRequest] = Field(..., min_length=1)
+    max_concurrency: Optional[int] = Field(default=None, ge=1)
 
 class Suggestion(BaseModel):
     title: str
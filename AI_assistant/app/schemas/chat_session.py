@@ -19,3 +19,14 @@ class ChatSessionOut(ChatSessionCreate):
     id: UUID
     started_at:Optional[datetime]
     ended_at: Optional[datetime]
+
+
+def chat_session_out_dict(row) -> dict:
+    """ChatSessionOut's JSON shape straight from a chat_sessions row, without Pydantic validation."""
+    return {
+        "user_id": row.user_id,
+        "session_type": row.session_type,
+        "id": row.id,
+        "started_at": row.started_at,
+        "ended_at": row.ended_at,
+    }
@@ -1,9 +1,10 @@
 # Pydantic schema for messages
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from uuid import UUID
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Any, Dict, Optional
+from app.utils.format_json_as_text import render_message
 
 class SenderType(str, Enum):
     user = "user"
@@ -16,4 +17,24 @@ class MessageCreate(BaseModel):
 
 class MessageOut(MessageCreate):
     id: UUID
+    message: Optional[str] = None
     response_to: Optional[UUID]
+    payload: Optional[Dict[str, Any]] = None
+
+    @model_validator(mode="after")
+    def render_payload(self):
+        # AI messages may be stored as payload only; render their text for the client.
+        if self.message is None:
+            self.message = render_message(None, self.payload)
+        return self
+
+
+def message_out_dict(row) -> dict:
+    """MessageOut's JSON shape straight from a history MessageRow, without Pydantic validation."""
+    return {
+        "sender": row.sender,
+        "message": render_message(row.message, row.payload),
+        "response_to": row.response_to,
+        "id": row.id,
+        "payload": row.payload,
+    }
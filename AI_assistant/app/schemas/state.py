@@ -1,32 +1,65 @@
-from pydantic import BaseModel, ConfigDict
+import operator
+from dataclasses import dataclass
+from typing import Annotated, Any, Dict, List, Optional, TypedDict
 from uuid import UUID
-from typing import Optional, Any, Dict, List
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
 from sqlalchemy.ext.asyncio import AsyncSession
 
-class ChatFlowState(BaseModel):
+
+class ChatFlowState(TypedDict, total=False):
+    """
+    Graph state: plain data only. Nodes return just the keys they change and LangGraph
+    merges them (last write wins per key), so nothing is validated or copied per transition.
+    Dependencies such as the DB session live in FlowContext, not here.
+    """
     session_id: UUID
     user_query: str
-    db: AsyncSession
+    user_id: Optional[UUID]
 
     # Intent detection output
-    intent: Optional[str] = None
-    sub_intent: Optional[str] = None
-    intent_object: Optional[Dict] = None
+    intent: Optional[str]
+    sub_intent: Optional[str]
+    sub_intents: List[str]  # every sub-intent asked for; sub_intent is the first
+    intent_object: Optional[Dict]
 
     # Prompt building inputs
-    user_location: Optional[str] = None
-    current_time: Optional[str] = None
-    user_preferences: Optional[str] = None
-    realtime_info: Optional[str] = None
-    chat_history_summary: Optional[str] = None
+    user_location: Optional[str]
+    current_time: Optional[str]
+    user_preferences: Optional[str]
+    realtime_info: Optional[str]
+    chat_history_summary: Optional[str]
+    long_term_memory: Optional[str]
+    chat_memory: List[BaseMessage]  # last turns of the session
+    warm_recommendation: Optional[Dict]  # pre-generated base answer for (intent, sub_intent, location)
+    part_instruction: Optional[str]  # fan-out only: appended to user_query in the prompt, not part of it
 
     # Prompt output
-    prompt: Optional[List[Any]] = None  # LangChain Message types
+    prompt: List[BaseMessage]
+
+    # Itinerary flow: the trip outline, one day's Send payload, and the planned days
+    trip_plan: Optional[Dict]
+    day_plan: Optional[Dict]
+    itinerary_days: Annotated[List[Dict], operator.add]  # appended to by the concurrent plan_day tasks
+
+    # Multi-sub-intent recommendations: one answer per sub-intent, merged into response
+    response_parts: Annotated[List[Dict], operator.add]
 
     # LLM response
-    response: Optional[Dict] = None
+    response: Optional[Dict]
+
+
+@dataclass(slots=True)
+class FlowContext:
+    """Per-run dependencies, passed to nodes through the run config instead of the state."""
+    db: AsyncSession
+
+
+def flow_config(db: AsyncSession, **configurable: Any) -> RunnableConfig:
+    """Run config carrying a FlowContext for graph.ainvoke(state, config=...)."""
+    return {"configurable": {"context": FlowContext(db=db), **configurable}}
 
-    # LangChain memory or tools
-    chat_memory: Optional[Any] = None
 
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+def flow_context(config: Optional[RunnableConfig]) -> FlowContext:
+    return config["configurable"]["context"]
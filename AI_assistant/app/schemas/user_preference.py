@@ -0,0 +1,13 @@
+# Pydantic schema for user preferences
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from uuid import UUID
+from datetime import datetime
+
+
+class UserPreferencesIn(BaseModel):
+    preferences: Dict[str, Any]
+
+class UserPreferencesOut(UserPreferencesIn):
+    user_id: UUID
+    updated_at: Optional[datetime]
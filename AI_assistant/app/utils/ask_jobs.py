@@ -0,0 +1,390 @@
+# app/utils/ask_jobs.py
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.utils.metrics import metrics
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger("ai_assistant")
+
+ASK_JOB_BACKEND = os.getenv("ASK_JOB_BACKEND", "memory")  # memory, redis
+ASK_JOB_URL = os.getenv("ASK_JOB_URL", "redis://localhost:6379/0")
+ASK_JOB_TTL_S = float(os.getenv("ASK_JOB_TTL_S", "3600"))
+ASK_JOB_MAX_JOBS = int(os.getenv("ASK_JOB_MAX_JOBS", "10000"))
+ASK_JOB_MAX_QUEUED = int(os.getenv("ASK_JOB_MAX_QUEUED", "1000"))
+# Graph runs per HTTP process; 0 leaves the queue to `python -m app.jobs.ask_worker` processes.
+ASK_JOB_WORKERS = int(os.getenv("ASK_JOB_WORKERS", "4"))
+ASK_JOB_MAX_WAIT_S = float(os.getenv("ASK_JOB_MAX_WAIT_S", "30"))
+ASK_JOB_POLL_INTERVAL_S = float(os.getenv("ASK_JOB_POLL_INTERVAL_S", "0.2"))
+# A claimed job whose worker has not renewed its lease for this long is put back on the queue;
+# workers renew it every third of the lease. After ASK_JOB_MAX_ATTEMPTS claims it fails instead.
+ASK_JOB_LEASE_S = float(os.getenv("ASK_JOB_LEASE_S", "30"))
+ASK_JOB_MAX_ATTEMPTS = int(os.getenv("ASK_JOB_MAX_ATTEMPTS", "3"))
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def new_job(request: Dict) -> Dict:
+    return {
+        "job_id": str(uuid.uuid4()),
+        "status": QUEUED,
+        "request": request,
+        "response": None,
+        "error": None,
+        "attempts": 0,
+        "created_at": _now(),
+        "started_at": None,
+        "finished_at": None,
+    }
+
+
+class AskJobStore:
+    """
+    Queue and TTL'd record store for asynchronous /ask jobs.
+
+    A job is a JSON-able dict (see new_job). Records expire `ttl` seconds after their last
+    update, so finished results stay fetchable for that long. This in-process implementation
+    only serves a single HTTP worker; use RedisAskJobStore when several processes share jobs.
+    """
+
+    def __init__(self, ttl: float = ASK_JOB_TTL_S, max_jobs: int = ASK_JOB_MAX_JOBS, max_queued: int = ASK_JOB_MAX_QUEUED):
+        self.ttl = ttl
+        self.max_queued = max_queued
+        self._jobs = TTLCache(maxsize=max_jobs, ttl=ttl)
+        self._queue: List[str] = []
+        self._queued = asyncio.Condition()
+        # Events for long-polls; they expire with the job even if it never finishes.
+        self._finished = TTLCache(maxsize=max_jobs, ttl=ttl)
+
+    async def submit(self, request: Dict) -> Dict:
+        async with self._queued:
+            if len(self._queue) >= self.max_queued:
+                raise JobQueueFull(f"{len(self._queue)} jobs already queued")
+            job = new_job(request)
+            self._jobs.set(job["job_id"], job)
+            self._queue.append(job["job_id"])
+            self._queued.notify()
+        return dict(job)
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict]:
+        """Returns the job once it has finished, or as it stands after `timeout` seconds."""
+        job = await self.get(job_id)
+        if job is None or job["status"] in FINISHED or timeout <= 0:
+            return job
+        event = self._finished.get(job_id)
+        if event is None:
+            event = asyncio.Event()
+            self._finished.set(job_id, event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return await self.get(job_id)
+
+    async def claim(self, timeout: float) -> Optional[Dict]:
+        """Takes the oldest queued job and marks it running; None if nothing arrives in time."""
+        async with self._queued:
+            try:
+                await asyncio.wait_for(self._queued.wait_for(lambda: bool(self._queue)), timeout)
+            except asyncio.TimeoutError:
+                return None
+            job_id = self._queue.pop(0)
+        job = self._jobs.get(job_id)
+        if job is None:  # expired while queued
+            return None
+        job.update(status=RUNNING, started_at=_now(), attempts=job.get("attempts", 0) + 1)
+        self._jobs.set(job_id, job)
+        return dict(job)
+
+    async def heartbeat(self, job_id: str) -> bool:
+        """Renews the claim on a running job; False if it was lost. In-process jobs die with the process."""
+        return True
+
+    async def finish(self, job_id: str, response: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.update(status=FAILED if error else DONE, response=response, error=error, finished_at=_now())
+            self._jobs.set(job_id, job)
+        event = self._finished.pop(job_id, None)
+        if event:
+            event.set()
+
+    async def release(self, job_id: str) -> None:
+        """Gives up a claimed job when its worker shuts down. In-process jobs die with the process, so it fails."""
+        await self.finish(job_id, error="cancelled: worker shut down")
+
+    async def queued(self) -> int:
+        return len(self._queue)
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisAskJobStore(AskJobStore):
+    """
+    Redis-backed store shared by HTTP and worker processes.
+
+    Keys:
+        ask_jobs:queue      list of job ids (LPUSH on submit, BLMOVE to ask_jobs:running by workers)
+        ask_jobs:running    list of claimed job ids
+        ask_job:{id}        JSON job record, expiring `ttl` seconds after its last update
+        ask_job_lease:{id}  set while the claiming worker is alive, renewed by heartbeat()
+        ask_jobs:unleased   hash of claimed job id -> when a sweep first found it without a lease
+    Long-polls re-read the record every ASK_JOB_POLL_INTERVAL_S.
+
+    A worker that dies mid-job stops renewing its lease. Every claim() first sweeps
+    ask_jobs:running (at most once per half lease) and puts jobs without a lease back on the
+    queue, or fails them after `max_attempts` claims. A job still queued and without a lease
+    was moved by a worker that has not set the lease yet, or that died in between; it is only
+    put back once it has been seen that way for a whole lease.
+    """
+
+    QUEUE_KEY = "ask_jobs:queue"
+    RUNNING_KEY = "ask_jobs:running"
+    UNLEASED_KEY = "ask_jobs:unleased"
+
+    def __init__(
+        self,
+        url: str = ASK_JOB_URL,
+        ttl: float = ASK_JOB_TTL_S,
+        max_queued: int = ASK_JOB_MAX_QUEUED,
+        poll_interval: float = ASK_JOB_POLL_INTERVAL_S,
+        lease: float = ASK_JOB_LEASE_S,
+        max_attempts: int = ASK_JOB_MAX_ATTEMPTS,
+        client=None,
+    ):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url, decode_responses=True)
+        self.redis = client
+        self.ttl = int(ttl)
+        self.max_queued = max_queued
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._next_sweep = 0.0
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"ask_job:{job_id}"
+
+    @staticmethod
+    def _lease_key(job_id: str) -> str:
+        return f"ask_job_lease:{job_id}"
+
+    async def _save(self, job: Dict) -> None:
+        await self.redis.set(self._key(job["job_id"]), json.dumps(job, default=str), ex=self.ttl)
+
+    async def submit(self, request: Dict) -> Dict:
+        if await self.redis.llen(self.QUEUE_KEY) >= self.max_queued:
+            raise JobQueueFull("job queue is full")
+        job = new_job(request)
+        await self._save(job)
+        await self.redis.lpush(self.QUEUE_KEY, job["job_id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        raw = await self.redis.get(self._key(job_id))
+        return json.loads(raw) if raw else None
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict]:
+        deadline = time.monotonic() + timeout
+        job = await self.get(job_id)
+        while job is not None and job["status"] not in FINISHED and time.monotonic() < deadline:
+            await asyncio.sleep(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+            job = await self.get(job_id)
+        return job
+
+    async def claim(self, timeout: float) -> Optional[Dict]:
+        if time.monotonic() >= self._next_sweep:
+            self._next_sweep = time.monotonic() + self.lease / 2
+            await self.requeue_expired()
+        job_id = await self.redis.blmove(self.QUEUE_KEY, self.RUNNING_KEY, max(1, int(timeout)), "RIGHT", "LEFT")
+        if not job_id:
+            return None
+        job = await self.get(job_id)
+        if job is None:
+            await self.redis.lrem(self.RUNNING_KEY, 1, job_id)
+            return None
+        # The lease goes first: requeue_expired() reads "running without a lease" as a dead worker.
+        await self.redis.set(self._lease_key(job_id), "1", px=int(self.lease * 1000))
+        await self.redis.hdel(self.UNLEASED_KEY, job_id)
+        job.update(status=RUNNING, started_at=_now(), attempts=job.get("attempts", 0) + 1)
+        await self._save(job)
+        return job
+
+    async def heartbeat(self, job_id: str) -> bool:
+        return bool(await self.redis.pexpire(self._lease_key(job_id), int(self.lease * 1000)))
+
+    async def _claimed_recently(self, job_id: str) -> bool:
+        """For a job moved to running but never leased: True until a sweep has seen it so for a lease."""
+        now = time.time()
+        if await self.redis.hsetnx(self.UNLEASED_KEY, job_id, now):
+            return True
+        seen = await self.redis.hget(self.UNLEASED_KEY, job_id)
+        return seen is not None and now - float(seen) < self.lease
+
+    async def requeue_expired(self) -> int:
+        """Puts claimed jobs whose lease lapsed back on the queue; returns how many."""
+        requeued = 0
+        for job_id in await self.redis.lrange(self.RUNNING_KEY, 0, -1):
+            if await self.redis.exists(self._lease_key(job_id)):
+                continue
+            job = await self.get(job_id)
+            if job is not None and job["status"] == QUEUED and await self._claimed_recently(job_id):
+                continue  # its lease is probably being set
+            await self.redis.hdel(self.UNLEASED_KEY, job_id)
+            if not await self.redis.lrem(self.RUNNING_KEY, 1, job_id):
+                continue  # finished, or another process got to it first
+            if job is None or job["status"] in FINISHED:
+                continue
+            if job.get("attempts", 0) >= self.max_attempts:
+                logger.error(f"Ask job {job_id} lost its worker {job['attempts']} times; failing it")
+                metrics.increment("ask_jobs.abandoned")
+                job.update(status=FAILED, error=f"worker lost {job['attempts']} times", finished_at=_now())
+                await self._save(job)
+                continue
+            logger.warning(f"Ask job {job_id} lost its worker (attempt {job.get('attempts', 0)}); requeueing it")
+            metrics.increment("ask_jobs.reclaimed")
+            job.update(status=QUEUED, started_at=None)
+            await self._save(job)
+            await self.redis.rpush(self.QUEUE_KEY, job_id)  # the claiming end: next in line
+            requeued += 1
+        return requeued
+
+    async def finish(self, job_id: str, response: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        job = await self.get(job_id)
+        if job is None:
+            logger.warning(f"Ask job {job_id} expired before it finished")
+        else:
+            job.update(status=FAILED if error else DONE, response=response, error=error, finished_at=_now())
+            await self._save(job)
+        await self.redis.lrem(self.RUNNING_KEY, 1, job_id)
+        await self.redis.delete(self._lease_key(job_id))
+        await self.redis.hdel(self.UNLEASED_KEY, job_id)
+
+    async def release(self, job_id: str) -> None:
+        """Hands a claimed job back to the queue, next in line, for another worker to run."""
+        await self.redis.delete(self._lease_key(job_id))
+        await self.redis.hdel(self.UNLEASED_KEY, job_id)
+        if not await self.redis.lrem(self.RUNNING_KEY, 1, job_id):
+            return  # finished, or already reclaimed by a sweep
+        job = await self.get(job_id)
+        if job is None or job["status"] in FINISHED:
+            return
+        logger.info(f"Ask job {job_id} released by a stopping worker; requeueing it")
+        metrics.increment("ask_jobs.released")
+        job.update(status=QUEUED, started_at=None)
+        await self._save(job)
+        await self.redis.rpush(self.QUEUE_KEY, job_id)
+
+    async def queued(self) -> int:
+        return await self.redis.llen(self.QUEUE_KEY)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def build_ask_job_store(backend: str = ASK_JOB_BACKEND) -> AskJobStore:
+    if backend == "memory":
+        return AskJobStore()
+    if backend == "redis":
+        return RedisAskJobStore()
+    raise ValueError(f"Unknown ASK_JOB_BACKEND '{backend}'. Choose memory or redis.")
+
+
+ask_job_store = build_ask_job_store()
+logger.debug(f"Ask job backend: {ASK_JOB_BACKEND}")
+
+
+class AskJobWorkers:
+    """
+    `concurrency` asyncio tasks that claim jobs from the store and run `handler(request)`.
+    Sized independently of the HTTP server's workers; ASK_JOB_WORKERS=0 disables them.
+    """
+
+    def __init__(self, store: AskJobStore, handler: Callable[[Dict], Awaitable[Dict]], concurrency: int = ASK_JOB_WORKERS):
+        self.store = store
+        self.handler = handler
+        self.concurrency = concurrency
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._run(i)) for i in range(self.concurrency)]
+        if self._tasks:
+            logger.info(f"Started {self.concurrency} ask job workers")
+
+    async def _run(self, worker: int) -> None:
+        while True:
+            try:
+                job = await self.store.claim(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception(f"Ask job worker {worker} failed to claim a job")
+                await asyncio.sleep(1.0)
+                continue
+            if job is None:
+                continue
+            await self.run_job(job)
+
+    async def run_job(self, job: Dict) -> None:
+        job_id = job["job_id"]
+        created = datetime.fromisoformat(job["created_at"])
+        metrics.observe("ask_jobs.queue_wait_ms", (datetime.now(timezone.utc) - created).total_seconds() * 1000)
+        started = time.perf_counter()
+        heartbeat = asyncio.ensure_future(self._heartbeat(job_id))
+        try:
+            response = await self.handler(job["request"])
+        except asyncio.CancelledError:
+            await self.store.release(job_id)  # a graceful stop (deploy, Ctrl+C) is not the job's fault
+            raise
+        except Exception as e:
+            logger.exception(f"Ask job {job_id} failed")
+            metrics.increment("ask_jobs.failed")
+            await self.store.finish(job_id, error=str(e))
+            return
+        finally:
+            heartbeat.cancel()
+        metrics.observe("ask_jobs.run_ms", (time.perf_counter() - started) * 1000)
+        metrics.increment("ask_jobs.completed")
+        await self.store.finish(job_id, response=response)
+
+    async def _heartbeat(self, job_id: str) -> None:
+        interval = getattr(self.store, "lease", ASK_JOB_LEASE_S) / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await self.store.heartbeat(job_id):
+                    logger.warning(f"Ask job {job_id} lost its lease; another worker may run it too")
+            except Exception:
+                logger.exception(f"Renewing the lease of ask job {job_id} failed")
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,314 @@
+# app/utils/bulk_io.py
+
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+from sqlalchemy import insert, select, union_all
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.models.chat_session import ChatSession
+from app.models.message import Message, MessageArchive
+from app.utils.fast_json import dumps
+from app.utils.metrics import metrics
+
+logger = logging.getLogger("ai_assistant")
+
+# Rows per transaction on import, and per encoded chunk on export.
+BULK_CHUNK_ROWS = int(os.getenv("BULK_CHUNK_ROWS", "10000"))
+
+FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Import order: sessions before their messages.
+TABLE_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "chat_sessions": ("id", "user_id", "session_type", "started_at", "ended_at"),
+    "messages": ("id", "session_id", "sender", "message", "payload", "timestamp", "response_to"),
+}
+_TABLES = {"chat_sessions": ChatSession.__table__, "messages": Message.__table__}
+_TIME_COLUMNS = {"chat_sessions": "started_at", "messages": "timestamp"}
+# (parent table, column): rows whose parent is missing are skipped on Postgres.
+_PARENTS = {"chat_sessions": ("users", "user_id"), "messages": ("chat_sessions", "session_id")}
+
+_UUID_COLUMNS = {"id", "user_id", "session_id", "response_to"}
+_TIME_COLUMN_NAMES = {"started_at", "ended_at", "timestamp"}
+_JSON_COLUMNS = {"payload"}
+
+
+def _check(table: str, fmt: str) -> None:
+    if table not in TABLE_COLUMNS:
+        raise ValueError(f"Unknown table '{table}'. Choose {', '.join(TABLE_COLUMNS)}.")
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Choose {', '.join(FORMATS)}.")
+
+
+def _throughput(summary: Dict, started: float) -> Dict:
+    seconds = time.perf_counter() - started
+    summary["seconds"] = round(seconds, 3)
+    summary["rows_per_s"] = round(summary["rows"] / seconds) if seconds > 0 else 0
+    return summary
+
+
+# --- export -------------------------------------------------------------
+
+def _export_query(table: str, since: Optional[datetime], until: Optional[datetime], include_archive: bool):
+    columns = TABLE_COLUMNS[table]
+    sources = [_TABLES[table]] + ([MessageArchive.__table__] if include_archive and table == "messages" else [])
+    selects = []
+    for source in sources:
+        query = select(*[source.c[name] for name in columns])
+        time_column = source.c[_TIME_COLUMNS[table]]
+        if since is not None:
+            query = query.where(time_column >= since)  # prunes message partitions
+        if until is not None:
+            query = query.where(time_column < until)
+        selects.append(query)
+    # No ORDER BY: rows stream in storage order, so the server never sorts the whole table.
+    return selects[0] if len(selects) == 1 else union_all(*selects)
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _encode(rows: Sequence[Sequence], columns: Sequence[str], fmt: str, header: bool) -> bytes:
+    if fmt == "ndjson":
+        return b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(columns)
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def _copy_csv_out(conn: AsyncConnection, query, summary: Dict) -> AsyncIterator[bytes]:
+    """Postgres COPY ... TO STDOUT (FORMAT csv), relayed through a small queue for backpressure."""
+    compiled = query.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    # asyncpg's paramstyle is numeric ($1, $2, ...), in the order of positiontup.
+    args = [compiled.params[name] for name in compiled.positiontup]
+    driver = (await conn.get_raw_connection()).driver_connection
+    chunks: asyncio.Queue = asyncio.Queue(maxsize=8)
+    done = object()
+
+    async def copy() -> None:
+        try:
+            status = await driver.copy_from_query(str(compiled), *args, output=chunks.put, format="csv", header=True)
+            summary["rows"] = int(status.split()[-1])
+        except asyncio.CancelledError:
+            raise  # the consumer went away; nobody reads the queue any more
+        except Exception as e:
+            await chunks.put(e)
+            return
+        await chunks.put(done)
+
+    task = asyncio.ensure_future(copy())
+    try:
+        while (chunk := await chunks.get()) is not done:
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        task.cancel()
+
+
+async def export_table(
+    engine: AsyncEngine,
+    table: str,
+    fmt: str = "ndjson",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    include_archive: bool = False,
+    chunk_rows: int = BULK_CHUNK_ROWS,
+    summary: Optional[Dict] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Streams a table as NDJSON (one object per line) or CSV (with a header row) in chunks of
+    `chunk_rows`, over one connection and a server-side cursor, so memory stays flat however
+    many rows there are. CSV from Postgres is produced by COPY itself. `summary`, if given, is
+    filled with rows, seconds and rows_per_s once the stream ends.
+    """
+    _check(table, fmt)
+    summary = {} if summary is None else summary
+    summary.update(table=table, format=fmt, rows=0)
+    columns = TABLE_COLUMNS[table]
+    query = _export_query(table, since, until, include_archive)
+    started = time.perf_counter()
+
+    async with engine.connect() as conn:
+        if fmt == "csv" and conn.dialect.name == "postgresql":
+            async for chunk in _copy_csv_out(conn, query, summary):
+                yield chunk
+        else:
+            result = await conn.stream(query.execution_options(yield_per=chunk_rows))
+            async for rows in result.partitions(chunk_rows):
+                yield _encode(rows, columns, fmt, header=summary["rows"] == 0)
+                summary["rows"] += len(rows)
+            if fmt == "csv" and summary["rows"] == 0:
+                yield _encode([], columns, fmt, header=True)
+
+    _throughput(summary, started)
+    metrics.observe("bulk_io.export_rows_per_s", summary["rows_per_s"])
+    logger.info(f"Exported {summary['rows']} {table} rows as {fmt} ({summary['rows_per_s']} rows/s)")
+
+
+# --- import -------------------------------------------------------------
+
+async def _lines(source: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    pending = b""
+    async for chunk in source:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode() + "\n"
+    if pending:
+        yield pending.decode()
+
+
+async def _ndjson_records(lines: AsyncIterable[str]) -> AsyncIterator[Dict]:
+    async for line in lines:
+        if line.strip():
+            yield orjson.loads(line)
+
+
+async def _csv_records(lines: AsyncIterable[str]) -> AsyncIterator[Dict]:
+    """CSV with a header row. Lines are buffered while a quoted field (e.g. a multi-line message) is open."""
+    header, pending, quotes = None, [], 0
+    async for line in lines:
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            continue
+        for values in csv.reader(pending):
+            if header is None:
+                header = values
+            elif values:
+                yield {name: value for name, value in zip(header, values)}
+        pending, quotes = [], 0
+
+
+def _coerce(name: str, value: Any) -> Any:
+    """A value read from NDJSON or CSV, as the DB driver expects it. Empty CSV fields are NULL."""
+    if value is None or value == "":
+        return None
+    if name in _UUID_COLUMNS:
+        return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+    if name in _TIME_COLUMN_NAMES:
+        # These columns are "timestamp" without time zone (see data/schema.sql); values are naive UTC.
+        parsed = datetime.fromisoformat(value)
+        return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+    if name in _JSON_COLUMNS and isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def coerce_row(columns: Sequence[str], record: Dict) -> Dict:
+    return {name: _coerce(name, record.get(name)) for name in columns}
+
+
+def copy_records(table: str, rows: List[Dict]) -> List[Tuple]:
+    """Coerced rows as the tuples asyncpg's copy_records_to_table takes, in TABLE_COLUMNS order."""
+    columns = TABLE_COLUMNS[table]
+    return [
+        tuple(json.dumps(row[name]) if name in _JSON_COLUMNS and row[name] is not None else row[name] for name in columns)
+        for row in rows
+    ]
+
+
+async def _load_chunk_postgres(conn: AsyncConnection, table: str, rows: List[Dict]) -> int:
+    """COPY into a temp staging table, then one INSERT ... SELECT that skips duplicates and orphans."""
+    columns = TABLE_COLUMNS[table]
+    stage = f"_bulk_{table}"
+    parent, parent_column = _PARENTS[table]
+    await conn.exec_driver_sql(
+        f'CREATE TEMP TABLE IF NOT EXISTS "{stage}" (LIKE "{table}" INCLUDING DEFAULTS) ON COMMIT DELETE ROWS'
+    )
+    driver = (await conn.get_raw_connection()).driver_connection
+    await driver.copy_records_to_table(stage, records=copy_records(table, rows), columns=list(columns))
+    if table == "messages":
+        await conn.exec_driver_sql(f'SELECT ensure_message_partitions(min("timestamp")::date) FROM "{stage}"')
+    column_list = ", ".join(f'"{name}"' for name in columns)
+    result = await conn.exec_driver_sql(
+        f'INSERT INTO "{table}" ({column_list}) SELECT {column_list} FROM "{stage}" s '
+        f'WHERE EXISTS (SELECT 1 FROM "{parent}" p WHERE p.id = s."{parent_column}") '
+        f"ON CONFLICT DO NOTHING"
+    )
+    return result.rowcount
+
+
+async def _load_chunk(conn: AsyncConnection, table: str, rows: List[Dict]) -> int:
+    if conn.dialect.name == "postgresql":
+        return await _load_chunk_postgres(conn, table, rows)
+    if conn.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        statement = sqlite_insert(_TABLES[table]).on_conflict_do_nothing()
+    else:
+        statement = insert(_TABLES[table])
+    result = await conn.execute(statement, rows)
+    return result.rowcount
+
+
+async def import_table(
+    engine: AsyncEngine,
+    table: str,
+    source: AsyncIterable[bytes],
+    fmt: str = "ndjson",
+    chunk_rows: int = BULK_CHUNK_ROWS,
+) -> Dict:
+    """
+    Loads NDJSON or CSV rows (as written by export_table) from a byte stream, `chunk_rows` per
+    transaction, so memory stays flat and a failure only rolls back the current chunk. Rows
+    that already exist are skipped; on Postgres so are rows whose parent (the user of a
+    session, the session of a message) does not exist. Imported sessions are not archived.
+    """
+    _check(table, fmt)
+    columns = TABLE_COLUMNS[table]
+    records = _ndjson_records(_lines(source)) if fmt == "ndjson" else _csv_records(_lines(source))
+    summary = {"table": table, "format": fmt, "rows": 0, "inserted": 0, "skipped": 0, "chunks": 0}
+    started = time.perf_counter()
+
+    async def flush(conn: AsyncConnection, rows: List[Dict]) -> None:
+        try:
+            async with conn.begin():
+                inserted = await _load_chunk(conn, table, rows)
+        except Exception as e:
+            logger.exception(f"Importing a chunk of {len(rows)} {table} rows failed after {summary['rows']} rows")
+            raise
+        summary["rows"] += len(rows)
+        summary["inserted"] += inserted
+        summary["skipped"] += len(rows) - inserted
+        summary["chunks"] += 1
+        logger.debug(f"Imported chunk {summary['chunks']} of {table}: {inserted}/{len(rows)} rows")
+
+    # One connection for the whole run, so the Postgres staging table is created once.
+    async with engine.connect() as conn:
+        rows: List[Dict] = []
+        async for record in records:
+            rows.append(coerce_row(columns, record))
+            if len(rows) >= chunk_rows:
+                await flush(conn, rows)
+                rows = []
+        if rows:
+            await flush(conn, rows)
+
+    _throughput(summary, started)
+    metrics.observe("bulk_io.import_rows_per_s", summary["rows_per_s"])
+    logger.info(
+        f"Imported {summary['inserted']} of {summary['rows']} {table} rows from {fmt} "
+        f"({summary['rows_per_s']} rows/s, {summary['skipped']} skipped)"
+    )
+    return summary
@@ -0,0 +1,262 @@
+# app/utils/click_buffer.py
+
+import asyncio
+import logging
+import os
+import re
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit, urlunsplit
+from uuid import UUID
+
+from sqlalchemy.exc import DataError, IntegrityError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.crud.affiliate import get_partner_urls, insert_clicks
+from app.models.affiliate import utcnow_naive
+from app.utils.metrics import metrics
+
+logger = logging.getLogger("ai_assistant")
+
+# Errors that mean the batch itself is bad, not that the database is unavailable.
+_REJECTED = (IntegrityError, DataError, ProgrammingError, ValueError, TypeError)
+
+# A flush starts once this many clicks are buffered, or every interval, whichever comes first.
+CLICK_FLUSH_MAX_EVENTS = int(os.getenv("CLICK_FLUSH_MAX_EVENTS", "1000"))
+CLICK_FLUSH_INTERVAL_S = float(os.getenv("CLICK_FLUSH_INTERVAL_S", "1"))
+# Clicks held while the database is slow or down; beyond this the oldest are dropped.
+CLICK_BUFFER_MAX_EVENTS = int(os.getenv("CLICK_BUFFER_MAX_EVENTS", "100000"))
+# Times a batch the database rejects (integrity/data errors) is tried before it is dead-lettered.
+CLICK_FLUSH_MAX_ATTEMPTS = int(os.getenv("CLICK_FLUSH_MAX_ATTEMPTS", "3"))
+CLICK_DEAD_LETTER_MAX_EVENTS = int(os.getenv("CLICK_DEAD_LETTER_MAX_EVENTS", "10000"))
+AFFILIATE_CACHE_TTL_S = float(os.getenv("AFFILIATE_CACHE_TTL_S", "300"))
+AFFILIATE_CACHE_RETRY_S = float(os.getenv("AFFILIATE_CACHE_RETRY_S", "5"))
+
+
+def _host_and_path(url: str) -> Tuple[str, str]:
+    parts = urlsplit(url if "//" in url else f"//{url}")
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return host, parts.path.rstrip("/")
+
+
+_HOSTNAME = re.compile(r"[a-z0-9-]+(\.[a-z0-9-]+)*")  # urlsplit lower-cases hostname
+_URL_SAFE = "/%:@!$&'()*+,;=-._~"
+
+
+def safe_destination(url: str) -> Optional[str]:
+    """
+    The redirect target for a click URL, rebuilt from its parsed scheme, host, path and query,
+    or None unless it is an absolute http(s) URL with a host and no userinfo. Backslashes and
+    control characters are refused because browsers and urllib disagree on where the host ends.
+    """
+    if "\\" in url or any(ord(c) < 0x20 or ord(c) == 0x7F for c in url):
+        return None
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    if parts.scheme.lower() not in ("http", "https") or "@" in parts.netloc:
+        return None
+    if not parts.hostname or not _HOSTNAME.fullmatch(parts.hostname):
+        return None
+    netloc = parts.hostname if port is None else f"{parts.hostname}:{port}"
+    path = quote(parts.path, safe=_URL_SAFE) or "/"
+    return urlunsplit((parts.scheme.lower(), netloc, path, quote(parts.query, safe=_URL_SAFE + "?"), ""))
+
+
+class AffiliateResolver:
+    """
+    Maps a destination URL to the affiliate whose partner_url it falls under.
+
+    The affiliates table is loaded whole and kept for `ttl` seconds, so resolving a click never
+    touches the database. Matching ignores scheme, "www." and case of the host; among partner
+    URLs on the same host the longest matching path prefix wins.
+    """
+
+    def __init__(self, engine: AsyncEngine, ttl: float = AFFILIATE_CACHE_TTL_S, retry_after: float = AFFILIATE_CACHE_RETRY_S):
+        self.engine = engine
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._by_host: Optional[Dict[str, List[Tuple[str, UUID]]]] = None
+        self._expires_at = 0.0
+        self._loading = asyncio.Lock()
+
+    async def resolve(self, url: str) -> Optional[UUID]:
+        """The affiliate for a click URL; None if no partner matches or the URL is not safe_destination()."""
+        destination = safe_destination(url)
+        if destination is None:
+            return None
+        if self._by_host is None or time.monotonic() >= self._expires_at:
+            await self.refresh()
+        host, path = _host_and_path(destination)
+        for prefix, affiliate_id in self._by_host.get(host, ()):
+            if path == prefix or path.startswith(prefix + "/"):
+                return affiliate_id
+        return None
+
+    async def refresh(self, force: bool = False) -> None:
+        async with self._loading:
+            if not force and self._by_host is not None and time.monotonic() < self._expires_at:
+                return  # another caller reloaded while we waited
+            try:
+                async with self.engine.connect() as conn:
+                    rows = await get_partner_urls(conn)
+            except Exception:
+                if self._by_host is None:
+                    raise
+                logger.exception(f"Reloading affiliates failed; keeping the cached map for {self.retry_after:g}s")
+                self._expires_at = time.monotonic() + self.retry_after
+                return
+            by_host: Dict[str, List[Tuple[str, UUID]]] = {}
+            for affiliate_id, partner_url in rows:
+                host, path = _host_and_path(partner_url)
+                if host:
+                    by_host.setdefault(host, []).append((path, affiliate_id))
+            for prefixes in by_host.values():
+                prefixes.sort(key=lambda entry: len(entry[0]), reverse=True)
+            self._by_host = by_host
+            self._expires_at = time.monotonic() + self.ttl
+            metrics.increment("affiliates.cache_loads")
+            logger.debug(f"Loaded {len(rows)} affiliate partner URLs")
+
+
+class ClickBuffer:
+    """
+    In-memory buffer that writes affiliate clicks in batches instead of one INSERT per click.
+
+    record() only appends, so the click endpoint can redirect without waiting on the database.
+    A flush starts when `flush_max` clicks are buffered or `interval` seconds have passed, and
+    writes everything buffered, `flush_max` clicks per transaction (COPY + INSERT ... SELECT on
+    Postgres, a multi-row INSERT elsewhere).
+
+    A batch that fails stays buffered and is retried on later flushes:
+    - if the data itself was rejected (integrity or data error), the later batches are still
+      written, and after `max_attempts` the batch moves to `dead_letters` (clicks.dead_lettered);
+    - on any other error the database is taken to be unavailable, and the flush stops until
+      the next one.
+    Clicks beyond `max_buffered` are dropped oldest first and counted as clicks.dropped.
+    close() flushes what is left.
+
+    Clicks live only in this process until flushed, so a crash loses at most about one
+    interval of them.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        flush_max: int = CLICK_FLUSH_MAX_EVENTS,
+        interval: float = CLICK_FLUSH_INTERVAL_S,
+        max_buffered: int = CLICK_BUFFER_MAX_EVENTS,
+        max_attempts: int = CLICK_FLUSH_MAX_ATTEMPTS,
+        max_dead_letters: int = CLICK_DEAD_LETTER_MAX_EVENTS,
+    ):
+        self.engine = engine
+        self.flush_max = flush_max
+        self.interval = interval
+        self.max_buffered = max_buffered
+        self.max_attempts = max_attempts
+        self.dead_letters: Deque[Dict] = deque(maxlen=max_dead_letters)
+        self._events: Deque[Dict] = deque()
+        self._retries: Deque[Tuple[int, List[Dict]]] = deque()  # (failed attempts, batch), oldest first
+        self._flushing = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._timer: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._events) + sum(len(batch) for _, batch in self._retries)
+
+    def record(self, affiliate_id: UUID, destination_url: str, user_id: Optional[UUID] = None) -> None:
+        self._events.append({
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "affiliate_id": affiliate_id,
+            "destination_url": destination_url,
+            "clicked_at": utcnow_naive(),
+        })
+        metrics.increment("clicks.recorded")
+        self._trim()
+        if len(self._events) >= self.flush_max and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.ensure_future(self.flush())
+
+    def _trim(self) -> None:
+        """Drops the oldest clicks, retried batches first, until at most `max_buffered` are held."""
+        excess = len(self) - self.max_buffered
+        while excess > 0 and self._retries:
+            attempts, batch = self._retries.popleft()
+            if len(batch) > excess:
+                self._retries.appendleft((attempts, batch[excess:]))
+            metrics.increment("clicks.dropped", min(excess, len(batch)))
+            excess -= len(batch)
+        while excess > 0:
+            self._events.popleft()
+            metrics.increment("clicks.dropped")
+            excess -= 1
+
+    def _take(self) -> List[Dict]:
+        """The next `flush_max` new clicks."""
+        return [self._events.popleft() for _ in range(min(len(self._events), self.flush_max))]
+
+    async def flush(self) -> int:
+        """Writes everything buffered so far, retried batches first; returns the number of clicks written."""
+        async with self._flushing:
+            written = 0
+            retries = list(self._retries)
+            self._retries.clear()
+            while retries or self._events:
+                attempts, batch = retries.pop(0) if retries else (0, self._take())
+                started = time.perf_counter()
+                try:
+                    async with self.engine.begin() as conn:
+                        await insert_clicks(conn, batch)
+                except _REJECTED as e:
+                    metrics.increment("clicks.flush_errors")
+                    if attempts + 1 < self.max_attempts:
+                        logger.warning(f"{len(batch)} clicks were rejected (attempt {attempts + 1}), retrying next flush: {e}")
+                        self._retries.append((attempts + 1, batch))
+                    else:
+                        logger.error(f"{len(batch)} clicks rejected {attempts + 1} times; moved to dead letters: {e}")
+                        metrics.increment("clicks.dead_lettered", len(batch))
+                        self.dead_letters.extend(batch)
+                    continue
+                except Exception:
+                    logger.exception(f"Flushing {len(batch)} clicks failed; keeping them for the next flush")
+                    metrics.increment("clicks.flush_errors")
+                    self._retries.append((attempts, batch))
+                    self._retries.extend(retries)  # not tried yet; new clicks not taken stay in _events
+                    self._trim()
+                    break
+                written += len(batch)
+                metrics.increment("clicks.flushed", len(batch))
+                metrics.observe("clicks.flush_ms", (time.perf_counter() - started) * 1000)
+                metrics.observe("clicks.batch_size", len(batch))
+            metrics.set_gauge("clicks.buffered", len(self))
+            return written
+
+    def start(self) -> None:
+        if self._timer is None:
+            self._timer = asyncio.ensure_future(self._flush_periodically())
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            try:
+                await self._timer
+            except asyncio.CancelledError:
+                pass
+            self._timer = None
+        if self._flush_task is not None:
+            await self._flush_task
+        written = await self.flush()
+        if len(self):
+            logger.warning(f"{len(self)} clicks could not be written on shutdown")
+        logger.info(f"Click buffer closed after writing {written} remaining clicks")
@@ -0,0 +1,40 @@
+from typing import Any, List
+
+PREFERENCES_MAX_CHARS = 300
+
+
+def _flatten(prefix: str, value: Any, parts: List[str]) -> None:
+    if value is None or value == "" or value == [] or value == {} or value is False:
+        return
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else str(key), item, parts)
+    elif isinstance(value, (list, tuple)):
+        items = [str(item) for item in value if item not in (None, "")]
+        if items:
+            parts.append(f"{prefix}: {', '.join(items)}")
+    elif value is True:
+        parts.append(prefix)
+    else:
+        parts.append(f"{prefix}: {value}")
+
+
+def compact_preferences(preferences: Any, max_chars: int = PREFERENCES_MAX_CHARS) -> str:
+    """
+    Flattens a preferences JSON document into one short prompt line, e.g.
+    {"diet": "vegetarian", "interests": ["history", "street food"], "accessible": true}
+    -> "diet: vegetarian; interests: history, street food; accessible".
+    Empty values are dropped and whole entries past `max_chars` are cut.
+    """
+    if not preferences:
+        return ""
+    parts: List[str] = []
+    _flatten("" if isinstance(preferences, dict) else "preferences", preferences, parts)
+
+    text = ""
+    for part in parts:
+        candidate = f"{text}; {part}" if text else part
+        if len(candidate) > max_chars:
+            break
+        text = candidate
+    return text
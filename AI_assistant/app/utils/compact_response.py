@@ -0,0 +1,48 @@
+from typing import Any, List
+
+RESPONSE_MAX_CHARS = 400
+
+# Keys that name an entry in a list of results (items, comparison, days, details).
+_LABEL_KEYS = ("name", "title", "day", "type")
+# Short facts worth keeping next to the label; descriptions and links are dropped.
+_FACT_KEYS = ("rating", "price", "price_level", "value")
+# List fields kept in full, e.g. a day's activities in a plan.
+_DETAIL_LIST_KEYS = ("activities",)
+
+
+def _label(item: Any) -> str:
+    if not isinstance(item, dict):
+        return str(item)
+    label = next((str(item[key]) for key in _LABEL_KEYS if item.get(key) not in (None, "")), "")
+    facts = [str(item[key]) for key in _FACT_KEYS if item.get(key) not in (None, "")]
+    facts += [" / ".join(map(str, item[key])) for key in _DETAIL_LIST_KEYS if isinstance(item.get(key), list) and item[key]]
+    if label and facts:
+        return f"{label} ({', '.join(facts)})"
+    return label or ", ".join(facts)
+
+
+def compact_response(payload: Any, max_chars: int = RESPONSE_MAX_CHARS) -> str:
+    """
+    Turns a structured AI response into one short line for the conversation memory, e.g.
+    {"title": "Top food in Pune", "items": [{"name": "Vaishali", "rating": 4.5, ...}], "follow_up": "Book one?"}
+    -> "Top food in Pune; items: Vaishali (4.5); follow_up: Book one?".
+    Boilerplate summaries, descriptions and links are left out; the line is cut at `max_chars`.
+    """
+    if not payload:
+        return ""
+    if not isinstance(payload, dict):
+        return str(payload)[:max_chars]
+
+    parts: List[str] = []
+    if payload.get("title"):
+        parts.append(str(payload["title"]))
+    for key, value in payload.items():
+        if isinstance(value, list):
+            labels = [label for label in (_label(item) for item in value) if label]
+            if labels:
+                parts.append(f"{key}: {', '.join(labels)}")
+    if payload.get("follow_up"):
+        parts.append(f"follow_up: {payload['follow_up']}")
+
+    text = "; ".join(parts)
+    return text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + "…"
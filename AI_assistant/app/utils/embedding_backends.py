@@ -0,0 +1,96 @@
+# app/utils/embedding_backends.py
+
+import logging
+import os
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger("ai_assistant")
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+
+# int8 ONNX export settings; the export is created once and reused from disk.
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "models/all-MiniLM-L6-v2-onnx")
+EMBEDDING_ONNX_QUANTIZATION = os.getenv("EMBEDDING_ONNX_QUANTIZATION", "avx2")  # arm64, avx2, avx512, avx512_vnni
+
+
+def onnx_int8_file_name(quantization: str = EMBEDDING_ONNX_QUANTIZATION) -> str:
+    return f"onnx/model_int8_{quantization}.onnx"
+
+
+def ensure_onnx_int8_export(
+    model_name: str = EMBEDDING_MODEL,
+    export_dir: str = EMBEDDING_ONNX_DIR,
+    quantization: str = EMBEDDING_ONNX_QUANTIZATION,
+) -> str:
+    """
+    Exports `model_name` to ONNX and dynamically quantizes it to int8 under `export_dir`,
+    unless that file already exists. Returns the export directory.
+
+    Requires `sentence-transformers[onnx]` (optimum + onnxruntime).
+    """
+    file_name = onnx_int8_file_name(quantization)
+    if os.path.exists(os.path.join(export_dir, file_name)):
+        logger.debug("Using existing int8 ONNX export: %s", os.path.join(export_dir, file_name))
+        return export_dir
+
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    logger.info("Exporting %s to int8 ONNX (%s) in %s", model_name, quantization, export_dir)
+    try:
+        model = SentenceTransformer(model_name, backend="onnx")
+        model.save(export_dir)
+        export_dynamic_quantized_onnx_model(
+            model,
+            quantization_config=quantization,
+            model_name_or_path=export_dir,
+            file_suffix=f"int8_{quantization}",
+        )
+    except Exception as e:
+        logger.exception("Failed to export int8 ONNX embedding model")
+        raise
+    return export_dir
+
+
+def _torch_embeddings() -> Embeddings:
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+
+def _onnx_int8_embeddings() -> Embeddings:
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    export_dir = ensure_onnx_int8_export()
+    return HuggingFaceEmbeddings(
+        model_name=export_dir,
+        model_kwargs={
+            "backend": "onnx",
+            "model_kwargs": {"file_name": onnx_int8_file_name(), "provider": "CPUExecutionProvider"},
+        },
+    )
+
+
+EMBEDDING_BACKENDS: Dict[str, Callable[[], Embeddings]] = {
+    "torch": _torch_embeddings,
+    "onnx-int8": _onnx_int8_embeddings,
+}
+
+
+def get_embeddings(backend: str = None) -> Embeddings:
+    """
+    Returns the LangChain embeddings for the configured backend (EMBEDDING_BACKEND):
+    "torch" is the full-precision sentence-transformer, "onnx-int8" the quantized CPU export.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Choose one of: {', '.join(EMBEDDING_BACKENDS)}")
+    logger.info("Loading embedding backend: %s (%s)", backend, EMBEDDING_MODEL)
+    return EMBEDDING_BACKENDS[backend]()
+
+
+@lru_cache(maxsize=None)
+def shared_embeddings(backend: Optional[str] = None) -> Embeddings:
+    """get_embeddings, loaded once per backend and shared by intent retrieval and long-term memory."""
+    return get_embeddings(backend)
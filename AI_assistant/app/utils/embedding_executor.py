@@ -0,0 +1,206 @@
+# app/utils/embedding_executor.py
+
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_community.vectorstores import FAISS
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger("ai_assistant")
+
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "32"))
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+EMBED_POOL_SIZE = int(os.getenv("EMBED_POOL_SIZE", "1"))
+EMBED_STATS_LOG_EVERY = int(os.getenv("EMBED_STATS_LOG_EVERY", "100"))
+
+
+class EmbeddingBatchExecutor:
+    """
+    Gathers concurrent similarity-search requests into micro-batches and runs the
+    embedding forward pass plus one batched FAISS search in a dedicated thread pool,
+    so neither blocks the event loop and each batch pays the model overhead once.
+
+    A batch is dispatched when it reaches `max_batch_size` or `max_wait_ms` after its
+    first query arrived, whichever comes first. At most `pool_size` batches run at once;
+    while the pool is busy new queries keep queueing and form the next, larger batch.
+    """
+
+    def __init__(
+        self,
+        vectorstore: FAISS,
+        max_batch_size: int = EMBED_BATCH_MAX_SIZE,
+        max_wait_ms: float = EMBED_BATCH_WAIT_MS,
+        pool_size: int = EMBED_POOL_SIZE,
+    ):
+        self.vectorstore = vectorstore
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.pool_size = pool_size
+        self._pool = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="embedding")
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.queries = 0
+        self.batches = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.perf_counter()
+        logger.info(
+            "EmbeddingBatchExecutor initialized (max_batch_size=%d, max_wait_ms=%s, pool_size=%d)",
+            max_batch_size, max_wait_ms, pool_size,
+        )
+
+    # --- public API ---------------------------------------------------
+
+    async def search(self, query: str, k: int = 3) -> List[Document]:
+        """
+        Returns the top-k documents for `query`, batched with any concurrent callers.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, k, future))
+        return await future
+
+    async def search_many(self, queries: List[str], k: int = 3) -> List[List[Document]]:
+        """
+        Submits all queries at once; they are split into batches of at most max_batch_size.
+        """
+        return list(await asyncio.gather(*(self.search(query, k) for query in queries)))
+
+    def stats(self) -> dict:
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            "queries": self.queries,
+            "batches": self.batches,
+            "avg_batch_size": round(self.queries / self.batches, 2) if self.batches else 0.0,
+            "queries_per_s": round(self.queries / elapsed, 2) if elapsed else 0.0,
+            "busy_queries_per_s": round(self.queries / self.busy_seconds, 2) if self.busy_seconds else 0.0,
+        }
+
+    async def close(self):
+        if self._collector:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+        while self._queue is not None and not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            future.cancel()  # queued but never batched
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("EmbeddingBatchExecutor closed: %s", self.stats())
+
+    # --- batching -----------------------------------------------------
+
+    def _ensure_started(self):
+        # Created lazily so the executor can be built at import time, outside any event loop.
+        loop = asyncio.get_running_loop()
+        if self._collector is None or self._collector.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.pool_size)
+            self._collector = asyncio.create_task(self._collect(), name="embedding-batch-collector")
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            batch: List[Tuple[str, int, asyncio.Future]] = []
+            try:
+                batch.append(await self._queue.get())
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch_size:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                self._dispatch(loop, batch)
+            except BaseException as e:
+                # Never leave a caller waiting on a batch that was not dispatched.
+                self._slots.release()
+                self._fail(batch, e)
+                if not isinstance(e, Exception):
+                    raise
+                logger.exception("Dispatching an embedding batch of %d queries failed", len(batch))
+
+    @staticmethod
+    def _fail(batch: List[Tuple[str, int, asyncio.Future]], error: BaseException):
+        for _, _, future in batch:
+            if future.done():
+                continue
+            if isinstance(error, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(error)
+
+    def _dispatch(self, loop: asyncio.AbstractEventLoop, batch: List[Tuple[str, int, asyncio.Future]]):
+        queries = [query for query, _, _ in batch]
+        k = max(k for _, k, _ in batch)
+        work = loop.run_in_executor(self._pool, self._embed_and_search, queries, k)
+
+        def resolve(done: asyncio.Future):
+            self._slots.release()
+            if done.cancelled():
+                self._fail(batch, asyncio.CancelledError())
+                return
+            if done.exception() is not None:
+                logger.error("Embedding batch of %d queries failed: %s", len(batch), done.exception())
+                self._fail(batch, done.exception())
+                return
+            results, seconds = done.result()
+            self._record(len(batch), seconds)
+            for (_, query_k, future), docs in zip(batch, results):
+                if not future.done():
+                    future.set_result(docs[:query_k])
+
+        work.add_done_callback(resolve)
+
+    def _embed_and_search(self, queries: List[str], k: int) -> Tuple[List[List[Document]], float]:
+        """
+        Runs in the pool: one embedding forward pass and one FAISS search for the whole batch.
+        """
+        started = time.perf_counter()
+        vectors = np.asarray(self.vectorstore.embeddings.embed_documents(queries), dtype=np.float32)
+        if getattr(self.vectorstore, "_normalize_L2", False):
+            import faiss
+            faiss.normalize_L2(vectors)
+        _, indices = self.vectorstore.index.search(vectors, k)
+
+        results = []
+        for row in indices:
+            docs = []
+            for i in row:
+                if i == -1:
+                    continue
+                doc = self.vectorstore.docstore.search(self.vectorstore.index_to_docstore_id[i])
+                if isinstance(doc, Document):
+                    docs.append(doc)
+            results.append(docs)
+        return results, time.perf_counter() - started
+
+    def _record(self, size: int, seconds: float):
+        self.queries += size
+        self.batches += 1
+        self.busy_seconds += seconds
+        metrics.increment("embedding.queries", size)
+        metrics.increment("embedding.batches")
+        metrics.observe("embedding.batch_size", size)
+        metrics.observe("embedding.batch_ms", seconds * 1000)
+        metrics.set_gauge("embedding.busy_queries_per_s", self.stats()["busy_queries_per_s"])
+        if self.batches % EMBED_STATS_LOG_EVERY == 0:
+            logger.info("Embedding throughput: %s", self.stats())
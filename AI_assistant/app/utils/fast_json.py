@@ -0,0 +1,77 @@
+# app/utils/fast_json.py
+
+import os
+from typing import Any, AsyncIterator, Callable, Iterator, List, Sequence
+
+import orjson
+from fastapi.responses import Response, StreamingResponse
+
+# Lists at least this long are streamed in chunks instead of encoded in one piece.
+STREAM_LIST_MIN_ITEMS = int(os.getenv("STREAM_LIST_MIN_ITEMS", "1000"))
+STREAM_CHUNK_ITEMS = int(os.getenv("STREAM_CHUNK_ITEMS", "500"))
+
+# UTC as "Z", like Pydantic's JSON output; UUIDs and datetimes are native to orjson.
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def _array_chunks(rows: Sequence, to_dict: Callable[[Any], dict], chunk_items: int) -> Iterator[bytes]:
+    yield b"["
+    for start in range(0, len(rows), chunk_items):
+        chunk = b",".join(dumps(to_dict(row)) for row in rows[start:start + chunk_items])
+        yield chunk if start == 0 else b"," + chunk
+    yield b"]"
+
+
+def json_list_response(
+    rows: Sequence,
+    to_dict: Callable[[Any], dict],
+    stream_min_items: int = STREAM_LIST_MIN_ITEMS,
+    chunk_items: int = STREAM_CHUNK_ITEMS,
+) -> Response:
+    """
+    JSON array of `to_dict(row)` for each row, encoded with orjson and no Pydantic round trip.
+    `to_dict` must produce the route's response_model shape. Long lists are encoded and sent in
+    chunks, so the encoded body is never held in one piece; the rows themselves already are. To
+    avoid loading them all, use json_list_stream_response.
+    """
+    if len(rows) < stream_min_items:
+        return Response(b"[" + b",".join(dumps(to_dict(row)) for row in rows) + b"]", media_type="application/json")
+    return StreamingResponse(_array_chunks(rows, to_dict, chunk_items), media_type="application/json")
+
+
+async def _stream_array(head: Sequence, rest: AsyncIterator[Sequence], to_dict: Callable[[Any], dict]) -> AsyncIterator[bytes]:
+    try:
+        yield b"[" + b",".join(dumps(to_dict(row)) for row in head)
+        async for rows in rest:
+            if rows:
+                yield b"," + b",".join(dumps(to_dict(row)) for row in rows)
+        yield b"]"
+    finally:
+        await rest.aclose()  # releases the source's connection if the client goes away
+
+
+async def json_list_stream_response(
+    chunks: AsyncIterator[Sequence],
+    to_dict: Callable[[Any], dict],
+    stream_min_items: int = STREAM_LIST_MIN_ITEMS,
+) -> Response:
+    """
+    Like json_list_response, for rows read in chunks (e.g. from a server-side cursor). Chunks are
+    read until `stream_min_items` rows have arrived: a list that ends first is sent in one piece,
+    a longer one is streamed as the remaining chunks are read, so neither its rows nor its body
+    are ever held in memory in full.
+    """
+    head: List = []
+    try:
+        async for rows in chunks:
+            head.extend(rows)
+            if head and len(head) >= stream_min_items:
+                return StreamingResponse(_stream_array(head, chunks, to_dict), media_type="application/json")
+    except BaseException:
+        await chunks.aclose()
+        raise
+    return json_list_response(head, to_dict, stream_min_items=len(head) + 1)
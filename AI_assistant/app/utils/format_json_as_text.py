@@ -1,3 +1,6 @@
+from typing import Any, Optional
+
+
 def format_json_as_text(data: dict, indent: int = 0) -> str:
     """
     Recursively converts a nested JSON/dictionary into a readable text format.
@@ -28,3 +31,13 @@ def format_json_as_text(data: dict, indent: int = 0) -> str:
         lines.append(f"{spacer}{data}")
 
     return "\n".join(lines)
+
+
+def render_message(message: Optional[str], payload: Any) -> str:
+    """
+    Text of a stored message: the saved text if there is one, otherwise the structured
+    AI payload rendered on demand.
+    """
+    if message is not None:
+        return message
+    return format_json_as_text(payload) if payload is not None else ""
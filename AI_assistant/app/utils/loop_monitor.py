@@ -0,0 +1,187 @@
+# app/utils/loop_monitor.py
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, NamedTuple, Optional
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger("ai_assistant")
+
+LOOP_MONITOR = os.getenv("LOOP_MONITOR", "off")  # on, off
+# A callback holding the loop at least this long is reported, with its stack and graph node.
+LOOP_MONITOR_THRESHOLD_MS = float(os.getenv("LOOP_MONITOR_THRESHOLD_MS", "100"))
+# How often the lag probe wakes up; its oversleep is the event-loop lag.
+LOOP_MONITOR_PROBE_MS = float(os.getenv("LOOP_MONITOR_PROBE_MS", "50"))
+LOOP_MONITOR_STACK_DEPTH = int(os.getenv("LOOP_MONITOR_STACK_DEPTH", "20"))
+
+
+class BlockReport(NamedTuple):
+    duration_ms: float
+    node: Optional[str]  # LangGraph node the callback ran for, if any
+    task: str  # coroutine (or callback) that held the loop
+    stack: str  # where the loop thread was while blocked; empty if the callback ended before sampling
+
+
+_original_run = asyncio.events.Handle._run
+_active: Optional["LoopMonitor"] = None
+
+
+def _timed_run(handle: asyncio.Handle) -> None:
+    monitor = _active
+    if monitor is None or handle._loop is not monitor.loop:
+        return _original_run(handle)
+    started = time.perf_counter()
+    record = [started, ""]  # the watchdog fills in the stack
+    monitor._running = record
+    try:
+        return _original_run(handle)
+    finally:
+        monitor._running = None
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms >= monitor.threshold_ms:
+            monitor._report(handle, elapsed_ms, record[1])
+
+
+def _node_of(handle: asyncio.Handle) -> Optional[str]:
+    from langchain_core.runnables.config import var_child_runnable_config
+
+    context = getattr(handle, "_context", None)
+    config = context.get(var_child_runnable_config) if context is not None else None
+    return ((config or {}).get("metadata") or {}).get("langgraph_node")
+
+
+def _task_of(handle: asyncio.Handle) -> str:
+    owner = getattr(handle._callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return getattr(coro, "__qualname__", repr(coro))
+    return getattr(handle._callback, "__qualname__", repr(handle._callback))
+
+
+def _format_stack(frame, depth: int) -> str:
+    """The innermost `depth` frames of the callback, without the event loop's own frames above it."""
+    stack = traceback.extract_stack(frame)
+    for i in range(len(stack) - 1, -1, -1):
+        if stack[i].name == "_run" and stack[i].filename == asyncio.events.__file__:
+            stack = stack[i + 1:]
+            break
+    return "".join(traceback.format_list(stack[-depth:]))
+
+
+class LoopMonitor:
+    """
+    Opt-in (LOOP_MONITOR=on) detector for sync work running on the event loop.
+
+    - Every callback the loop runs is timed; one taking at least `threshold_ms` is logged with
+      the stack the loop thread was in while it blocked (sampled by a watchdog thread), the
+      LangGraph node it belongs to and its task, and counted under event_loop.blocked[.<node>].
+    - A probe task sleeps `probe_ms` in a loop and records how late it wakes up as
+      event_loop.lag_ms.
+
+    Timing wraps asyncio.Handle._run, which costs about a microsecond per callback, so keep
+    it for load runs and debugging rather than production. Loops that do not run their
+    callbacks through it (uvloop, uvicorn's default when installed) are refused: run uvicorn
+    with --loop asyncio.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = LOOP_MONITOR_THRESHOLD_MS,
+        probe_ms: float = LOOP_MONITOR_PROBE_MS,
+        stack_depth: int = LOOP_MONITOR_STACK_DEPTH,
+        keep: int = 100,
+    ):
+        self.threshold_ms = threshold_ms
+        self.probe_ms = probe_ms
+        self.stack_depth = stack_depth
+        self.reports: Deque[BlockReport] = deque(maxlen=keep)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._running: Optional[list] = None  # [started, stack] of the callback on the loop now
+        self._loop_thread: Optional[int] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._probe: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self.loop is not None
+
+    def start(self) -> None:
+        """Starts monitoring the running loop. Only one loop is monitored per process."""
+        global _active
+        if self.running:
+            return
+        if _active is not None:
+            raise RuntimeError("Another LoopMonitor is already running")
+        loop = asyncio.get_running_loop()
+        if not isinstance(loop, asyncio.BaseEventLoop):
+            # uvloop's handles never call Handle._run, so every block would go unreported.
+            raise RuntimeError(
+                f"LOOP_MONITOR needs the asyncio event loop, not {type(loop).__module__}.{type(loop).__name__}; "
+                "start uvicorn with --loop asyncio"
+            )
+        self.loop = loop
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        _active = self
+        asyncio.events.Handle._run = _timed_run
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+        self._probe = asyncio.ensure_future(self._probe_lag())
+        logger.info(f"Event-loop monitor on: threshold {self.threshold_ms:g} ms, probe every {self.probe_ms:g} ms")
+
+    async def close(self) -> None:
+        global _active
+        if not self.running:
+            return
+        if _active is self:
+            asyncio.events.Handle._run = _original_run
+            _active = None
+        self._stop.set()
+        self._probe.cancel()
+        try:
+            await self._probe
+        except asyncio.CancelledError:
+            pass
+        await asyncio.to_thread(self._watchdog.join)
+        self.loop = None
+
+    async def _probe_lag(self) -> None:
+        interval = self.probe_ms / 1000
+        while True:
+            expected = self.loop.time() + interval
+            await asyncio.sleep(interval)
+            metrics.observe("event_loop.lag_ms", max(0.0, (self.loop.time() - expected) * 1000))
+
+    def _watch(self) -> None:
+        """Watchdog thread: captures the loop thread's stack while a callback is over the threshold."""
+        poll = self.threshold_ms / 4000
+        while not self._stop.wait(poll):
+            record = self._running
+            if record is None or record[1] or (time.perf_counter() - record[0]) * 1000 < self.threshold_ms:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None and self._running is record:
+                record[1] = _format_stack(frame, self.stack_depth)
+
+    def _report(self, handle: asyncio.Handle, elapsed_ms: float, stack: str) -> None:
+        node = _node_of(handle)
+        report = BlockReport(round(elapsed_ms, 1), node, _task_of(handle), stack)
+        self.reports.append(report)
+        metrics.increment("event_loop.blocked")
+        metrics.increment(f"event_loop.blocked.{node or 'none'}")
+        metrics.observe("event_loop.block_ms", elapsed_ms)
+        logger.warning(
+            f"Event loop blocked for {report.duration_ms} ms by {report.task} (node: {node or '-'})\n"
+            f"{report.stack or '  (stack not captured)'}"
+        )
+
+
+loop_monitor = LoopMonitor()
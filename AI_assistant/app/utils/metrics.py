@@ -0,0 +1,82 @@
+# app/utils/metrics.py
+
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict
+
+
+def _percentile(ordered: list, pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = (pct / 100) * (len(ordered) - 1)
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class Metrics:
+    """
+    Minimal in-process metrics registry: counters, gauges and sampled histograms.
+    Exposed as JSON by the /metrics endpoint. Safe to update from worker threads.
+    """
+
+    def __init__(self, sample_size: int = 1024):
+        self._lock = threading.Lock()
+        self._sample_size = sample_size
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._samples: Dict[str, Deque[float]] = {}
+        self._totals: Dict[str, list] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            if name not in self._samples:
+                self._samples[name] = deque(maxlen=self._sample_size)
+                self._totals[name] = [0, 0.0, value]  # count, sum, max
+            self._samples[name].append(value)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += value
+            totals[2] = max(totals[2], value)
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            histograms = {}
+            for name, samples in self._samples.items():
+                ordered = sorted(samples)
+                count, total, maximum = self._totals[name]
+                histograms[name] = {
+                    "count": count,
+                    "mean": round(total / count, 3) if count else 0.0,
+                    "p50": round(_percentile(ordered, 50), 3),
+                    "p95": round(_percentile(ordered, 95), 3),
+                    "p99": round(_percentile(ordered, 99), 3),
+                    "max": round(maximum, 3),
+                }
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "histograms": histograms,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._samples.clear()
+            self._totals.clear()
+
+
+metrics = Metrics()
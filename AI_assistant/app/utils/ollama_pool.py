@@ -0,0 +1,317 @@
+# app/utils/ollama_pool.py
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+from langchain_ollama import OllamaLLM
+from pydantic import ConfigDict, PrivateAttr
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger("ai_assistant")
+
+# Comma-separated Ollama URLs; empty means the single default endpoint (OLLAMA_HOST).
+OLLAMA_BACKENDS = os.getenv("OLLAMA_BACKENDS", "")
+OLLAMA_HEALTH_INTERVAL_S = float(os.getenv("OLLAMA_HEALTH_INTERVAL_S", "10"))
+OLLAMA_HEALTH_TIMEOUT_S = float(os.getenv("OLLAMA_HEALTH_TIMEOUT_S", "2"))
+OLLAMA_EJECT_AFTER_FAILURES = int(os.getenv("OLLAMA_EJECT_AFTER_FAILURES", "3"))
+OLLAMA_EJECT_SECONDS = float(os.getenv("OLLAMA_EJECT_SECONDS", "30"))
+
+# Keep the model (and its cached prompt prefix) loaded between requests. Every LLM uses the
+# same num_ctx: a different context size makes Ollama reload the model and drop that cache.
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "0"))  # 0 = the server's default
+
+# Hedging: if a call is still running past the p95 of recent calls of the same LLM,
+# send a duplicate to another backend and take whichever answers first.
+OLLAMA_HEDGE = os.getenv("OLLAMA_HEDGE", "0") == "1"
+OLLAMA_HEDGE_MIN_SAMPLES = int(os.getenv("OLLAMA_HEDGE_MIN_SAMPLES", "20"))
+OLLAMA_HEDGE_MIN_DELAY_MS = float(os.getenv("OLLAMA_HEDGE_MIN_DELAY_MS", "50"))
+
+
+class OllamaBackend:
+    def __init__(self, url: Optional[str]):
+        self.url = url  # None = the ollama client's default (OLLAMA_HOST)
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self._llms: Dict[Tuple, OllamaLLM] = {}
+        self._building = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.url or "default"
+
+    @property
+    def healthy(self) -> bool:
+        return self.ejected_until <= time.monotonic()
+
+    def llm(self, model: str, options: Dict[str, Any]) -> OllamaLLM:
+        """
+        The client for this model and options, built on first use. Building one creates its
+        httpx clients and SSL context (tens of ms), so async callers go through allm().
+        """
+        key = (model, tuple(sorted(options.items())))
+        with self._building:
+            llm = self._llms.get(key)
+            if llm is None:
+                kwargs = dict(options, model=model)
+                if self.url:
+                    kwargs["base_url"] = self.url
+                llm = self._llms[key] = OllamaLLM(**kwargs)
+        return llm
+
+    async def allm(self, model: str, options: Dict[str, Any]) -> OllamaLLM:
+        """llm() without blocking the event loop when the client is not built yet."""
+        llm = self._llms.get((model, tuple(sorted(options.items()))))
+        return llm if llm is not None else await asyncio.to_thread(self.llm, model, options)
+
+
+class OllamaPool:
+    """
+    A set of Ollama backends. Calls go to the healthy backend with the fewest in-flight
+    requests. A backend is ejected for OLLAMA_EJECT_SECONDS after OLLAMA_EJECT_AFTER_FAILURES
+    consecutive failures, counting both calls and background health checks, and the health
+    check re-admits it once /api/version answers.
+    """
+
+    def __init__(
+        self,
+        urls: List[Optional[str]],
+        eject_after_failures: int = OLLAMA_EJECT_AFTER_FAILURES,
+        eject_seconds: float = OLLAMA_EJECT_SECONDS,
+        health_interval_s: float = OLLAMA_HEALTH_INTERVAL_S,
+    ):
+        self.backends = [OllamaBackend(url) for url in urls]
+        self.eject_after_failures = eject_after_failures
+        self.eject_seconds = eject_seconds
+        self.health_interval_s = health_interval_s
+        self._lock = threading.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+
+    def prepare(self, model: str, options: Dict[str, Any]) -> None:
+        """Builds the client for this model and options on every backend ahead of the first call."""
+        for backend in self.backends:
+            backend.llm(model, options)
+
+    def acquire(self, exclude: Optional[OllamaBackend] = None) -> OllamaBackend:
+        """Picks the least-loaded healthy backend and counts the call as in flight."""
+        with self._lock:
+            candidates = [b for b in self.backends if b is not exclude and b.healthy]
+            if not candidates:
+                # Everything is ejected: try the backend that has failed least rather than fail outright.
+                candidates = [b for b in self.backends if b is not exclude] or self.backends
+                candidates = [min(candidates, key=lambda b: b.consecutive_failures)]
+            lowest = min(b.in_flight for b in candidates)
+            backend = random.choice([b for b in candidates if b.in_flight == lowest])
+            backend.in_flight += 1
+        metrics.set_gauge(f"ollama.{backend.name}.in_flight", backend.in_flight)
+        return backend
+
+    def release(self, backend: OllamaBackend, ok: bool) -> None:
+        with self._lock:
+            backend.in_flight -= 1
+            if ok:
+                backend.consecutive_failures = 0
+            else:
+                backend.consecutive_failures += 1
+                if backend.consecutive_failures >= self.eject_after_failures and backend.healthy and len(self.backends) > 1:
+                    backend.ejected_until = time.monotonic() + self.eject_seconds
+                    metrics.increment("ollama.ejections")
+                    logger.warning(f"Ejecting Ollama backend {backend.name} after {backend.consecutive_failures} failures")
+        metrics.set_gauge(f"ollama.{backend.name}.in_flight", backend.in_flight)
+        if not ok:
+            metrics.increment(f"ollama.{backend.name}.failures")
+
+    async def check_health(self, client: httpx.AsyncClient) -> None:
+        for backend in self.backends:
+            if not backend.url:
+                continue
+            try:
+                response = await client.get(f"{backend.url.rstrip('/')}/api/version", timeout=OLLAMA_HEALTH_TIMEOUT_S)
+                response.raise_for_status()
+                ok = True
+            except Exception as e:
+                logger.warning(f"Ollama backend {backend.name} failed its health check: {e!r}")
+                ok = False
+            with self._lock:
+                if ok:
+                    if not backend.healthy:
+                        logger.info(f"Ollama backend {backend.name} is healthy again")
+                    backend.consecutive_failures = 0
+                    backend.ejected_until = 0.0
+                else:
+                    backend.consecutive_failures += 1
+                    if len(self.backends) > 1 and not backend.healthy:
+                        backend.ejected_until = time.monotonic() + self.eject_seconds  # still down: keep it out
+                    elif len(self.backends) > 1 and backend.consecutive_failures >= self.eject_after_failures:
+                        backend.ejected_until = time.monotonic() + self.eject_seconds
+                        metrics.increment("ollama.ejections")
+                        logger.warning(f"Ejecting Ollama backend {backend.name} after {backend.consecutive_failures} failures")
+            metrics.set_gauge(f"ollama.{backend.name}.healthy", 1 if ok else 0)
+
+    async def _health_loop(self) -> None:
+        async with httpx.AsyncClient() as client:
+            while True:
+                await self.check_health(client)
+                await asyncio.sleep(self.health_interval_s)
+
+    def start(self) -> None:
+        """Starts the background health checks (needs a running event loop; no-op for one backend)."""
+        if len(self.backends) > 1 and (self._health_task is None or self._health_task.done()):
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def close(self) -> None:
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+
+def build_ollama_pool(backends: str = OLLAMA_BACKENDS) -> OllamaPool:
+    urls = [url.strip() for url in backends.split(",") if url.strip()]
+    logger.debug(f"Ollama backends: {urls or ['default']}")
+    return OllamaPool(urls or [None])
+
+
+ollama_pool = build_ollama_pool()
+
+
+class PooledOllamaLLM(LLM):
+    """
+    Drop-in OllamaLLM replacement that routes each call through an OllamaPool.
+    A failed call is retried once on another backend; async calls can be hedged.
+    """
+
+    model: str = "llama3.2"
+    temperature: Optional[float] = None
+    keep_alive: Optional[str] = OLLAMA_KEEP_ALIVE or None
+    num_ctx: Optional[int] = OLLAMA_NUM_CTX or None
+    hedge: bool = OLLAMA_HEDGE
+    pool: Any = None
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    _latencies: Deque[float] = PrivateAttr(default_factory=lambda: deque(maxlen=200))
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        # Clients are built here, usually at import, rather than on the event loop at the first call.
+        self._pool.prepare(self.model, self._options())
+
+    @property
+    def _llm_type(self) -> str:
+        return "pooled-ollama"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, **self._options()}
+
+    @property
+    def _pool(self) -> OllamaPool:
+        return self.pool or ollama_pool
+
+    def _options(self) -> Dict[str, Any]:
+        options = {"temperature": self.temperature, "keep_alive": self.keep_alive, "num_ctx": self.num_ctx}
+        return {key: value for key, value in options.items() if value is not None}
+
+    def hedge_delay_s(self) -> Optional[float]:
+        """p95 of recent successful calls, or None until there are enough samples."""
+        if len(self._latencies) < OLLAMA_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._latencies)
+        p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+        return max(p95, OLLAMA_HEDGE_MIN_DELAY_MS / 1000)
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        tried = None
+        for attempt in range(2):
+            backend = self._pool.acquire(exclude=tried)
+            started = time.perf_counter()
+            try:
+                text = backend.llm(self.model, self._options()).invoke(prompt, stop=stop, **kwargs)
+            except Exception as e:
+                self._pool.release(backend, ok=False)
+                if attempt or len(self._pool.backends) == 1:
+                    raise
+                logger.warning(f"Ollama call on {backend.name} failed ({e!r}); retrying on another backend")
+                tried = backend
+                continue
+            self._pool.release(backend, ok=True)
+            self._latencies.append(time.perf_counter() - started)
+            return text
+
+    async def _attempt(self, backend: OllamaBackend, prompt: str, stop, kwargs) -> str:
+        started = time.perf_counter()
+        try:
+            llm = await backend.allm(self.model, self._options())
+            text = await llm.ainvoke(prompt, stop=stop, **kwargs)
+        except asyncio.CancelledError:
+            self._pool.release(backend, ok=True)  # lost a hedge race; not the backend's fault
+            raise
+        except Exception:
+            self._pool.release(backend, ok=False)
+            raise
+        self._pool.release(backend, ok=True)
+        self._latencies.append(time.perf_counter() - started)
+        return text
+
+    async def _acall(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        pool = self._pool
+        primary_backend = pool.acquire()
+        primary = asyncio.ensure_future(self._attempt(primary_backend, prompt, stop, kwargs))
+        tasks = [primary]
+        try:
+            delay = self.hedge_delay_s() if self.hedge and len(pool.backends) > 1 else None
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    metrics.increment("ollama.hedges")
+                    tasks.append(asyncio.ensure_future(self._attempt(pool.acquire(exclude=primary_backend), prompt, stop, kwargs)))
+
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tasks.remove(task)
+                    if task.exception() is None:
+                        if task is not primary:
+                            metrics.increment("ollama.hedge_wins")
+                        return task.result()
+                    if not tasks and len(pool.backends) > 1 and task is primary and len(done) == 1:
+                        # Primary failed without a hedge in flight: retry once elsewhere.
+                        logger.warning(f"Ollama call on {primary_backend.name} failed ({task.exception()!r}); retrying")
+                        return await self._attempt(pool.acquire(exclude=primary_backend), prompt, stop, kwargs)
+                    if not tasks:
+                        raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def get_llm(model: str = "llama3.2", temperature: Optional[float] = None, **kwargs: Any) -> PooledOllamaLLM:
+    """LLM for the app's nodes, spread over the OLLAMA_BACKENDS pool."""
+    return PooledOllamaLLM(model=model, temperature=temperature, **kwargs)
@@ -0,0 +1,101 @@
+# app/utils/recommendation_store.py
+
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger("ai_assistant")
+
+WARM_RECS_BACKEND = os.getenv("WARM_RECS_BACKEND", "none")  # memory, redis, none
+WARM_RECS_URL = os.getenv("WARM_RECS_URL", "redis://localhost:6379/0")
+WARM_RECS_TTL_S = float(os.getenv("WARM_RECS_TTL_S", "86400"))
+WARM_RECS_MAX_ENTRIES = int(os.getenv("WARM_RECS_MAX_ENTRIES", "5000"))
+
+
+def warm_key(intent: str, sub_intent: str, location: str) -> Tuple[str, str, str]:
+    """Case- and whitespace-insensitive key, so "Pune, India" and " pune,  india" share an entry."""
+    return tuple(re.sub(r"\s+", " ", (part or "").strip().lower()) for part in (intent, sub_intent, location))
+
+
+def new_entry(response: Dict, requests: int = 0) -> Dict:
+    """A stored base recommendation: the parsed response plus when and why it was generated."""
+    return {
+        "response": response,
+        "requests": requests,  # how often the pair was asked for when it was mined
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+class RecommendationStore:
+    """
+    Pre-generated base recommendations per (intent, sub_intent, location), written by the
+    warming job (app/jobs/warm_recommendations.py) and read by the recommendation graph.
+    Entries expire `ttl` seconds after they were written, which bounds how stale a reused
+    answer can get. The base class is the "none" backend: every read misses.
+    """
+
+    async def get(self, intent: str, sub_intent: str, location: str) -> Optional[Dict]:
+        return None
+
+    async def set(self, intent: str, sub_intent: str, location: str, entry: Dict) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class InMemoryRecommendationStore(RecommendationStore):
+    """Per process; only useful when the warming runs in the same process (tests, benchmarks)."""
+
+    def __init__(self, max_entries: int = WARM_RECS_MAX_ENTRIES, ttl: float = WARM_RECS_TTL_S):
+        self.entries = TTLCache(maxsize=max_entries, ttl=ttl)
+
+    async def get(self, intent: str, sub_intent: str, location: str) -> Optional[Dict]:
+        return self.entries.get(warm_key(intent, sub_intent, location))
+
+    async def set(self, intent: str, sub_intent: str, location: str, entry: Dict) -> None:
+        self.entries.set(warm_key(intent, sub_intent, location), entry)
+
+
+class RedisRecommendationStore(RecommendationStore):
+    """Shared by the API workers and the warming job. One JSON string per key, with EX ttl."""
+
+    def __init__(self, url: str = WARM_RECS_URL, ttl: float = WARM_RECS_TTL_S, client=None):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url, decode_responses=True)
+        self.redis = client
+        self.ttl = int(ttl)
+
+    @staticmethod
+    def _key(intent: str, sub_intent: str, location: str) -> str:
+        return "warm_rec:" + ":".join(warm_key(intent, sub_intent, location))
+
+    async def get(self, intent: str, sub_intent: str, location: str) -> Optional[Dict]:
+        raw = await self.redis.get(self._key(intent, sub_intent, location))
+        return json.loads(raw) if raw else None
+
+    async def set(self, intent: str, sub_intent: str, location: str, entry: Dict) -> None:
+        await self.redis.set(self._key(intent, sub_intent, location), json.dumps(entry, default=str), ex=self.ttl)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def build_recommendation_store(backend: str = WARM_RECS_BACKEND) -> RecommendationStore:
+    if backend == "memory":
+        return InMemoryRecommendationStore()
+    if backend == "redis":
+        return RedisRecommendationStore()
+    if backend == "none":
+        return RecommendationStore()
+    raise ValueError(f"Unknown WARM_RECS_BACKEND '{backend}'. Choose memory, redis or none.")
+
+
+recommendation_store = build_recommendation_store()
+logger.debug(f"Warm recommendation backend: {WARM_RECS_BACKEND}")
@@ -0,0 +1,160 @@
+# app/utils/session_gate.py
+
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from app.utils.metrics import metrics
+
+logger = logging.getLogger("ai_assistant")
+
+# supersede: a newer query cancels older in-flight/queued ones for the session; queue: strictly FIFO
+ASK_SESSION_POLICY = os.getenv("ASK_SESSION_POLICY", "supersede")
+
+
+class Superseded(Exception):
+    """Raised to the caller whose graph run was cancelled by a newer query for the same session."""
+
+
+class _Turn:
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.future.add_done_callback(lambda f: f.cancelled() or f.exception())  # joiners are optional
+        self.task: Optional[asyncio.Task] = None
+        self.superseded = False
+        self.cancellable = True
+
+    def supersede(self) -> None:
+        self.superseded = True
+        if self.task is not None:
+            self.task.cancel()
+
+
+class _Lane:
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.turns: List[_Turn] = []
+        self.users = 0
+
+
+_current_turn: contextvars.ContextVar[Optional[_Turn]] = contextvars.ContextVar("session_turn", default=None)
+
+
+def commit_point() -> None:
+    """
+    Marks the running turn as past the point of no return (it is writing to the DB), so a newer
+    query waits for it instead of cancelling it. No-op outside SessionGate.run.
+    """
+    turn = _current_turn.get()
+    if turn is not None:
+        turn.cancellable = False
+
+
+class SessionGate:
+    """
+    Runs at most one graph invocation per chat session at a time, in arrival order.
+
+    - A query identical to one already queued or running for the session (same `key`) joins
+      that run and gets its result, so a double-send costs one generation.
+    - With supersede=True, a different query cancels the older runs that have not reached
+      commit_point(); their callers get Superseded and the lock passes to the newest query.
+    - A caller that goes away (client disconnect) cancels its run only before commit_point();
+      after it, the run finishes saving the turn before the cancellation goes through.
+
+    Per process: requests for one session must reach the same worker for this to hold.
+    """
+
+    def __init__(self, policy: str = ASK_SESSION_POLICY):
+        if policy not in ("supersede", "queue"):
+            raise ValueError(f"Unknown ASK_SESSION_POLICY '{policy}'. Choose supersede or queue.")
+        self.policy = policy
+        self._lanes: Dict[Any, _Lane] = {}
+
+    def in_flight(self, session_id: Any) -> int:
+        lane = self._lanes.get(session_id)
+        return len(lane.turns) if lane else 0
+
+    async def run(
+        self,
+        session_id: Any,
+        key: Hashable,
+        work: Callable[[], Awaitable[Any]],
+        supersede: Optional[bool] = None,
+    ) -> Any:
+        supersede = self.policy == "supersede" if supersede is None else supersede
+        lane = self._lanes.setdefault(session_id, _Lane())
+
+        for turn in lane.turns:
+            if turn.key == key and not turn.superseded:
+                metrics.increment("ask.coalesced")
+                logger.info(f"Joining in-flight request for session {session_id}")
+                return await asyncio.shield(turn.future)
+
+        turn = _Turn(key)
+        if supersede:
+            for older in lane.turns:
+                if older.cancellable and not older.superseded:
+                    older.supersede()
+                    metrics.increment("ask.superseded")
+                    logger.info(f"Superseding an older request for session {session_id}")
+        lane.turns.append(turn)
+        lane.users += 1
+        queued_at = time.perf_counter()
+        try:
+            async with lane.lock:
+                metrics.observe("ask.session_wait_ms", (time.perf_counter() - queued_at) * 1000)
+                if turn.superseded:
+                    raise Superseded(f"Superseded by a newer request for session {session_id}")
+                turn.task = asyncio.ensure_future(self._run_turn(turn, work))
+                try:
+                    await asyncio.wait({turn.task})
+                except asyncio.CancelledError:  # the caller went away
+                    if turn.cancellable:
+                        turn.task.cancel()
+                    else:
+                        await self._finish_committed(turn.task)
+                    raise
+                if turn.task.cancelled():
+                    raise Superseded(f"Superseded by a newer request for session {session_id}")
+                return turn.task.result()
+        except BaseException as e:
+            if not turn.future.done():
+                turn.future.set_exception(e if isinstance(e, Exception) else Superseded("The joined request was cancelled"))
+            raise
+        finally:
+            lane.turns.remove(turn)
+            lane.users -= 1
+            if not lane.users:
+                self._lanes.pop(session_id, None)
+
+    @staticmethod
+    async def _finish_committed(task: asyncio.Task) -> None:
+        """
+        Waits out a turn past commit_point() whose caller was cancelled, so its writes are not
+        cut in half and the session's next query still waits for them. Further cancellations
+        are absorbed until the turn is done.
+        """
+        while not task.done():
+            try:
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                pass
+        logger.info("Finished saving a turn whose caller went away")
+
+    @staticmethod
+    async def _run_turn(turn: _Turn, work: Callable[[], Awaitable[Any]]) -> Any:
+        _current_turn.set(turn)
+        try:
+            result = await work()
+        except Exception as e:
+            turn.future.set_exception(e)
+            raise
+        turn.future.set_result(result)
+        return result
+
+
+session_gate = SessionGate()
@@ -0,0 +1,120 @@
+# benchmarks/bulk_io.py
+"""
+Import/export throughput (rows/s) of app/utils/bulk_io.py against the per-row path it
+replaces (crud.message.create_message: one INSERT, commit and refresh per message).
+
+Seeds --sessions x --messages into the source database, exports the messages in each format,
+then imports them into the target database both ways. The target is dropped and recreated
+per run, so point --target-url at a scratch database; by default both are throwaway SQLite files.
+
+    python -m benchmarks.bulk_io --sessions 200 --messages 500
+    python -m benchmarks.bulk_io --source-url postgresql+asyncpg://.../src --target-url postgresql+asyncpg://.../dst
+
+--per-row-limit caps the rows fed through create_message, which is orders of magnitude slower.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import AsyncIterator, Dict, List
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud.message import create_message
+from app.db.base import Base
+from app.models.message import Message
+from app.utils.bulk_io import FORMATS, TABLE_COLUMNS, coerce_row, export_table, import_table
+from benchmarks.seed_data import seed
+from benchmarks.stats import save_result
+
+
+async def _replay(chunks: List[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def _fresh_target(url: str) -> None:
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+
+async def per_row(url: str, sessions_chunks: List[bytes], messages: List[Dict], limit: int) -> Dict:
+    """The old path: create_message for each row, after a bulk load of the sessions."""
+    engine = create_async_engine(url)
+    try:
+        await import_table(engine, "chat_sessions", _replay(sessions_chunks), "ndjson")
+        rows = messages[:limit]
+        started = time.perf_counter()
+        async with sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)() as db:
+            for row in rows:
+                await create_message(db, Message(**row))
+        seconds = time.perf_counter() - started
+    finally:
+        await engine.dispose()
+    return {"rows": len(rows), "seconds": round(seconds, 3), "rows_per_s": round(len(rows) / seconds)}
+
+
+async def run(source_url: str, target_url: str, sessions: int, messages: int, chunk_rows: int, per_row_limit: int) -> Dict:
+    await seed(source_url, users=max(1, sessions // 10), sessions=sessions, messages=messages, create_schema=True, seed_value=11)
+    source = create_async_engine(source_url)
+    results: Dict = {"export": {}, "import": {}}
+    dumps: Dict[str, Dict[str, List[bytes]]] = {}
+    try:
+        for fmt in FORMATS:
+            dumps[fmt] = {}
+            for table in ("chat_sessions", "messages"):
+                summary: Dict = {}
+                dumps[fmt][table] = [chunk async for chunk in export_table(source, table, fmt, chunk_rows=chunk_rows, summary=summary)]
+                if table == "messages":
+                    results["export"][fmt] = {k: summary[k] for k in ("rows", "seconds", "rows_per_s")}
+    finally:
+        await source.dispose()
+
+    for fmt in FORMATS:
+        await _fresh_target(target_url)
+        target = create_async_engine(target_url)
+        try:
+            await import_table(target, "chat_sessions", _replay(dumps[fmt]["chat_sessions"]), fmt, chunk_rows)
+            summary = await import_table(target, "messages", _replay(dumps[fmt]["messages"]), fmt, chunk_rows)
+        finally:
+            await target.dispose()
+        results["import"][fmt] = {k: summary[k] for k in ("rows", "seconds", "rows_per_s")}
+
+    lines = (line for chunk in dumps["ndjson"]["messages"] for line in chunk.splitlines() if line)
+    rows = [coerce_row(TABLE_COLUMNS["messages"], orjson.loads(line)) for line in lines]
+    await _fresh_target(target_url)
+    results["import"]["per_row_create_message"] = await per_row(target_url, dumps["ndjson"]["chat_sessions"], rows, per_row_limit)
+    return {"sessions": sessions, "messages_per_session": messages, "chunk_rows": chunk_rows, **results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import/export throughput vs per-row create_message.")
+    parser.add_argument("--source-url", help="Defaults to a temporary SQLite file.")
+    parser.add_argument("--target-url", help="Defaults to a temporary SQLite file.")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=500, help="Messages per session.")
+    parser.add_argument("--chunk-rows", type=int, default=10000)
+    parser.add_argument("--per-row-limit", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_url = args.source_url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'source.db')}"
+        target_url = args.target_url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'target.db')}"
+        result = asyncio.run(run(source_url, target_url, args.sessions, args.messages, args.chunk_rows, args.per_row_limit))
+
+    print(f"{'operation':<34}{'rows':>10}{'seconds':>10}{'rows/s':>12}")
+    for direction in ("export", "import"):
+        for name, row in result[direction].items():
+            print(f"{direction + ' ' + name:<34}{row['rows']:>10}{row['seconds']:>10}{row['rows_per_s']:>12}")
+    print(f"\nResult written to {save_result('bulk_io', result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# benchmarks/click_ingestion.py
+"""
+Affiliate click ingestion throughput (clicks/s) through GET /affiliate/click, buffered
+(app/utils/click_buffer.py) against a per-request INSERT and commit of each click.
+
+Both paths run in-process through the ASGI app (no HTTP client or socket) with --concurrency
+clients issuing --clicks clicks in total, resolve the affiliate through the same cached
+lookup, and are timed until every click is in the database (for the buffered path that
+includes the final flush).
+Also reports flush-only throughput: clicks recorded straight into the buffer, then flushed.
+
+    python -m benchmarks.click_ingestion --clicks 20000 --concurrency 50
+    python -m benchmarks.click_ingestion --database-url postgresql+asyncpg://.../scratch
+
+The affiliates and affiliate_clicks tables are dropped and recreated, so point
+--database-url at a scratch database; by default it is a throwaway SQLite file.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Optional
+from urllib.parse import urlencode
+from uuid import UUID
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import RedirectResponse
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.db.base import Base
+from app.models.affiliate import Affiliate, AffiliateClick, utcnow_naive
+from app.models.user import User
+from benchmarks.stats import percentile, save_result
+
+PARTNERS = ("booking.example", "tours.example/pune", "tours.example/goa", "eats.example")
+
+
+async def _prepare(engine: AsyncEngine, users: int) -> List[UUID]:
+    tables = [User.__table__, Affiliate.__table__, AffiliateClick.__table__]
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync: AffiliateClick.__table__.drop(sync, checkfirst=True))
+        await conn.run_sync(lambda sync: Affiliate.__table__.drop(sync, checkfirst=True))
+        await conn.run_sync(lambda sync: Base.metadata.create_all(sync, tables=tables))
+        await conn.execute(insert(Affiliate), [
+            {"id": uuid.uuid4(), "name": partner, "partner_url": f"https://{partner}"} for partner in PARTNERS
+        ])
+        user_ids = [uuid.uuid4() for _ in range(users)]
+        await conn.execute(insert(User), [
+            {"id": user_id, "name": f"bench-{i}", "email": f"bench-{user_id}@example.com", "hashed_password": "x"} for i, user_id in enumerate(user_ids)
+        ])
+    return user_ids
+
+
+async def _count_clicks(engine: AsyncEngine) -> int:
+    async with engine.connect() as conn:
+        return (await conn.execute(select(func.count()).select_from(AffiliateClick.__table__))).scalar_one()
+
+
+def _per_request_app(engine: AsyncEngine, resolver) -> FastAPI:
+    """The path the buffer replaces: one INSERT and commit inside every click request."""
+    from app.crud.affiliate import insert_clicks
+    from app.utils.click_buffer import safe_destination
+
+    app = FastAPI()
+
+    @app.get("/affiliate/click")
+    async def track_click(url: str, user_id: Optional[UUID] = None):
+        url = safe_destination(url)
+        affiliate_id = await resolver.resolve(url) if url else None
+        if affiliate_id is None:
+            raise HTTPException(status_code=404)
+        async with engine.begin() as conn:
+            await insert_clicks(conn, [{
+                "id": uuid.uuid4(), "user_id": user_id, "affiliate_id": affiliate_id,
+                "destination_url": url, "clicked_at": utcnow_naive(),
+            }])
+        return RedirectResponse(url, status_code=307)
+
+    return app
+
+
+async def _asgi_get(app: FastAPI, path: str, params: Dict[str, str]) -> int:
+    """One GET straight through the ASGI app; an HTTP client would cost more CPU than the route."""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": urlencode(params).encode(), "root_path": "",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 0), "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _drive(app: FastAPI, clicks: int, concurrency: int, user_ids: List[UUID]) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(clicks))
+
+    async def client_loop():
+        nonlocal errors
+        for i in remaining:
+            params = {"url": f"https://www.{PARTNERS[i % len(PARTNERS)]}/offer/{i}", "user_id": str(user_ids[i % len(user_ids)])}
+            started = time.perf_counter()
+            status = await _asgi_get(app, "/affiliate/click", params)
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += status != 307
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return {"seconds": time.perf_counter() - started, "errors": errors, "latencies": latencies}
+
+
+def _summary(clicks: int, seconds: float, stored: int, driven: Optional[Dict] = None) -> Dict:
+    summary = {"clicks": clicks, "stored": stored, "seconds": round(seconds, 3), "clicks_per_s": round(clicks / seconds)}
+    if driven is not None:
+        summary.update({
+            "errors": driven["errors"],
+            "p50_ms": round(percentile(driven["latencies"], 50), 2),
+            "p99_ms": round(percentile(driven["latencies"], 99), 2),
+        })
+    return summary
+
+
+async def run(database_url: str, clicks: int, concurrency: int, flush_max: int, interval: float) -> Dict:
+    # app.click_routes builds its singletons on app.db.connection's engine; swap in ours.
+    os.environ.setdefault("DATABASE_URL", database_url)
+    import app.click_routes as click_routes
+    from app.utils.click_buffer import AffiliateResolver, ClickBuffer
+
+    engine = create_async_engine(database_url)
+    results: Dict = {}
+    try:
+        user_ids = await _prepare(engine, users=100)
+        resolver = AffiliateResolver(engine)
+        await resolver.refresh()
+        click_routes.affiliate_resolver = resolver
+
+        buffer = ClickBuffer(engine, flush_max=flush_max, interval=interval, max_buffered=max(clicks, flush_max))
+        click_routes.click_buffer = buffer
+        app = FastAPI()
+        app.include_router(click_routes.click_router, prefix="/affiliate")
+        buffer.start()
+        driven = await _drive(app, clicks, concurrency, user_ids)
+        started = time.perf_counter()
+        await buffer.close()
+        seconds = driven["seconds"] + time.perf_counter() - started
+        results["buffered"] = _summary(clicks, seconds, await _count_clicks(engine), driven)
+
+        before = await _count_clicks(engine)
+        buffer = ClickBuffer(engine, flush_max=flush_max, interval=interval, max_buffered=clicks)
+        affiliate_id = await resolver.resolve(f"https://{PARTNERS[0]}")
+        started = time.perf_counter()
+        for i in range(clicks):
+            buffer.record(affiliate_id, f"https://{PARTNERS[0]}/offer/{i}", user_ids[i % len(user_ids)])
+        await buffer.close()
+        results["flush_only"] = _summary(clicks, time.perf_counter() - started, await _count_clicks(engine) - before)
+
+        before = await _count_clicks(engine)
+        driven = await _drive(_per_request_app(engine, resolver), clicks, concurrency, user_ids)
+        results["per_request_insert"] = _summary(clicks, driven["seconds"], await _count_clicks(engine) - before, driven)
+    finally:
+        await engine.dispose()
+    return {"clicks": clicks, "concurrency": concurrency, "flush_max": flush_max, "interval_s": interval, "dialect": engine.dialect.name, **results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buffered vs per-request affiliate click ingestion throughput.")
+    parser.add_argument("--database-url", help="Defaults to a temporary SQLite file.")
+    parser.add_argument("--clicks", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--flush-max", type=int, default=1000)
+    parser.add_argument("--interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(tmp, 'clicks.db')}"
+        result = asyncio.run(run(database_url, args.clicks, args.concurrency, args.flush_max, args.interval))
+
+    print(f"{'path':<22}{'clicks':>9}{'stored':>9}{'seconds':>10}{'clicks/s':>11}{'p50 ms':>9}{'p99 ms':>9}")
+    for name in ("buffered", "flush_only", "per_request_insert"):
+        row = result[name]
+        print(
+            f"{name:<22}{row['clicks']:>9}{row['stored']:>9}{row['seconds']:>10}{row['clicks_per_s']:>11}"
+            f"{row.get('p50_ms', '-'):>9}{row.get('p99_ms', '-'):>9}"
+        )
+    print(f"\nResult written to {save_result('click_ingestion', result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# benchmarks/embedding_backends.py
+"""
+Compares embedding backends for intent retrieval.
+
+For every `examples` entry in the intent KB it records which intents each backend
+retrieves, then reports top-1 accuracy against the example's own intent, agreement
+with the reference backend, per-query latency and resident memory. Each backend runs
+in its own subprocess so RSS numbers are not polluted by the other model.
+
+    python -m benchmarks.embedding_backends --backends torch,onnx-int8
+
+Exits non-zero if any backend changes a top-1 intent decision relative to the reference.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.microbench import KB_PATH, load_kb
+from benchmarks.stats import BENCH_DIR, percentile, save_result
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (Linux), falling back to peak RSS elsewhere."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def labelled_examples(kb: Dict) -> List[Tuple[str, str]]:
+    return [(example, item["intent"]) for item in kb["intents"] for example in item["examples"]]
+
+
+def intent_decisions(embeddings, kb: Dict, k: int = 3, rounds: int = 1) -> Dict:
+    """
+    Builds the intent index with `embeddings` and retrieves top-k intents for every KB example.
+    Returns the decisions plus per-query latencies (embed + search) in milliseconds.
+    """
+    from langchain_community.vectorstores import FAISS
+    from app.langgraph.nodes.detect_intent_node import DetectIntentNode
+
+    vectorstore = FAISS.from_documents(DetectIntentNode._build_documents(kb), embeddings)
+    examples = labelled_examples(kb)
+    decisions = []
+    latencies_ms = []
+
+    for round_index in range(rounds):
+        for example, expected in examples:
+            started = time.perf_counter()
+            docs = vectorstore.similarity_search(example, k=k)
+            latencies_ms.append((time.perf_counter() - started) * 1000)
+            if round_index == 0:
+                decisions.append({
+                    "example": example,
+                    "expected": expected,
+                    "retrieved": [doc.metadata["intent"] for doc in docs],
+                })
+    return {"decisions": decisions, "latencies_ms": latencies_ms}
+
+
+def measure_backend(backend: str, rounds: int) -> Dict:
+    from app.utils.embedding_backends import get_embeddings
+
+    kb = load_kb()
+    rss_before = rss_mb()
+    started = time.perf_counter()
+    embeddings = get_embeddings(backend)
+    embeddings.embed_query("warm up")
+    load_seconds = time.perf_counter() - started
+
+    result = intent_decisions(embeddings, kb, rounds=rounds)
+    latencies = result["latencies_ms"]
+    decisions = result["decisions"]
+    correct = sum(1 for d in decisions if d["retrieved"] and d["retrieved"][0] == d["expected"])
+    return {
+        "backend": backend,
+        "decisions": decisions,
+        "top1_accuracy": round(correct / len(decisions), 4),
+        "load_s": round(load_seconds, 2),
+        "latency_p50_ms": round(percentile(latencies, 50), 3),
+        "latency_p95_ms": round(percentile(latencies, 95), 3),
+        "rss_model_mb": round(rss_mb() - rss_before, 1),
+        "rss_total_mb": round(rss_mb(), 1),
+    }
+
+
+def agreement(reference: Dict, candidate: Dict) -> Dict:
+    pairs = list(zip(reference["decisions"], candidate["decisions"]))
+    top1 = [r["example"] for r, c in pairs if r["retrieved"][:1] != c["retrieved"][:1]]
+    topk = sum(1 for r, c in pairs if r["retrieved"] == c["retrieved"])
+    return {
+        "top1_agreement": round(1 - len(top1) / len(pairs), 4),
+        "topk_agreement": round(topk / len(pairs), 4),
+        "top1_changed": top1,
+    }
+
+
+def run_in_subprocess(backend: str, rounds: int) -> Dict:
+    output = subprocess.check_output(
+        [sys.executable, "-m", "benchmarks.embedding_backends", "--child", backend, "--rounds", str(rounds)],
+        cwd=os.path.dirname(BENCH_DIR),
+    )
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy, latency and memory of embedding backends.")
+    parser.add_argument("--backends", default="torch,onnx-int8")
+    parser.add_argument("--reference", default="torch")
+    parser.add_argument("--rounds", type=int, default=20, help="Passes over the KB examples for latency.")
+    parser.add_argument("--child", metavar="BACKEND", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_backend(args.child, args.rounds)))
+        return
+
+    backends = [b.strip() for b in args.backends.split(",")]
+    results = {backend: run_in_subprocess(backend, args.rounds) for backend in backends}
+    reference = results.get(args.reference)
+
+    print(f"KB: {KB_PATH} ({len(labelled_examples(load_kb()))} labelled examples)")
+    print(f"{'backend':<12}{'top1 acc':>10}{'agree':>8}{'p50 ms':>10}{'p95 ms':>10}{'model MB':>10}{'load s':>8}")
+    changed = False
+    for backend, row in results.items():
+        agree = agreement(reference, row) if reference else None
+        row["agreement"] = agree
+        changed = changed or bool(agree and agree["top1_changed"])
+        print(
+            f"{backend:<12}{row['top1_accuracy']:>10}{(agree['top1_agreement'] if agree else '-'):>8}"
+            f"{row['latency_p50_ms']:>10}{row['latency_p95_ms']:>10}{row['rss_model_mb']:>10}{row['load_s']:>8}"
+        )
+        if agree and agree["top1_changed"]:
+            print(f"  changed decisions: {agree['top1_changed']}")
+
+    print(f"\nResult written to {save_result('embedding_backends', {'backends': results})}")
+    if changed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
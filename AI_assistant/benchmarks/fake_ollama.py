@@ -0,0 +1,385 @@
+# benchmarks/fake_ollama.py
+"""
+A small stand-in for the Ollama HTTP API so /chat/ask can be load-tested without
+real inference. It speaks enough of /api/generate, /api/chat, /api/tags and
+/api/version for the `ollama` client used by langchain_ollama.
+
+Run it with:
+    python -m benchmarks.fake_ollama --port 11435 --token-rate 40 --latency lognormal:-1.6,0.4
+and point the app at it with OLLAMA_HOST=http://127.0.0.1:11435.
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Deque, Dict, List, Optional
+
+from benchmarks.stats import BENCH_DIR
+
+DEFAULT_REPLIES_PATH = f"{BENCH_DIR}/fixtures/ollama_replies.json"
+TOKEN_PATTERN = re.compile(r"\S+\s*|\s+")
+
+
+def parse_distribution(spec: str, rng: random.Random) -> Callable[[], float]:
+    """
+    Turns a latency spec into a sampler returning seconds.
+
+    Supported specs:
+        fixed:0.2
+        uniform:0.1,0.5
+        normal:0.3,0.05        (mean, stddev; clipped at 0)
+        lognormal:-1.6,0.4     (mu, sigma of the underlying normal)
+    """
+    kind, _, args = spec.partition(":")
+    params = [float(p) for p in args.split(",") if p.strip()] if args else []
+
+    if kind == "fixed":
+        value = params[0] if params else 0.0
+        return lambda: value
+    if kind == "uniform":
+        low, high = params
+        return lambda: rng.uniform(low, high)
+    if kind == "normal":
+        mean, stddev = params
+        return lambda: max(0.0, rng.gauss(mean, stddev))
+    if kind == "lognormal":
+        mu, sigma = params
+        return lambda: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def load_replies(path: str) -> Dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+@dataclass
+class FakeOllamaConfig:
+    token_rate: float = 0.0          # tokens per second streamed back; 0 streams instantly
+    latency: str = "fixed:0"         # time to first token
+    prompt_eval_rate: float = 0.0    # prompt tokens per second; 0 makes prompt evaluation free
+    replies_path: str = DEFAULT_REPLIES_PATH
+    model: str = "llama3.2"
+    seed: Optional[int] = None
+    prefix_cache_slots: int = 0      # recent prompts whose common prefix is not re-evaluated; 0 disables
+
+
+@dataclass
+class FakeOllamaStats:
+    requests: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    prompt_tokens: int = 0
+    prompt_tokens_cached: int = 0
+    prompt_eval_seconds: float = 0.0
+    eval_tokens: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def enter(self):
+        with self.lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def leave(self, prompt_tokens: int, eval_tokens: int, cached_tokens: int = 0, prompt_eval: float = 0.0):
+        with self.lock:
+            self.in_flight -= 1
+            self.prompt_tokens += prompt_tokens
+            self.prompt_tokens_cached += cached_tokens
+            self.prompt_eval_seconds += prompt_eval
+            self.eval_tokens += eval_tokens
+
+    def as_dict(self) -> Dict:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "prompt_tokens": self.prompt_tokens,
+                "prompt_tokens_cached": self.prompt_tokens_cached,
+                "prompt_eval_seconds": round(self.prompt_eval_seconds, 6),
+                "eval_tokens": self.eval_tokens,
+            }
+
+
+class FakeOllama:
+    """
+    Reply selection and timing model, independent of the HTTP plumbing.
+    """
+
+    def __init__(self, config: FakeOllamaConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.rng_lock = threading.Lock()
+        self.sample_latency = parse_distribution(config.latency, self.rng)
+        self.replies = load_replies(config.replies_path)
+        self.stats = FakeOllamaStats()
+        self.prefix_cache: Dict[str, Deque[str]] = {}
+        self.prefix_cache_lock = threading.Lock()
+
+    def first_token_delay(self) -> float:
+        with self.rng_lock:
+            return self.sample_latency()
+
+    def prompt_eval_seconds(self, prompt_tokens: int) -> float:
+        if self.config.prompt_eval_rate <= 0:
+            return 0.0
+        return prompt_tokens / self.config.prompt_eval_rate
+
+    def cached_prompt_tokens(self, model: str, prompt: str, keep_alive) -> int:
+        """
+        Tokens of `prompt` already in the KV cache: the longest common prefix with a recent
+        prompt for the same model, as llama.cpp slots reuse it. keep_alive=0 unloads the model.
+        """
+        if self.config.prefix_cache_slots <= 0:
+            return 0
+        with self.prefix_cache_lock:
+            recent = self.prefix_cache.setdefault(model, deque(maxlen=self.config.prefix_cache_slots))
+            shared = max((len(os.path.commonprefix([prompt, seen])) for seen in recent), default=0)
+            if keep_alive in (0, "0", "0s"):
+                recent.clear()
+            else:
+                recent.append(prompt)
+        # The last prompt token is always evaluated again.
+        return min(shared // 4, self.count_prompt_tokens(prompt) - 1)
+
+    def reply_for(self, prompt: str) -> str:
+        for rule in self.replies.get("rules", []):
+            if rule["match"] in prompt:
+                response = rule["response"]
+                return response if isinstance(response, str) else json.dumps(response)
+        default = self.replies.get("default", "")
+        return default if isinstance(default, str) else json.dumps(default, indent=2)
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return TOKEN_PATTERN.findall(text)
+
+    @staticmethod
+    def count_prompt_tokens(prompt: str) -> int:
+        # Rough llama-style estimate; good enough to drive the timing model.
+        return max(1, len(prompt) // 4)
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeOllamaHTTPServer"
+
+    def log_message(self, format, *args):  # noqa: A002 - keep stdout quiet under load
+        pass
+
+    # --- plumbing -----------------------------------------------------
+
+    def _send_json(self, payload: Dict, status: int = 200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, payload: Dict):
+        data = (json.dumps(payload) + "\n").encode()
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+        return json.loads(raw or b"{}")
+
+    # --- routes -------------------------------------------------------
+
+    def do_GET(self):
+        fake = self.server.fake
+        if self.path in ("/", ""):
+            body = b"Ollama is running"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == "/api/version":
+            self._send_json({"version": "0.0.0-fake"})
+        elif self.path == "/api/tags":
+            self._send_json({"models": [{
+                "name": f"{fake.config.model}:latest",
+                "model": f"{fake.config.model}:latest",
+                "modified_at": datetime.now(timezone.utc).isoformat(),
+                "size": 0,
+                "digest": "fake",
+            }]})
+        elif self.path == "/api/ps":
+            self._send_json({"models": [], "stats": fake.stats.as_dict()})
+        else:
+            self._send_json({"error": f"unknown path {self.path}"}, status=404)
+
+    def do_POST(self):
+        if self.path == "/api/generate":
+            request = self._read_json()
+            self._generate(request, prompt=f"{request.get('system') or ''}{request.get('prompt') or ''}", chat=False)
+        elif self.path == "/api/chat":
+            request = self._read_json()
+            prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+            self._generate(request, prompt=prompt, chat=True)
+        else:
+            self._send_json({"error": f"unknown path {self.path}"}, status=404)
+
+    def _generate(self, request: Dict, prompt: str, chat: bool):
+        fake = self.server.fake
+        model = request.get("model") or fake.config.model
+        stream = request.get("stream", True)
+
+        fake.stats.enter()
+        started = time.perf_counter()
+        prompt_tokens = fake.count_prompt_tokens(prompt)
+        cached_tokens = fake.cached_prompt_tokens(model, prompt, request.get("keep_alive"))
+        tokens = fake.tokenize(fake.reply_for(prompt))
+        prompt_eval = fake.prompt_eval_seconds(prompt_tokens - cached_tokens)
+        try:
+            time.sleep(fake.first_token_delay() + prompt_eval)
+            delay = 1.0 / fake.config.token_rate if fake.config.token_rate > 0 else 0.0
+
+            if stream:
+                self._start_stream()
+            eval_started = time.perf_counter()
+            for token in tokens:
+                if delay:
+                    time.sleep(delay)
+                if stream:
+                    self._write_chunk(self._part(model, token, chat, done=False))
+            eval_seconds = time.perf_counter() - eval_started
+
+            final = self._part(model, "" if stream else "".join(tokens), chat, done=True)
+            final.update({
+                "done_reason": "stop",
+                "total_duration": int((time.perf_counter() - started) * 1e9),
+                "load_duration": 0,
+                "prompt_eval_count": prompt_tokens - cached_tokens,
+                "prompt_eval_duration": int(prompt_eval * 1e9),
+                "eval_count": len(tokens),
+                "eval_duration": int(eval_seconds * 1e9),
+            })
+            if stream:
+                self._write_chunk(final)
+                self._end_stream()
+            else:
+                self._send_json(final)
+        finally:
+            fake.stats.leave(prompt_tokens, len(tokens), cached_tokens, prompt_eval)
+
+    @staticmethod
+    def _part(model: str, text: str, chat: bool, done: bool) -> Dict:
+        part = {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "done": done,
+        }
+        if chat:
+            part["message"] = {"role": "assistant", "content": text}
+        else:
+            part["response"] = text
+        return part
+
+
+class FakeOllamaHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fake: FakeOllama):
+        super().__init__(address, FakeOllamaHandler)
+        self.fake = fake
+
+
+class FakeOllamaServer:
+    """
+    Runs the fake in a background thread; handy for tests and in-process benchmarks.
+
+        with FakeOllamaServer(FakeOllamaConfig(token_rate=50)) as server:
+            llm = OllamaLLM(model="llama3.2", base_url=server.url)
+    """
+
+    def __init__(self, config: Optional[FakeOllamaConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.fake = FakeOllama(config or FakeOllamaConfig())
+        self.httpd = FakeOllamaHTTPServer((host, port), self.fake)
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> FakeOllamaStats:
+        return self.fake.stats
+
+    def start(self) -> "FakeOllamaServer":
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="fake-ollama", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for load testing.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--token-rate", type=float, default=0.0, help="Tokens per second (0 = no delay).")
+    parser.add_argument("--latency", default="fixed:0", help="Time-to-first-token distribution, e.g. lognormal:-1.6,0.4")
+    parser.add_argument("--prompt-eval-rate", type=float, default=0.0, help="Prompt tokens per second (0 = free).")
+    parser.add_argument("--prefix-cache-slots", type=int, default=0, help="Recent prompts kept for prefix reuse (0 = off).")
+    parser.add_argument("--replies", default=DEFAULT_REPLIES_PATH, help="JSON file with canned replies.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(
+        FakeOllamaConfig(
+            token_rate=args.token_rate,
+            latency=args.latency,
+            prompt_eval_rate=args.prompt_eval_rate,
+            prefix_cache_slots=args.prefix_cache_slots,
+            replies_path=args.replies,
+            seed=args.seed,
+        ),
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Fake Ollama listening on {server.url} (token_rate={args.token_rate}, latency={args.latency})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
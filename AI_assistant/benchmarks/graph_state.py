@@ -0,0 +1,164 @@
+# benchmarks/graph_state.py
+"""
+Per-transition overhead of the LangGraph state representation.
+
+Runs the same chain of no-op nodes (one per recommendation-graph node by default), each
+writing one field, with two state types:
+
+    pydantic   the previous ChatFlowState: a BaseModel with arbitrary_types_allowed that
+               carries the AsyncSession, a ConversationBufferMemory and the prompt messages;
+               nodes mutate it and return the whole state
+    typeddict  the current ChatFlowState (TypedDict); nodes return only the changed key and
+               the DB session rides in the run config (FlowContext)
+
+Reports microseconds per node transition (graph.ainvoke time / nodes).
+
+    python -m benchmarks.graph_state --nodes 8 --runs 2000
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from langchain.memory import ConversationBufferMemory
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END, StateGraph
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.state import ChatFlowState, flow_config, flow_context
+from benchmarks.stats import percentile, save_result
+
+FIELDS = [
+    "chat_memory", "user_id", "long_term_memory", "chat_history_summary", "realtime_info",
+    "user_preferences", "prompt", "response",
+]
+
+
+class LegacyChatFlowState(BaseModel):
+    """The Pydantic state this tree used before, kept here as the comparison point."""
+    session_id: uuid.UUID
+    user_query: str
+    db: AsyncSession
+    user_id: Optional[uuid.UUID] = None
+    intent: Optional[str] = None
+    sub_intent: Optional[str] = None
+    intent_object: Optional[Dict] = None
+    user_location: Optional[str] = None
+    current_time: Optional[str] = None
+    user_preferences: Optional[str] = None
+    realtime_info: Optional[str] = None
+    chat_history_summary: Optional[str] = None
+    long_term_memory: Optional[str] = None
+    prompt: Optional[List[Any]] = None
+    response: Optional[Dict] = None
+    chat_memory: Optional[Any] = None
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+
+def _values(intent_object: Dict) -> Dict[str, Any]:
+    messages = [HumanMessage(content="Veg food near FC Road?"), AIMessage(content="Vaishali (4.5), Shabree (4.4)")] * 5
+    return {
+        "chat_memory": messages,
+        "user_id": uuid.uuid4(),
+        "long_term_memory": "- [2025-05-02] User: Vegan cafes in Pune? | AI: Greenr Cafe (4.4)",
+        "chat_history_summary": "- User is planning a romantic weekend in Pune",
+        "realtime_info": "- Weather: 31°C, clear",
+        "user_preferences": "diet: vegetarian; budget: medium",
+        "prompt": [SystemMessage(content="x" * 4000), SystemMessage(content="context"), HumanMessage(content="q")],
+        "response": intent_object,
+    }
+
+
+def build_legacy_graph(nodes: int, values: Dict[str, Any]):
+    graph = StateGraph(LegacyChatFlowState)
+    names = [f"n{i}" for i in range(nodes)]
+    for i, name in enumerate(names):
+        field = FIELDS[i % len(FIELDS)]
+        value = values[field]
+        if field == "chat_memory":
+            value = ConversationBufferMemory(return_messages=True)
+            value.chat_memory.messages = list(values["chat_memory"])
+
+        async def node(state: LegacyChatFlowState, field=field, value=value) -> LegacyChatFlowState:
+            setattr(state, field, value)
+            return state
+        graph.add_node(name, node)
+    graph.set_entry_point(names[0])
+    for a, b in zip(names, names[1:]):
+        graph.add_edge(a, b)
+    graph.add_edge(names[-1], END)
+    return graph.compile()
+
+
+def build_typed_graph(nodes: int, values: Dict[str, Any]):
+    graph = StateGraph(ChatFlowState)
+    names = [f"n{i}" for i in range(nodes)]
+    for i, name in enumerate(names):
+        field = FIELDS[i % len(FIELDS)]
+
+        async def node(state: ChatFlowState, config: RunnableConfig, field=field, value=values[field]) -> dict:
+            flow_context(config)  # what a node needing the DB does
+            return {field: value}
+        graph.add_node(name, node)
+    graph.set_entry_point(names[0])
+    for a, b in zip(names, names[1:]):
+        graph.add_edge(a, b)
+    graph.add_edge(names[-1], END)
+    return graph.compile()
+
+
+async def measure(invoke, runs: int, nodes: int) -> Dict:
+    for _ in range(min(50, runs)):
+        await invoke()
+    per_transition = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await invoke()
+        per_transition.append((time.perf_counter() - started) * 1e6 / nodes)
+    return {
+        "us_per_transition_p50": round(percentile(per_transition, 50), 2),
+        "us_per_transition_p95": round(percentile(per_transition, 95), 2),
+    }
+
+
+async def run(nodes: int, runs: int) -> Dict:
+    from benchmarks.microbench import load_kb
+
+    intent_object = next(i for i in load_kb()["intents"] if i["intent"] == "recommendation")
+    values = _values(intent_object)
+    db = AsyncSession()
+    base = {
+        "session_id": uuid.uuid4(), "user_query": "Find romantic vegetarian restaurants near me",
+        "intent": "recommendation", "sub_intent": "food", "intent_object": intent_object, "user_location": "Pune, India",
+    }
+
+    legacy = build_legacy_graph(nodes, values)
+    typed = build_typed_graph(nodes, values)
+    config = flow_config(db)
+    results = {
+        "pydantic": await measure(lambda: legacy.ainvoke(LegacyChatFlowState(db=db, **base)), runs, nodes),
+        "typeddict": await measure(lambda: typed.ainvoke(dict(base), config=config), runs, nodes),
+    }
+    return {"nodes": nodes, "runs": runs, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LangGraph per-transition overhead: Pydantic vs TypedDict state.")
+    parser.add_argument("--nodes", type=int, default=8, help="Chain length (the recommendation graph has 8 nodes).")
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.nodes, args.runs))
+    print(f"{'state':<12}{'us/transition p50':>20}{'us/transition p95':>20}")
+    for name, row in result["results"].items():
+        print(f"{name:<12}{row['us_per_transition_p50']:>20}{row['us_per_transition_p95']:>20}")
+    print(f"\nResult written to {save_result('graph_state', result)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# benchmarks/history_access.py
+"""
+Per-turn CPU time and allocations of the history reads: ORM entity loads vs the
+column-projected Core selects in app/crud/history.py.
+
+Seeds a local SQLite database with long sessions and replays the reads one turn does
+(recent turns for memory, full history for summarization, message listing):
+
+    python -m benchmarks.history_access --messages 200,500 --turns 30
+
+CPU time is process time, so it includes driver and SQLAlchemy work but not I/O waits.
+Allocations are the tracemalloc peak of each turn, measured in a separate pass.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+from sqlalchemy import asc, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import history
+from app.models.message import Message
+from benchmarks.seed_data import seed
+from benchmarks.stats import save_result
+
+MEMORY_LIMIT = 10
+
+
+async def orm_recent_turns(db: AsyncSession, session_id) -> List:
+    result = await db.execute(
+        select(Message).where(Message.session_id == session_id).order_by(desc(Message.timestamp)).limit(MEMORY_LIMIT)
+    )
+    return list(reversed(result.scalars().all()))
+
+
+async def orm_all_turns(db: AsyncSession, session_id) -> List:
+    result = await db.execute(select(Message).where(Message.session_id == session_id).order_by(asc(Message.timestamp)))
+    return result.scalars().all()
+
+
+async def orm_session_messages(db: AsyncSession, session_id) -> List:
+    result = await db.execute(select(Message).where(Message.session_id == session_id))
+    return result.scalars().all()
+
+
+async def core_recent_turns(db: AsyncSession, session_id) -> List:
+    return await history.get_recent_turns(db, session_id, MEMORY_LIMIT)
+
+
+READS: Dict[str, Dict[str, Callable[[AsyncSession, object], Awaitable[List]]]] = {
+    "recent_turns": {"orm": orm_recent_turns, "core": core_recent_turns},
+    "all_turns": {"orm": orm_all_turns, "core": history.get_all_turns},
+    "session_messages": {"orm": orm_session_messages, "core": history.get_session_messages},
+}
+
+
+async def measure(session_factory, read, session_ids: List, turns: int) -> Dict:
+    async def one_turn(session_id):
+        # A fresh session per turn, like a request.
+        async with session_factory() as db:
+            return await read(db, session_id)
+
+    await one_turn(session_ids[0])  # warm the statement cache
+
+    started = time.process_time()
+    for i in range(turns):
+        await one_turn(session_ids[i % len(session_ids)])
+    cpu_ms = (time.process_time() - started) * 1000 / turns
+
+    tracemalloc.start()
+    peaks = []
+    for i in range(turns):
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        await one_turn(session_ids[i % len(session_ids)])
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    return {"cpu_ms_per_turn": round(cpu_ms, 3), "peak_alloc_kb_per_turn": round(sum(peaks) / turns / 1024, 1)}
+
+
+async def run(message_counts: List[int], sessions: int, turns: int) -> Dict:
+    results = {}
+    for messages in message_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'history.db')}"
+            seeded = await seed(url, users=1, sessions=sessions, messages=messages, create_schema=True, seed_value=42)
+            engine = create_async_engine(url)
+            session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+            session_ids = [uuid.UUID(s) for s in seeded["sessions"]]
+
+            for name, variants in READS.items():
+                for variant, read in variants.items():
+                    results[f"{name}/{variant}/{messages}"] = await measure(session_factory, read, session_ids, turns)
+            await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ORM vs Core history reads on long sessions.")
+    parser.add_argument("--messages", default="200,500", help="Comma-separated messages per session.")
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=30, help="Reads timed per variant.")
+    args = parser.parse_args()
+
+    message_counts = [int(m) for m in args.messages.split(",")]
+    results = asyncio.run(run(message_counts, args.sessions, args.turns))
+
+    print(f"{'read':<18}{'messages':>9}{'orm cpu ms':>12}{'core cpu ms':>13}{'orm peak KB':>13}{'core peak KB':>14}")
+    for name in READS:
+        for messages in message_counts:
+            orm = results[f"{name}/orm/{messages}"]
+            core = results[f"{name}/core/{messages}"]
+            print(
+                f"{name:<18}{messages:>9}{orm['cpu_ms_per_turn']:>12}{core['cpu_ms_per_turn']:>13}"
+                f"{orm['peak_alloc_kb_per_turn']:>13}{core['peak_alloc_kb_per_turn']:>14}"
+            )
+    print(f"\nResult written to {save_result('history_access', {'results': results})}")
+
+
+if __name__ == "__main__":
+    main()
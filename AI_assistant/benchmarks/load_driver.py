@@ -0,0 +1,256 @@
+# benchmarks/load_driver.py
+"""
+Closed-loop load driver for the running service.
+
+    python -m benchmarks.load_driver --base-url http://127.0.0.1:8000 \
+        --concurrency 16 --duration 60 --mix ask=1,messages=3,sessions=1 --save-baseline main
+
+Reports throughput and p50/p95/p99 per endpoint, writes the run to benchmarks/results/
+and optionally saves it as (or compares it against) a named baseline in benchmarks/baselines/.
+
+With --max-loop-blocks N (service started with LOOP_MONITOR=on and uvicorn --loop asyncio),
+the event-loop blocks the service counted during the run are reported per graph node, and
+the run fails above N.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.seed_data import DEFAULT_SESSIONS_PATH, USER_QUERIES
+from benchmarks.stats import (
+    compare_metrics, format_comparison, load_baseline, save_baseline, save_result, summarize_latencies,
+)
+
+
+def build_endpoints(session_ids: List[str], batch_size: int = 20) -> Dict[str, Callable]:
+    def ask(client: httpx.AsyncClient, rng: random.Random):
+        return client.post("/chat/ask", json={
+            "user_query": rng.choice(USER_QUERIES),
+            "chat_session_id": rng.choice(session_ids),
+        })
+
+    async def ask_batch(client: httpx.AsyncClient, rng: random.Random):
+        # Reads the whole NDJSON stream so latency covers every item in the batch.
+        items = [
+            {"user_query": rng.choice(USER_QUERIES), "chat_session_id": rng.choice(session_ids)}
+            for _ in range(batch_size)
+        ]
+        async with client.stream("POST", "/chat/ask/batch", json={"items": items}) as response:
+            async for _ in response.aiter_lines():
+                pass
+        return response
+
+    def messages(client: httpx.AsyncClient, rng: random.Random):
+        return client.get(f"/chat/chat_sessions/{rng.choice(session_ids)}/messages")
+
+    def sessions(client: httpx.AsyncClient, rng: random.Random):
+        return client.get("/chat/chat_sessions", params={"limit": 100})
+
+    def health(client: httpx.AsyncClient, rng: random.Random):
+        return client.get("/health")
+
+    return {"ask": ask, "ask_batch": ask_batch, "messages": messages, "sessions": sessions, "health": health}
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    mix = []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix.append((name.strip(), float(weight or 1)))
+    return mix
+
+
+async def run_load(
+    base_url: str,
+    session_ids: List[str],
+    mix: List[Tuple[str, float]],
+    concurrency: int,
+    duration: float,
+    total_requests: int,
+    timeout: float,
+    seed: int,
+    batch_size: int = 20,
+) -> Dict:
+    endpoints = build_endpoints(session_ids, batch_size)
+    unknown = [name for name, _ in mix if name not in endpoints]
+    if unknown:
+        raise ValueError(f"Unknown endpoints in mix: {unknown}")
+
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    issued = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    def should_continue() -> bool:
+        if total_requests and issued >= total_requests:
+            return False
+        if deadline and time.perf_counter() >= deadline:
+            return False
+        return True
+
+    async def worker(worker_id: int, client: httpx.AsyncClient):
+        nonlocal issued
+        rng = random.Random(seed + worker_id)
+        while should_continue():
+            issued += 1
+            name = rng.choices(names, weights=weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await endpoints[name](client, rng)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if ok:
+                latencies[name].append(elapsed_ms)
+            else:
+                errors[name] += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i, client) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "config": {
+            "base_url": base_url,
+            "concurrency": concurrency,
+            "duration_s": duration,
+            "requests": total_requests,
+            "mix": dict(mix),
+            "batch_size": batch_size,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "endpoints": {
+            name: summarize_latencies(latencies[name], elapsed, errors[name])
+            for name in names
+        },
+        "overall": summarize_latencies(all_latencies, elapsed, sum(errors.values())),
+    }
+
+
+async def fetch_metrics(base_url: str, timeout: float) -> Dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        response = await client.get("/metrics")
+        response.raise_for_status()
+        return response.json()
+
+
+def loop_blocks(before: Dict, after: Dict) -> Dict:
+    """Event-loop blocks counted by the service between two /metrics snapshots (see app/utils/loop_monitor.py)."""
+    prefix = "event_loop.blocked."
+    counters_before, counters_after = before.get("counters", {}), after.get("counters", {})
+    by_node = {
+        name[len(prefix):]: int(value - counters_before.get(name, 0))
+        for name, value in counters_after.items()
+        if name.startswith(prefix) and value > counters_before.get(name, 0)
+    }
+    return {
+        "blocked": int(counters_after.get("event_loop.blocked", 0) - counters_before.get("event_loop.blocked", 0)),
+        "by_node": by_node,
+        "lag_ms": after.get("histograms", {}).get("event_loop.lag_ms"),
+    }
+
+
+def print_report(result: Dict):
+    print(f"\nElapsed: {result['elapsed_s']}s  concurrency={result['config']['concurrency']}")
+    print(f"{'endpoint':<12}{'reqs':>8}{'errs':>6}{'err%':>8}{'rps':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    rows = dict(result["endpoints"], overall=result["overall"])
+    for name, row in rows.items():
+        print(
+            f"{name:<12}{row['requests']:>8}{row['errors']:>6}{round(row['error_rate'] * 100, 2):>8}{row['throughput_rps']:>10}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+        )
+    if "ask_batch" in result["endpoints"]:
+        items_per_s = result["endpoints"]["ask_batch"]["throughput_rps"] * result["config"]["batch_size"]
+        print(f"ask_batch items/s: {round(items_per_s, 2)}")
+    if "event_loop" in result:
+        loop = result["event_loop"]
+        nodes = ", ".join(f"{node}={count}" for node, count in loop["by_node"].items()) or "-"
+        lag = loop["lag_ms"] or {}
+        print(f"event loop: {loop['blocked']} blocks ({nodes}); lag p99 {lag.get('p99')} ms, max {lag.get('max')} ms")
+
+
+def comparable(result: Dict) -> Dict[str, Dict]:
+    return dict(result["endpoints"], overall=result["overall"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load driver for the AI assistant service.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--sessions-file", default=DEFAULT_SESSIONS_PATH, help="Output of benchmarks.seed_data.")
+    parser.add_argument("--mix", default="ask=1,messages=2,sessions=1", help="Weighted endpoint mix.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run (0 = use --requests).")
+    parser.add_argument("--requests", type=int, default=0, help="Total requests to send (0 = use --duration).")
+    parser.add_argument("--batch-size", type=int, default=20, help="Items per ask_batch request.")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--name", default="load", help="Result file name under benchmarks/results/.")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Store this run as a named baseline.")
+    parser.add_argument("--compare", metavar="NAME", help="Compare this run against a named baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed regression fraction for --compare.")
+    parser.add_argument("--max-loop-blocks", type=int, help="Fail if the service's event loop blocked more often (needs LOOP_MONITOR=on, uvicorn --loop asyncio).")
+    args = parser.parse_args()
+
+    if not args.duration and not args.requests:
+        parser.error("set --duration or --requests")
+
+    with open(args.sessions_file, "r") as f:
+        session_ids = json.load(f)["sessions"]
+
+    if args.max_loop_blocks is not None:
+        metrics_before = asyncio.run(fetch_metrics(args.base_url, args.timeout))
+        if "event_loop.lag_ms" not in metrics_before.get("histograms", {}):
+            print("--max-loop-blocks needs the service started with LOOP_MONITOR=on (uvicorn --loop asyncio)")
+            sys.exit(2)
+
+    result = asyncio.run(run_load(
+        base_url=args.base_url,
+        session_ids=session_ids,
+        mix=parse_mix(args.mix),
+        concurrency=args.concurrency,
+        duration=args.duration,
+        total_requests=args.requests,
+        timeout=args.timeout,
+        seed=args.seed,
+        batch_size=args.batch_size,
+    ))
+    if args.max_loop_blocks is not None:
+        result["event_loop"] = loop_blocks(metrics_before, asyncio.run(fetch_metrics(args.base_url, args.timeout)))
+    print_report(result)
+    print(f"\nResult written to {save_result(args.name, result)}")
+
+    if args.save_baseline:
+        print(f"Baseline saved to {save_baseline(args.save_baseline, result)}")
+
+    if args.compare:
+        baseline = load_baseline(args.compare)
+        if baseline is None:
+            print(f"No baseline named '{args.compare}'")
+            sys.exit(2)
+        rows = compare_metrics(comparable(result), comparable(baseline), args.tolerance)
+        print(f"\nCompared with baseline '{args.compare}' (commit {baseline.get('commit')}):")
+        print(format_comparison(rows))
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+    if args.max_loop_blocks is not None and result["event_loop"]["blocked"] > args.max_loop_blocks:
+        print(f"Event loop blocked {result['event_loop']['blocked']} times (allowed {args.max_loop_blocks})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# benchmarks/long_term_memory.py
+"""
+Long-term memory recall and context size.
+
+Indexes the labelled exchanges in fixtures/long_term_memory.json as one user's shard, then
+reports, for each follow-up query, whether the exchanges labelled as relevant come back in
+the top k (recall@k). It then pads the shard with unrelated exchanges to show that the
+prompt text stays bounded however long the history gets, and times a search at each size.
+
+    python -m benchmarks.long_term_memory --backend keyword --k 4
+    python -m benchmarks.long_term_memory --backend torch --min-recall 0.9
+
+"keyword" is a dependency-free hashed bag-of-words embedding for CI; "torch" and
+"onnx-int8" are the app's embedding backends. Exits non-zero below --min-recall.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import sys
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from langchain_core.embeddings import Embeddings
+
+from app.crud.history import Exchange
+from app.langgraph.nodes.memory.long_term_memory import FaissLongTermMemory, format_recollections
+from benchmarks.stats import BENCH_DIR, percentile, save_result
+
+FIXTURE_PATH = os.path.join(BENCH_DIR, "fixtures", "long_term_memory.json")
+STOPWORDS = {
+    "a", "an", "and", "again", "any", "did", "details", "earlier", "for", "from", "in", "is", "it",
+    "me", "of", "on", "please", "suggest", "that", "the", "to", "was", "what", "where", "which",
+    "with", "you", "your", "remind", "recommended", "called", "options", "worth",
+}
+
+
+class KeywordEmbedding(Embeddings):
+    """Hashed bag of lower-cased words (stopwords dropped), L2-normalized. Deterministic."""
+
+    def __init__(self, size: int = 512):
+        self.size = size
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.size
+        for word in re.findall(r"[a-z0-9]+", text.lower()):
+            if word not in STOPWORDS:
+                vector[zlib.crc32(word.encode()) % self.size] += 1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def load_fixture(path: str = FIXTURE_PATH) -> Dict:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def fixture_exchanges(fixture: Dict) -> Dict[str, Exchange]:
+    sessions: Dict[str, uuid.UUID] = {}
+    exchanges = {}
+    for item in fixture["exchanges"]:
+        session_id = sessions.setdefault(item["session"], uuid.uuid4())
+        timestamp = datetime.fromisoformat(item["date"]).replace(tzinfo=timezone.utc)
+        exchanges[item["id"]] = Exchange(uuid.uuid4(), session_id, timestamp, item["question"], item["answer"])
+    return exchanges
+
+
+def filler_exchanges(count: int) -> List[Exchange]:
+    """Unrelated small talk, to grow the history without adding relevant answers."""
+    session_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    return [
+        Exchange(uuid.uuid4(), session_id, now, f"Filler question number {i} about nothing", f"Filler answer {i}")
+        for i in range(count)
+    ]
+
+
+def embeddings_for(backend: str) -> Embeddings:
+    if backend == "keyword":
+        return KeywordEmbedding()
+    from app.utils.embedding_backends import get_embeddings
+    return get_embeddings(backend)
+
+
+async def recall(memory: FaissLongTermMemory, fixture: Dict, k: int) -> Dict:
+    user_id = uuid.uuid4()
+    by_label = fixture_exchanges(fixture)
+    await memory.build_shard(user_id, list(by_label.values()))
+    labels = {exchange.id: label for label, exchange in by_label.items()}
+
+    per_query, hits, relevant = [], 0, 0
+    for item in fixture["queries"]:
+        found = await memory.search(user_id, item["query"], k=k)
+        retrieved = [labels[exchange.id] for exchange, _ in found]
+        matched = [label for label in item["relevant"] if label in retrieved]
+        hits += len(matched)
+        relevant += len(item["relevant"])
+        per_query.append({"query": item["query"], "relevant": item["relevant"], "retrieved": retrieved})
+    return {"recall_at_k": round(hits / relevant, 3), "queries": per_query}
+
+
+async def context_size(memory: FaissLongTermMemory, fixture: Dict, k: int, history_sizes: List[int]) -> Dict:
+    query = fixture["queries"][0]["query"]
+    results = {}
+    for size in history_sizes:
+        user_id = uuid.uuid4()
+        await memory.build_shard(user_id, list(fixture_exchanges(fixture).values()) + filler_exchanges(size))
+        latencies = []
+        for _ in range(20):
+            started = time.perf_counter()
+            found = await memory.search(user_id, query, k=k)
+            latencies.append((time.perf_counter() - started) * 1000)
+        results[str(size)] = {
+            "context_chars": len(format_recollections(found)),
+            "search_ms_p50": round(percentile(latencies, 50), 3),
+        }
+        memory.forget_user(user_id)
+    return results
+
+
+async def run(backend: str, k: int, history_sizes: List[int], min_score: float) -> Dict:
+    memory = FaissLongTermMemory(embeddings=lambda: embeddings_for(backend), min_score=min_score)
+    fixture = load_fixture()
+    try:
+        return {
+            "backend": backend,
+            "k": k,
+            **await recall(memory, fixture, k),
+            "context": await context_size(memory, fixture, k, history_sizes),
+        }
+    finally:
+        await memory.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-term memory recall@k and context size.")
+    parser.add_argument("--backend", default="keyword", help="keyword, torch or onnx-int8")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--min-score", type=float, default=0.0)
+    parser.add_argument("--history", default="0,100,1000,10000", help="Filler exchanges added per run.")
+    parser.add_argument("--min-recall", type=float, default=0.9)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.backend, args.k, [int(n) for n in args.history.split(",")], args.min_score))
+    for item in result["queries"]:
+        missed = [label for label in item["relevant"] if label not in item["retrieved"]]
+        print(f"{'MISS' if missed else 'ok  '}  {item['query']}  ->  {', '.join(item['retrieved'])}")
+    print(f"\nrecall@{args.k} ({args.backend}): {result['recall_at_k']}")
+    print(f"\n{'history':>8}{'context chars':>16}{'search ms p50':>16}")
+    for size, row in result["context"].items():
+        print(f"{size:>8}{row['context_chars']:>16}{row['search_ms_p50']:>16}")
+    print(f"\nResult written to {save_result('long_term_memory', result)}")
+    if result["recall_at_k"] < args.min_recall:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+# benchmarks/microbench.py
+"""
+Microbenchmarks for the pieces of the /chat/ask hot path.
+
+Each benchmark is timed in nanoseconds per operation and divided by a fixed
+pure-Python calibration loop, so the stored `relative` numbers stay comparable
+across machines. tests/test_microbenchmarks.py replays them and fails when any
+node is slower than benchmarks/baselines/microbench.json by more than the tolerance.
+
+    python -m benchmarks.microbench                    # run and print
+    python -m benchmarks.microbench --update-baseline  # accept current numbers
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.stats import BENCH_DIR, load_baseline, save_baseline, save_result
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+KB_PATH = os.path.join(BENCH_DIR, "..", "data", "intents_knowledge_base.json")
+BASELINE_NAME = "microbench"
+DEFAULT_TOLERANCE = float(os.getenv("MICROBENCH_TOLERANCE", "0.5"))
+
+# Runner = callable(n) that performs n operations; it may have a close() for its resources.
+Runner = Callable[[int], None]
+
+
+class BenchUnavailable(Exception):
+    """Raised by a setup function when an optional dependency is missing."""
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[], Runner]
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str):
+    def register(setup: Callable[[], Runner]):
+        BENCHMARKS[name] = Benchmark(name=name, setup=setup)
+        return setup
+    return register
+
+
+def load_fixture(name: str) -> Dict:
+    with open(os.path.join(FIXTURES_DIR, name), "r") as f:
+        return json.load(f)
+
+
+def load_kb() -> Dict:
+    with open(KB_PATH, "r") as f:
+        return json.load(f)
+
+
+def sync_runner(fn: Callable[[], object]) -> Runner:
+    def run(n: int):
+        for _ in range(n):
+            fn()
+    return run
+
+
+def async_runner(coro_fn: Callable[[], object]) -> Runner:
+    loop = asyncio.new_event_loop()
+
+    async def many(n: int):
+        for _ in range(n):
+            await coro_fn()
+
+    def run(n: int):
+        loop.run_until_complete(many(n))
+    run.close = loop.close
+    return run
+
+
+def history_rows(count: int = 10) -> List[tuple]:
+    """(sender, message, timestamp, payload) rows, as returned by the history selects."""
+    replies = load_fixture("ollama_replies.json")
+    return [
+        ("user", "Find romantic vegetarian restaurants near me", None, None) if i % 2 == 0
+        else ("ai", None, None, replies["default"])
+        for i in range(count)
+    ]
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def all(self):
+        return list(self._rows)
+
+
+class FakeDB:
+    """Returns fixed rows for any query, so only conversion cost is measured."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def execute(self, *args, **kwargs):
+        return FakeResult(self.rows)
+
+
+# --- benchmarks ----------------------------------------------------------
+
+
+@benchmark("format_json_as_text")
+def bench_format_json_as_text() -> Runner:
+    from app.utils.format_json_as_text import format_json_as_text
+    payload = load_fixture("ollama_replies.json")["default"]
+    return sync_runner(lambda: format_json_as_text(payload))
+
+
+@benchmark("safe_json_parse")
+def bench_safe_json_parse() -> Runner:
+    from app.langgraph.nodes.generate_response_node import safe_json_parse
+    outputs = [o["text"] for o in load_fixture("malformed_llm_outputs.json")["llm_outputs"]]
+    for text in outputs:
+        if not safe_json_parse(text):
+            raise BenchUnavailable("fixture needs the LLM fallback parser")
+
+    def parse_all():
+        for text in outputs:
+            safe_json_parse(text)
+    return sync_runner(parse_all)
+
+
+@benchmark("prompt_node")
+def bench_prompt_node() -> Runner:
+    from app.langgraph.nodes.prompt.prompt_node import prompt_node
+
+    intent_object = next(i for i in load_kb()["intents"] if i["intent"] == "recommendation")
+    state = {
+        "session_id": uuid.uuid4(),
+        "user_query": "Find romantic vegetarian restaurants near me",
+        "intent": "recommendation",
+        "sub_intent": "food",
+        "intent_object": intent_object,
+        "user_location": "Pune, India",
+        "current_time": "2025-06-22 12:30 PM",
+        "chat_history_summary": "- User is planning a romantic weekend in Pune",
+    }
+    return async_runner(lambda: prompt_node(state))
+
+
+@benchmark("detect_intent_vector_search")
+def bench_detect_intent_vector_search() -> Runner:
+    try:
+        from langchain_community.embeddings import DeterministicFakeEmbedding
+        from langchain_community.vectorstores import FAISS
+    except ImportError as e:
+        raise BenchUnavailable(str(e))
+    from app.langgraph.nodes.detect_intent_node import DetectIntentNode
+
+    # Real FAISS index over the real KB documents; only the encoder is swapped for a
+    # deterministic one so the number tracks search/docstore cost, not model weights.
+    docs = DetectIntentNode._build_documents(load_kb())
+    try:
+        vectorstore = FAISS.from_documents(docs, DeterministicFakeEmbedding(size=384))
+    except ImportError as e:
+        raise BenchUnavailable(str(e))
+    return sync_runner(lambda: vectorstore.similarity_search("Cool things to see in Goa today", k=3))
+
+
+@benchmark("memory_get_memory")
+def bench_memory_get_memory() -> Runner:
+    """Warm session: turns come from the session cache."""
+    from app.langgraph.nodes.memory.langchain_memory import Memory
+    memory = Memory(session_id=uuid.uuid4(), db=FakeDB(history_rows(10)))
+    return async_runner(memory.get_memory)
+
+
+@benchmark("memory_get_memory_cold")
+def bench_memory_get_memory_cold() -> Runner:
+    """Cold session: every call misses the session cache and converts DB rows."""
+    from app.langgraph.nodes.memory.langchain_memory import Memory
+    from app.langgraph.nodes.memory.session_cache import session_cache
+    memory = Memory(session_id=uuid.uuid4(), db=FakeDB(history_rows(10)))
+
+    async def cold_get_memory():
+        await session_cache.invalidate(memory.session_id)
+        return await memory.get_memory()
+
+    return async_runner(cold_get_memory)
+
+
+@benchmark("chat_flow_state")
+def bench_chat_flow_state() -> Runner:
+    from app.schemas.state import ChatFlowState
+    session_id = uuid.uuid4()
+    return sync_runner(lambda: ChatFlowState(
+        session_id=session_id,
+        user_query="Find best restaurants near me",
+        intent="recommendation",
+        sub_intent="food",
+        user_location="Pune, India",
+    ))
+
+
+# --- timing --------------------------------------------------------------
+
+
+def calibration_runner() -> Runner:
+    data = {f"k{i}": i for i in range(64)}
+
+    def work():
+        total = 0
+        for key, value in data.items():
+            total += len(key) * value
+        return total
+    return sync_runner(work)
+
+
+def time_runner(run: Runner, repeat: int = 5, min_time: float = 0.05) -> float:
+    """
+    Returns the best observed nanoseconds per operation over `repeat` rounds,
+    each long enough (>= min_time seconds) to swamp timer resolution.
+    """
+    run(1)  # warm caches and lazy imports
+    number = 1
+    while True:
+        started = time.perf_counter()
+        run(number)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        run(number)
+        best = min(best, (time.perf_counter() - started) / number)
+    return best * 1e9
+
+
+def run_benchmarks(names: Optional[List[str]] = None, repeat: int = 5) -> Dict:
+    """
+    Runs the selected benchmarks and returns a machine-readable result mapping.
+    Benchmarks whose optional dependencies are missing are listed under "skipped".
+    """
+    logging.getLogger("ai_assistant").setLevel(logging.WARNING)
+    calibration = calibration_runner()
+    calibrations: List[float] = []
+    results: Dict[str, Dict] = {}
+    skipped: Dict[str, str] = {}
+
+    for name in names or list(BENCHMARKS):
+        try:
+            runner = BENCHMARKS[name].setup()
+        except (BenchUnavailable, ImportError) as e:
+            skipped[name] = str(e)
+            continue
+        try:
+            # Calibrate right next to each benchmark so CPU frequency drift cancels out.
+            calibration_ns = time_runner(calibration, repeat=repeat)
+            ns_per_op = time_runner(runner, repeat=repeat)
+            calibration_ns = min(calibration_ns, time_runner(calibration, repeat=repeat))
+        finally:
+            if hasattr(runner, "close"):
+                runner.close()
+        calibrations.append(calibration_ns)
+        results[name] = {
+            "ns_per_op": round(ns_per_op, 1),
+            "relative": round(ns_per_op / calibration_ns, 4),
+        }
+
+    calibration_ns = min(calibrations) if calibrations else time_runner(calibration, repeat=repeat)
+    return {"calibration_ns": round(calibration_ns, 1), "benchmarks": results, "skipped": skipped}
+
+
+def find_regressions(result: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE) -> Dict[str, Dict]:
+    """
+    Returns {name: details} for every benchmark whose calibrated cost grew by more than `tolerance`.
+    """
+    regressions = {}
+    for name, current in result["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            continue
+        change = (current["relative"] - base["relative"]) / base["relative"]
+        if change > tolerance:
+            regressions[name] = {"baseline": base["relative"], "current": current["relative"], "change": round(change, 3)}
+    return regressions
+
+
+def confirmed_regressions(result: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE, retries: int = 2) -> Dict[str, Dict]:
+    """
+    Like find_regressions, but re-times each suspect up to `retries` more times and only reports
+    benchmarks that stay slow, so a single noisy sample does not fail the run.
+    """
+    regressions = find_regressions(result, baseline, tolerance)
+    for _ in range(retries):
+        if not regressions:
+            break
+        rerun = run_benchmarks(list(regressions))
+        regressions = {
+            name: row for name, row in find_regressions(rerun, baseline, tolerance).items()
+            if name in regressions
+        }
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hot-path microbenchmarks.")
+    parser.add_argument("names", nargs="*", help=f"Subset to run: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    result = run_benchmarks(args.names or None, repeat=args.repeat)
+    print(f"calibration: {result['calibration_ns']} ns/op")
+    for name, row in result["benchmarks"].items():
+        print(f"{name:<32}{row['ns_per_op']:>14} ns/op{row['relative']:>12}x")
+    for name, reason in result["skipped"].items():
+        print(f"{name:<32}skipped: {reason}")
+    save_result(BASELINE_NAME, result)
+
+    if args.update_baseline:
+        print(f"Baseline saved to {save_baseline(BASELINE_NAME, result)}")
+        return
+
+    baseline = load_baseline(BASELINE_NAME)
+    if baseline:
+        regressions = confirmed_regressions(result, baseline, args.tolerance)
+        for name, row in regressions.items():
+            print(f"REGRESSION {name}: {row['baseline']}x -> {row['current']}x ({row['change']:+.0%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# benchmarks/partition_latency.py
+"""
+History-read latency on a flat vs a monthly-partitioned `messages` table at 1x, 10x and
+100x data volume. Needs PostgreSQL (uses generate_series and gen_random_uuid, PG13+):
+
+    python -m benchmarks.partition_latency --database-url postgresql+asyncpg://... --base-messages 200000
+
+Each (layout, scale) gets its own schema (bench_<layout>_<scale>x) filled server-side, with
+sessions spread over --months months. The app's own statements from app/crud/history.py are
+timed for recently active sessions, and EXPLAIN ANALYZE reports how many message partitions
+the recent-turns read actually executed. Use --keep to reuse schemas between runs.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import time
+from typing import Dict, List
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import history
+from benchmarks.stats import percentile, save_result
+
+LAYOUTS = ("flat", "partitioned")
+
+TABLES_SQL = """
+CREATE TABLE chat_sessions (
+  id uuid PRIMARY KEY,
+  user_id uuid NOT NULL,
+  session_type varchar,
+  started_at timestamptz DEFAULT CURRENT_TIMESTAMP,
+  ended_at timestamptz,
+  archived_at timestamptz
+);
+CREATE TABLE messages_archive (
+  id uuid PRIMARY KEY,
+  session_id uuid NOT NULL,
+  sender varchar,
+  message text,
+  payload jsonb,
+  response_to uuid,
+  "timestamp" timestamptz,
+  archived_at timestamptz
+);
+CREATE INDEX ON messages_archive (session_id, "timestamp" DESC);
+"""
+
+FLAT_MESSAGES_SQL = """
+CREATE TABLE messages (
+  id uuid PRIMARY KEY,
+  session_id uuid NOT NULL,
+  sender varchar,
+  message text,
+  payload jsonb,
+  response_to uuid,
+  "timestamp" timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+PARTITIONED_MESSAGES_SQL = """
+CREATE TABLE messages (
+  id uuid NOT NULL,
+  session_id uuid NOT NULL,
+  sender varchar,
+  message text,
+  payload jsonb,
+  response_to uuid,
+  "timestamp" timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id, "timestamp")
+) PARTITION BY RANGE ("timestamp");
+CREATE TABLE messages_default PARTITION OF messages DEFAULT;
+"""
+
+PARTITIONS_SQL = """
+DO $$
+DECLARE month_start date := date_trunc('month', CURRENT_DATE - make_interval(months => {months}))::date;
+BEGIN
+  WHILE month_start <= date_trunc('month', CURRENT_DATE + interval '1 month')::date LOOP
+    EXECUTE format('CREATE TABLE %I PARTITION OF messages FOR VALUES FROM (%L) TO (%L)',
+      format('messages_y%sm%s', to_char(month_start, 'YYYY'), to_char(month_start, 'MM')),
+      month_start, (month_start + interval '1 month')::date);
+    month_start := (month_start + interval '1 month')::date;
+  END LOOP;
+END $$;
+"""
+
+FILL_SQL = """
+INSERT INTO chat_sessions (id, user_id, session_type, started_at)
+SELECT gen_random_uuid(), '00000000-0000-0000-0000-000000000001', 'chat',
+       now() - random() * make_interval(days => {days})
+FROM generate_series(1, {sessions});
+
+INSERT INTO messages (id, session_id, sender, message, "timestamp")
+SELECT gen_random_uuid(), s.id, CASE WHEN g % 2 = 0 THEN 'user' ELSE 'ai' END,
+       repeat('Vegetarian thali places near FC Road. ', 8), s.started_at + g * interval '30 seconds'
+FROM chat_sessions s, generate_series(0, {per_session} - 1) AS g;
+
+CREATE INDEX ON messages (session_id, "timestamp" DESC);
+ANALYZE chat_sessions;
+ANALYZE messages;
+"""
+
+
+def schema_name(layout: str, scale: int) -> str:
+    return f"bench_{layout}_{scale}x"
+
+
+async def build_schema(engine, layout: str, scale: int, base_messages: int, per_session: int, months: int, keep: bool) -> None:
+    schema = schema_name(layout, scale)
+    async with engine.connect() as conn:
+        exists = (await conn.execute(
+            text("SELECT 1 FROM information_schema.schemata WHERE schema_name = :s"), {"s": schema}
+        )).first()
+    if exists and keep:
+        return
+
+    sessions = max(1, base_messages * scale // per_session)
+    statements = [f'DROP SCHEMA IF EXISTS "{schema}" CASCADE', f'CREATE SCHEMA "{schema}"', f'SET search_path TO "{schema}"']
+    statements += [TABLES_SQL, FLAT_MESSAGES_SQL if layout == "flat" else PARTITIONED_MESSAGES_SQL]
+    if layout == "partitioned":
+        statements.append(PARTITIONS_SQL.format(months=months))
+    statements.append(FILL_SQL.format(days=months * 30, sessions=sessions, per_session=per_session))
+
+    started = time.perf_counter()
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        for sql in statements:
+            await raw.driver_connection.execute(sql)  # multi-statement scripts need the simple query protocol
+        await conn.commit()
+    print(f"  built {schema}: {sessions * per_session:,} messages in {time.perf_counter() - started:.0f}s")
+
+
+async def time_reads(database_url: str, schema: str, samples: int, recent_days: int) -> Dict:
+    engine = create_async_engine(database_url, connect_args={"server_settings": {"search_path": schema}})
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with session_factory() as db:
+            session_ids = list((await db.execute(text(
+                "SELECT id FROM chat_sessions WHERE started_at > now() - make_interval(days => :d) ORDER BY random() LIMIT :n"
+            ), {"d": recent_days, "n": samples})).scalars())
+
+            reads = {
+                "recent_turns": lambda sid: history.get_recent_turns(db, sid, 10),
+                "all_turns": lambda sid: history.get_all_turns(db, sid),
+            }
+            result = {}
+            for name, read in reads.items():
+                await read(session_ids[0])  # warm connection and plan caches
+                latencies = []
+                for sid in session_ids:
+                    started = time.perf_counter()
+                    await read(sid)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                result[name] = {"p50_ms": round(percentile(latencies, 50), 3), "p95_ms": round(percentile(latencies, 95), 3)}
+
+            statement = history._recent_turns.params(session_id=random.choice(session_ids), limit=10)
+            compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+            plan = (await db.execute(text(f"EXPLAIN (ANALYZE, COSTS OFF) {compiled}"))).scalars().all()
+            scanned = {m for line in plan if "never executed" not in line for m in re.findall(r"messages_y\d{4}m\d{2}|messages_default", line)}
+            result["partitions_executed"] = len(scanned)
+        return result
+    finally:
+        await engine.dispose()
+
+
+async def run(database_url: str, base_messages: int, scales: List[int], per_session: int, months: int, samples: int, keep: bool) -> Dict:
+    engine = create_async_engine(database_url)
+    results = {}
+    try:
+        for scale in scales:
+            for layout in LAYOUTS:
+                await build_schema(engine, layout, scale, base_messages, per_session, months, keep)
+                results[f"{layout}/{scale}x"] = await time_reads(database_url, schema_name(layout, scale), samples, recent_days=7)
+    finally:
+        await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flat vs partitioned messages latency at growing volume.")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="PostgreSQL; defaults to $DATABASE_URL.")
+    parser.add_argument("--base-messages", type=int, default=100_000, help="1x volume (today's messages row count).")
+    parser.add_argument("--scales", default="1,10,100")
+    parser.add_argument("--messages-per-session", type=int, default=40)
+    parser.add_argument("--months", type=int, default=24, help="History spread over this many months.")
+    parser.add_argument("--samples", type=int, default=200, help="Recent sessions timed per read.")
+    parser.add_argument("--keep", action="store_true", help="Reuse existing bench schemas instead of rebuilding.")
+    args = parser.parse_args()
+
+    if not args.database_url or not args.database_url.startswith("postgresql"):
+        parser.error("a PostgreSQL --database-url (or $DATABASE_URL) is required")
+
+    scales = [int(s) for s in args.scales.split(",")]
+    results = asyncio.run(run(
+        args.database_url, args.base_messages, scales, args.messages_per_session, args.months, args.samples, args.keep,
+    ))
+
+    print(f"{'layout/volume':<20}{'recent p50':>12}{'recent p95':>12}{'all p50':>10}{'all p95':>10}{'partitions':>12}")
+    for key, row in results.items():
+        print(
+            f"{key:<20}{row['recent_turns']['p50_ms']:>12}{row['recent_turns']['p95_ms']:>12}"
+            f"{row['all_turns']['p50_ms']:>10}{row['all_turns']['p95_ms']:>10}{row['partitions_executed']:>12}"
+        )
+    print(f"\nResult written to {save_result('partition_latency', {'base_messages': args.base_messages, 'results': results})}")
+
+
+if __name__ == "__main__":
+    main()
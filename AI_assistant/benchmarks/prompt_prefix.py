@@ -0,0 +1,173 @@
+# benchmarks/prompt_prefix.py
+"""
+Prompt-eval time of the generation prompt with the old layout (per-request values at the top
+of the system message) vs the static-prefix-first layout built by PromptBuilder.
+
+Requests from several sessions are interleaved, as they are under load, and sent one at a
+time. By default each layout runs against a fresh in-process fake Ollama that models prefix
+reuse (--prefix-cache-slots) and charges --prompt-eval-rate tokens/s for the rest:
+
+    python -m benchmarks.prompt_prefix --requests 60 --sessions 4
+
+Pass --ollama-url to measure a real server instead; prompt_eval_duration comes from its replies.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from typing import Callable, Dict, List
+
+from jinja2 import Template
+from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate, SystemMessagePromptTemplate
+from langchain_core.messages import get_buffer_string
+from ollama import AsyncClient
+
+from app.langgraph.nodes.prompt.get_prompt import PromptBuilder
+from app.utils.ollama_pool import OLLAMA_KEEP_ALIVE, OLLAMA_NUM_CTX
+from benchmarks.fake_ollama import FakeOllamaConfig, FakeOllamaServer
+from benchmarks.microbench import load_kb
+from benchmarks.stats import percentile, save_result
+
+# The system template PromptBuilder used before the static-first reorder.
+LEGACY_SYSTEM_TEMPLATE = """
+                You are **Teeow.ai**, a smart and friendly AI **travel consultant**.
+
+                - system_instruction: {system_instruction}
+
+                📌 Personalization:
+                - Location: {user_location}
+                - Time: {current_time}
+                - Preferences: {user_preferences}
+                - Past Summary: {chat_history_summary}
+                - Last Messages: {chat_memory}
+
+                📡 Real-time Info: {realtime_info}
+                🧾 FORMAT INSTRUCTIONS:
+                You must **respond ONLY using the JSON structure shown below**. Do not create new keys. Do not add fields like "answer", "suggestions", or "follow_up" unless they already exist in the format.
+
+                🧱 OUTPUT STRUCTURE (MUST match exactly):
+                ```json
+                {output_format}
+                ```
+            """
+
+LOCATIONS = ["Pune, India", "Goa, India", "Paris, France", "Kyoto, Japan", "Lisbon, Portugal"]
+SUB_INTENTS = ["food", "attractions", "activities", "local gems"]
+QUERIES = [
+    "Find romantic vegetarian restaurants near me",
+    "What should I see this evening?",
+    "Any quiet cafes to work from?",
+    "Suggest something fun for a rainy day",
+]
+
+
+def request_states(requests: int, sessions: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    memories: Dict[int, List[str]] = {s: [] for s in range(sessions)}
+    states = []
+    for i in range(requests):
+        session = i % sessions
+        query = rng.choice(QUERIES)
+        states.append({
+            "sub_intent": rng.choice(SUB_INTENTS),
+            "user_location": LOCATIONS[session % len(LOCATIONS)],
+            "current_time": f"2025-06-22 {12 + i // 60:02d}:{i % 60:02d}",
+            "user_query": query,
+            "user_preferences": "diet: vegetarian; budget: medium",
+            "chat_history_summary": f"- Session {session} is planning a weekend trip",
+            "chat_memory": "\n".join(memories[session][-10:]),
+            "realtime_info": f"- Weather: {rng.randint(18, 34)}°C, clear",
+        })
+        memories[session] += [f"Human: {query}", f"AI: {{\"title\": \"Reply {i}\"}}"]
+    return states
+
+
+def legacy_prompt(intent_obj: Dict) -> Callable[[Dict], str]:
+    template = ChatPromptTemplate.from_messages([
+        SystemMessagePromptTemplate.from_template(LEGACY_SYSTEM_TEMPLATE),
+        HumanMessagePromptTemplate.from_template("User Query: {user_query}"),
+    ])
+
+    def render(state: Dict) -> str:
+        instruction = Template(intent_obj["system_instruction"]).render(**state)
+        output_format = Template(json.dumps(intent_obj["output_format"], indent=2)).render(**state)
+        values = {k: v for k, v in state.items() if k != "sub_intent"}
+        return get_buffer_string(template.format_messages(system_instruction=instruction, output_format=output_format, **values))
+
+    return render
+
+
+def static_first_prompt(intent_obj: Dict) -> Callable[[Dict], str]:
+    builder = PromptBuilder()
+
+    def render(state: Dict) -> str:
+        messages = builder.get_prompt().format_messages(static_prefix=[builder.static_prefix(intent_obj)], **state)
+        return get_buffer_string(messages)  # what OllamaLLM sends for a list of messages
+
+    return render
+
+
+async def replay(url: str, prompts: List[str], model: str, keep_alive: str, num_ctx: int) -> Dict:
+    client = AsyncClient(host=url)
+    options = {"num_ctx": num_ctx} if num_ctx else {}
+    eval_ms, eval_tokens = [], []
+    for prompt in prompts:
+        response = await client.generate(model=model, prompt=prompt, options=options, keep_alive=keep_alive, stream=False)
+        eval_ms.append(response["prompt_eval_duration"] / 1e6)
+        eval_tokens.append(response["prompt_eval_count"])
+    prompt_tokens = sum(len(p) // 4 for p in prompts)
+    return {
+        "prompt_eval_ms_mean": round(sum(eval_ms) / len(eval_ms), 3),
+        "prompt_eval_ms_p50": round(percentile(eval_ms, 50), 3),
+        "prompt_eval_ms_p95": round(percentile(eval_ms, 95), 3),
+        "evaluated_tokens_mean": round(sum(eval_tokens) / len(eval_tokens), 1),
+        "prompt_tokens_mean": round(prompt_tokens / len(prompts), 1),
+    }
+
+
+async def run(args) -> Dict:
+    intent_obj = next(i for i in load_kb()["intents"] if i["intent"] == "recommendation")
+    states = request_states(args.requests, args.sessions, args.seed)
+    layouts = {"legacy": legacy_prompt(intent_obj), "static_first": static_first_prompt(intent_obj)}
+
+    results = {}
+    for name, render in layouts.items():
+        prompts = [render(state) for state in states]
+        if args.ollama_url:
+            await replay(args.ollama_url, prompts[:1], args.model, args.keep_alive, args.num_ctx)  # load the model
+            results[name] = await replay(args.ollama_url, prompts, args.model, args.keep_alive, args.num_ctx)
+            continue
+        config = FakeOllamaConfig(prompt_eval_rate=args.prompt_eval_rate, prefix_cache_slots=args.prefix_cache_slots)
+        with FakeOllamaServer(config) as server:
+            results[name] = await replay(server.url, prompts, args.model, args.keep_alive, args.num_ctx)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt-eval time: legacy vs static-prefix-first prompt layout.")
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--sessions", type=int, default=4, help="Sessions whose requests are interleaved.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--model", default="llama3.2")
+    parser.add_argument("--keep-alive", default=OLLAMA_KEEP_ALIVE)
+    parser.add_argument("--num-ctx", type=int, default=OLLAMA_NUM_CTX or 4096)
+    parser.add_argument("--ollama-url", default=None, help="Measure a real Ollama server instead of the fake.")
+    parser.add_argument("--prompt-eval-rate", type=float, default=500.0, help="Fake only: prompt tokens per second.")
+    parser.add_argument("--prefix-cache-slots", type=int, default=1, help="Fake only: prompts kept for prefix reuse.")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    print(f"{'layout':<14}{'eval mean ms':>14}{'eval p50 ms':>13}{'eval p95 ms':>13}{'evaluated tok':>15}{'prompt tok':>12}")
+    for name, row in results.items():
+        print(
+            f"{name:<14}{row['prompt_eval_ms_mean']:>14}{row['prompt_eval_ms_p50']:>13}{row['prompt_eval_ms_p95']:>13}"
+            f"{row['evaluated_tokens_mean']:>15}{row['prompt_tokens_mean']:>12}"
+        )
+    target = args.ollama_url or "fake"
+    print(f"\nResult written to {save_result('prompt_prefix', {'target': target, 'results': results})}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# benchmarks/seed_data.py
+"""
+Seeds users, their preferences, chat sessions and message history for load tests.
+
+Works against the real Postgres schema (apply data/schema.sql first) or against a
+local SQLite stand-in, in which case the tables are created from the ORM models:
+
+    python -m benchmarks.seed_data --database-url sqlite+aiosqlite:///bench.db --sessions 200 --messages 40
+
+The seeded session ids are written to benchmarks/results/seed_sessions.json for the load driver.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.base import Base
+from app.models.user import User, TierEnum
+from app.models.chat_session import ChatSession
+from app.models.message import Message
+from app.models.user_preference import UserPreference
+from benchmarks.stats import RESULTS_DIR, write_json
+
+DEFAULT_SESSIONS_PATH = os.path.join(RESULTS_DIR, "seed_sessions.json")
+
+USER_QUERIES = [
+    "Find best restaurants near me",
+    "Any vegetarian cafes open late?",
+    "What should I see in Pune this weekend?",
+    "Suggest a few local gems away from the crowds",
+    "Cheap street food around FC Road?",
+    "Good places for a quiet dinner with a view",
+]
+
+
+def ai_reply(rng: random.Random) -> dict:
+    """A structured AI response, stored as the message payload like save_to_db_node does."""
+    names = rng.sample(["Vaishali", "Shabree", "Malaka Spice", "Cafe Goodluck", "Le Plaisir", "Kayani Bakery"], 3)
+    return {
+        "title": "Top Recommendations for food in Pune, India",
+        "items": [{"name": name, "rating": round(rng.uniform(3.8, 4.8), 1)} for name in names],
+        "follow_up": "Want to explore similar options or book something now?",
+    }
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+async def seed(database_url: str, users: int, sessions: int, messages: int, create_schema: bool, seed_value: int) -> dict:
+    rng = random.Random(seed_value)
+    engine = create_async_engine(database_url, future=True)
+
+    async with engine.begin() as conn:
+        if create_schema or is_sqlite(database_url):
+            await conn.run_sync(Base.metadata.create_all)
+
+        user_rows = [{
+            "id": uuid.uuid4(),
+            "name": f"bench-user-{i}",
+            "email": f"bench-{uuid.uuid4().hex[:12]}@example.com",
+            "hashed_password": "not-a-real-hash",
+            "tier": TierEnum.FREE,
+        } for i in range(users)]
+        await conn.execute(insert(User), user_rows)
+        await conn.execute(insert(UserPreference), [{
+            "id": uuid.uuid4(),
+            "user_id": user["id"],
+            "preferences": {
+                "diet": rng.choice(["vegetarian", "vegan", "no restrictions"]),
+                "budget": rng.choice(["low", "medium", "high"]),
+                "interests": rng.sample(["history", "street food", "nightlife", "nature", "art"], 2),
+            },
+        } for user in user_rows])
+
+        start = datetime.now(timezone.utc) - timedelta(days=1)
+        session_rows = [{
+            "id": uuid.uuid4(),
+            "user_id": user_rows[i % users]["id"],
+            "session_type": "chat",
+            "started_at": start,
+        } for i in range(sessions)]
+        await conn.execute(insert(ChatSession), session_rows)
+
+        message_rows = []
+        for session in session_rows:
+            timestamp = start
+            previous_id = None
+            for i in range(messages):
+                timestamp = timestamp + timedelta(seconds=30)
+                message_id = uuid.uuid4()
+                is_user = i % 2 == 0
+                message_rows.append({
+                    "id": message_id,
+                    "session_id": session["id"],
+                    "sender": "user" if is_user else "ai",
+                    "message": rng.choice(USER_QUERIES) if is_user else None,
+                    "payload": None if is_user else ai_reply(rng),
+                    "response_to": None if is_user else previous_id,
+                    "timestamp": timestamp,
+                })
+                previous_id = message_id
+
+        # Insert in chunks to keep parameter counts below driver limits.
+        for offset in range(0, len(message_rows), 5000):
+            await conn.execute(insert(Message), message_rows[offset:offset + 5000])
+
+    await engine.dispose()
+    return {
+        "database_url": database_url,
+        "users": [str(u["id"]) for u in user_rows],
+        "sessions": [str(s["id"]) for s in session_rows],
+        "messages_per_session": messages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed chat data for load tests.")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Defaults to $DATABASE_URL.")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=20, help="Messages per session.")
+    parser.add_argument("--create-schema", action="store_true", help="Create tables from the ORM models first.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=DEFAULT_SESSIONS_PATH)
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("--database-url or $DATABASE_URL is required")
+
+    summary = asyncio.run(seed(args.database_url, args.users, args.sessions, args.messages, args.create_schema, args.seed))
+    write_json(args.out, summary)
+    print(f"Seeded {len(summary['sessions'])} sessions x {args.messages} messages -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
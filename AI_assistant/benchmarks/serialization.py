@@ -0,0 +1,133 @@
+# benchmarks/serialization.py
+"""
+Serialization time per 1,000 rows for the list routes, before and after the orjson path:
+
+    before_json       response_model validation (Pydantic, from attributes), json-mode dump,
+                      then JSONResponse / the json module (FastAPI before its dump_json fast path)
+    before_dump_json  the same validation, then Pydantic's dump_json (current FastAPI)
+    after             message_out_dict / chat_session_out_dict + orjson, no validation
+    after_streamed    the same, streamed in STREAM_CHUNK_ITEMS chunks
+
+    python -m benchmarks.serialization --rows 1000,10000 --repeat 20
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.crud.history import MessageRow
+from app.schemas.chat_session import ChatSessionOut, chat_session_out_dict
+from app.schemas.message import MessageOut, message_out_dict
+from app.utils.fast_json import json_list_response
+from benchmarks.seed_data import USER_QUERIES, ai_reply
+from benchmarks.stats import percentile, save_result
+
+
+def message_rows(count: int, rng: random.Random) -> List[MessageRow]:
+    session_id = uuid.uuid4()
+    start = datetime.now(timezone.utc) - timedelta(days=1)
+    rows, previous = [], None
+    for i in range(count):
+        is_user = i % 2 == 0
+        row = MessageRow(
+            id=uuid.uuid4(),
+            session_id=session_id,
+            sender="user" if is_user else "ai",
+            message=rng.choice(USER_QUERIES) if is_user else None,
+            response_to=None if is_user else previous,
+            timestamp=start + timedelta(seconds=30 * i),
+            payload=None if is_user else ai_reply(rng),
+        )
+        previous = row.id
+        rows.append(row)
+    return rows
+
+
+def session_rows(count: int) -> List[tuple]:
+    from collections import namedtuple
+    Row = namedtuple("Row", "user_id session_type id started_at ended_at")
+    now = datetime.now(timezone.utc)
+    return [Row(uuid.uuid4(), "chat", uuid.uuid4(), now, None) for _ in range(count)]
+
+
+def before_json(adapter: TypeAdapter) -> Callable[[list], bytes]:
+    def encode(rows: list) -> bytes:
+        validated = adapter.validate_python(rows, from_attributes=True)
+        return JSONResponse(adapter.dump_python(validated, mode="json")).body
+    return encode
+
+
+def before_dump_json(adapter: TypeAdapter) -> Callable[[list], bytes]:
+    def encode(rows: list) -> bytes:
+        return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+    return encode
+
+
+def after(to_dict: Callable, stream_min_items: int) -> Callable[[list], bytes]:
+    loop = asyncio.new_event_loop()
+
+    def encode(rows: list) -> bytes:
+        response = json_list_response(rows, to_dict, stream_min_items=stream_min_items)
+        if hasattr(response, "body_iterator"):
+            async def drain():
+                return b"".join([chunk async for chunk in response.body_iterator])
+            return loop.run_until_complete(drain())
+        return response.body
+    return encode
+
+
+def measure(encode: Callable[[list], bytes], rows: list, repeat: int) -> Dict:
+    encode(rows)  # warm-up (imports, validator build)
+    per_thousand = []
+    for _ in range(repeat):
+        started = time.process_time()
+        body = encode(rows)
+        per_thousand.append((time.process_time() - started) * 1000 * 1000 / len(rows))
+    return {
+        "cpu_ms_per_1000_p50": round(percentile(per_thousand, 50), 3),
+        "cpu_ms_per_1000_p95": round(percentile(per_thousand, 95), 3),
+        "bytes": len(body),
+    }
+
+
+def run(counts: List[int], repeat: int) -> Dict:
+    rng = random.Random(7)
+    variants = {
+        "messages": (lambda n: message_rows(n, rng), TypeAdapter(List[MessageOut]), message_out_dict),
+        "chat_sessions": (session_rows, TypeAdapter(List[ChatSessionOut]), chat_session_out_dict),
+    }
+    results = {}
+    for name, (make_rows, adapter, to_dict) in variants.items():
+        for count in counts:
+            rows = make_rows(count)
+            results[f"{name}/{count}/before_json"] = measure(before_json(adapter), rows, repeat)
+            results[f"{name}/{count}/before_dump_json"] = measure(before_dump_json(adapter), rows, repeat)
+            results[f"{name}/{count}/after"] = measure(after(to_dict, stream_min_items=10**9), rows, repeat)
+            results[f"{name}/{count}/after_streamed"] = measure(after(to_dict, stream_min_items=0), rows, repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List-route serialization: Pydantic + json vs orjson rows.")
+    parser.add_argument("--rows", default="1000,10000", help="Comma-separated list sizes.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    counts = [int(c) for c in args.rows.split(",")]
+    results = run(counts, args.repeat)
+
+    print(f"{'route/rows/variant':<36}{'cpu ms/1k p50':>15}{'cpu ms/1k p95':>15}{'bytes':>12}")
+    for key, row in results.items():
+        print(f"{key:<36}{row['cpu_ms_per_1000_p50']:>15}{row['cpu_ms_per_1000_p95']:>15}{row['bytes']:>12}")
+    print(f"\nResult written to {save_result('serialization', {'results': results})}")
+
+
+if __name__ == "__main__":
+    main()
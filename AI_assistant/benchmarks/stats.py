@@ -0,0 +1,142 @@
+# benchmarks/stats.py
+
+import json
+import os
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Linear-interpolated percentile (pct in 0-100) of an unsorted list.
+    Returns 0.0 for an empty list.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (pct / 100) * (len(ordered) - 1)
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize_latencies(latencies_ms: List[float], elapsed_s: float, errors: int = 0) -> Dict:
+    """
+    Collapses raw per-request latencies into the numbers we track between commits.
+    `latencies_ms` holds successful requests only; `errors` counts the failed ones.
+    """
+    count = len(latencies_ms)
+    issued = count + errors
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / issued, 4) if issued else 0.0,
+        "throughput_rps": round(count / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+        "max_ms": round(max(latencies_ms), 2) if latencies_ms else 0.0,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def write_json(path: str, payload: Dict) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    return path
+
+
+def save_result(name: str, payload: Dict) -> str:
+    """
+    Writes a run into results/ stamped with the current commit and time.
+    """
+    payload = dict(payload)
+    payload.setdefault("commit", git_revision())
+    payload.setdefault("recorded_at", datetime.now(timezone.utc).isoformat())
+    return write_json(os.path.join(RESULTS_DIR, f"{name}.json"), payload)
+
+
+def save_baseline(name: str, payload: Dict) -> str:
+    payload = dict(payload)
+    payload.setdefault("commit", git_revision())
+    payload.setdefault("recorded_at", datetime.now(timezone.utc).isoformat())
+    return write_json(os.path.join(BASELINE_DIR, f"{name}.json"), payload)
+
+
+def load_baseline(name: str) -> Optional[Dict]:
+    path = os.path.join(BASELINE_DIR, f"{name}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+# Metrics where a larger number is an improvement; everything else is "lower is better".
+HIGHER_IS_BETTER = {"throughput_rps"}
+
+# Metrics flagged on any rise, since a clean baseline sits at zero and has no relative change.
+ANY_RISE_REGRESSES = {"error_rate"}
+
+
+def compare_metrics(current: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[Dict]:
+    """
+    Compares {group: {metric: value}} mappings and returns one row per shared metric.
+    A row is flagged as a regression when it is worse than baseline by more than `tolerance`
+    (a fraction, e.g. 0.1 for 10%), or for ANY_RISE_REGRESSES metrics when it is above baseline.
+    """
+    rows = []
+    for group, metrics in current.items():
+        base_metrics = baseline.get(group)
+        if not isinstance(base_metrics, dict):
+            continue
+        for metric, value in metrics.items():
+            base_value = base_metrics.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(base_value, (int, float)):
+                continue
+            if metric in ("requests", "errors"):
+                continue
+            if base_value == 0:
+                change = 0.0
+            else:
+                change = (value - base_value) / base_value
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            if metric in ANY_RISE_REGRESSES:
+                regression = value > base_value
+            else:
+                regression = worse > tolerance
+            rows.append({
+                "group": group,
+                "metric": metric,
+                "baseline": base_value,
+                "current": value,
+                "change_pct": round(change * 100, 1),
+                "regression": regression,
+            })
+    return rows
+
+
+def format_comparison(rows: List[Dict]) -> str:
+    lines = [f"{'group':<24}{'metric':<16}{'baseline':>12}{'current':>12}{'change':>10}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['group']:<24}{row['metric']:<16}{row['baseline']:>12}{row['current']:>12}"
+            f"{row['change_pct']:>9}%{flag}"
+        )
+    return "\n".join(lines)
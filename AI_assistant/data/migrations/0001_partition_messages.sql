@@ -0,0 +1,55 @@
+-- Range-partition "messages" by month on "timestamp".
+-- Primary keys on a partitioned table must include the partition key, so the key becomes
+-- (id, "timestamp") and the self-referencing "response_to" foreign key is dropped
+-- ("response_to" stays as a plain column).
+
+ALTER TABLE "messages" RENAME TO "messages_unpartitioned";
+
+CREATE TABLE "messages" (
+  LIKE "messages_unpartitioned" INCLUDING DEFAULTS,
+  PRIMARY KEY ("id", "timestamp")
+) PARTITION BY RANGE ("timestamp");
+
+-- Catches rows outside every monthly partition (e.g. clock skew); should stay empty.
+CREATE TABLE "messages_default" PARTITION OF "messages" DEFAULT;
+
+-- Creates the monthly partitions messages_yYYYYmMM from `from_month` up to `months_ahead`
+-- months past the current one. Idempotent; run by the archival job to keep partitions ahead.
+CREATE OR REPLACE FUNCTION ensure_message_partitions(from_month date, months_ahead int DEFAULT 3)
+RETURNS int AS $$
+DECLARE
+  month_start date := date_trunc('month', from_month)::date;
+  last_month date := (date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead))::date;
+  created int := 0;
+  partition_name text;
+BEGIN
+  WHILE month_start <= last_month LOOP
+    partition_name := format('messages_y%sm%s', to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+    IF to_regclass(partition_name) IS NULL THEN
+      EXECUTE format(
+        'CREATE TABLE %I PARTITION OF "messages" FOR VALUES FROM (%L) TO (%L)',
+        partition_name, month_start, (month_start + interval '1 month')::date
+      );
+      created := created + 1;
+    END IF;
+    month_start := (month_start + interval '1 month')::date;
+  END LOOP;
+  RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+UPDATE "messages_unpartitioned" SET "timestamp" = CURRENT_TIMESTAMP WHERE "timestamp" IS NULL;
+
+SELECT ensure_message_partitions(COALESCE((SELECT min("timestamp") FROM "messages_unpartitioned"), CURRENT_TIMESTAMP)::date);
+
+INSERT INTO "messages" SELECT * FROM "messages_unpartitioned";
+
+DROP TABLE "messages_unpartitioned";
+
+-- Every history read filters by session and orders by time.
+CREATE INDEX "messages_session_id_timestamp_idx" ON "messages" ("session_id", "timestamp" DESC);
+
+ALTER TABLE "messages" ADD FOREIGN KEY ("session_id") REFERENCES "chat_sessions" ("id");
+
+COMMENT ON COLUMN "messages"."sender" IS 'ENUM: user, assistant, system';
+COMMENT ON COLUMN "messages"."response_to" IS 'Refers to the message this is responding to (not enforced: messages is partitioned)';
@@ -0,0 +1,22 @@
+-- Cold storage for the messages of ended or idle sessions, filled by app/jobs/archive_messages.py.
+-- Not partitioned: it is read by session through the (session_id, timestamp) index below. History
+-- reads of a session with archived_at set merge its rows here with any the session wrote to
+-- "messages" after it was resumed (see app/crud/history.py); other sessions skip this table.
+
+CREATE TABLE "messages_archive" (
+  LIKE "messages" INCLUDING DEFAULTS,
+  "archived_at" timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY ("id")
+);
+
+-- Message bodies are the bulk of the data; lz4 TOAST compression needs PostgreSQL 14+.
+ALTER TABLE "messages_archive" ALTER COLUMN "message" SET COMPRESSION lz4;
+
+ALTER TABLE "messages_archive" ADD FOREIGN KEY ("session_id") REFERENCES "chat_sessions" ("id");
+
+CREATE INDEX "messages_archive_session_id_timestamp_idx" ON "messages_archive" ("session_id", "timestamp" DESC);
+
+ALTER TABLE "chat_sessions" ADD COLUMN "archived_at" timestamp;
+
+-- The archival job looks for ended sessions that are not archived yet.
+CREATE INDEX "chat_sessions_ended_at_idx" ON "chat_sessions" ("ended_at") WHERE "archived_at" IS NULL;
@@ -0,0 +1,14 @@
+-- Structured AI responses. AI messages keep the parsed JSON in "payload" and leave "message"
+-- NULL; the text is rendered when a route or the summarizer reads it. User messages and
+-- edited messages still carry text in "message", which takes precedence over the payload.
+
+ALTER TABLE "messages" ADD COLUMN "payload" jsonb;
+ALTER TABLE "messages" ALTER COLUMN "message" DROP NOT NULL;
+ALTER TABLE "messages" ADD CONSTRAINT "messages_message_or_payload"
+  CHECK ("message" IS NOT NULL OR "payload" IS NOT NULL);
+
+ALTER TABLE "messages_archive" ADD COLUMN "payload" jsonb;
+ALTER TABLE "messages_archive" ALTER COLUMN "message" DROP NOT NULL;
+ALTER TABLE "messages_archive" ADD CONSTRAINT "messages_archive_message_or_payload"
+  CHECK ("message" IS NOT NULL OR "payload" IS NOT NULL);
+ALTER TABLE "messages_archive" ALTER COLUMN "payload" SET COMPRESSION lz4;
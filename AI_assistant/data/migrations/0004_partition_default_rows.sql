@@ -0,0 +1,42 @@
+-- ensure_message_partitions used to fail as soon as "messages_default" held a row for the month
+-- it was creating: Postgres refuses to attach a partition whose range the default partition
+-- already has rows for. It now moves those rows out of the default partition into a stash,
+-- creates the month's partition and re-inserts them, all in the caller's transaction.
+
+CREATE OR REPLACE FUNCTION ensure_message_partitions(from_month date, months_ahead int DEFAULT 3)
+RETURNS int AS $$
+DECLARE
+  month_start date := date_trunc('month', from_month)::date;
+  last_month date := (date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead))::date;
+  next_month date;
+  created int := 0;
+  partition_name text;
+BEGIN
+  WHILE month_start <= last_month LOOP
+    partition_name := format('messages_y%sm%s', to_char(month_start, 'YYYY'), to_char(month_start, 'MM'));
+    next_month := (month_start + interval '1 month')::date;
+    IF to_regclass(partition_name) IS NULL THEN
+      IF EXISTS (SELECT 1 FROM "messages_default" WHERE "timestamp" >= month_start AND "timestamp" < next_month) THEN
+        CREATE TEMP TABLE IF NOT EXISTS "messages_default_stash" (LIKE "messages") ON COMMIT DROP;
+        WITH moved AS (
+          DELETE FROM "messages_default" WHERE "timestamp" >= month_start AND "timestamp" < next_month RETURNING *
+        )
+        INSERT INTO "messages_default_stash" SELECT * FROM moved;
+        RAISE NOTICE 'Moving % rows from messages_default into %',
+          (SELECT count(*) FROM "messages_default_stash"), partition_name;
+      END IF;
+      EXECUTE format(
+        'CREATE TABLE %I PARTITION OF "messages" FOR VALUES FROM (%L) TO (%L)',
+        partition_name, month_start, next_month
+      );
+      IF to_regclass('pg_temp.messages_default_stash') IS NOT NULL THEN
+        INSERT INTO "messages" SELECT * FROM "messages_default_stash";
+        TRUNCATE "messages_default_stash";
+      END IF;
+      created := created + 1;
+    END IF;
+    month_start := next_month;
+  END LOOP;
+  RETURN created;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,21 @@
+-- History reads bound "messages" below by chat_sessions.started_at, so Postgres can prune the
+-- partitions older than the session (app/crud/history.py). A row older than its session (bulk
+-- import, clock skew) would be hidden by that bound, so writing one moves started_at back to it.
+
+CREATE OR REPLACE FUNCTION lower_session_started_at() RETURNS trigger AS $$
+BEGIN
+  UPDATE "chat_sessions" SET "started_at" = NEW."timestamp"
+  WHERE "id" = NEW."session_id" AND ("started_at" IS NULL OR "started_at" > NEW."timestamp");
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS "messages_lower_session_started_at" ON "messages";
+CREATE TRIGGER "messages_lower_session_started_at"
+AFTER INSERT OR UPDATE OF "timestamp" ON "messages"
+FOR EACH ROW EXECUTE FUNCTION lower_session_started_at();
+
+-- Rows written before the trigger existed.
+UPDATE "chat_sessions" AS s SET "started_at" = m."first_at"
+FROM (SELECT "session_id", min("timestamp") AS "first_at" FROM "messages" GROUP BY "session_id") AS m
+WHERE s."id" = m."session_id" AND (s."started_at" IS NULL OR s."started_at" > m."first_at");
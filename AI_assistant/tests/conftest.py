@@ -0,0 +1,68 @@
+import asyncio
+import os
+import uuid
+from typing import Awaitable, Callable, Dict, List, TypeVar
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.seed_data import seed
+
+T = TypeVar("T")
+
+
+def pytest_addoption(parser):
+    parser.addoption("--microbench", action="store_true", help="run the microbenchmark regression gate (same as MICROBENCH=1)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "microbench: wall-clock regression gate, run with --microbench or MICROBENCH=1")
+    if config.getoption("--microbench"):
+        os.environ["MICROBENCH"] = "1"
+
+
+class SeededDatabase:
+    """A seeded SQLite database: its URL, an engine on it and the ids seed() created."""
+
+    def __init__(self, url: str, engine: AsyncEngine, seeded: Dict):
+        self.url = url
+        self.engine = engine
+        self.seeded = seeded
+        self.user_ids: List[uuid.UUID] = [uuid.UUID(u) for u in seeded["users"]]
+        self.session_ids: List[uuid.UUID] = [uuid.UUID(s) for s in seeded["sessions"]]
+        self._sessions = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    def session(self) -> AsyncSession:
+        return self._sessions()
+
+
+@pytest.fixture
+def seeded_db(tmp_path) -> Callable[..., T]:
+    """
+    Seeds a fresh SQLite database with benchmarks.seed_data and runs `body(database)` on it
+    in its own event loop, disposing the engine afterwards:
+
+        result = seeded_db(body, users=1, sessions=2, messages=6, seed_value=5)
+    """
+    def run(
+        body: Callable[[SeededDatabase], Awaitable[T]],
+        users: int = 1,
+        sessions: int = 1,
+        messages: int = 0,
+        seed_value: int = 0,
+        name: str = "seeded.db",
+    ) -> T:
+        url = f"sqlite+aiosqlite:///{tmp_path / name}"
+
+        async def main():
+            seeded = await seed(url, users=users, sessions=sessions, messages=messages, create_schema=True, seed_value=seed_value)
+            engine = create_async_engine(url)
+            try:
+                return await body(SeededDatabase(url, engine, seeded))
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
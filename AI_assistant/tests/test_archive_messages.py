@@ -0,0 +1,110 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select, update
+
+from app.crud import history, message as message_crud
+from app.jobs.archive_messages import partition_name, run_archival
+from app.models.chat_session import ChatSession
+from app.models.message import Message, MessageArchive
+
+
+def test_partition_name_crosses_year_boundaries():
+    assert partition_name(datetime(2026, 2, 3), months_back=2) == "messages_y2025m12"
+    assert partition_name(datetime(2026, 10, 19)) == "messages_y2026m10"
+
+
+def test_ended_sessions_move_to_the_archive_and_stay_readable(seeded_db):
+    async def run(database):
+        ended, active = database.session_ids
+        engine = database.engine
+        async with engine.begin() as conn:
+            await conn.execute(
+                update(ChatSession).where(ChatSession.id == ended).values(ended_at=datetime.now(timezone.utc) - timedelta(days=10))
+            )
+
+        summary = await run_archival(database.url, batch_size=10)
+        async with engine.begin() as conn:
+            started_at = (await conn.execute(select(ChatSession.started_at).where(ChatSession.id == ended))).scalar_one()
+            await conn.execute(insert(Message), [
+                # the session is resumed after archival, and a row predates started_at (import, clock skew)
+                {"id": uuid.uuid4(), "session_id": ended, "sender": "user", "message": "resumed",
+                 "timestamp": datetime.now(timezone.utc)},
+                {"id": uuid.uuid4(), "session_id": ended, "sender": "user", "message": "early",
+                 "timestamp": started_at - timedelta(days=1)},
+            ])
+        async with database.session() as db:
+            hot = (await db.execute(select(Message.session_id, func.count()).group_by(Message.session_id))).all()
+            archived = (await db.execute(select(func.count()).select_from(MessageArchive))).scalar_one()
+            archived_at = (await db.execute(select(ChatSession.archived_at).where(ChatSession.id == ended))).scalar_one()
+            turns = await history.get_recent_turns(db, ended, 4)
+            everything = await history.get_all_turns(db, ended)
+            count = await history.count_messages(db, ended)
+            active_count = await history.count_messages(db, active)
+        return summary, dict(hot), active, archived, archived_at, turns, everything, count, active_count
+
+    summary, hot, active, archived, archived_at, turns, everything, count, active_count = seeded_db(
+        run, sessions=2, messages=6, seed_value=5
+    )
+    assert summary["sessions"] == 1 and summary["messages"] == 6
+    assert hot[active] == 6 and hot[next(k for k in hot if k != active)] == 2
+    assert archived == 6 and archived_at is not None
+    # hot and archived rows are merged, and nothing is hidden by started_at
+    assert len(turns) == 4 and turns[-1].message == "resumed"
+    assert [t.message for t in everything][::7] == ["early", "resumed"] and count == len(everything) == 8
+    assert active_count == 6
+
+
+def test_resumed_session_is_archived_again_once_quiet(seeded_db):
+    async def run(database):
+        ended = database.session_ids[0]
+        engine = database.engine
+        long_ago = datetime.now(timezone.utc) - timedelta(days=10)
+        async with engine.begin() as conn:
+            await conn.execute(update(ChatSession).where(ChatSession.id == ended).values(ended_at=long_ago))
+        first = await run_archival(database.url, batch_size=10)
+
+        resumed = uuid.uuid4()
+        async with engine.begin() as conn:
+            await conn.execute(insert(Message), [{
+                "id": resumed, "session_id": ended, "sender": "user", "message": "resumed",
+                "timestamp": datetime.now(timezone.utc),
+            }])
+        while_active = await run_archival(database.url, batch_size=10)
+        async with engine.begin() as conn:
+            await conn.execute(update(Message).where(Message.id == resumed).values(timestamp=long_ago + timedelta(days=1)))
+        once_quiet = await run_archival(database.url, batch_size=10)
+
+        async with database.session() as db:
+            hot = (await db.execute(select(func.count()).select_from(Message))).scalar_one()
+            archived = (await db.execute(select(func.count()).select_from(MessageArchive))).scalar_one()
+            everything = await history.get_all_turns(db, ended)
+        return first, while_active, once_quiet, hot, archived, everything
+
+    first, while_active, once_quiet, hot, archived, everything = seeded_db(run, messages=4, seed_value=5)
+    assert (first["messages"], while_active["sessions"], once_quiet["messages"]) == (4, 0, 1)
+    assert hot == 0 and archived == 5 and "resumed" in [t.message for t in everything]
+
+
+def test_archived_messages_can_be_fetched_edited_and_deleted_by_id(seeded_db):
+    async def run(database):
+        ended = database.session_ids[0]
+        async with database.engine.begin() as conn:
+            await conn.execute(
+                update(ChatSession).where(ChatSession.id == ended).values(ended_at=datetime.now(timezone.utc) - timedelta(days=10))
+            )
+        await run_archival(database.url, batch_size=10)
+
+        async with database.session() as db:
+            first, second = [row.id for row in await history.get_session_messages(db, ended)][:2]
+            fetched = await message_crud.get_message(db, first)
+            edited = await message_crud.update_message(db, first, {"message": "edited"})
+            deleted = await message_crud.delete_message(db, second)
+            missing = await message_crud.get_message(db, second), await message_crud.delete_message(db, uuid.uuid4())
+            listed = [row.message for row in await history.get_session_messages(db, ended)]
+        return fetched, edited, deleted, missing, listed
+
+    fetched, edited, deleted, missing, listed = seeded_db(run, messages=4, seed_value=5)
+    assert isinstance(fetched, MessageArchive) and edited.message == "edited"
+    assert deleted and missing == (None, False)
+    assert len(listed) == 3 and listed[0] == "edited"
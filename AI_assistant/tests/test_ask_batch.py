@@ -0,0 +1,118 @@
+import asyncio
+import contextlib
+import json
+import uuid
+
+import pytest
+
+from app.langgraph.nodes import detect_intent_node
+
+DELAYS = {"slow": 0.15, "medium": 0.08, "fast": 0.01, "boom": 0.04}
+
+
+class FakeIntentDetector:
+    def __init__(self, *args, fail_retrieval: bool = False, **kwargs):
+        self.fail_retrieval = fail_retrieval
+
+    async def aretrieve_batch(self, queries, k: int = 3):
+        if self.fail_retrieval:
+            raise RuntimeError("embedding backend down")
+        return [[] for _ in queries]
+
+    async def aclassify(self, state, docs):
+        return {**state, "intent": "recommendation"}
+
+
+class FlowStub:
+    def __init__(self):
+        self.running = self.peak = 0
+
+    async def __call__(self, intent_state, db):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(DELAYS[intent_state["user_query"]])
+            if intent_state["user_query"] == "boom":
+                raise RuntimeError("flow failed")
+            return {"answer": intent_state["user_query"]}
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def batch_app(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'batch.db'}")
+    # Keep the import from building the real vectorstore and LLM.
+    monkeypatch.setattr(detect_intent_node, "DetectIntentNode", FakeIntentDetector)
+    from fastapi import FastAPI
+    from app import routes
+
+    flow = FlowStub()
+    monkeypatch.setattr(routes, "intent_detector", FakeIntentDetector())
+    monkeypatch.setattr(routes, "run_intent_flow", flow)
+    monkeypatch.setattr(routes, "AsyncSessionLocal", contextlib.nullcontext)
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/chat")
+    return app, routes, flow
+
+
+def _items(*queries):
+    return [{"chat_session_id": str(uuid.uuid4()), "user_query": query} for query in queries]
+
+
+def _post(app, body):
+    import httpx
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.post("/chat/ask/batch", json=body)
+
+    return asyncio.run(run())
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_batch_over_the_item_limit_is_rejected(batch_app, monkeypatch):
+    app, routes, flow = batch_app
+    monkeypatch.setattr(routes, "ASK_BATCH_MAX_ITEMS", 2)
+    response = _post(app, {"items": _items("fast", "fast", "fast")})
+    assert response.status_code == 413
+    assert flow.peak == 0
+
+
+def test_one_line_per_item_in_completion_order_and_failures_stay_local(batch_app):
+    app, routes, flow = batch_app
+    items = _items("slow", "boom", "fast", "medium")
+    response = _post(app, {"items": items})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = _lines(response)
+    assert [line["index"] for line in lines] == [2, 1, 3, 0]
+    assert [line["chat_session_id"] for line in lines] == [items[i]["chat_session_id"] for i in (2, 1, 3, 0)]
+    by_index = {line["index"]: line for line in lines}
+    assert by_index[1] == {"index": 1, "chat_session_id": items[1]["chat_session_id"], "status": "error", "error": "flow failed"}
+    assert [by_index[i]["status"] for i in (0, 2, 3)] == ["ok"] * 3
+    assert by_index[0]["response"] == {"answer": "slow"}
+
+
+def test_max_concurrency_is_clamped_to_the_server_limit(batch_app, monkeypatch):
+    app, routes, flow = batch_app
+    monkeypatch.setattr(routes, "ASK_BATCH_CONCURRENCY", 2)
+    response = _post(app, {"items": _items(*["fast"] * 6), "max_concurrency": 50})
+    assert [line["status"] for line in _lines(response)] == ["ok"] * 6
+    assert flow.peak == 2
+
+
+def test_failed_batched_retrieval_streams_an_error_for_every_item(batch_app, monkeypatch):
+    app, routes, flow = batch_app
+    monkeypatch.setattr(routes, "intent_detector", FakeIntentDetector(fail_retrieval=True))
+    items = _items("fast", "slow", "boom")
+    lines = _lines(_post(app, {"items": items}))
+    assert lines == [
+        {"index": i, "chat_session_id": item["chat_session_id"], "status": "error", "error": "embedding backend down"}
+        for i, item in enumerate(items)
+    ]
+    assert flow.peak == 0
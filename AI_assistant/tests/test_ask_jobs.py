@@ -0,0 +1,171 @@
+import asyncio
+
+import pytest
+
+from app.utils.ask_jobs import AskJobStore, AskJobWorkers, JobQueueFull, RedisAskJobStore
+
+REQUEST = {"chat_session_id": "4c1f3b1e-0000-0000-0000-000000000001", "user_query": "Veg food near me?"}
+
+
+def test_long_poll_returns_as_soon_as_the_job_finishes():
+    async def run():
+        store = AskJobStore(ttl=60)
+        job = await store.submit(REQUEST)
+        assert (await store.wait(job["job_id"], 0))["status"] == "queued"
+
+        async def work():
+            claimed = await store.claim(timeout=1)
+            assert claimed["status"] == "running" and claimed["request"] == REQUEST
+            await asyncio.sleep(0.05)
+            await store.finish(claimed["job_id"], response={"title": "Vaishali"})
+
+        worker = asyncio.create_task(work())
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        finished = await store.wait(job["job_id"], timeout=5)
+        await worker
+        return finished, loop.time() - started
+
+    finished, waited = asyncio.run(run())
+    assert finished["status"] == "done" and finished["response"] == {"title": "Vaishali"}
+    assert waited < 1
+
+
+def test_jobs_expire_and_the_queue_is_bounded():
+    async def run():
+        store = AskJobStore(ttl=0.05, max_queued=1)
+        job = await store.submit(REQUEST)
+        with pytest.raises(JobQueueFull):
+            await store.submit(REQUEST)
+        await asyncio.sleep(0.1)
+        return await store.get(job["job_id"]), await store.claim(timeout=0.01)
+
+    expired, claimed = asyncio.run(run())
+    assert expired is None and claimed is None
+
+
+def test_workers_bound_concurrency_and_record_failures():
+    running = []
+    peak = []
+
+    async def handler(request):
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.05)
+        running.pop()
+        if request["user_query"] == "boom":
+            raise RuntimeError("graph failed")
+        return {"echo": request["user_query"]}
+
+    async def run():
+        store = AskJobStore(ttl=60)
+        workers = AskJobWorkers(store, handler, concurrency=2)
+        workers.start()
+        jobs = [await store.submit({"user_query": q}) for q in ("a", "b", "c", "boom")]
+        try:
+            return [await store.wait(job["job_id"], timeout=5) for job in jobs]
+        finally:
+            await workers.close()
+
+    results = asyncio.run(run())
+    assert [r["status"] for r in results] == ["done", "done", "done", "failed"]
+    assert results[0]["response"] == {"echo": "a"} and results[3]["error"] == "graph failed"
+    assert max(peak) == 2
+
+
+def test_redis_store_round_trip():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def run():
+        store = RedisAskJobStore(client=fakeredis.FakeAsyncRedis(decode_responses=True), ttl=60, max_queued=5, poll_interval=0.01)
+        job = await store.submit(REQUEST)
+        claimed = await store.claim(timeout=1)
+        waiter = asyncio.create_task(store.wait(job["job_id"], timeout=2))
+        await store.finish(claimed["job_id"], error="ollama down")
+        ttl = await store.redis.ttl(f"ask_job:{job['job_id']}")
+        return claimed, await waiter, ttl, await store.queued()
+
+    claimed, finished, ttl, queued = asyncio.run(run())
+    assert claimed["status"] == "running"
+    assert finished["status"] == "failed" and finished["error"] == "ollama down"
+    assert 0 < ttl <= 60 and queued == 0
+
+
+def test_redis_job_of_a_dead_worker_is_reclaimed_then_failed():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def run():
+        store = RedisAskJobStore(client=fakeredis.FakeAsyncRedis(decode_responses=True), ttl=60, lease=0.05, max_attempts=2)
+        job = await store.submit(REQUEST)
+        first = await store.claim(timeout=1)  # this worker "crashes": no heartbeat, no finish
+        await asyncio.sleep(0.1)
+        second = await store.claim(timeout=1)  # the sweep puts it back first
+        renewed = await store.heartbeat(second["job_id"])
+        await asyncio.sleep(0.1)
+        requeued = await store.requeue_expired()
+        return first, second, renewed, requeued, await store.get(job["job_id"]), await store.redis.llen(store.RUNNING_KEY)
+
+    first, second, renewed, requeued, final, running = asyncio.run(run())
+    assert first["attempts"] == 1 and second["job_id"] == first["job_id"] and second["attempts"] == 2
+    assert renewed and requeued == 0 and running == 0
+    assert final["status"] == "failed" and final["error"] == "worker lost 2 times"
+
+
+def test_redis_job_moved_but_never_leased_is_requeued_after_a_lease():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def run():
+        store = RedisAskJobStore(client=fakeredis.FakeAsyncRedis(decode_responses=True), ttl=60, lease=0.05)
+        job = await store.submit(REQUEST)
+        # A worker dies between BLMOVE and setting the lease.
+        await store.redis.lmove(store.QUEUE_KEY, store.RUNNING_KEY, "RIGHT", "LEFT")
+        just_moved = await store.requeue_expired()
+        await asyncio.sleep(0.1)
+        stranded = await store.requeue_expired()
+        claimed = await store.claim(timeout=1)
+        unleased = await store.redis.hlen(store.UNLEASED_KEY)
+        return job, just_moved, stranded, claimed, unleased
+
+    job, just_moved, stranded, claimed, unleased = asyncio.run(run())
+    assert just_moved == 0 and stranded == 1
+    assert claimed["job_id"] == job["job_id"] and claimed["attempts"] == 1 and unleased == 0
+
+
+def test_redis_job_cancelled_with_its_worker_is_claimed_again():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def run():
+        store = RedisAskJobStore(client=fakeredis.FakeAsyncRedis(decode_responses=True), ttl=60)
+        started = asyncio.Event()
+
+        async def slow(request):
+            started.set()
+            await asyncio.sleep(10)
+
+        job = await store.submit(REQUEST)
+        workers = AskJobWorkers(store, slow, concurrency=1)
+        running = asyncio.ensure_future(workers.run_job(await store.claim(timeout=1)))
+        await started.wait()
+        running.cancel()  # the worker shuts down mid-handler
+        await asyncio.gather(running, return_exceptions=True)
+        released = await store.get(job["job_id"])
+        lease = await store.redis.exists(store._lease_key(job["job_id"]))
+        again = await store.claim(timeout=1)
+        return job, released, lease, again
+
+    job, released, lease, again = asyncio.run(run())
+    assert released["status"] == "queued" and released["error"] is None and not lease
+    assert again["job_id"] == job["job_id"] and again["attempts"] == 2
+
+
+def test_finished_events_expire_with_the_job():
+    async def run():
+        store = AskJobStore(ttl=0.05)
+        job = await store.submit(REQUEST)
+        await store.wait(job["job_id"], timeout=0.01)  # a long-poll on a job nobody runs
+        held = job["job_id"] in store._finished
+        await asyncio.sleep(0.1)
+        return held, job["job_id"] in store._finished
+
+    held, still_held = asyncio.run(run())
+    assert held and not still_held
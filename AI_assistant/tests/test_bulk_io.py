@@ -0,0 +1,93 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.base import Base
+from app.jobs.bulk_conversations import export_to_dir, import_from_dir
+from app.models.message import Message
+from app.utils.bulk_io import TABLE_COLUMNS, coerce_row, copy_records, export_table, import_table
+
+
+async def _count(url: str, table) -> int:
+    engine = create_async_engine(url)
+    try:
+        async with engine.connect() as conn:
+            return (await conn.execute(select(func.count()).select_from(table))).scalar_one()
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_export_import_round_trip(tmp_path, seeded_db, fmt):
+    target = f"sqlite+aiosqlite:///{tmp_path / 'target.db'}"
+    tricky = {"title": 'Say "hi"', "items": [{"name": "Café, Pune\nnew line"}]}
+
+    async def round_trip(source):
+        async with source.engine.begin() as conn:
+            await conn.execute(insert(Message), [{
+                "id": uuid.uuid4(), "session_id": source.session_ids[0], "sender": "user",
+                "message": 'multi\nline, "quoted"', "payload": tricky, "timestamp": datetime.now(timezone.utc),
+            }])
+
+        exported = await export_to_dir(source.url, str(tmp_path / "dump"), fmt, chunk_rows=7)
+        target_engine = create_async_engine(target)
+        async with target_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await target_engine.dispose()
+        first = await import_from_dir(target, str(tmp_path / "dump"), fmt, chunk_rows=7)
+        again = await import_from_dir(target, str(tmp_path / "dump"), fmt, chunk_rows=7)
+
+        engine = create_async_engine(target)
+        async with engine.connect() as conn:
+            query = select(Message.message, Message.payload).where(Message.message.like("multi%"))
+            copied = (await conn.execute(query)).one()
+        await engine.dispose()
+        return exported, first, again, copied
+
+    exported, first, again, copied = seeded_db(round_trip, users=2, sessions=4, messages=10, seed_value=7, name="source.db")
+    assert [(s["table"], s["rows"]) for s in exported] == [("chat_sessions", 4), ("messages", 41)]
+    assert [(s["rows"], s["inserted"], s["chunks"]) for s in first] == [(4, 4, 1), (41, 41, 6)]
+    assert [(s["inserted"], s["skipped"]) for s in again] == [(0, 4), (0, 41)]
+    assert all(s["rows_per_s"] > 0 for s in first)
+    assert copied == ('multi\nline, "quoted"', tricky)
+    assert asyncio.run(_count(target, Message.__table__)) == 41
+
+
+def test_export_streams_in_chunks_and_rejects_unknown_tables(seeded_db):
+    async def chunks(database):
+        summary = {}
+        pieces = [chunk async for chunk in export_table(database.engine, "messages", "csv", chunk_rows=6, summary=summary)]
+        with pytest.raises(ValueError):
+            await import_table(database.engine, "users", _empty(), "ndjson")
+        return pieces, summary
+
+    pieces, summary = seeded_db(chunks, sessions=2, messages=10, seed_value=1)
+    assert len(pieces) == 4 and summary["rows"] == 20
+    assert pieces[0].startswith(b"id,session_id,sender,message,payload,timestamp,response_to\n")
+    assert not pieces[1].startswith(b"id,")
+
+
+def test_copy_records_carry_naive_utc_timestamps():
+    # data/schema.sql declares these columns "timestamp" without time zone, which asyncpg's COPY
+    # encoder only accepts naive values for.
+    message_id, session_id = uuid.uuid4(), uuid.uuid4()
+    record = {
+        "id": str(message_id), "session_id": str(session_id), "sender": "ai", "message": "",
+        "payload": '{"title": "Thali"}', "timestamp": "2026-10-19T15:30:00+05:30", "response_to": "",
+    }
+    columns = TABLE_COLUMNS["messages"]
+    first, second = copy_records("messages", [coerce_row(columns, record), coerce_row(columns, {**record, "timestamp": "2026-10-19T10:00:00"})])
+
+    assert first == (message_id, session_id, "ai", None, '{"title": "Thali"}', datetime(2026, 10, 19, 10, 0), None)
+    assert second[5] == datetime(2026, 10, 19, 10, 0) and second[5].tzinfo is None
+    session = coerce_row(TABLE_COLUMNS["chat_sessions"], {"started_at": "2026-10-19T10:00:00Z", "ended_at": "2026-10-19T12:00:00-01:00"})
+    assert copy_records("chat_sessions", [session])[0][3:] == (datetime(2026, 10, 19, 10, 0), datetime(2026, 10, 19, 13, 0))
+
+
+async def _empty():
+    return
+    yield
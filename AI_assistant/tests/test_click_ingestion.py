@@ -0,0 +1,190 @@
+import asyncio
+import uuid
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.base import Base
+from app.models.affiliate import Affiliate, AffiliateClick
+from app.utils.click_buffer import AffiliateResolver, ClickBuffer
+from app.utils.metrics import metrics
+
+BOOKING, PUNE_TOURS, TOURS = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+
+
+async def _engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'clicks.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(Affiliate), [
+            {"id": BOOKING, "name": "booking", "partner_url": "https://www.booking.example"},
+            {"id": TOURS, "name": "tours", "partner_url": "https://tours.example/"},
+            {"id": PUNE_TOURS, "name": "pune tours", "partner_url": "http://Tours.example/pune"},
+        ])
+    return engine
+
+
+async def _stored(engine):
+    async with engine.connect() as conn:
+        return (await conn.execute(select(AffiliateClick.destination_url).order_by(AffiliateClick.destination_url))).scalars().all()
+
+
+async def _ids(engine):
+    async with engine.connect() as conn:
+        return (await conn.execute(select(AffiliateClick.id))).scalars().all()
+
+
+def test_resolver_matches_host_and_longest_path_prefix(tmp_path):
+    async def run():
+        engine = await _engine(tmp_path)
+        resolver = AffiliateResolver(engine)
+        try:
+            return [await resolver.resolve(url) for url in (
+                "https://booking.example/hotel/42?ref=x",
+                "https://tours.example/pune/fort-walk",
+                "https://tours.example/punekar",
+                "https://evil.example/?next=https://booking.example",
+            )]
+        finally:
+            await engine.dispose()
+
+    metrics.reset()
+    assert asyncio.run(run()) == [BOOKING, PUNE_TOURS, TOURS, None]
+    assert metrics.counter("affiliates.cache_loads") == 1
+
+
+def test_buffer_flushes_on_size_and_on_interval(tmp_path):
+    async def run():
+        engine = await _engine(tmp_path)
+        buffer = ClickBuffer(engine, flush_max=3, interval=0.1)
+        try:
+            for i in range(3):
+                buffer.record(BOOKING, f"https://booking.example/{i}")
+            await asyncio.sleep(0)  # the size trigger schedules a flush right away
+            await buffer._flush_task
+            by_size = await _stored(engine)
+
+            buffer.start()
+            buffer.record(TOURS, "https://tours.example/late")
+            before_interval = await _stored(engine)
+            await asyncio.sleep(0.25)
+            by_interval = await _stored(engine)
+            await buffer.close()
+            return by_size, before_interval, by_interval
+        finally:
+            await engine.dispose()
+
+    by_size, before_interval, by_interval = asyncio.run(run())
+    assert by_size == [f"https://booking.example/{i}" for i in range(3)]
+    assert len(before_interval) == 3 and by_interval[-1] == "https://tours.example/late"
+
+
+def test_failed_flush_keeps_clicks_and_close_writes_them(tmp_path):
+    async def run():
+        engine = await _engine(tmp_path)
+        broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'clicks.db'}")
+        buffer = ClickBuffer(broken, flush_max=100, max_buffered=4)
+        try:
+            for i in range(5):
+                buffer.record(BOOKING, f"https://booking.example/{i}")
+            assert await buffer.flush() == 0 and len(buffer) == 4
+            buffer.engine = engine
+            await buffer.close()
+            return await _stored(engine)
+        finally:
+            await broken.dispose()
+            await engine.dispose()
+
+    metrics.reset()
+    assert asyncio.run(run()) == [f"https://booking.example/{i}" for i in range(1, 5)]
+    assert metrics.counter("clicks.dropped") == 1 and metrics.counter("clicks.flush_errors") == 1
+
+
+def test_outage_keeps_every_batch_buffered(tmp_path):
+    async def run():
+        engine = await _engine(tmp_path)
+        broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'clicks.db'}")
+        buffer = ClickBuffer(broken, flush_max=2, max_buffered=100)
+        try:
+            for i in range(6):
+                buffer.record(BOOKING, f"https://booking.example/{i}")
+            await asyncio.sleep(0)
+            await buffer._flush_task  # the size trigger's flush fails too
+            held = [len(buffer)]
+            for _ in range(2):
+                assert await buffer.flush() == 0
+                held.append(len(buffer))
+            buffer.engine = engine
+            assert await buffer.flush() == 6
+            return held, await _stored(engine)
+        finally:
+            await broken.dispose()
+            await engine.dispose()
+
+    metrics.reset()
+    held, stored = asyncio.run(run())
+    assert held == [6, 6, 6] and metrics.counter("clicks.dropped") == 0
+    assert stored == [f"https://booking.example/{i}" for i in range(6)]
+
+
+def test_rejected_batch_is_dead_lettered_without_blocking_later_clicks(tmp_path):
+    async def run():
+        engine = await _engine(tmp_path)
+        buffer = ClickBuffer(engine, flush_max=1, max_attempts=3)
+        try:
+            buffer.record(BOOKING, "https://booking.example/first")
+            await buffer._flush_task
+            first_id = (await _ids(engine))[0]
+            buffer.record(BOOKING, "https://booking.example/poison")
+            buffer._events[0]["id"] = first_id  # duplicate primary key: never insertable
+            await buffer._flush_task
+            held = [len(buffer)]
+            for name in ("second", "third"):
+                buffer.record(BOOKING, f"https://booking.example/{name}")
+                await buffer._flush_task
+                held.append(len(buffer))
+            return held, buffer.dead_letters, await _stored(engine)
+        finally:
+            await engine.dispose()
+
+    metrics.reset()
+    held, dead_letters, stored = asyncio.run(run())
+    assert held == [1, 1, 0]  # retried alongside later clicks, then dead-lettered
+    assert [e["destination_url"] for e in dead_letters] == ["https://booking.example/poison"]
+    assert stored == [f"https://booking.example/{n}" for n in ("first", "second", "third")]
+    assert metrics.counter("clicks.dead_lettered") == 1 and metrics.counter("clicks.flush_errors") == 3
+
+
+UNSAFE_URLS = (
+    "https://evil.example\\@booking.example/deals",  # browsers go to evil.example
+    "javascript://booking.example/%0aalert(1)",
+    "booking.example/deals",  # would be a relative redirect
+    "https://user@booking.example/deals",
+)
+
+
+def test_unsafe_urls_are_not_resolved_or_redirected(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'clicks.db'}")
+    import httpx
+    from fastapi import FastAPI
+    from app import click_routes
+
+    async def run():
+        engine = await _engine(tmp_path)
+        monkeypatch.setattr(click_routes, "affiliate_resolver", AffiliateResolver(engine))
+        monkeypatch.setattr(click_routes, "click_buffer", ClickBuffer(engine))
+        app = FastAPI()
+        app.include_router(click_routes.click_router, prefix="/affiliate")
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                unsafe = [(await client.get("/affiliate/click", params={"url": url})).status_code for url in UNSAFE_URLS]
+                ok = await client.get("/affiliate/click", params={"url": "HTTPS://www.Booking.example/hotel 42?ref=x#top"})
+            resolved = [await click_routes.affiliate_resolver.resolve(url) for url in UNSAFE_URLS]
+            return unsafe, ok, resolved, list(click_routes.click_buffer._events)
+        finally:
+            await engine.dispose()
+
+    unsafe, ok, resolved, events = asyncio.run(run())
+    assert unsafe == [404] * len(UNSAFE_URLS) and resolved == [None] * len(UNSAFE_URLS)
+    assert ok.status_code == 307 and ok.headers["location"] == "https://www.booking.example/hotel%2042?ref=x"
+    assert [e["destination_url"] for e in events] == ["https://www.booking.example/hotel%2042?ref=x"]
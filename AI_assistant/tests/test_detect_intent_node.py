@@ -0,0 +1,50 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from langchain_core.language_models.fake import FakeListLLM
+
+from app.langgraph.nodes.detect_intent_node import DetectIntentNode
+from app.schemas.state import ChatFlowState
+from app.utils.embedding_executor import EmbeddingBatchExecutor
+
+KB_PATH = "data/intents_knowledge_base.json"
+
+
+@pytest.fixture
+def detector():
+    pytest.importorskip("faiss")
+    from langchain_community.embeddings import DeterministicFakeEmbedding
+    from langchain_community.vectorstores import FAISS
+
+    with open(KB_PATH, "r") as f:
+        kb = json.load(f)
+
+    node = DetectIntentNode.__new__(DetectIntentNode)
+    node.kb_path = KB_PATH
+    node.vectorstore = FAISS.from_documents(DetectIntentNode._build_documents(kb), DeterministicFakeEmbedding(size=64))
+    node.executor = EmbeddingBatchExecutor(node.vectorstore, max_wait_ms=1)
+    node.llm = FakeListLLM(responses=["Recommendation, Food"])
+    return node
+
+
+def test_retrieve_batch_returns_docs_per_query(detector):
+    queries = ["Find best restaurants near me", "Weather in Tokyo next week", "Plan a 5-day trip to Japan"]
+    retrieved = asyncio.run(detector.aretrieve_batch(queries, k=2))
+    assert len(retrieved) == 3
+    assert all(len(docs) == 2 for docs in retrieved)
+
+
+def test_ainvoke_parses_intent(detector):
+    state = ChatFlowState(session_id=uuid.uuid4(), user_query="Find best restaurants near me")
+    state = asyncio.run(detector.ainvoke(state))
+    assert (state["intent"], state["sub_intent"]) == ("recommendation", "food")
+
+
+def test_several_sub_intents_are_kept_in_order(detector):
+    detector.llm = FakeListLLM(responses=["recommendation, food and activities, Food & local gems, attractions"])
+    state = ChatFlowState(session_id=uuid.uuid4(), user_query="Food and things to do in Goa")
+    state = asyncio.run(detector.ainvoke(state))
+    assert state["intent"] == "recommendation" and state["sub_intent"] == "food"
+    assert state["sub_intents"] == ["food", "activities", "local gems"]
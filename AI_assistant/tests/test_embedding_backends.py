@@ -0,0 +1,33 @@
+import importlib.util
+
+import pytest
+
+from app.utils.embedding_backends import get_embeddings
+from benchmarks.embedding_backends import agreement, intent_decisions, labelled_examples
+from benchmarks.microbench import load_kb
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        get_embeddings("tensorflow")
+
+
+def test_intent_decisions_cover_every_kb_example():
+    pytest.importorskip("faiss")
+    from langchain_community.embeddings import DeterministicFakeEmbedding
+
+    kb = load_kb()
+    result = intent_decisions(DeterministicFakeEmbedding(size=32), kb)
+    assert len(result["decisions"]) == len(labelled_examples(kb))
+    assert agreement(result, result)["top1_agreement"] == 1.0
+
+
+@pytest.mark.skipif(
+    not all(importlib.util.find_spec(m) for m in ("sentence_transformers", "optimum", "onnxruntime")),
+    reason="needs sentence-transformers[onnx] and the model weights",
+)
+def test_onnx_int8_keeps_intent_decisions():
+    kb = load_kb()
+    reference = intent_decisions(get_embeddings("torch"), kb)
+    candidate = intent_decisions(get_embeddings("onnx-int8"), kb)
+    assert agreement(reference, candidate)["top1_changed"] == []
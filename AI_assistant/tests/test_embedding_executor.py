@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import pytest
+
+from app.langgraph.nodes.detect_intent_node import DetectIntentNode
+from app.utils.embedding_executor import EmbeddingBatchExecutor
+
+KB_PATH = "data/intents_knowledge_base.json"
+
+
+@pytest.fixture
+def vectorstore():
+    pytest.importorskip("faiss")
+    from langchain_community.embeddings import DeterministicFakeEmbedding
+    from langchain_community.vectorstores import FAISS
+
+    class CountingEmbedding(DeterministicFakeEmbedding):
+        calls: int = 0
+
+        def embed_documents(self, texts):
+            self.calls += 1
+            return super().embed_documents(texts)
+
+    with open(KB_PATH, "r") as f:
+        kb = json.load(f)
+    return FAISS.from_documents(DetectIntentNode._build_documents(kb), CountingEmbedding(size=64))
+
+
+def test_concurrent_searches_are_micro_batched(vectorstore):
+    queries = [f"things to do in city {i}" for i in range(20)]
+    executor = EmbeddingBatchExecutor(vectorstore, max_batch_size=8, max_wait_ms=20, pool_size=1)
+    vectorstore.embeddings.calls = 0
+
+    async def run():
+        try:
+            return await executor.search_many(queries, k=2)
+        finally:
+            await executor.close()
+
+    results = asyncio.run(run())
+
+    assert executor.queries == 20
+    assert executor.batches == vectorstore.embeddings.calls
+    assert executor.batches <= 4
+    for query, docs in zip(queries, results):
+        expected = vectorstore.similarity_search(query, k=2)
+        assert [d.page_content for d in docs] == [d.page_content for d in expected]
+
+
+def test_search_errors_reach_every_caller(vectorstore):
+    executor = EmbeddingBatchExecutor(vectorstore, max_batch_size=4, max_wait_ms=5)
+
+    def broken(texts):
+        raise RuntimeError("encoder down")
+    vectorstore.embeddings.__dict__["embed_documents"] = broken
+
+    async def run():
+        try:
+            return await asyncio.gather(executor.search("a"), executor.search("b"), return_exceptions=True)
+        finally:
+            await executor.close()
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+
+
+def test_batch_that_cannot_be_dispatched_fails_its_callers(vectorstore):
+    executor = EmbeddingBatchExecutor(vectorstore, max_batch_size=4, max_wait_ms=5)
+    executor._pool.shutdown()  # run_in_executor now raises inside the collector
+
+    async def run():
+        try:
+            failed = await asyncio.wait_for(
+                asyncio.gather(executor.search("a"), executor.search("b"), return_exceptions=True), timeout=2
+            )
+            late = await asyncio.wait_for(asyncio.gather(executor.search("c"), return_exceptions=True), timeout=2)
+            return failed + late
+        finally:
+            await executor.close()
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
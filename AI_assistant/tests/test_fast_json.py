@@ -0,0 +1,71 @@
+import asyncio
+import random
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.crud.chat_session import get_all_chat_sessions, stream_chat_session_rows
+from app.crud.history import get_session_messages, stream_session_messages
+from app.schemas.chat_session import ChatSessionOut, chat_session_out_dict
+from app.schemas.message import MessageOut, message_out_dict
+from app.utils.fast_json import json_list_response, json_list_stream_response
+from benchmarks.serialization import message_rows
+
+
+def _body(response) -> bytes:
+    if not hasattr(response, "body_iterator"):
+        return response.body
+
+    async def drain():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(drain())
+
+
+def _pydantic_body(model, rows) -> bytes:
+    adapter = TypeAdapter(List[model])
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def test_message_list_matches_response_model_output_buffered_and_streamed():
+    rows = message_rows(7, random.Random(3))
+    expected = _pydantic_body(MessageOut, rows)
+
+    buffered = json_list_response(rows, message_out_dict)
+    streamed = json_list_response(rows, message_out_dict, stream_min_items=0, chunk_items=3)
+    assert not hasattr(buffered, "body_iterator") and hasattr(streamed, "body_iterator")
+    assert _body(buffered) == _body(streamed) == expected
+    assert _body(json_list_response([], message_out_dict, stream_min_items=0)) == b"[]"
+
+
+def test_chat_session_rows_match_response_model_output(seeded_db):
+    async def run(database):
+        async with database.session() as db:
+            sessions = await get_all_chat_sessions(db, limit=4, offset=1)
+            chunks = stream_chat_session_rows(db, limit=4, offset=1, chunk_rows=3)
+            response = await json_list_stream_response(chunks, chat_session_out_dict, stream_min_items=2)
+            body = b"".join([piece async for piece in response.body_iterator])
+        return sessions, response, body
+
+    sessions, response, body = seeded_db(run, users=2, sessions=6, seed_value=9)
+    assert len(sessions) == 4 and hasattr(response, "body_iterator")
+    assert body == _pydantic_body(ChatSessionOut, sessions)
+
+
+def test_lists_read_in_chunks_are_streamed_once_long_enough(seeded_db):
+    async def run(database):
+        session_id = database.session_ids[0]
+        async with database.session() as db:
+            rows = await get_session_messages(db, session_id)
+            chunks = [len(chunk) async for chunk in stream_session_messages(db, session_id, chunk_rows=4)]
+            streamed = await json_list_stream_response(stream_session_messages(db, session_id, 4), message_out_dict, stream_min_items=5)
+            body = b"".join([piece async for piece in streamed.body_iterator])
+            short = await json_list_stream_response(stream_session_messages(db, session_id, 4), message_out_dict, stream_min_items=11)
+            sessions = await json_list_stream_response(stream_chat_session_rows(db, limit=4, offset=1, chunk_rows=3), chat_session_out_dict)
+            all_sessions = await get_all_chat_sessions(db, limit=4, offset=1)
+        return rows, chunks, streamed, body, short, sessions, all_sessions
+
+    rows, chunks, streamed, body, short, sessions, all_sessions = seeded_db(run, sessions=6, messages=10, seed_value=9)
+    assert chunks == [4, 4, 2]
+    assert hasattr(streamed, "body_iterator") and body == _pydantic_body(MessageOut, rows)
+    assert not hasattr(short, "body_iterator") and short.body == body
+    assert not hasattr(sessions, "body_iterator") and sessions.body == _pydantic_body(ChatSessionOut, all_sessions)
@@ -0,0 +1,30 @@
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.crud import history
+from app.schemas.message import MessageOut
+
+
+def test_recent_turns_are_the_latest_in_chronological_order(seeded_db):
+    async def read(database):
+        async with database.session() as db:
+            session_id = database.session_ids[0]
+            return await history.get_recent_turns(db, session_id, 4), await history.get_all_turns(db, session_id)
+
+    recent, everything = seeded_db(read, sessions=2, messages=12, seed_value=7)
+    assert len(everything) == 12
+    assert recent == everything[-4:]
+    assert [turn.sender for turn in recent] == ["user", "ai", "user", "ai"]
+
+
+def test_session_messages_keep_the_route_response_shape(seeded_db):
+    async def read(database):
+        async with database.session() as db:
+            session_id = database.session_ids[0]
+            return await history.get_session_messages(db, session_id), await history.count_messages(db, session_id)
+
+    rows, count = seeded_db(read, sessions=2, messages=6, seed_value=7)
+    out = TypeAdapter(List[MessageOut]).validate_python(rows, from_attributes=True)
+    assert count == len(out) == 6
+    assert out[1].response_to == out[0].id
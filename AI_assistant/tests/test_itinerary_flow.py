@@ -0,0 +1,114 @@
+import asyncio
+import json
+import time
+import uuid
+
+from sqlalchemy import select
+
+from app.langgraph.flows.itinerary_graph import build_itinerary_graph
+from app.langgraph.nodes.itinerary import itinerary_nodes
+from app.models.trip import Itinerary, Trip
+from app.schemas.state import flow_config
+from app.utils.load_intent_object import load_intent_object
+from app.utils.session_gate import SessionGate
+
+DAY_DELAY_S = 0.2
+
+
+class FakeLLM:
+    """Outline call answers at once; each day call takes DAY_DELAY_S."""
+
+    def __init__(self):
+        self.day_calls = []
+
+    async def ainvoke(self, prompt):
+        query = prompt[-1].content
+        if "Plan Day" not in query:
+            return json.dumps({
+                "title": "5-Day Trip to Goa", "destination": "Goa, India", "start_date": "2025-12-01",
+                "days": [{"day": n, "theme": f"Theme {n}", "area": f"Area {n}"} for n in range(1, 6)],
+            })
+        day = int(query.split("Plan Day ")[1].split(":")[0])
+        self.day_calls.append(day)
+        await asyncio.sleep(DAY_DELAY_S)
+        if day == 4 and self.day_calls.count(4) == 1:
+            return "not json at all"  # retried once
+        activities = [f"Morning: Sight {day}", "Evening: Sunset at Baga"]
+        return json.dumps({"day": day, "activities": activities})
+
+
+def test_days_are_planned_concurrently_merged_and_saved(seeded_db, monkeypatch):
+    fake = FakeLLM()
+    monkeypatch.setattr(itinerary_nodes, "llm", fake)
+    monkeypatch.setattr(itinerary_nodes, "safe_json_parse", lambda text: json.loads(text) if text.startswith("{") else {})
+
+    async def run(database):
+        async with database.session() as db:
+            state = {
+                "session_id": database.session_ids[0], "user_query": "Plan a 5-day trip to Goa",
+                "intent": "planning", "sub_intent": "itinerary", "user_location": "Pune, India",
+                "intent_object": load_intent_object("planning", "data/intents_knowledge_base.json"),
+            }
+            started = time.perf_counter()
+            final = await build_itinerary_graph().ainvoke(state, config=flow_config(db))
+            elapsed = time.perf_counter() - started
+            trip = (await db.execute(select(Trip))).scalar_one()
+            days = (await db.execute(select(Itinerary.day, Itinerary.activities).order_by(Itinerary.day))).all()
+        return final["response"], elapsed, trip, days
+
+    response, elapsed, trip, days = seeded_db(run, messages=2, seed_value=3)
+    # Five days of DAY_DELAY_S each, plus day 4's retry: about two delays in parallel, five in series.
+    assert elapsed < 3.5 * DAY_DELAY_S
+    assert sorted(fake.day_calls) == [1, 2, 3, 4, 4, 5]
+    assert [d["day"] for d in response["days"]] == [f"Day {n}" for n in range(1, 6)]
+    assert response["days"][0]["activities"] == ["Morning: Sight 1", "Evening: Sunset at Baga"]
+    assert response["days"][3]["activities"] == ["Morning: Sight 4"]  # the repeated sunset is dropped
+    assert "incomplete_days" not in response and response["trip_id"] == str(trip.id)
+    assert (trip.destination, str(trip.start_date), str(trip.end_date)) == ("Goa, India", "2025-12-01", "2025-12-05")
+    assert [day for day, _ in days] == [1, 2, 3, 4, 5] and days[2][1] == ["Morning: Sight 3"]
+
+
+def test_outline_falls_back_to_the_requested_length():
+    state = {"user_query": "Budget-friendly 3 nights in Hampi", "user_location": "Pune, India"}
+    skeleton = itinerary_nodes.normalise_skeleton({"days": "none", "start_date": "soon"}, state)
+    assert [d["day"] for d in skeleton["days"]] == [1, 2, 3, 4]
+    assert skeleton["start_date"] is None and skeleton["title"] == "4-Day Trip"
+    assert skeleton["destination"] == "" and skeleton["days"][0]["theme"] == "Day 1"  # not the user's own city
+    assert itinerary_nodes.requested_days("Itinerary for Rome weekend") == 2
+    assert itinerary_nodes.requested_days("Plan a trip to Rome") == itinerary_nodes.ITINERARY_DEFAULT_DAYS
+    assert itinerary_nodes.requested_days("Plan a 40 day trip") == itinerary_nodes.ITINERARY_MAX_DAYS
+
+
+def test_outline_is_trimmed_or_padded_to_the_stated_length():
+    outline = {"destination": "Goa, India", "days": [{"theme": f"Theme {n}"} for n in range(1, 7)]}
+    trimmed = itinerary_nodes.normalise_skeleton(outline, {"user_query": "Plan a 5-day trip to Goa"})
+    padded = itinerary_nodes.normalise_skeleton(outline, {"user_query": "A week in Goa, 8 days"})
+    unstated = itinerary_nodes.normalise_skeleton(outline, {"user_query": "Plan a trip to Goa"})
+    assert [d["theme"] for d in trimmed["days"]] == [f"Theme {n}" for n in range(1, 6)]
+    assert [d["day"] for d in padded["days"]] == list(range(1, 9)) and padded["days"][7]["theme"] == "Day 8 in Goa, India"
+    assert len(unstated["days"]) == 6
+
+
+def test_a_newer_query_does_not_cancel_a_trip_being_saved(monkeypatch):
+    saved = []
+
+    async def create_trip_with_days(db, user_id, title, *rest):
+        await asyncio.sleep(0.05)
+        saved.append(title)
+        return uuid.uuid4()
+
+    monkeypatch.setattr(itinerary_nodes, "create_trip_with_days", create_trip_with_days)
+    state = {
+        "session_id": uuid.uuid4(), "user_id": uuid.uuid4(), "response": {"days": [{"activities": []}]},
+        "trip_plan": {"title": "1-Day Trip", "destination": "", "start_date": None},
+    }
+
+    async def run():
+        gate = SessionGate(policy="supersede")
+        saving = asyncio.create_task(gate.run("s", "plan", lambda: itinerary_nodes.save_itinerary_node(state, flow_config(None))))
+        await asyncio.sleep(0.01)
+        newer = await gate.run("s", "newer", lambda: asyncio.sleep(0, "newer"))
+        return await saving, newer
+
+    saved_state, newer = asyncio.run(run())
+    assert saved == ["1-Day Trip"] and "trip_id" in saved_state["response"] and newer == "newer"
@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.fake_ollama import FakeOllamaConfig, FakeOllamaServer, parse_distribution
+from benchmarks.stats import compare_metrics, percentile, summarize_latencies
+
+
+def test_percentile_interpolates():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == pytest.approx(50.5)
+    assert percentile(values, 99) == pytest.approx(99.01)
+    assert percentile([], 95) == 0.0
+
+
+def test_compare_flags_latency_and_throughput_regressions():
+    baseline = {"ask": {"p95_ms": 100.0, "throughput_rps": 50.0}}
+    current = {"ask": {"p95_ms": 125.0, "throughput_rps": 49.0}}
+    rows = {row["metric"]: row for row in compare_metrics(current, baseline, tolerance=0.1)}
+    assert rows["p95_ms"]["regression"]
+    assert not rows["throughput_rps"]["regression"]
+
+
+def test_rising_error_rate_is_a_regression_even_from_a_clean_baseline():
+    baseline = {"ask": summarize_latencies([100.0] * 10, elapsed_s=1.0)}
+    current = {"ask": summarize_latencies([90.0] * 9, elapsed_s=1.0, errors=1)}
+    assert current["ask"]["error_rate"] == 0.1
+    rows = {row["metric"]: row for row in compare_metrics(current, baseline, tolerance=0.5)}
+    assert rows["error_rate"]["regression"]
+    assert not rows["p95_ms"]["regression"]
+    assert not any(row["regression"] for row in compare_metrics(baseline, baseline, tolerance=0.5))
+
+
+def test_latency_distribution_specs():
+    import random
+    rng = random.Random(0)
+    assert parse_distribution("fixed:0.25", rng)() == 0.25
+    assert 0.1 <= parse_distribution("uniform:0.1,0.2", rng)() <= 0.2
+    with pytest.raises(ValueError):
+        parse_distribution("poisson:1", rng)
+
+
+def test_fake_ollama_serves_canned_replies_to_langchain():
+    from langchain_ollama import OllamaLLM
+
+    with FakeOllamaServer(FakeOllamaConfig(token_rate=0)) as server:
+        llm = OllamaLLM(model="llama3.2", base_url=server.url)
+
+        intent = llm.invoke("You are a helpful assistant that classifies user travel queries.")
+        assert intent.strip() == "recommendation,food"
+
+        reply = asyncio.run(llm.ainvoke("Find best restaurants near me"))
+        assert json.loads(reply)["items"]
+
+        assert server.stats.as_dict()["requests"] == 2
+
+
+def test_seed_data_on_sqlite_stand_in(seeded_db):
+    pytest.importorskip("aiosqlite")
+
+    async def summary_of(database):
+        return database.seeded
+
+    summary = seeded_db(summary_of, users=2, sessions=3, messages=4, seed_value=1)
+    assert len(summary["sessions"]) == 3
+    assert summary["messages_per_session"] == 4
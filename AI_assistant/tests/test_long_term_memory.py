@@ -0,0 +1,134 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from app.langgraph.nodes import save_to_db_node as save_module
+from app.langgraph.nodes.memory import long_term_memory as ltm
+from app.langgraph.nodes.memory.session_cache import SessionCache
+from app.schemas.state import ChatFlowState, flow_config
+from benchmarks.long_term_memory import KeywordEmbedding, run
+
+pytest.importorskip("faiss")
+
+
+def test_recall_on_labelled_fixture_and_bounded_context():
+    result = asyncio.run(run("keyword", k=4, history_sizes=[0, 2000], min_score=0.35))
+    assert result["recall_at_k"] >= 0.9
+    for row in result["context"].values():
+        assert 0 < row["context_chars"] <= ltm.LONG_TERM_MEMORY_MAX_CHARS
+
+
+def test_format_recollections_respects_the_budget():
+    found = [(ltm.Exchange(uuid.uuid4(), uuid.uuid4(), None, "q" * 50, "a" * 50), 0.9)] * 10
+    text = ltm.format_recollections(found, max_chars=300)
+    assert len(text) <= 300 and text.count("\n") == 1
+    assert len(ltm.format_recollections(found[:1], max_chars=20)) == 20
+
+
+def test_recalls_earlier_sessions_and_indexes_new_exchanges(seeded_db, monkeypatch):
+    memory = ltm.FaissLongTermMemory(embeddings=KeywordEmbedding, min_score=0.3, build_wait=5)
+    monkeypatch.setattr(ltm, "long_term_memory", memory)
+    monkeypatch.setattr(save_module, "long_term_memory", memory)
+    monkeypatch.setattr(save_module, "session_cache", SessionCache())
+
+    async def run_flow(database):
+        memory._sessions = database.session
+        earlier, current = database.session_ids
+        try:
+            async with database.session() as db:
+                config = flow_config(db)
+
+                async def ask(session_id, query, response):
+                    state = ChatFlowState(session_id=session_id, user_query=query)
+                    state.update(await ltm.long_term_memory_node(state, config), response=response)
+                    await save_module.save_to_db_node(state, config)
+                    return state["long_term_memory"]
+
+                await ask(earlier, "Vegetarian thali in Pune", {"title": "Thali", "items": [{"name": "Shabree"}]})
+                await ask(earlier, "Sunset cruise in Goa", {"title": "Cruises", "items": [{"name": "Santa Monica"}]})
+                recalled = await ask(current, "Which vegetarian thali place in Pune?", {"title": "Thali again"})
+                # The shard is resident now, so this exchange is indexed as it is saved...
+                followup = await ask(current, "Any thali place in Pune besides that one?", {"title": "More thali"})
+                # ...but questions already in the short-term window are not quoted again.
+                window = [HumanMessage(content="Which vegetarian thali place in Pune?")]
+                state = ChatFlowState(session_id=current, user_query="thali Pune", chat_memory=window)
+                windowed = (await ltm.long_term_memory_node(state, config))["long_term_memory"]
+        finally:
+            await memory.close()
+        return recalled, followup, windowed
+
+    recalled, followup, windowed = seeded_db(run_flow, sessions=2, seed_value=3)
+    assert "Vegetarian thali in Pune" in recalled and "Shabree" in recalled and "Goa" not in recalled
+    assert "Which vegetarian thali place in Pune?" in followup
+    assert "Which vegetarian thali place in Pune?" not in windowed and "Any thali place" in windowed
+
+
+def test_cold_shard_is_built_in_the_background_and_forgotten_on_delete(seeded_db, monkeypatch):
+    built = []
+
+    class SlowKeywordEmbedding(KeywordEmbedding):
+        def embed_documents(self, texts):
+            built.append(len(texts))
+            time.sleep(0.2)
+            return super().embed_documents(texts)
+
+    async def body(database):
+        memory = ltm.FaissLongTermMemory(
+            embeddings=SlowKeywordEmbedding, min_score=0, max_exchanges=3, build_wait=0.01, sessions=database.session,
+        )
+        user_id = database.user_ids[0]
+        try:
+            started = time.perf_counter()
+            cold = await memory.search(user_id, "food")
+            waited = time.perf_counter() - started
+            await memory._building[user_id]
+            warm = await memory.search(user_id, "food", k=10)
+            memory.forget_user(user_id)
+            forgotten = memory.shards.get(user_id)
+            await memory.search(user_id, "food")  # starts a rebuild...
+            memory.forget_user(user_id)  # ...which a deletion cancels
+            async with database.session() as db:
+                newest = await ltm.get_user_exchanges(db, user_id, 3)
+                everything = await ltm.get_user_exchanges(db, user_id, 1000)
+            indexed = sorted(e.id for e, _ in warm)
+            return cold, waited, indexed, forgotten, memory._building, newest, everything
+        finally:
+            await memory.close()
+
+    cold, waited, indexed, forgotten, building, newest, everything = seeded_db(body, sessions=2, messages=12, seed_value=3)
+    assert cold == [] and waited < 0.15
+    assert len(everything) > 3 and newest == everything[-3:]
+    assert built[0] == 3 and indexed == sorted(e.id for e in newest)  # only the newest max_exchanges were embedded
+    assert forgotten is None and building == {}
+
+
+def test_cancelled_build_leaves_the_next_build_registered(seeded_db):
+    async def body(database):
+        memory = ltm.FaissLongTermMemory(embeddings=KeywordEmbedding, min_score=0, build_wait=0, sessions=database.session)
+        starts = []
+        load = memory._load_shard
+
+        async def counted(user_id):
+            starts.append(user_id)
+            return await load(user_id)
+
+        memory._load_shard = counted
+        user_id = database.user_ids[0]
+        try:
+            await memory.search(user_id, "food")  # starts a build...
+            memory.forget_user(user_id)  # ...which a deletion cancels
+            await memory.search(user_id, "food")  # starts the next build
+            await memory.search(user_id, "food")  # joins it
+            saved = ltm.Exchange(uuid.uuid4(), database.session_ids[0], None, "Saved mid-build question", "Noted")
+            await memory.add(user_id, saved)
+            await memory._building[user_id]
+            found = await memory.search(user_id, "Saved mid-build question", k=50)
+            return len(starts), [exchange.question for exchange, _ in found]
+        finally:
+            await memory.close()
+
+    builds, questions = seeded_db(body, messages=6, seed_value=3)
+    assert builds == 2 and "Saved mid-build question" in questions
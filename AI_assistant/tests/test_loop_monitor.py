@@ -0,0 +1,80 @@
+import asyncio
+import time
+from typing import TypedDict
+
+import pytest
+from langgraph.graph import END, StateGraph
+
+from app.utils.loop_monitor import LoopMonitor
+from app.utils.metrics import metrics
+from benchmarks.load_driver import loop_blocks
+
+
+class _State(TypedDict, total=False):
+    step: str
+
+
+def _encode_synchronously():
+    time.sleep(0.25)  # stands in for a sync encode/search on the loop
+
+
+async def _blocking_node(state: _State) -> dict:
+    _encode_synchronously()
+    return {"step": "blocking"}
+
+
+async def _awaiting_node(state: _State) -> dict:
+    await asyncio.sleep(0.2)
+    return {"step": "awaiting"}
+
+
+def test_flags_the_blocking_graph_node_with_its_stack():
+    graph = StateGraph(_State)
+    graph.add_node("awaiting", _awaiting_node)
+    graph.add_node("blocking", _blocking_node)
+    graph.set_entry_point("awaiting")
+    graph.add_edge("awaiting", "blocking")
+    graph.add_edge("blocking", END)
+    flow = graph.compile()
+    original_run = asyncio.events.Handle._run
+
+    async def run():
+        monitor = LoopMonitor(threshold_ms=100, probe_ms=20)
+        monitor.start()
+        try:
+            await flow.ainvoke({})
+        finally:
+            await monitor.close()
+        return monitor
+
+    metrics.reset()
+    monitor = asyncio.run(run())
+    assert [(r.node, r.duration_ms >= 250) for r in monitor.reports] == [("blocking", True)]
+    stack = monitor.reports[0].stack
+    assert "_encode_synchronously" in stack and "base_events.py" not in stack
+    counters = metrics.snapshot()["counters"]
+    assert counters["event_loop.blocked"] == 1 and counters["event_loop.blocked.blocking"] == 1
+    assert metrics.snapshot()["histograms"]["event_loop.lag_ms"]["max"] >= 200
+    assert asyncio.events.Handle._run is original_run
+
+
+def test_load_driver_reports_blocks_between_snapshots():
+    before = {"counters": {"event_loop.blocked": 2, "event_loop.blocked.build_prompt": 2}}
+    after = {
+        "counters": {"event_loop.blocked": 5, "event_loop.blocked.build_prompt": 3, "event_loop.blocked.none": 2},
+        "histograms": {"event_loop.lag_ms": {"p99": 120.0}},
+    }
+    assert loop_blocks(before, after) == {
+        "blocked": 3, "by_node": {"build_prompt": 1, "none": 2}, "lag_ms": {"p99": 120.0},
+    }
+
+
+def test_refuses_loops_whose_callbacks_it_cannot_time(monkeypatch):
+    class UvloopLike:  # uvloop's Loop is not an asyncio.BaseEventLoop
+        pass
+
+    monkeypatch.setattr(asyncio, "get_running_loop", UvloopLike)
+    monitor = LoopMonitor()
+    with pytest.raises(RuntimeError, match="--loop asyncio"):
+        monitor.start()
+    assert not monitor.running
@@ -0,0 +1,58 @@
+from sqlalchemy import select
+
+from app.crud.history import get_recent_turns, get_session_messages
+from app.langgraph.nodes import save_to_db_node as save_module
+from app.langgraph.nodes.memory.session_cache import InMemorySessionCache
+from app.models.message import Message
+from app.schemas.message import MessageOut
+from app.schemas.state import ChatFlowState, flow_config
+from app.utils.compact_response import compact_response
+from app.utils.format_json_as_text import format_json_as_text
+
+RESPONSE = {
+    "title": "Top Recommendations for food in Pune, India",
+    "summary": "Here are the most relevant, high-quality suggestions based on your preferences:",
+    "items": [
+        {"name": "Vaishali", "description": "Iconic South Indian breakfasts.", "rating": 4.5, "price_level": "$", "link": "https://..."},
+        {"name": "Shabree", "description": "Maharashtrian thali.", "rating": 4.4},
+    ],
+    "follow_up": "Want to explore similar options or book something now?",
+}
+
+
+def test_compact_response_keeps_titles_names_and_follow_up():
+    assert compact_response(RESPONSE) == (
+        "Top Recommendations for food in Pune, India; items: Vaishali (4.5, $), Shabree (4.4); "
+        "follow_up: Want to explore similar options or book something now?"
+    )
+    assert compact_response({"title": "Plan", "days": [{"day": "Day 1", "activities": ["Fort", "Lunch"]}]}) == \
+        "Plan; days: Day 1 (Fort / Lunch)"
+    assert len(compact_response(RESPONSE, max_chars=40)) == 40
+    assert compact_response({}) == ""
+
+
+def test_ai_response_is_stored_as_payload_and_rendered_on_read(seeded_db, monkeypatch):
+    cache = InMemorySessionCache(max_turns=10)
+    monkeypatch.setattr(save_module, "session_cache", cache)
+
+    async def run(database):
+        session_id = database.session_ids[0]
+        await cache.set_turns(session_id, [])
+        async with database.session() as db:
+            state = ChatFlowState(session_id=session_id, user_query="Veg food near FC Road?", response=RESPONSE)
+            await save_module.save_to_db_node(state, flow_config(db))
+
+            stored = (await db.execute(select(Message).where(Message.sender == "ai"))).scalar_one()
+            turns = await get_recent_turns(db, session_id, 10)
+            listed = [MessageOut.model_validate(row, from_attributes=True) for row in await get_session_messages(db, session_id)]
+        return stored, turns, listed, await cache.get_turns(session_id)
+
+    stored, turns, listed, cached = seeded_db(run, seed_value=5)
+    assert stored.message is None and stored.payload == RESPONSE
+
+    assert [turn.compact() for turn in turns] == ["Veg food near FC Road?", compact_response(RESPONSE)]
+    assert turns[1].text() == format_json_as_text(RESPONSE)
+    assert cached == [("user", "Veg food near FC Road?"), ("ai", compact_response(RESPONSE))]
+
+    ai_out = next(m for m in listed if m.sender == "ai")
+    assert ai_out.message == format_json_as_text(RESPONSE) and ai_out.payload == RESPONSE
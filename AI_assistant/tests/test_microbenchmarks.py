@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from benchmarks.microbench import (
+    BASELINE_NAME, BENCHMARKS, DEFAULT_TOLERANCE, confirmed_regressions, find_regressions, run_benchmarks,
+)
+from benchmarks.stats import load_baseline, save_result
+
+# Wall-clock timings are too noisy to fail every local run, so the gate is opt-in here and runs
+# as its own CI job (.github/workflows/tests.yml: pytest -m microbench --microbench).
+opt_in = pytest.mark.skipif(os.getenv("MICROBENCH") != "1", reason="microbenchmark gate is opt-in: pass --microbench or set MICROBENCH=1")
+
+
+def gated(test):
+    return pytest.mark.microbench(opt_in(test))
+
+
+@pytest.fixture(scope="module")
+def bench_result():
+    result = run_benchmarks()
+    save_result(BASELINE_NAME, result)
+    return result
+
+
+@gated
+@pytest.mark.parametrize("name", list(BENCHMARKS))
+def test_no_regression_against_baseline(name, bench_result):
+    if name in bench_result["skipped"]:
+        pytest.skip(bench_result["skipped"][name])
+
+    baseline = load_baseline(BASELINE_NAME)
+    if not baseline or name not in baseline.get("benchmarks", {}):
+        pytest.skip(f"no stored baseline for {name}")
+
+    current = {"benchmarks": {name: bench_result["benchmarks"][name]}}
+    regressions = confirmed_regressions(current, baseline, DEFAULT_TOLERANCE)
+    assert not regressions, f"{name} regressed beyond {DEFAULT_TOLERANCE:.0%}: {regressions[name]}"
+
+
+def test_find_regressions_uses_relative_cost():
+    baseline = {"benchmarks": {"a": {"relative": 10.0}, "b": {"relative": 4.0}}}
+    result = {"benchmarks": {"a": {"relative": 16.0}, "b": {"relative": 4.4}, "c": {"relative": 1.0}}}
+    assert set(find_regressions(result, baseline, tolerance=0.5)) == {"a"}
@@ -0,0 +1,109 @@
+import asyncio
+import socket
+
+import httpx
+
+from app.utils.metrics import metrics
+from app.utils.ollama_pool import OllamaPool, PooledOllamaLLM, build_ollama_pool
+from benchmarks.fake_ollama import FakeOllamaConfig, FakeOllamaServer
+
+PROMPT = "Find best restaurants near me"
+
+
+def _dead_url() -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def test_build_pool_from_config():
+    assert [b.url for b in build_ollama_pool("").backends] == [None]
+    pool = build_ollama_pool("http://a:11434, http://b:11434,")
+    assert [b.url for b in pool.backends] == ["http://a:11434", "http://b:11434"]
+
+
+def test_concurrent_calls_spread_over_least_loaded_backends():
+    config = FakeOllamaConfig(latency="fixed:0.2", token_rate=0)
+    with FakeOllamaServer(config) as first, FakeOllamaServer(config) as second:
+        pool = OllamaPool([first.url, second.url])
+        llm = PooledOllamaLLM(model="llama3.2", pool=pool)
+
+        async def run():
+            return await asyncio.gather(*[llm.ainvoke(PROMPT) for _ in range(6)])
+
+        assert len(asyncio.run(run())) == 6
+        assert first.stats.requests == 3
+        assert second.stats.requests == 3
+        assert all(b.in_flight == 0 for b in pool.backends)
+
+
+def test_failing_backend_is_retried_elsewhere_and_ejected():
+    metrics.reset()
+    with FakeOllamaServer(FakeOllamaConfig(token_rate=0)) as live:
+        pool = OllamaPool([_dead_url(), live.url], eject_after_failures=2, eject_seconds=60)
+        dead = pool.backends[0]
+        llm = PooledOllamaLLM(model="llama3.2", pool=pool)
+
+        calls = 0
+        while dead.healthy and calls < 50:  # the pick among idle backends is random
+            assert llm.invoke(PROMPT)
+            calls += 1
+        assert asyncio.run(llm.ainvoke(PROMPT))
+
+        assert not dead.healthy
+        assert metrics.counter("ollama.ejections") == 1
+        assert live.stats.requests == calls + 1
+
+        # The health check re-admits the backend once it answers again.
+        dead.url = live.url
+
+        async def check():
+            async with httpx.AsyncClient() as client:
+                await pool.check_health(client)
+
+        asyncio.run(check())
+        assert dead.healthy and dead.consecutive_failures == 0
+
+
+def test_health_check_ejects_only_after_repeated_failures():
+    metrics.reset()
+    with FakeOllamaServer(FakeOllamaConfig(token_rate=0)) as live:
+        pool = OllamaPool([_dead_url(), live.url], eject_after_failures=2, eject_seconds=60)
+        dead = pool.backends[0]
+
+        async def check():
+            async with httpx.AsyncClient() as client:
+                await pool.check_health(client)
+
+        asyncio.run(check())
+        assert dead.healthy and dead.consecutive_failures == 1
+        asyncio.run(check())
+        assert not dead.healthy and metrics.counter("ollama.ejections") == 1
+        assert pool.backends[1].healthy
+
+
+def test_clients_are_built_before_the_first_call():
+    pool = OllamaPool(["http://a:11434", "http://b:11434"])
+    llm = PooledOllamaLLM(model="llama3.2", pool=pool, temperature=0)
+    options = llm._options()
+    assert all(len(b._llms) == 1 for b in pool.backends)
+    assert asyncio.run(pool.backends[0].allm("llama3.2", options)) is pool.backends[0].llm("llama3.2", options)
+
+
+def test_slow_call_is_hedged_to_another_backend():
+    metrics.reset()
+    with FakeOllamaServer(FakeOllamaConfig(latency="fixed:2")) as slow, \
+            FakeOllamaServer(FakeOllamaConfig(token_rate=0)) as fast:
+        pool = OllamaPool([slow.url, fast.url])
+        llm = PooledOllamaLLM(model="llama3.2", pool=pool, hedge=True)
+        llm._latencies.extend([0.05] * 20)
+        pool.backends[1].in_flight = 1  # make the slow backend the least loaded one
+
+        reply = asyncio.run(asyncio.wait_for(llm.ainvoke(PROMPT), timeout=1.5))
+
+        assert reply
+        assert slow.stats.requests == 1 and fast.stats.requests == 1
+        assert metrics.counter("ollama.hedges") == 1
+        assert metrics.counter("ollama.hedge_wins") == 1
+        assert pool.backends[0].in_flight == 0
@@ -0,0 +1,62 @@
+import asyncio
+import json
+import uuid
+
+from langchain_core.messages import HumanMessage, get_buffer_string
+from app.langgraph.nodes.prompt.prompt_node import prompt_node
+from app.schemas.state import ChatFlowState
+from app.utils.ollama_pool import OllamaPool, PooledOllamaLLM
+from benchmarks.fake_ollama import FakeOllamaConfig, FakeOllamaServer
+
+with open("data/intents_knowledge_base.json") as f:
+    RECOMMENDATION = next(i for i in json.load(f)["intents"] if i["intent"] == "recommendation")
+
+
+def _prompt(**overrides) -> str:
+    values = dict(
+        session_id=uuid.uuid4(),
+        user_query="Find romantic vegetarian restaurants near me",
+        intent="recommendation",
+        sub_intent="food",
+        intent_object=RECOMMENDATION,
+        user_location="Pune, India",
+        current_time="2025-06-22 12:30 PM",
+        chat_history_summary="- User is planning a romantic weekend",
+    )
+    values.update(overrides)
+    update = asyncio.run(prompt_node(ChatFlowState(**values)))
+    return get_buffer_string(update["prompt"])
+
+
+def test_static_prefix_is_identical_across_requests():
+    first = _prompt()
+    second = _prompt(
+        sub_intent="attractions", user_location="Goa, India", current_time="2025-06-23 09:00 AM",
+        chat_memory=[HumanMessage(content="hi")], realtime_info="- Weather: 31°C", user_preferences="diet: vegan",
+    )
+
+    context = first.index("📌 Context:")
+    assert first[:context] == second[:context]
+    assert "OUTPUT STRUCTURE" in first[:context]
+    for value in ("Pune, India", "2025-06-22 12:30 PM", "romantic weekend"):
+        assert value not in first[:context] and value in first[context:]
+    assert "Sub-intent: attractions" in second[context:]
+    assert second.rstrip().endswith("User Query: Find romantic vegetarian restaurants near me")
+
+
+def test_fake_ollama_reuses_the_shared_prefix():
+    config = FakeOllamaConfig(token_rate=0, prefix_cache_slots=1)
+    with FakeOllamaServer(config) as server:
+        llm = PooledOllamaLLM(model="llama3.2", pool=OllamaPool([server.url]))
+        llm.invoke(_prompt())
+        llm.invoke(_prompt(user_location="Goa, India"))
+
+        stats = server.stats.as_dict()
+        prefix_tokens = len(_prompt().split("📌 Context:")[0]) // 4
+        assert stats["prompt_tokens_cached"] >= prefix_tokens
+
+        # keep_alive=0 unloads the model, so nothing is reused afterwards.
+        PooledOllamaLLM(model="llama3.2", pool=OllamaPool([server.url]), keep_alive="0").invoke(_prompt())
+        cached = server.stats.as_dict()["prompt_tokens_cached"]
+        llm.invoke(_prompt())
+        assert server.stats.as_dict()["prompt_tokens_cached"] == cached
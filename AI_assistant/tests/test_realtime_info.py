@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import pytest
+
+from app.langgraph.nodes.realtime.providers import (
+    RealtimeInfoFetcher, RealtimeProvider, StubRealtimeProvider, build_realtime_fetcher,
+)
+
+
+class FailingProvider(RealtimeProvider):
+    name = "failing"
+
+    async def fetch(self, location, sub_intent):
+        raise ConnectionError("upstream down")
+
+
+class SlowStub(StubRealtimeProvider):
+    name = "slow"
+
+
+def test_results_are_cached_per_location_and_sub_intent():
+    stub = StubRealtimeProvider()
+    fetcher = RealtimeInfoFetcher([stub], deadline_s=1)
+
+    async def run():
+        first = await fetcher.fetch("Goa, India", "food")
+        second = await fetcher.fetch("Goa, India", "food")
+        other = await fetcher.fetch("Goa, India", "attractions")
+        return first, second, other
+
+    first, second, other = asyncio.run(run())
+    assert first == second and "Goa, India" in first
+    assert first != other
+    assert stub.calls == 2
+
+
+def test_late_and_failing_providers_are_dropped_without_waiting():
+    slow = SlowStub(delay_s=0.2)
+    fetcher = RealtimeInfoFetcher([StubRealtimeProvider(), slow, FailingProvider()], deadline_s=0.05)
+
+    async def run():
+        started = time.perf_counter()
+        info = await fetcher.fetch("Pune, India", "food")
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0.3)  # the late provider finishes in the background
+        return info, elapsed, await fetcher.fetch("Pune, India", "food")
+
+    info, elapsed, later = asyncio.run(run())
+    assert elapsed < 0.15
+    assert info.count("\n") == 0
+    assert later.count("\n") == 1
+    assert slow.calls == 1
+
+
+def test_unknown_provider_is_rejected():
+    assert build_realtime_fetcher("").providers == []
+    with pytest.raises(ValueError):
+        build_realtime_fetcher("stub,weather-api")
+
+
+def test_recommendation_graph_loads_context_before_the_prompt():
+    from app.langgraph.flows.recommendation_graph import build_recommendation_graph
+
+    graph = build_recommendation_graph().get_graph()
+    edges = {(edge.source, edge.target) for edge in graph.edges}
+    assert ("summarize_history", "load_user_preferences") in edges
+    assert ("load_user_preferences", "fetch_realtime_info") in edges
+    assert ("fetch_realtime_info", "load_warm_recommendations") in edges
+    assert ("load_warm_recommendations", "build_prompt") in edges
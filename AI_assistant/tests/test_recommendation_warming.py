@@ -0,0 +1,114 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from langchain_core.messages import AIMessage
+from sqlalchemy import insert
+
+from app.jobs import warm_recommendations as job
+from app.langgraph.nodes import generate_response_node as generate_module
+from app.langgraph.nodes import warm_recommendations_node as warm_module
+from app.langgraph.nodes.prompt.prompt_node import prompt_node
+from app.models.message import Message
+from app.utils.recommendation_store import InMemoryRecommendationStore, new_entry
+
+with open(job.INTENT_KB_PATH) as f:
+    INTENTS = json.load(f)["intents"]
+RECOMMENDATION = next(i for i in INTENTS if i["intent"] == "recommendation")
+
+
+def _answer(session_id, title, days_ago=0):
+    return {
+        "id": uuid.uuid4(), "session_id": session_id, "sender": "ai", "message": None,
+        "payload": {"title": title, "items": []},
+        "timestamp": datetime.now(timezone.utc) - timedelta(days=days_ago),
+    }
+
+
+def test_popular_pairs_are_mined_from_answer_titles(seeded_db):
+    async def mine(database):
+        # 2 sessions x 3 answers titled "Top Recommendations for food in Pune, India"
+        session_id = database.session_ids[0]
+        async with database.engine.begin() as conn:
+            await conn.execute(insert(Message), [
+                _answer(session_id, "Top Recommendations for attractions in Goa, India"),
+                _answer(session_id, "Top Recommendations for Attractions in goa,  india"),
+                _answer(session_id, "Top Recommendations for attractions in Goa, India"),
+                _answer(session_id, "Top Recommendations for attractions in Goa, India", days_ago=30),
+                _answer(session_id, "Top Recommendations for food in Mumbai"),
+                _answer(session_id, "Top Recommendations for pizza in Pune, India"),
+                _answer(session_id, "Your itinerary Plan"),
+            ])
+        since = datetime.now(timezone.utc) - timedelta(days=14)
+        return await job.popular_pairs(database.engine, INTENTS, since, top=10, min_requests=2)
+
+    pairs = seeded_db(mine, sessions=2, messages=6, seed_value=5)
+    assert pairs == [
+        job.PopularPair("recommendation", "food", "Pune, India", 6),
+        job.PopularPair("recommendation", "attractions", "Goa, India", 3),
+    ]
+    assert job.title_pattern(next(i for i in INTENTS if i["intent"] == "planning")) is None
+
+
+def test_warm_pairs_skips_fresh_entries():
+    store = InMemoryRecommendationStore()
+    pairs = [job.PopularPair("recommendation", "food", "Pune, India", 6)]
+    generated = []
+
+    async def generate(pair, intent_object):
+        generated.append(pair)
+        return {"title": f"Top Recommendations for {pair.sub_intent} in {pair.location}", "items": [{"name": "Vaishali"}]}
+
+    async def warm_twice():
+        first = await job.warm_pairs(store, pairs, INTENTS, generate)
+        second = await job.warm_pairs(store, pairs, INTENTS, generate)
+        forced = await job.warm_pairs(store, pairs, INTENTS, generate, refresh_after_s=0)
+        return first, second, forced, await store.get("recommendation", "FOOD", " pune,  india ")
+
+    first, second, forced, entry = asyncio.run(warm_twice())
+    assert (first["warmed"], second["fresh"], forced["warmed"]) == (1, 1, 1)
+    assert len(generated) == 2
+    assert entry["response"]["items"] == [{"name": "Vaishali"}] and entry["requests"] == 6
+    assert job.in_window(3, "1-6") and not job.in_window(6, "1-6")
+    assert job.in_window(23, "22-5") and job.in_window(2, "22-5") and not job.in_window(12, "22-5")
+
+
+def test_graph_reuses_or_personalises_the_warm_answer(monkeypatch):
+    store = InMemoryRecommendationStore()
+    warm = {"title": "Top Recommendations for food in Pune, India", "items": [{"name": "Vaishali", "rating": 4.5}]}
+    monkeypatch.setattr(warm_module, "recommendation_store", store)
+    prompts = []
+
+    class FakeLLM:
+        async def ainvoke(self, prompt):
+            prompts.append(prompt)
+            return json.dumps({"title": "Personalised", "items": [{"name": "Shabree"}]})
+
+    monkeypatch.setattr(generate_module, "llm", FakeLLM())
+
+    async def ask(query="Best food in Pune?", **context):
+        state = {
+            "session_id": uuid.uuid4(), "user_query": query, "intent": "recommendation",
+            "sub_intent": "food", "intent_object": RECOMMENDATION, "user_location": "pune, india", **context,
+        }
+        state.update(await warm_module.warm_recommendations_node(state))
+        state.update(await prompt_node(state))
+        return (await generate_module.generate_response_node(state))["response"]
+
+    async def flow():
+        cold = await ask()
+        await store.set("recommendation", "food", "Pune, India", new_entry(warm))
+        reused = await ask()
+        personalised = await ask(user_preferences="diet: vegetarian", chat_memory=[AIMessage(content="hi")])
+        constrained = await ask("Vegan food in Pune under ₹500, open now")
+        live = await ask(realtime_info="Heavy rain in Pune until 6 pm")
+        return cold, reused, personalised, constrained, live
+
+    cold, reused, personalised, constrained, live = asyncio.run(flow())
+    assert cold["title"] == "Personalised"
+    assert reused == warm
+    assert personalised["title"] == constrained["title"] == live["title"] == "Personalised"
+    assert len(prompts) == 4
+    assert "Vegan food in Pune under ₹500, open now" in prompts[2][-1].content
+    assert "Popular Picks: Top Recommendations for food in Pune, India; items: Vaishali (4.5)" in prompts[1][1].content
@@ -0,0 +1,111 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.langgraph.nodes.memory import langchain_memory, summarize_history_node
+from app.langgraph.nodes.memory.langchain_memory import Memory
+from app.langgraph.nodes.memory.session_cache import InMemorySessionCache, RedisSessionCache
+from app.schemas.state import flow_config
+from app.utils.ttl_cache import TTLCache
+
+
+class RowsResult(list):
+    def all(self):
+        return list(self)
+
+    def scalar_one(self):
+        return len(self)
+
+
+class CountingDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, *args, **kwargs):
+        self.queries += 1
+        return RowsResult(self.rows)
+
+
+def newest_first(turns):
+    return [(sender, text, None) for sender, text in reversed(turns)]
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expired():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, timer=lambda: now[0])
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache and cache.get("a") == 1
+
+    now[0] = 11
+    assert cache.get("a") is None and len(cache) == 1
+
+
+def test_warm_session_memory_skips_the_database(monkeypatch):
+    cache = InMemorySessionCache(max_turns=4)
+    monkeypatch.setattr(langchain_memory, "session_cache", cache)
+    session_id = uuid.uuid4()
+    db = CountingDB(newest_first([("user", "hi"), ("ai", "hello")]))
+
+    async def run():
+        first = await Memory(session_id, db).get_memory()
+        await cache.append_turns(session_id, [("user", "food in Goa?"), ("ai", "Try Thalassa")])
+        return first, await Memory(session_id, db).get_memory()
+
+    first, second = asyncio.run(run())
+    assert db.queries == 1
+    assert [m.content for m in first.chat_memory.messages] == ["hi", "hello"]
+    assert [m.content for m in second.chat_memory.messages] == ["hi", "hello", "food in Goa?", "Try Thalassa"]
+
+
+def test_append_only_updates_cached_sessions():
+    cache = InMemorySessionCache(max_turns=2)
+    cold, warm = uuid.uuid4(), uuid.uuid4()
+
+    async def run():
+        await cache.append_turns(cold, [("user", "a")])
+        await cache.set_turns(warm, [("user", "a")], message_count=1)
+        await cache.append_turns(warm, [("ai", "b"), ("user", "c")])
+        return await cache.get_turns(cold), await cache.get_turns(warm), await cache.get_message_count(warm)
+
+    assert asyncio.run(run()) == (None, [("ai", "b"), ("user", "c")], 3)
+
+
+def test_summary_is_reused_until_enough_new_messages(monkeypatch):
+    cache = InMemorySessionCache()
+    monkeypatch.setattr(summarize_history_node, "session_cache", cache)
+    session_id = uuid.uuid4()
+    db = CountingDB([])
+
+    async def run():
+        await cache.set_message_count(session_id, 20)
+        await cache.set_summary(session_id, 18, "- likes street food")
+        return await summarize_history_node.summarize_history_node({"session_id": session_id}, flow_config(db))
+
+    update = asyncio.run(run())
+    assert db.queries == 0
+    assert update == {"chat_history_summary": "- likes street food"}
+
+
+def test_redis_backend_round_trip():
+    fakeredis = pytest.importorskip("fakeredis")
+    cache = RedisSessionCache(client=fakeredis.FakeAsyncRedis(decode_responses=True), ttl=60, max_turns=3)
+    session_id = uuid.uuid4()
+
+    async def run():
+        assert await cache.get_turns(session_id) is None
+        await cache.set_turns(session_id, [("user", "a"), ("ai", "b")], message_count=2)
+        await cache.append_turns(session_id, [("user", "c"), ("ai", "d")])
+        await cache.set_summary(session_id, 4, "summary")
+        result = (await cache.get_turns(session_id), await cache.get_message_count(session_id), await cache.get_summary(session_id))
+        await cache.invalidate(session_id)
+        return result, await cache.get_turns(session_id)
+
+    (turns, count, summary), after = asyncio.run(run())
+    assert turns == [("ai", "b"), ("user", "c"), ("ai", "d")]
+    assert count == 4 and summary == (4, "summary")
+    assert after is None
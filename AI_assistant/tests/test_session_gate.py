@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from app.utils.metrics import metrics
+from app.utils.session_gate import SessionGate, Superseded, commit_point
+
+SESSION = "4c1f3b1e-0000-0000-0000-000000000001"
+
+
+def test_double_send_is_coalesced_into_one_run():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"title": "Vaishali"}
+
+    async def run():
+        gate = SessionGate()
+        results = await asyncio.gather(*(gate.run(SESSION, ("Veg food?", None), work) for _ in range(3)))
+        return results, gate.in_flight(SESSION)
+
+    before = metrics.counter("ask.coalesced")
+    results, in_flight = asyncio.run(run())
+    assert results == [{"title": "Vaishali"}] * 3 and len(calls) == 1 and in_flight == 0
+    assert metrics.counter("ask.coalesced") == before + 2
+
+
+def test_newer_query_cancels_the_stale_generation():
+    events = []
+
+    def work(name, delay):
+        async def generate():
+            events.append(f"start {name}")
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                events.append(f"cancelled {name}")
+                raise
+            return name
+        return generate
+
+    async def run():
+        gate = SessionGate(policy="supersede")
+        first = asyncio.create_task(gate.run(SESSION, "a", work("a", 5)))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(gate.run(SESSION, "b", work("b", 5)))
+        await asyncio.sleep(0.01)
+        latest = await gate.run(SESSION, "c", work("c", 0.01))
+        return await asyncio.gather(first, second, return_exceptions=True), latest
+
+    before = metrics.counter("ask.superseded")
+    (first, second), latest = asyncio.run(run())
+    assert isinstance(first, Superseded) and isinstance(second, Superseded) and latest == "c"
+    assert events == ["start a", "cancelled a", "start b", "cancelled b", "start c"]
+    assert metrics.counter("ask.superseded") == before + 2
+
+
+def test_queued_query_is_dropped_when_a_newer_one_arrives():
+    started = []
+
+    def work(name):
+        async def generate():
+            started.append(name)
+            commit_point()
+            await asyncio.sleep(0.05)
+            return name
+        return generate
+
+    async def run():
+        gate = SessionGate(policy="supersede")
+        first = asyncio.create_task(gate.run(SESSION, "a", work("a")))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(gate.run(SESSION, "b", work("b")))
+        await asyncio.sleep(0.01)
+        latest = await gate.run(SESSION, "c", work("c"))
+        return await asyncio.gather(first, queued, return_exceptions=True), latest
+
+    (first, queued), latest = asyncio.run(run())
+    assert first == "a" and isinstance(queued, Superseded) and latest == "c"
+    assert started == ["a", "c"]
+
+
+@pytest.mark.parametrize("policy", ["queue", "supersede"])
+def test_runs_are_serialized_and_committed_runs_are_never_cancelled(policy):
+    running, overlaps = [], []
+
+    def work(name, commits):
+        async def generate():
+            overlaps.append(len(running))
+            running.append(name)
+            if commits:
+                commit_point()
+            await asyncio.sleep(0.05)
+            running.remove(name)
+            return name
+        return generate
+
+    async def run():
+        gate = SessionGate(policy=policy)
+        first = asyncio.create_task(gate.run(SESSION, "a", work("a", commits=True)))
+        await asyncio.sleep(0.01)
+        return await asyncio.gather(first, gate.run(SESSION, "b", work("b", commits=False)))
+
+    assert asyncio.run(run()) == ["a", "b"]
+    assert overlaps == [0, 0]
+
+
+def test_disconnect_after_commit_point_still_saves_the_whole_turn():
+    saved = []
+
+    def work(name, commits):
+        async def generate():
+            if commits:
+                commit_point()
+            for row in ("user", "ai"):
+                await asyncio.sleep(0.02)
+                saved.append(f"{name} {row}")
+            return name
+        return generate
+
+    async def run():
+        gate = SessionGate()
+        committed = asyncio.create_task(gate.run(SESSION, "a", work("a", commits=True)))
+        uncommitted = asyncio.create_task(gate.run("other", "b", work("b", commits=False)))
+        await asyncio.sleep(0.03)
+        committed.cancel()
+        uncommitted.cancel()
+        results = await asyncio.gather(committed, uncommitted, return_exceptions=True)
+        return results, saved[:], await gate.run(SESSION, "c", work("c", commits=True))
+
+    (committed, uncommitted), at_cancel, latest = asyncio.run(run())
+    assert isinstance(committed, asyncio.CancelledError) and isinstance(uncommitted, asyncio.CancelledError)
+    assert at_cancel == ["a user", "b user", "a ai"] and latest == "c"
+    assert saved == ["a user", "b user", "a ai", "c user", "c ai"]
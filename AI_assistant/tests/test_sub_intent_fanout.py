@@ -0,0 +1,120 @@
+import asyncio
+import json
+import time
+import uuid
+
+from sqlalchemy import select
+
+from app.langgraph.flows.recommendation_graph import build_recommendation_graph
+from app.langgraph.nodes import generate_response_node as generate_module
+from app.langgraph.nodes import warm_recommendations_node as warm_module
+from app.langgraph.nodes.realtime import realtime_info_node as realtime_module
+from app.langgraph.nodes.sub_intent_fanout_node import generate_sub_intent_node, merge_responses
+from app.models.message import Message
+from app.schemas.state import flow_config
+from app.utils.load_intent_object import load_intent_object
+from app.utils.recommendation_store import InMemoryRecommendationStore, new_entry
+
+RECOMMENDATION = load_intent_object("recommendation", "data/intents_knowledge_base.json")
+CALL_DELAY_S = 0.2
+
+
+class FakeLLM:
+    """Every call takes CALL_DELAY_S and answers three items for the sub-intent it was asked about."""
+
+    def __init__(self, fail=()):
+        self.queries = []
+        self.fail = fail
+
+    async def ainvoke(self, prompt):
+        query = prompt[-1].content
+        self.queries.append(query)
+        await asyncio.sleep(CALL_DELAY_S)
+        sub_intent = query.split("Answer only the ")[1].split(" part")[0] if "Answer only" in query else "single"
+        if sub_intent in self.fail:
+            raise ConnectionError("backend down")
+        return json.dumps({
+            "title": f"Top {sub_intent}", "summary": f"Best {sub_intent}",
+            "items": [{"name": f"{sub_intent} {n}", "rating": 4.0 + n / 10} for n in range(3)],
+            "follow_up": f"More {sub_intent}?",
+        })
+
+
+class CountingFetcher:
+    def __init__(self):
+        self.sub_intents = []
+
+    async def fetch(self, location, sub_intent):
+        self.sub_intents.append(sub_intent)
+        return ""
+
+
+def _ask(seeded_db, sub_intents, name):
+    async def run(database):
+        async with database.session() as db:
+            state = {
+                "session_id": database.session_ids[0], "user_query": "Food and things to do in Goa",
+                "intent": "recommendation", "sub_intent": sub_intents[0], "sub_intents": sub_intents,
+                "intent_object": RECOMMENDATION, "user_location": "Goa, India",
+            }
+            started = time.perf_counter()
+            final = await build_recommendation_graph().ainvoke(state, config=flow_config(db))
+            elapsed = time.perf_counter() - started
+            saved = (await db.execute(select(Message.payload).where(Message.sender == "ai"))).scalars().all()
+        return final["response"], elapsed, saved
+
+    return seeded_db(run, messages=2, seed_value=9, name=name)
+
+
+def test_sub_intents_are_answered_in_parallel_and_merged(seeded_db, monkeypatch):
+    fake, fetcher = FakeLLM(), CountingFetcher()
+    monkeypatch.setattr(generate_module, "llm", fake)
+    monkeypatch.setattr(realtime_module, "realtime_fetcher", fetcher)
+    response, elapsed, saved = _ask(seeded_db, ["food", "activities", "local gems"], "fanout.db")
+
+    assert len(fake.queries) == 3 and all("at most 2 items" in q for q in fake.queries)
+    assert sorted(fetcher.sub_intents) == ["activities", "food", "local gems"]  # once per part, no shared fetch
+    assert elapsed < 2 * CALL_DELAY_S  # one call's latency, not three
+    assert response["title"] == "Top Recommendations for food, activities and local gems in Goa, India"
+    assert [(i["name"], i["sub_intent"]) for i in response["items"]] == [
+        ("food 0", "food"), ("food 1", "food"), ("activities 0", "activities"),
+        ("activities 1", "activities"), ("local gems 0", "local gems"), ("local gems 1", "local gems"),
+    ]
+    assert response["summary"] == "Best food Best activities Best local gems"
+    assert response["follow_up"] == "More food? More activities? More local gems?"
+    assert response in saved
+
+
+def test_failed_part_is_left_out_and_one_sub_intent_is_not_split(seeded_db, monkeypatch):
+    fake = FakeLLM(fail=("activities",))
+    monkeypatch.setattr(generate_module, "llm", fake)
+    response, _, _ = _ask(seeded_db, ["food", "activities"], "fanout.db")
+    single, _, _ = _ask(seeded_db, ["food"], "single.db")
+
+    assert {i["sub_intent"] for i in response["items"]} == {"food"}
+    assert response["summary"] == "Best food"
+    assert response["title"] == "Top Recommendations for food in Goa, India"
+    assert single["title"] == "Top single" and len(single["items"]) == 3
+    assert "Answer only" not in fake.queries[-1]
+    empty = merge_responses([], RECOMMENDATION["output_format"], ["food"], "Goa")
+    assert empty["items"] == [] and empty["follow_up"] == RECOMMENDATION["output_format"]["follow_up"]
+
+
+def test_part_instruction_does_not_block_a_warm_answer(monkeypatch):
+    fake, store = FakeLLM(), InMemoryRecommendationStore()
+    warm = {"title": "Top Recommendations for food in Goa, India", "items": [{"name": "Fisherman's Wharf", "rating": 4.5}]}
+    monkeypatch.setattr(generate_module, "llm", fake)
+    monkeypatch.setattr(warm_module, "recommendation_store", store)
+
+    async def run():
+        await store.set("recommendation", "food", "Goa, India", new_entry(warm))
+        state = {
+            "session_id": uuid.uuid4(), "user_query": "Food and things to do in Goa", "intent": "recommendation",
+            "sub_intents": ["food", "activities"], "intent_object": RECOMMENDATION, "user_location": "Goa, India",
+        }
+        return [await generate_sub_intent_node({**state, "sub_intent": s}) for s in state["sub_intents"]]
+
+    food, activities = asyncio.run(run())
+    assert food["response_parts"][0]["response"] == warm  # the other sub-intent named in the query is no constraint
+    assert activities["response_parts"][0]["response"]["title"] == "Top activities"
+    assert len(fake.queries) == 1 and fake.queries[0].count("Food and things to do in Goa\n(Answer only the activities part") == 1
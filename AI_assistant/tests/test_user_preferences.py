@@ -0,0 +1,63 @@
+import asyncio
+import uuid
+
+from sqlalchemy import delete, event, select
+
+from app.crud.user_preference import get_user_preferences, upsert_user_preferences
+from app.langgraph.nodes.user_preferences_node import UserPreferencesCache
+from app.models.user_preference import UserPreference
+from app.utils.compact_preferences import compact_preferences
+
+
+def test_compact_preferences_flattens_and_bounds_the_prompt_line():
+    prefs = {"diet": "vegetarian", "interests": ["history", "street food"], "accessible": True, "pets": False, "notes": ""}
+    assert compact_preferences(prefs) == "diet: vegetarian; interests: history, street food; accessible"
+    assert compact_preferences({"budget": {"max": 800}}) == "budget.max: 800"
+    assert compact_preferences(prefs, max_chars=20) == "diet: vegetarian"
+    assert compact_preferences(None) == ""
+
+
+def test_preferences_are_cached_until_the_user_changes_them(seeded_db):
+    async def run(database):
+        queries = []
+        event.listen(database.engine.sync_engine, "before_cursor_execute", lambda *args: queries.append(args[2]))
+        cache = UserPreferencesCache()
+        session_id, user_id = database.session_ids[0], database.user_ids[0]
+        async with database.session() as db:
+            cold = await cache.get(db, session_id)
+            cold_queries = len(queries)
+            warm = await cache.get(db, session_id)
+            warm_queries = len(queries) - cold_queries
+
+            await upsert_user_preferences(db, user_id, {"diet": "vegan"})
+            cache.invalidate_user(user_id)
+            updated = await cache.get(db, session_id)
+            stored = await get_user_preferences(db, user_id)
+        return cold, cold_queries, warm, warm_queries, updated, stored
+
+    cold, cold_queries, warm, warm_queries, updated, stored = seeded_db(run, seed_value=3)
+    assert cold.startswith("diet: ") and warm == cold
+    assert cold_queries == 1 and warm_queries == 0
+    assert updated == "diet: vegan" and stored.preferences == {"diet": "vegan"}
+
+
+def test_upsert_is_one_statement_and_skips_missing_users(seeded_db):
+    async def run(database):
+        user_id = database.user_ids[0]
+        async with database.session() as db:
+            missing = await upsert_user_preferences(db, uuid.uuid4(), {"diet": "vegan"})
+            # concurrent PUTs for a user without a row yet: one inserts, the rest update
+            await db.execute(delete(UserPreference).where(UserPreference.user_id == user_id))
+            await db.commit()
+        async def put(n):
+            async with database.session() as db:
+                return await upsert_user_preferences(db, user_id, {"budget": n})
+        saved = await asyncio.gather(*(put(n) for n in range(5)))
+        async with database.session() as db:
+            rows = (await db.execute(select(UserPreference).where(UserPreference.user_id == user_id))).scalars().all()
+        return missing, saved, rows
+
+    missing, saved, rows = seeded_db(run, seed_value=3)
+    assert missing is None
+    assert len(rows) == 1 and rows[0].preferences in [{"budget": n} for n in range(5)]
+    assert all(s.user_id == rows[0].user_id for s in saved)